@@ -55,6 +55,7 @@ For example: "gdm issue cambrionix-1234 - reboot -- --help"
 Refer to https://github.com/google/gazoo-device for full documentation.
 """
 import gc
+import importlib
 import logging
 import multiprocessing
 import os
@@ -62,17 +63,30 @@ import signal
 import sys
 
 from gazoo_device import _version
-from gazoo_device import gazoo_device_controllers
+from gazoo_device import extensions
 from gazoo_device import gdm_logger
-from gazoo_device import manager
-from gazoo_device import package_registrar
 from gazoo_device.utility import common_utils
 
-Manager = manager.Manager
-register = package_registrar.register
 version = _version.version
 __version__ = _version.version
 
+# Attributes which are only imported when first accessed to keep
+# "import gazoo_device" fast. Attribute name -> (module name, attribute name).
+_LAZY_ATTRIBUTES = {
+    "Manager": ("gazoo_device.manager", "Manager"),
+    "register": ("gazoo_device.package_registrar", "register"),
+}
+
+
+def __getattr__(name):
+  """Imports lazily loaded attributes on first access."""
+  if name not in _LAZY_ATTRIBUTES:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  module_name, attribute_name = _LAZY_ATTRIBUTES[name]
+  value = getattr(importlib.import_module(module_name), attribute_name)
+  globals()[name] = value
+  return value
+
 # Defend against inadvertent basicConfig, which adds log noise
 logging.getLogger().addHandler(logging.NullHandler())
 
@@ -94,6 +108,10 @@ if sys.platform == "darwin" and sys.version_info >= (3, 8):
 gdm_logger.initialize_logger()
 
 
+# Same as the default generation 0 threshold of the garbage collector.
+_GC_SKIP_ALLOCATION_THRESHOLD = 700
+
+
 def _after_fork():
   """Re-enables garbage collection in both parent & child process."""
   gc.enable()
@@ -110,7 +128,12 @@ def _before_fork():
   acquired stdout buffer lock.
   """
   gc.disable()
-  gc.collect()
+  # A full collection takes tens of milliseconds. Skip it if there were few
+  # allocations since the previous one, such as when a switchboard forks all of
+  # its processes in a row.
+  gen0_count, gen1_count, gen2_count = gc.get_count()
+  if gen1_count or gen2_count or gen0_count >= _GC_SKIP_ALLOCATION_THRESHOLD:
+    gc.collect()
   gdm_logger.flush_queue_messages()
 
 
@@ -122,5 +145,5 @@ common_utils.register_at_fork(before=_before_fork,
                               after_in_parent=_after_fork,
                               after_in_child=_after_fork)
 
-# Register device classes and capabilities built into GDM
-package_registrar.register(gazoo_device_controllers)
+# Device classes and capabilities built into GDM are imported and registered
+# when extensions are first accessed (see extensions.load()).
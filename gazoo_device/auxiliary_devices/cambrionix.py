@@ -87,6 +87,7 @@ Typical commands::
 import fcntl
 import os
 import select
+import threading
 import time
 import typing
 
@@ -125,10 +126,16 @@ TIMEOUTS = {
     # seconds and is likely the longest running command)
     "PING": 3,
     "REBOOT": 3,
-    "REBOOT_WATCHDOG": 15
+    "REBOOT_WATCHDOG": 15,
+    # Closes the control serial port when unused so other processes can use it.
+    "SESSION_IDLE": 1
 }
 
 _REBOOT_METHODS = ["watchdog", "shell"]
+_LINE_ENDING = "\r\n"
+_PROMPT = "\n>> "
+# Output after the CTRL-C prompt is discarded until the hub is quiet this long.
+_QUIET_TIMEOUT = 0.1
 
 
 class Cambrionix(auxiliary_device.AuxiliaryDevice):
@@ -196,7 +203,12 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
     self._commands.update(COMMANDS)
     self._regexes.update(REGEXES)
     self._timeouts.update(TIMEOUTS)
-    self._serial_port = None
+    # The same instance is initialized again for every user of the hub (see
+    # __new__). Keep the control session they share.
+    if not hasattr(self, "_session_lock"):
+      self._session_lock = threading.RLock()
+      self._idle_timer = None
+      self._serial_port = None
 
   def __del__(self):
     self.close()
@@ -234,8 +246,7 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
   @decorators.LogDecorator(logger, level=decorators.DEBUG)
   def close(self):
     """Closes the serial port connection."""
-    if self._serial_port is not None and self._serial_port.is_open:
-      self._serial_port.close()
+    self._close_session()
 
     super(Cambrionix, self).close()
 
@@ -447,14 +458,15 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
         regex_dict=self.regexes,
         device_name=self.name,
         serial_number=self.serial_number,
-        total_ports=self.total_ports)
+        total_ports=self.total_ports,
+        shell_batch_fn=self._shell_batch)
 
   @decorators.PersistentProperty
   def valid_modes(self):
     return ["off", "sync", "charge"]
 
   def _command(self, command, close_delay=0.0):
-    """Opens the control serial port and sends a command.
+    """Sends a command over the control session.
 
     Args:
       command (str): Command to send to device
@@ -475,26 +487,59 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
       closing the control serial port to prevent other GDM instances from
       accessing the control serial port.
     """
-    self._open()
-    try:
-      self.__write_command(self._serial_port, command)
-      if command.startswith("reboot"):
-        return
-
-      response = self.__get_response(self._serial_port)
-      if response[0].startswith("*E"):
+    if command.startswith("reboot"):
+      with self._session_lock:
+        try:
+          self._open()
+          self.__write_commands(self._serial_port, [command])
+        finally:
+          if close_delay > 0.0:
+            time.sleep(close_delay)
+          self._close_session()
+      return
+    return self._command_batch([command])[0]
+
+  def _command_batch(self, commands):
+    """Sends several commands in one write and collects all their responses.
+
+    The control serial port stays open between calls and is closed when
+    unused for TIMEOUTS["SESSION_IDLE"] seconds, so that other processes can
+    use the hub.
+
+    Args:
+      commands (list): Commands to send to device. Can't include reboots.
+
+    Returns:
+      list: Response lines of each command (without the echo and the trailing
+      >> prompt).
+
+    Raises:
+      DeviceError: Error in response to a command.
+    """
+    with self._session_lock:
+      self._cancel_idle_timer()
+      try:
+        self._open()
+        self.__write_commands(self._serial_port, commands)
+        responses = self.__get_responses(self._serial_port, commands)
+      except Exception:
+        self._close_session()  # The prompt state is unknown.
+        raise
+      self._start_idle_timer()
+
+    for command, response in zip(commands, responses):
+      if response and response[0].startswith("*E"):
         raise errors.DeviceError("Device {} command failed. "
                                  "Unable to write command: {} "
                                  "to serial port: {}  Err: {!r}".format(
                                      self.name, command, self._serial_port,
                                      response[0]))
-    finally:
-      if close_delay > 0.0:
-        time.sleep(close_delay)
-      self.close()
+    return responses
 
-    # Discard the last line which is the prompt
-    return response[:-1]
+  def _shell_batch(self, commands):
+    """Sends several commands and returns their responses as strings."""
+    return [self._list_to_str(response)
+            for response in self._command_batch(commands)]
 
   def _get_system_status(self):
     """Gets hardware and firmware information.
@@ -536,6 +581,9 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
     return lst
 
   def _open(self):
+    """Opens the control session unless it's open already."""
+    if self._serial_port is not None and self._serial_port.is_open:
+      return
     start_time = time.time()
     error = ""
     while time.time() - start_time < self.timeouts["OPEN"]:
@@ -554,64 +602,99 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
           file_descriptor = self._serial_port.fd
           flags = fcntl.fcntl(file_descriptor, fcntl.F_GETFD)
           fcntl.fcntl(file_descriptor, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
-          return
-        if not self._serial_port.is_open:
+        elif not self._serial_port.is_open:
           self._serial_port.open()
-        return
+        break
       except Exception as err:
         error = err
-    raise errors.DeviceError("Device {} open failed. "
-                             "Unable to open control serial port in {} seconds"
-                             "Error: {}".format(self.name,
-                                                self.timeouts["OPEN"], error))
+    else:
+      raise errors.DeviceError(
+          "Device {} open failed. "
+          "Unable to open control serial port in {} seconds"
+          "Error: {}".format(self.name, self.timeouts["OPEN"], error))
+
+    # Clear any existing text by sending a CTRL-C
+    # command and waiting for a prompt
+    self._serial_port.write(("\x03" + _LINE_ENDING).encode("utf-8"))
+    Cambrionix.__read_prompts(self._serial_port, 1)
+    # The line ending produces another prompt. Discard it and any other
+    # pending output so it isn't taken for the response to the next command.
+    Cambrionix.__read_until_quiet(self._serial_port)
+    self._serial_port.reset_input_buffer()
+
+  def _close_session(self):
+    """Closes the control serial port."""
+    with self._session_lock:
+      self._cancel_idle_timer()
+      if self._serial_port is not None and self._serial_port.is_open:
+        self._serial_port.close()
+
+  def _cancel_idle_timer(self):
+    if self._idle_timer is not None:
+      self._idle_timer.cancel()
+      self._idle_timer = None
+
+  def _start_idle_timer(self):
+    self._idle_timer = threading.Timer(self.timeouts["SESSION_IDLE"],
+                                       self._close_session)
+    self._idle_timer.daemon = True
+    self._idle_timer.start()
 
   @staticmethod
-  def __write_command(serial_port, command):
-    """Internal helper for writing to the hub.
+  def __write_commands(serial_port, commands):
+    """Internal helper for writing commands to the hub in one go.
 
     Args:
       serial_port (str): Cambrionix serial port.
-      command (str): command to send to device.
-
-    Raises:
-      DeviceError: no response from device.
+      commands (list): commands to send to device.
     """
-    line_ending = "\r\n"
-    ctrl_c_cmd = "\x03" + line_ending
+    data = "".join(
+        command if command.endswith(_LINE_ENDING) else command + _LINE_ENDING
+        for command in commands)
+    serial_port.write(data.encode("utf-8"))
 
-    # Clear any existing text by sending a CTRL-C
-    # command and waiting for a prompt
-    serial_port.write(ctrl_c_cmd.encode("utf-8"))
-    Cambrionix.__get_response(serial_port)
+  @staticmethod
+  def __get_responses(serial_port, commands):
+    """Internal helper returning the response to each command as lines.
 
-    if not command.endswith(line_ending):
-      command += line_ending
+    Args:
+      serial_port (str): Cambrionix serial port.
+      commands (list): commands whose responses to read.
 
-    for char in command:
-      serial_port.write(char.encode("utf-8"))
-      if command.startswith("reboot") and char == "\r":
-        break
+    Returns:
+      list: response lines to each command, without the command echo.
+    """
+    read_data = Cambrionix.__read_prompts(serial_port, len(commands))
+    responses = []
+    for command, response in zip(commands, read_data.split(_PROMPT)):
+      lines = response.splitlines()
+      # The hub echoes commands back.
+      while lines and lines[0].strip() in ("", command.strip()):
+        lines.pop(0)
+      responses.append(lines)
+    return responses
+
+  @staticmethod
+  def __read_until_quiet(serial_port):
+    """Internal helper reading from the hub until no more data arrives.
 
-      while True:
-        ready = select.select([serial_port], [], [], 25)[0]
-        if ready:
-          if serial_port.read(1).decode("utf-8") == char:
-            break
-        else:
-          raise errors.DeviceError("Device cambrionix write command failed. "
-                                   "Read timeout on serial port: {} "
-                                   "while writing command: {}".format(
-                                       serial_port, command))
+    Args:
+      serial_port (str): Cambrionix serial port.
+    """
+    while select.select([serial_port], [], [], _QUIET_TIMEOUT)[0]:
+      if not serial_port.read(serial_port.inWaiting()):
+        break
 
   @staticmethod
-  def __get_response(serial_port):
-    """Internal helper returning the response from the hub as a list of lines.
+  def __read_prompts(serial_port, prompt_count):
+    """Internal helper reading from the hub until prompt_count prompts.
 
     Args:
       serial_port (str): Cambrionix serial port.
+      prompt_count (int): number of prompts to read.
 
     Returns:
-      str: response.
+      str: data read, up to and including the last prompt.
 
     Raises:
       DeviceError: Device not responding.
@@ -620,7 +703,7 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
       The command prompt is always this string: ">> ".
     """
     read_data = ""
-    while not read_data.endswith("\n>> "):
+    while read_data.count(_PROMPT) < prompt_count:
       ready = select.select([serial_port], [], [], 25)[0]
       if ready:
         read_data += serial_port.read(serial_port.inWaiting()).decode(
@@ -630,7 +713,7 @@ class Cambrionix(auxiliary_device.AuxiliaryDevice):
             "Device cambrionix get response failed. "
             "Read timeout on serial port: {}".format(serial_port))
 
-    return read_data.splitlines()
+    return read_data
 
 
 deprecation_utils.add_deprecated_attributes(
@@ -82,6 +82,9 @@ REGEXES = {
 
 TIMEOUTS = {"SHELL": 10, "SHUTDOWN": 60, "ONLINE": 120}
 
+# Seconds to cache switch properties for. Reboots invalidate cached values.
+_PROPERTY_TTL = 300
+
 
 class UnifiPoeSwitch(auxiliary_device.AuxiliaryDevice):
   """Device class for a Ubiquiti UniFi PoE Switch."""
@@ -114,7 +117,7 @@ class UnifiPoeSwitch(auxiliary_device.AuxiliaryDevice):
     """IP address."""
     return self.communication_address
 
-  @decorators.DynamicProperty
+  @decorators.DynamicProperty.cached(ttl=_PROPERTY_TTL)
   def firmware_version(self):
     """Version of UniFi PoE Switch.
 
@@ -133,7 +136,7 @@ class UnifiPoeSwitch(auxiliary_device.AuxiliaryDevice):
         self.check_telnet_connect
     ]
 
-  @decorators.DynamicProperty
+  @decorators.DynamicProperty.cached(ttl=_PROPERTY_TTL)
   def total_ports(self):
     """Gets the number of ports for the attached unifi_switch.
 
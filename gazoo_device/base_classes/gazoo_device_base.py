@@ -31,9 +31,11 @@ from gazoo_device import gdm_logger
 from gazoo_device.base_classes import primary_device_base
 from gazoo_device.capabilities import event_parser_default
 from gazoo_device.capabilities.interfaces import capability_base
+from gazoo_device.switchboard import log_index
 from gazoo_device.switchboard import log_process
 from gazoo_device.switchboard import switchboard
 from gazoo_device.utility import deprecation_utils
+from gazoo_device.utility import property_cache
 
 logger = gdm_logger.get_logger()
 
@@ -346,6 +348,17 @@ class GazooDeviceBase(primary_device_base.PrimaryDeviceBase):
     names = self.get_dynamic_property_names()
     return self._get_properties(names)
 
+  def get_log_lines(self, start_time, end_time=None, max_workers=1):
+    """Returns lines of the current device log logged in the time range.
+
+    See log_index.get_lines() for the arguments.
+
+    Returns:
+        list: log lines.
+    """
+    return log_index.get_lines(self._log_file_name, start_time, end_time,
+                               max_workers=max_workers)
+
   def get_persistent_properties(self):
     """Returns a dictionary of prop, value for each persistent property."""
     names = self.get_persistent_property_names()
@@ -760,8 +773,12 @@ class GazooDeviceBase(primary_device_base.PrimaryDeviceBase):
     """Resets all capabilities which have been initialized by deleting them.
 
     Capabilities will be re-initialized on next use (when they're accessed).
+    The switchboard is reset last, so that other capabilities can still use
+    it when they're closed.
     """
-    for capability_name in self.get_supported_capabilities():
+    capability_names = sorted(self.get_supported_capabilities(),
+                              key=lambda name: name == "switchboard")
+    for capability_name in capability_names:
       self.reset_capability(capability_name)
 
   @decorators.LogDecorator(logger, decorators.DEBUG)
@@ -782,6 +799,17 @@ class GazooDeviceBase(primary_device_base.PrimaryDeviceBase):
       getattr(self, capability_name).close()
       delattr(self, capability_name)
 
+  def search_log(self, pattern, since=None, max_workers=1):
+    """Returns lines of the current device log which match the regex.
+
+    See log_index.search() for the arguments.
+
+    Returns:
+        list: matching log lines.
+    """
+    return log_index.search(self._log_file_name, pattern, since=since,
+                            max_workers=max_workers)
+
   def shell_with_regex(self,
                        command,
                        regex,
@@ -930,9 +958,15 @@ class GazooDeviceBase(primary_device_base.PrimaryDeviceBase):
 
   def _get_properties(self, property_names):
     """Returns a dictionary of prop, value for each property."""
+    # Retrieve shell-backed properties in a single shell command if possible.
+    batched_values = property_cache.evaluate_shell_properties(
+        self, property_names)
     property_dict = {}
     for name in property_names:
-      value = self.get_property(name)
+      if name in batched_values:
+        value = batched_values[name]
+      else:
+        value = self.get_property(name)
       if isinstance(value, str) and "does not have a known property" in value:
         continue  # property not supported in current flavor
       property_dict[name] = value
@@ -75,6 +75,9 @@ REGEXES = {
 
 TIMEOUTS = {"GDM_HELLO": 5, "SHELL": 10, "SHUTDOWN": 60, "ONLINE": 120}
 
+# Seconds to cache version properties for. Reboots invalidate cached values.
+_VERSION_PROPERTY_TTL = 300
+
 
 class RaspbianDevice(auxiliary_device.AuxiliaryDevice):
   """Base Class for Raspbian Devices."""
@@ -116,7 +119,9 @@ class RaspbianDevice(auxiliary_device.AuxiliaryDevice):
           timeout=timeout,
           details=str(err))
 
-  @decorators.DynamicProperty
+  @decorators.DynamicProperty.cached(
+      ttl=_VERSION_PROPERTY_TTL,
+      shell_query=("KERNEL_VERSION", "KERNEL_VERSION_REGEX"))
   def kernel_version(self):
     """Version of Raspbian kernel.
 
@@ -128,7 +133,9 @@ class RaspbianDevice(auxiliary_device.AuxiliaryDevice):
         self.regexes["KERNEL_VERSION_REGEX"],
         raise_error=True)
 
-  @decorators.DynamicProperty
+  @decorators.DynamicProperty.cached(
+      ttl=_VERSION_PROPERTY_TTL,
+      shell_query=("FIRMWARE_VERSION", "FIRMWARE_VERSION_REGEX"))
   def firmware_version(self):
     """Version of Raspbian.
 
@@ -210,12 +217,28 @@ class RaspbianDevice(auxiliary_device.AuxiliaryDevice):
               dictionary of optional attributes (set to None).
     """
     self.props = self.props.copy()
-    for cmd_name, command in self.commands.items():
-      if not cmd_name.endswith("INFO"):
-        continue
+    info_cmd_names = [cmd_name for cmd_name in self.commands
+                      if cmd_name.endswith("INFO")]
+    info_commands = [self.commands[cmd_name] for cmd_name in info_cmd_names]
+    try:
+      results = self.shell_capability.shell_batch(
+          info_commands,
+          timeout=self.timeouts["SHELL"] * max(len(info_commands), 1))
+      responses = [response for response, _ in results]
+    except errors.DeviceError as err:
+      logger.debug("{} batched detection queries failed: {!r}".format(
+          self.name, err))
+      responses = [None] * len(info_commands)
+
+    for cmd_name, command, response in zip(info_cmd_names, info_commands,
+                                           responses):
       regex = self._regexes[cmd_name + "_REGEX"]
       cmd_name = cmd_name.lower()[:-5]  # remove _INFO
-      value = self.shell_with_regex(command, regex)
+      match = re.search(regex, response or "", re.MULTILINE | re.DOTALL)
+      if match:
+        value = match.group(1)
+      else:  # Retry the command individually.
+        value = self.shell_with_regex(command, regex)
       if re.search(self.regexes["COMMAND_UNSUPPORTED"], value):
         value = "Raspbian detection did not support '{}'".format(command)
       self.props["persistent_identifiers"][cmd_name] = value
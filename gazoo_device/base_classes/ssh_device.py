@@ -312,12 +312,22 @@ class SshDevice(gazoo_device_base.GazooDeviceBase):
 
   def _set_persistent_properties(self):
     """Obtains persistent properties from the device during detection."""
-    for key in [
-        cmd for cmd in list(self.commands) if cmd.startswith(INFO_PREFIX)
-    ]:
+    keys = [cmd for cmd in list(self.commands) if cmd.startswith(INFO_PREFIX)]
+    commands = [self.commands[key] for key in keys]
+    # Send all detection commands in a single round trip if possible.
+    try:
+      outputs = [
+          output for output, _ in self.shell_capability.shell_batch(
+              commands, timeout=self.timeouts["SHELL"] * max(len(keys), 1))
+      ]
+    except errors.DeviceError as err:
+      logger.info("{} batched detection commands failed: {!r}. "
+                  "Sending them one by one.".format(self.name, err))
+      outputs = [self.shell(command) for command in commands]
+    for key, output in zip(keys, outputs):
       prop = key.lower()[len(INFO_PREFIX):]  # Remove INFO_ from key.
       response = ""
-      resp_list = self.shell(self.commands[key]).split("=")
+      resp_list = output.split("=")
       if resp_list:
         response = resp_list[-1]
 
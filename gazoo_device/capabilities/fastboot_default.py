@@ -21,7 +21,6 @@ from gazoo_device import errors
 from gazoo_device import gdm_logger
 from gazoo_device.capabilities.interfaces import fastboot_base
 from gazoo_device.utility import adb_utils
-from gazoo_device.utility import common_utils
 
 logger = gdm_logger.get_logger()
 
@@ -104,29 +103,19 @@ class FastbootDefault(fastboot_base.FastbootBase):
   def _is_in_fastboot_mode(self, timeout: Optional[float] = None) -> bool:
     """Returns if device in fastboot mode.
 
-    Waits up to timeout time. We try to verify whether the device is in fastboot
-    mode in the {timeout} duration, with retry interval 0.5 sec. If timeout is
-    None (not provided), there will be no retry.
+    Waits up to timeout time for the device to enter fastboot mode. If timeout
+    is None (not provided), there will be no wait.
 
     Args:
       timeout: Maximum wait time in seconds. If timeout is None, we will not
-        retry.
+        wait.
 
     Returns:
       Whether device is in fastboot mode.
     """
-    # No retry when timeout is None. Setting timeout to 0.1 is equivalent to
-    # "no retry" since interval is 0.5 sec.
-    timeout = timeout or 0.1
-
-    try:
-      common_utils.retry(
-          adb_utils.is_fastboot_mode,
-          func_args=(self._fastboot_serial,),
-          is_successful=bool,
-          timeout=timeout,
-          interval=0.5)
+    if adb_utils.wait_for_state(self._fastboot_serial,
+                                (adb_utils.FASTBOOT_STATE,),
+                                timeout=timeout or 0):
       logger.info("{} is in fastboot mode.", self._device_name)
       return True
-    except errors.CommunicationTimeoutError:
-      return False
+    return False
@@ -90,6 +90,38 @@ class ShellBase(capability_base.CapabilityBase):
         return code.
     """
 
+  def shell_batch(self,
+                  commands,
+                  command_name="shell_batch",
+                  timeout=None,
+                  port=0):
+    """Sends several commands and returns the response and return code of each.
+
+    Flavors which can send all commands in a single round trip to the device
+    override this implementation, which sends the commands one by one.
+
+    Args:
+        commands (list): commands to send to the device.
+        command_name (str): Identifier for the commands.
+        timeout (float): Time in seconds to wait for device to respond to all
+          commands.
+        port (int): Which port to send on, 0 or 1.
+
+    Raises:
+        DeviceError: if communication fails.
+
+    Returns:
+        list: (response, return code) tuple for each command.
+    """
+    return [
+        self.shell(
+            command,
+            command_name=command_name,
+            timeout=timeout or self._timeout,
+            port=port,
+            include_return_code=True) for command in commands
+    ]
+
   @abc.abstractmethod
   def has_command(self, binary_name):
     """Returns if binary_name is installed on the device.
@@ -15,9 +15,22 @@
 """Switch power capability interface.
 
 This class defines the required API all flavors of the switch_power capability.
+
+Port modes are cached for PORT_MODE_TTL seconds after they are queried or set
+(see get_cached_mode()). The cache is also invalidated when the switch is
+rebooted, and can be invalidated explicitly with invalidate_port_modes() when
+port modes are changed outside of GDM.
 """
 import abc
+from gazoo_device import decorators
+from gazoo_device import gdm_logger
 from gazoo_device.capabilities.interfaces import capability_base
+from gazoo_device.utility import property_cache
+
+logger = gdm_logger.get_logger()
+
+PORT_MODE_TTL = 5
+_PORT_MODE_KEY_PREFIX = "port_mode_"
 
 
 class SwitchPowerBase(capability_base.CapabilityBase):
@@ -68,3 +81,54 @@ class SwitchPowerBase(capability_base.CapabilityBase):
     Raises:
         DeviceError: invalid port.
     """
+
+  def get_cached_mode(self, port):
+    """Gets the port mode, from the cache if it was queried or set recently.
+
+    Args:
+        port (int): Use this port to get the mode.
+
+    Returns:
+        str: auxiliary device port mode settings
+
+    Raises:
+        DeviceError: invalid port.
+    """
+    is_cached, mode = property_cache.get_value(self, _get_port_mode_key(port))
+    if is_cached:
+      return mode
+    return self._refresh_port_modes(port)
+
+  @decorators.CapabilityLogDecorator(logger, decorators.DEBUG)
+  def invalidate_port_modes(self):
+    """Discards cached port modes, e.g. after changing them outside of GDM."""
+    property_cache.discard_values(self, _PORT_MODE_KEY_PREFIX)
+
+  def _cache_port_mode(self, port, mode):
+    """Caches the port mode after it has been queried or set."""
+    property_cache.set_value(self, _get_port_mode_key(port), mode,
+                             PORT_MODE_TTL)
+
+  def _discard_port_mode(self, port):
+    """Discards the cached port mode before the mode is changed."""
+    property_cache.discard_value(self, _get_port_mode_key(port))
+
+  def _refresh_port_modes(self, port):
+    """Queries the port mode, caching it. Returns the mode of the port.
+
+    Flavors which can query the modes of all ports at once override this to
+    refresh the cached modes of all ports.
+
+    Args:
+        port (int): port to return the mode of.
+    """
+    return self.get_mode(port)
+
+
+def _get_port_mode_key(port):
+  """Returns the cache key of the port. Port 1 and port "1" are the same."""
+  try:
+    port = int(port)
+  except (TypeError, ValueError):
+    pass  # Not all switches have numbered ports.
+  return _PORT_MODE_KEY_PREFIX + str(port)
@@ -24,7 +24,7 @@ eventually unit test device classes independent of hardware.
 Switchboard implementation resides in gazoo_device/switchboard/switchboard.py.
 """
 import abc
-from typing import List
+from typing import Any, List
 
 from gazoo_device import config
 from gazoo_device.capabilities.interfaces import capability_base
@@ -720,3 +720,29 @@ class SwitchboardBase(capability_base.CapabilityBase):
     Args:
         process_num(int): number of transport to stop.
     """
+
+  def request_stop_processes(self):
+    """Signals all Switchboard processes to stop without waiting for them.
+
+    Used to stop processes of several switchboards concurrently. Call
+    wait_for_processes_to_stop() afterwards. Does nothing by default.
+    """
+
+  def get_processes(self) -> List[Any]:
+    """Returns all Switchboard processes (started or not). None by default."""
+    return []
+
+  def wait_for_processes_to_stop(self, deadline: float) -> List[str]:
+    """Waits for signalled Switchboard processes to stop until the deadline.
+
+    Processes still running after the deadline are terminated. Returns no
+    processes by default.
+
+    Args:
+        deadline: time.time() value by which all processes must stop.
+
+    Returns:
+        Names of processes which had to be terminated.
+    """
+    del deadline  # Unused by the default implementation.
+    return []
@@ -13,13 +13,20 @@
 # limitations under the License.
 
 """Common shell() capability for devices communicating over SSH."""
+import re
 import time
+import uuid
+
 from gazoo_device import config
 from gazoo_device import errors
 from gazoo_device import gdm_logger
 from gazoo_device.capabilities.interfaces import shell_base
 
 _SSH_CONNECTION_FAILURE_MARKERS = ["Connection to", "Connection reset"]
+# Printed after each command of a batch. The command text contains "$?" instead
+# of the return code digits, so echoed commands don't match the regex.
+_BATCH_DELIMITER_CMD = "echo {marker}_{index}:$?"
+_BATCH_DELIMITER_REGEX = r"{marker}_(\d+):(\d+)\r?\n?"
 
 logger = gdm_logger.get_logger()
 
@@ -135,6 +142,63 @@ class ShellSSH(shell_base.ShellBase):
     else:
       return result
 
+  def shell_batch(self,
+                  commands,
+                  command_name="shell_batch",
+                  timeout=None,
+                  port=0,
+                  searchwindowsize=config.SEARCHWINDOWSIZE):
+    """Sends several commands in a single shell command.
+
+    The commands are sent as one brace group, with each command on its own
+    line followed by an echo of a unique delimiter and its return code. Each
+    command therefore parses exactly as it would on its own (a trailing "&"
+    or "# comment" doesn't affect the delimiter), and the shell only starts
+    running commands once the whole group has been received.
+
+    Args:
+        commands (list): commands to send to the device.
+        command_name (str): Identifier for the commands.
+        timeout (float): Time in seconds to wait for device to respond to all
+          commands.
+        port (int): Which port to send on, 0 or 1.
+        searchwindowsize (int): Number of the last bytes to look at.
+
+    Raises:
+        DeviceError: if communication fails or the response doesn't contain
+          the output of every command.
+
+    Returns:
+        list: (response, return code) tuple for each command.
+    """
+    if not commands:
+      return []
+    marker = "GDM_BATCH_{}".format(uuid.uuid4().hex[:8])
+    lines = []
+    for index, command in enumerate(commands):
+      lines.append(command.rstrip())
+      lines.append(_BATCH_DELIMITER_CMD.format(marker=marker, index=index))
+    script = "{{\n{}\n}}".format("\n".join(lines))
+    response = self.shell(
+        script,
+        command_name=command_name,
+        timeout=timeout,
+        port=port,
+        searchwindowsize=searchwindowsize)
+
+    # re.split() returns [output, index, return code, output, ..., remainder].
+    parts = re.split(_BATCH_DELIMITER_REGEX.format(marker=marker), response)
+    results = [(parts[i].strip(), int(parts[i + 2]))
+               for i in range(0, len(parts) - 1, 3)]
+    indices = [int(index) for index in parts[1::3]]
+    if indices != list(range(len(commands))):
+      raise errors.DeviceError(
+          "Device {} shell_batch failed for {}. Expected output of {} "
+          "commands, found delimiters {}. Shell output: {!r}.".format(
+              self._device_name, command_name, len(commands), indices,
+              response))
+    return results
+
   def has_command(self, binary_name):
     """Returns if binary_name is installed on the device.
 
@@ -86,6 +86,8 @@ class SwitchPowerDliPowerswitch(switch_power_base.SwitchPowerBase):
         headers=self._headers_dict["GET_PROP"])
     ports_value = response.split(",")
     ports_mode = [ON if port == "true" else OFF for port in ports_value]
+    for port, mode in enumerate(ports_mode):
+      self._cache_port_mode(port, mode)
     return ports_mode
 
   def get_mode(self, port):
@@ -106,10 +108,9 @@ class SwitchPowerDliPowerswitch(switch_power_base.SwitchPowerBase):
         self._command_dict["ADJUST_PORTS_MODE"].format(
             "=" + str(port), ip=self._ip_address),
         headers=self._headers_dict["GET_PROP"])
-    if response == "true":
-      return ON
-    else:
-      return OFF
+    mode = ON if response == "true" else OFF
+    self._cache_port_mode(port, mode)
+    return mode
 
   @decorators.CapabilityLogDecorator(logger)
   def power_on(self, port):
@@ -124,12 +125,14 @@ class SwitchPowerDliPowerswitch(switch_power_base.SwitchPowerBase):
     self._validate_port("power_on", port)
     logger.debug("{} Powering on powerswitch port {}".format(
         self._device_name, port))
+    self._discard_port_mode(port)
     self._http_fn(
         "POST",
         self._command_dict["ADJUST_PORTS_MODE"].format(
             "=" + str(port), ip=self._ip_address),
         headers=self._headers_dict["SET_PROP"],
         data={"value": "true"})
+    self._cache_port_mode(port, ON)
 
   @decorators.CapabilityLogDecorator(logger)
   def power_off(self, port):
@@ -144,12 +147,14 @@ class SwitchPowerDliPowerswitch(switch_power_base.SwitchPowerBase):
     self._validate_port("power_off", port)
     logger.debug("{} Powering off powerswitch port {}".format(
         self._device_name, port))
+    self._discard_port_mode(port)
     self._http_fn(
         "POST",
         self._command_dict["ADJUST_PORTS_MODE"].format(
             "=" + str(port), ip=self._ip_address),
         headers=self._headers_dict["SET_PROP"],
         data={"value": "false"})
+    self._cache_port_mode(port, OFF)
 
   @decorators.CapabilityLogDecorator(logger)
   def set_mode(self, mode, port):
@@ -185,12 +190,21 @@ class SwitchPowerDliPowerswitch(switch_power_base.SwitchPowerBase):
     else:
       data_value = "false"
 
+    for port in range(self._total_ports):
+      self._discard_port_mode(port)
     self._http_fn(
         "POST",
         self._command_dict["ADJUST_PORTS_MODE"].format(
             "all;", ip=self._ip_address),
         headers=self._headers_dict["SET_PROP"],
         data={"value": data_value})
+    for port in range(self._total_ports):
+      self._cache_port_mode(port, mode)
+
+  def _refresh_port_modes(self, port):
+    """Queries the modes of all ports at once."""
+    self._validate_port("get_mode", port)
+    return self.get_all_ports_mode()[port]
 
   def _validate_mode(self, mode):
     """Verify mode given resides in the valid mode list.
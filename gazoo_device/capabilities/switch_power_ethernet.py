@@ -63,9 +63,9 @@ class SwitchPowerEthernet(switch_power_base.SwitchPowerBase):
       DeviceError: invalid port.
     """
     port_status = self._get_port_status_func(port)
-    if port_status.lower() in ["on", "1", "enable"]:
-      return ON
-    return OFF
+    mode = ON if port_status.lower() in ["on", "1", "enable"] else OFF
+    self._cache_port_mode(port, mode)
+    return mode
 
   @decorators.CapabilityLogDecorator(logger, decorators.DEBUG)
   def power_off(self, port):
@@ -100,6 +100,7 @@ class SwitchPowerEthernet(switch_power_base.SwitchPowerBase):
     logger.info("{} setting power mode to {} for port {}".format(
         self._device_name, mode, port))
 
+    self._discard_port_mode(port)
     if mode == ON:
       self._turn_on_port_func(port)
     else:
@@ -112,6 +112,7 @@ class SwitchPowerUnifiSwitch(switch_power_base.SwitchPowerBase):
     self._validate_port("power_on", port)
     telnet_commands = self._create_port_config_command_and_regex(port)
     logger.debug(f"{self._device_name} Powering on unifi_switch port {port}")
+    self._discard_port_mode(port)
     self._telnet_port_config_send(
         telnet_commands=telnet_commands,
         func=self._send_fn,
@@ -130,6 +131,7 @@ class SwitchPowerUnifiSwitch(switch_power_base.SwitchPowerBase):
     self._validate_port("power_off", port)
     telnet_commands = self._create_port_config_command_and_regex(port)
     logger.debug(f"{self._device_name} Powering off unifi_switch port {port}")
+    self._discard_port_mode(port)
     self._telnet_port_config_send(
         telnet_commands=telnet_commands,
         func=self._send_fn,
@@ -164,9 +166,38 @@ class SwitchPowerUnifiSwitch(switch_power_base.SwitchPowerBase):
         mode (str): Mode to set all unifi_switch ports to. Valid modes are
           "on" (auto) or "off (shutdown)".
     """
+    self.set_ports_mode(mode, range(1, self._total_ports + 1))
+
+  @decorators.CapabilityLogDecorator(logger)
+  def set_ports_mode(self, mode, ports):
+    """Sets the specified ports to the mode specified in one telnet session.
+
+    The ports are configured one after another without leaving config mode,
+    then their modes are verified with a single query of all ports.
+
+    Args:
+        mode (str): Mode to set the ports to. Valid modes are "on" (auto) or
+          "off" (shutdown).
+        ports (list): device port numbers.
+
+    Raises:
+        DeviceError: invalid mode or port, or ports aren't in the mode after
+          being set.
+    """
     self._validate_mode(mode)
-    for poe_port in range(1, self._total_ports + 1):
-      self.set_mode(mode, poe_port)
+    ports = [int(port) for port in ports]
+    for port in ports:
+      self._validate_port("set_ports_mode", port)
+      self._discard_port_mode(port)
+    logger.debug(
+        f"{self._device_name} Setting unifi_switch ports {ports} to {mode}")
+    ports_status = self._telnet_config_send(
+        func=self._set_ports_mode_in_config, func_args=(mode, ports))
+    failed_ports = [port for port in ports if ports_status[port - 1] != mode]
+    if failed_ports:
+      raise errors.DeviceError(
+          f"Device {self._device_name} set_ports_mode failed. "
+          f"Mode of ports {failed_ports} is not {mode}.")
 
   def get_mode(self, port):
     """Get mode of the specified port.
@@ -187,11 +218,13 @@ class SwitchPowerUnifiSwitch(switch_power_base.SwitchPowerBase):
         func_kwargs={"regex_group": 1})
 
     if response == "Auto":
-      return ON
+      mode = ON
     elif response == "Shutdown":
-      return OFF
+      mode = OFF
     else:
-      return response
+      mode = response
+    self._cache_port_mode(port, mode)
+    return mode
 
   def get_all_ports_mode(self):
     """Get mode of all the device ports.
@@ -199,11 +232,14 @@ class SwitchPowerUnifiSwitch(switch_power_base.SwitchPowerBase):
     Returns:
         list: a list of the all the ports mode.
     """
-    result = self._telnet_config_send(
-        func=self._poe_telnet_send_and_expect,
-        func_args=([self._command_dict["GET_ALL_PORTS_MODE"]],
-                   [self._regex_dict["GET_ALL_PORTS_MODE_REGEX"]]),
-        func_kwargs={"regex_group": 1})
+    return self._telnet_config_send(func=self._get_all_ports_mode_in_config)
+
+  def _get_all_ports_mode_in_config(self):
+    """Gets the mode of all the device ports at the telnet_config menu level."""
+    result = self._poe_telnet_send_and_expect(
+        [self._command_dict["GET_ALL_PORTS_MODE"]],
+        [self._regex_dict["GET_ALL_PORTS_MODE_REGEX"]],
+        regex_group=1)
     ports_status = []
     for poe_port in range(1, self._total_ports + 1):
       match = re.search(
@@ -215,10 +251,39 @@ class SwitchPowerUnifiSwitch(switch_power_base.SwitchPowerBase):
           ports_status.append(OFF)
         else:
           ports_status.append(match.group(1))
+        self._cache_port_mode(poe_port, ports_status[-1])
       else:
         ports_status.append("")
     return ports_status
 
+  def _set_ports_mode_in_config(self, mode, ports):
+    """Sets the ports to the mode at the telnet_config menu level.
+
+    Args:
+        mode (str): mode to set the ports to, either 'on' or 'off'.
+        ports (list): device port numbers.
+
+    Returns:
+        list: the mode of all the device ports once they are set.
+    """
+    poe_mode = "auto" if mode == ON else "shutdown"
+    for poe_port in ports:
+      self._poe_telnet_send_and_expect([f"interface 0/{poe_port}"],
+                                       [fr"\(Interface 0/{poe_port}\)#"])
+      self._send_fn(
+          self._command_dict["ADJUST_PORTS_MODE"].format(mode=poe_mode))
+      self._poe_telnet_send_and_expect(["exit"], [r"\(Config\)#"])
+    return self._get_all_ports_mode_in_config()
+
+  def _refresh_port_modes(self, port):
+    """Queries the modes of all ports at once."""
+    port = int(port)
+    self._validate_port("get_mode", port)
+    mode = self.get_all_ports_mode()[port - 1]
+    if not mode:  # Port is missing from the response.
+      mode = self.get_mode(port)
+    return mode
+
   def _create_port_config_command_and_regex(self, poe_port):
     """Create the port config command and regex for the specified poe_port."""
     telnet_commands = TELNET_COMMANDS["ENTER_TELNET_PORT_CONFIG"].copy()
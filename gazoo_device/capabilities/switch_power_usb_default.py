@@ -107,9 +107,9 @@ class SwitchPowerUsbDefault(switch_power_base.SwitchPowerBase):
         regex=self._regex_dict["GET_MODE_REGEX"],
         command_name="get_mode",
         tries=5)
-    if "ON" in result.upper():
-      return SYNC
-    return OFF
+    mode = SYNC if "ON" in result.upper() else OFF
+    self._cache_port_mode(port, mode)
+    return mode
 
   @decorators.CapabilityLogDecorator(logger)
   def power_on(self, port, data_sync=True):
@@ -132,8 +132,10 @@ class SwitchPowerUsbDefault(switch_power_base.SwitchPowerBase):
 
     self._validate_port("power_on", port)
     logger.debug("{} Powering on usb port {}".format(self._device_name, port))
+    self._discard_port_mode(port)
     self._shell_fn(self._command_dict["POWER_ON"].format(
         self._serial_number, port))
+    self._cache_port_mode(port, SYNC)
 
   @decorators.CapabilityLogDecorator(logger)
   def power_off(self, port):
@@ -148,8 +150,10 @@ class SwitchPowerUsbDefault(switch_power_base.SwitchPowerBase):
     port = int(port)
     self._validate_port("power_off", port)
     logger.debug("{} Powering off usb port {}".format(self._device_name, port))
+    self._discard_port_mode(port)
     self._shell_fn(self._command_dict["POWER_OFF"].format(
         self._serial_number, port))
+    self._cache_port_mode(port, OFF)
 
   @decorators.CapabilityLogDecorator(logger)
   def set_all_ports_mode(self, mode):
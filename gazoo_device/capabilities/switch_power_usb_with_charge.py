@@ -13,9 +13,11 @@
 # limitations under the License.
 
 """Implementation of the switch_power_usb_with_charge capability."""
-from typing import Any, Callable, Dict
+import re
+from typing import Any, Callable, Dict, List, Optional
 
 from gazoo_device import decorators
+from gazoo_device import errors
 from gazoo_device import gdm_logger
 from gazoo_device.capabilities import switch_power_usb_default
 
@@ -38,7 +40,9 @@ class SwitchPowerUsbWithCharge(switch_power_usb_default.SwitchPowerUsbDefault):
                regex_dict: Dict[str, str],
                device_name: str,
                serial_number: str,
-               total_ports: int):
+               total_ports: int,
+               shell_batch_fn: Optional[
+                   Callable[[List[str]], List[str]]] = None):
     """Initializes an instance of SwitchPowerUsbWithCharge capability.
 
     Args:
@@ -49,6 +53,9 @@ class SwitchPowerUsbWithCharge(switch_power_usb_default.SwitchPowerUsbDefault):
       device_name: name of the device this capability is attached to.
       serial_number: serial number of device this capability is attached to.
       total_ports: Number of ports on the device.
+      shell_batch_fn: function which sends a list of commands in one round
+        trip and returns their responses. If None, commands are sent one by
+        one with shell_fn.
     """
     super().__init__(
         shell_fn=shell_fn,
@@ -58,12 +65,41 @@ class SwitchPowerUsbWithCharge(switch_power_usb_default.SwitchPowerUsbDefault):
         device_name=device_name,
         serial_number=serial_number,
         total_ports=total_ports)
+    self._shell_batch_fn = shell_batch_fn
 
   @decorators.PersistentProperty
   def supported_modes(self):
     """Get the USB power modes supported by the USB hub."""
     return [OFF, SYNC, CHARGE]
 
+  def get_all_ports_mode(self):
+    """Gets the USB mode for all ports on this hub.
+
+    Returns:
+      list: Returns a list of port modes with port number as index.
+
+    Raises:
+      DeviceError: unexpected response to a port state query.
+    """
+    if self._shell_batch_fn is None:
+      return super().get_all_ports_mode()
+    ports = range(1, self._total_ports + 1)
+    responses = self._shell_batch_fn(
+        [self._command_dict["GET_MODE"].format(port) for port in ports])
+    mode_list = []
+    for port, response in zip(ports, responses):
+      match = re.search(self._regex_dict["GET_MODE_REGEX"], response)
+      if not match:
+        raise errors.DeviceError(
+            "Device {} get_all_ports_mode failed. Unable to find {!r} in the "
+            "state of port {}: {!r}".format(
+                self._device_name, self._regex_dict["GET_MODE_REGEX"], port,
+                response))
+      mode = self._get_mode_from_flags(match.group(1))
+      self._cache_port_mode(port, mode)
+      mode_list.append(mode)
+    return mode_list
+
   def get_mode(self, port):
     """Gets the USB mode for the specified port.
 
@@ -83,13 +119,8 @@ class SwitchPowerUsbWithCharge(switch_power_usb_default.SwitchPowerUsbDefault):
         self._command_dict["GET_MODE"].format(port),
         self._regex_dict["GET_MODE_REGEX"],
         tries=5)
-
-    if "O" in flags:
-      mode = OFF
-    elif "S" in flags:
-      mode = SYNC
-    else:
-      mode = CHARGE
+    mode = self._get_mode_from_flags(flags)
+    self._cache_port_mode(port, mode)
     return mode
 
   @decorators.CapabilityLogDecorator(logger, decorators.DEBUG)
@@ -119,6 +150,31 @@ class SwitchPowerUsbWithCharge(switch_power_usb_default.SwitchPowerUsbDefault):
     else:
       self.set_mode(CHARGE, port)
 
+  @decorators.CapabilityLogDecorator(logger)
+  def set_all_ports_mode(self, mode):
+    """Sets all USB hub ports to the mode specified.
+
+    Args:
+      mode (str): USB hub mode to set. The mode must be in one of the
+        supported_modes Example, 'off', 'sync', 'charge'
+
+    Raises:
+      DeviceError: invalid mode.
+    """
+    if self._shell_batch_fn is None:
+      super().set_all_ports_mode(mode)
+      return
+    self._validate_mode(mode)
+    logger.debug("{} setting power mode to {} for all usb ports".format(
+        self._device_name, mode))
+    ports = range(1, self._total_ports + 1)
+    for port in ports:
+      self._discard_port_mode(port)
+    self._shell_batch_fn(
+        [self._command_dict["SET_MODE"].format(mode, port) for port in ports])
+    for port in ports:
+      self._cache_port_mode(port, mode)
+
   @decorators.CapabilityLogDecorator(logger, decorators.DEBUG)
   def set_mode(self, mode, port):
     """Sets the given USB port to the mode specified.
@@ -135,4 +191,22 @@ class SwitchPowerUsbWithCharge(switch_power_usb_default.SwitchPowerUsbDefault):
     self._validate_mode(mode)
     logger.debug("{} setting power mode to {} for usb port {}".format(
         self._device_name, mode, port))
+    self._discard_port_mode(port)
     self._shell_fn(self._command_dict["SET_MODE"].format(mode, port))
+    self._cache_port_mode(port, mode)
+
+  def _refresh_port_modes(self, port):
+    """Queries the modes of all ports at once if commands can be batched."""
+    if self._shell_batch_fn is None:
+      return super()._refresh_port_modes(port)
+    port = int(port)
+    self._validate_port("get_mode", port)
+    return self.get_all_ports_mode()[port - 1]
+
+  def _get_mode_from_flags(self, flags):
+    """Returns the USB mode given the port state flags."""
+    if "O" in flags:
+      return OFF
+    if "S" in flags:
+      return SYNC
+    return CHARGE
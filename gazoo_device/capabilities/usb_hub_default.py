@@ -250,5 +250,5 @@ class UsbHubDefault(usb_hub_base.UsbHubBase):
                                "supported_modes".format(self._device_name))
     if not self.healthy:
       self.health_check()
-    current_mode = self._usb_hub.switch_power.get_mode(port)
+    current_mode = self._usb_hub.switch_power.get_cached_mode(port)
     return current_mode != mode
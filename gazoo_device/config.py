@@ -44,6 +44,10 @@ DEFAULT_OPTIONS_FILE = os.path.join(CONFIG_DIRECTORY, "device_options.json")
 DEFAULT_TESTBEDS_FILE = os.path.join(CONFIG_DIRECTORY, "testbeds.json")
 DEFAULT_GDM_CONFIG_FILE = os.path.join(CONFIG_DIRECTORY, "gdm.json")
 DEFAULT_LOG_FILE = os.path.join(DEFAULT_LOG_DIRECTORY, "gdm.txt")
+DEFAULT_DETECT_CACHE_FILE = os.path.join(CONFIG_DIRECTORY, "detect_cache.json")
+DEFAULT_CONFORMANCE_CACHE_FILE = os.path.join(CONFIG_DIRECTORY,
+                                              "conformance_cache.json")
+DEFAULT_DAEMON_SOCKET = os.path.join(INSTALL_DIRECTORY, "gdm_daemon.sock")
 
 DEVICES_KEYS = ["devices", "other_devices"]
 OPTIONS_KEYS = ["device_options", "other_device_options"]
@@ -120,6 +120,17 @@ etc.
 @decorators.DynamicProperty
 def firmware_version(self):
 
+Values of slow dynamic properties can be cached for a number of seconds.
+Cached values are invalidated when the device reboots, recovers, factory resets
+or flashes a build (see utility/property_cache.py). Properties which are parsed
+from the output of a single shell command can declare it as a shell query
+(keys of self.commands and self.regexes). get_dynamic_properties() then
+retrieves all such properties of a device in a single shell command.
+
+@decorators.DynamicProperty.cached(
+    ttl=300, shell_query=("KERNEL_VERSION", "KERNEL_VERSION_REGEX"))
+def kernel_version(self):
+
 ***PersistentProperty***
 Used to identify all persistent properties.
 
@@ -143,10 +154,12 @@ import functools
 import inspect
 import logging
 import time
-from typing import Any, Callable
+from typing import Any, Callable, Optional, Tuple
 
 from gazoo_device import errors
 from gazoo_device import gdm_logger
+from gazoo_device.utility import method_metrics
+from gazoo_device.utility import property_cache
 
 logger_gdm = gdm_logger.get_logger()
 
@@ -353,6 +366,10 @@ class LogDecorator():
     if not func_args or func_args[0] != "self":
       raise TypeError(error_template.format(func, "static"))
 
+    # Defining class names by instance type. Resolved on the first call of the
+    # method on an instance of each class.
+    class_names = {}
+
     @functools.wraps(func)
     def wrapped_func(instance, *args, **kwargs):
       """Wraps (decorates) the given function.
@@ -373,36 +390,44 @@ class LogDecorator():
       Returns:
           object: same value as the wrapped function.
       """
-      fmt_args = {
-          "device_name": getattr(instance, self.name_attr, DEFAULT_DEVICE_NAME),
-          "method_name": func.__name__,
-          "class_name": self._find_defining_class_name(func, type(instance)),
-          "skip_reason": None,
-          "time_elapsed": None,
-          "exc_name": None,
-          "exc_reason": None
-      }
-
-      return_val = None
-      method_skipped = False
-      start_time = time.time()
-
-      if self.level is not None:
+      # Logger.isEnabledFor() caches levels, but GDM sets logger.level directly.
+      log_enabled = (self.level is not None and
+                     self.level >= self.logger.getEffectiveLevel())
+      fmt_args = None
+      if log_enabled:
+        fmt_args = self._get_fmt_args(func, instance, class_names)
         self.logger.log(self.level, MESSAGES["START"].format(**fmt_args))
 
+      return_val = None
+      skip_reason = None
+      failed = True
+      start_time = time.monotonic()
       try:
         return_val = func(instance, *args, **kwargs)
+        failed = False
       except SkipExceptionError as err:
-        method_skipped = True
-        fmt_args["skip_reason"] = str(err)
+        failed = False
+        skip_reason = str(err)
       except Exception as err:
+        if fmt_args is None:
+          fmt_args = self._get_fmt_args(func, instance, class_names)
         self._format_and_raise(fmt_args, err)
-
-      if self.level is not None:
-        if method_skipped:
+      finally:
+        if func.__name__ in property_cache.INVALIDATING_METHODS:
+          property_cache.invalidate(
+              getattr(instance, self.name_attr, DEFAULT_DEVICE_NAME))
+        if method_metrics.is_enabled():
+          method_metrics.record(
+              getattr(instance, self.name_attr, DEFAULT_DEVICE_NAME),
+              _get_capability_name(instance), func.__name__,
+              time.monotonic() - start_time, failed=failed)
+
+      if log_enabled:
+        if skip_reason is not None:
+          fmt_args["skip_reason"] = skip_reason
           self.logger.log(self.level, MESSAGES["SKIP"].format(**fmt_args))
         else:
-          fmt_args["time_elapsed"] = int(time.time() - start_time)
+          fmt_args["time_elapsed"] = int(time.monotonic() - start_time)
           self.logger.log(self.level, MESSAGES["SUCCESS"].format(**fmt_args))
 
       return return_val
@@ -410,6 +435,31 @@ class LogDecorator():
     wrapped_func.__dict__[WRAPS_ATTR_NAME] = func
     return wrapped_func
 
+  def _get_fmt_args(self, func, instance, class_names):
+    """Returns arguments for the log message templates.
+
+    Args:
+        func (function): decorated function.
+        instance (object): instance the method is called on.
+        class_names (dict): cache of defining class names by instance type.
+
+    Returns:
+        dict: log message template arguments.
+    """
+    instance_type = type(instance)
+    if instance_type not in class_names:
+      class_names[instance_type] = self._find_defining_class_name(
+          func, instance_type)
+    return {
+        "device_name": getattr(instance, self.name_attr, DEFAULT_DEVICE_NAME),
+        "method_name": func.__name__,
+        "class_name": class_names[instance_type],
+        "skip_reason": None,
+        "time_elapsed": None,
+        "exc_name": None,
+        "exc_reason": None
+    }
+
   def _find_defining_class_name(self, method, current_class):
     """Finds the name of the class from which the method was inherited from.
 
@@ -491,6 +541,12 @@ class CapabilityLogDecorator(LogDecorator):
         logger, level=level, wrap_type=wrap_type, name_attr=name_attr)
 
 
+def _get_capability_name(instance):
+  """Returns the capability name of a capability instance, None otherwise."""
+  get_capability_name = getattr(type(instance), "get_capability_name", None)
+  return get_capability_name() if get_capability_name else None
+
+
 decorators_factory = LogDecorator(logger_gdm, level=DEBUG)
 
 
@@ -506,14 +562,77 @@ class DynamicProperty(property):
   These properties may be settable if there is a corresponding setter property
   function.
   """
-  # Make pytype aware of the "setter" attribute.
-  setter: Callable[[Callable[[Any, Any], None]], None]
 
-  def __init__(self, fget, fset=None, fdel=None, doc=None):
+  def __init__(self,
+               fget,
+               fset=None,
+               fdel=None,
+               doc=None,
+               ttl: Optional[float] = None,
+               shell_query: Optional[Tuple[str, str]] = None):
+    """Initializes the dynamic property.
+
+    Args:
+        fget (method): getter function.
+        fset (method): setter function.
+        fdel (method): deleter function.
+        doc (str): docstring. Defaults to the getter docstring.
+        ttl: number of seconds to cache the property value for. If None, the
+          value is not cached.
+        shell_query: (command key, regex key) if the property value is the
+          first regex group matched in the response to a device shell command.
+          Allows retrieving several properties in a single shell command.
+    """
     if not doc:
       doc = fget.__doc__
     super().__init__(fget, fset=fset, fdel=fdel, doc=doc)
     self.name = fget.__name__
+    self.ttl = ttl
+    self.shell_query = shell_query
+
+  @classmethod
+  def cached(
+      cls,
+      ttl: float,
+      shell_query: Optional[Tuple[str, str]] = None
+  ) -> Callable[[Callable[[Any], Any]], "DynamicProperty"]:
+    """Returns a decorator for a dynamic property with a cached value.
+
+    Args:
+        ttl: number of seconds to cache the property value for.
+        shell_query: (command key, regex key) of the property shell query.
+    """
+    return functools.partial(cls, ttl=ttl, shell_query=shell_query)
+
+  def __get__(self, instance, owner=None):
+    if instance is None or self.ttl is None:
+      return super().__get__(instance, owner)
+    is_cached, value = property_cache.get_value(instance, self.name)
+    if not is_cached:
+      value = super().__get__(instance, owner)
+      property_cache.set_value(instance, self.name, value, self.ttl)
+    return value
+
+  def __set__(self, instance, value):
+    property_cache.discard_value(instance, self.name)
+    super().__set__(instance, value)
+
+  def getter(self, fget):
+    return self._copy(fget=fget)
+
+  def setter(self, fset):
+    return self._copy(fset=fset)
+
+  def deleter(self, fdel):
+    return self._copy(fdel=fdel)
+
+  def _copy(self, **kwargs):
+    """Returns a copy of the property with some of the functions replaced."""
+    property_kwargs = {"fget": self.fget, "fset": self.fset,
+                       "fdel": self.fdel, "doc": self.__doc__,
+                       "ttl": self.ttl, "shell_query": self.shell_query}
+    property_kwargs.update(kwargs)
+    return type(self)(**property_kwargs)
 
 
 class OptionalProperty(property):
@@ -20,13 +20,14 @@ import logging
 import re
 import subprocess
 import typing
-from typing import Any, Callable, Collection, Dict, List, Union
+from typing import Any, Callable, Collection, Dict, List, Optional, Union
 
 from gazoo_device import config
 from gazoo_device import extensions
 from gazoo_device.base_classes import auxiliary_device_base
 from gazoo_device.base_classes import primary_device_base
 from gazoo_device.capabilities.interfaces import switchboard_base
+from gazoo_device.utility import detect_cache
 from gazoo_device.utility import host_utils
 from gazoo_device.utility import http_utils
 from gazoo_device.utility import pwrpc_utils
@@ -304,7 +305,8 @@ def determine_device_class(
     address: str,
     communication_type: str,
     log_file_path: str,
-    create_switchboard_func: Callable[..., switchboard_base.SwitchboardBase]
+    create_switchboard_func: Callable[..., switchboard_base.SwitchboardBase],
+    cache: Optional[detect_cache.DetectCache] = None
 ) -> List[_DeviceClassType]:
   """Returns the device class(es) that matches the address' responses.
 
@@ -315,6 +317,8 @@ def determine_device_class(
     communication_type: category of communication.
     log_file_path: local path to write log messages to.
     create_switchboard_func: Method to create the switchboard.
+    cache: detection cache to reuse responses of known hardware from. If None,
+      always queries the device.
 
   Returns:
     list: classes where the device responses match the detect criteria.
@@ -324,7 +328,7 @@ def determine_device_class(
     device_classes = get_communication_type_classes(communication_type)
     return find_matching_device_class(address, communication_type,
                                       detect_logger, create_switchboard_func,
-                                      device_classes)
+                                      device_classes, cache=cache)
   finally:
     file_handler = detect_logger.handlers[0]
     file_handler.close()
@@ -336,7 +340,9 @@ def find_matching_device_class(
     communication_type: str,
     detect_logger: logging.Logger,
     create_switchboard_func: Callable[..., switchboard_base.SwitchboardBase],
-    device_classes: Collection[_DeviceClassType]) -> List[_DeviceClassType]:
+    device_classes: Collection[_DeviceClassType],
+    cache: Optional[detect_cache.DetectCache] = None
+) -> List[_DeviceClassType]:
   """Returns all classes where the device responses match the detect criteria.
 
   Args:
@@ -345,10 +351,22 @@ def find_matching_device_class(
     detect_logger: logs device interactions.
     create_switchboard_func: Method to create the switchboard.
     device_classes: device classes whose match criteria must be compared to.
+    cache: detection cache to reuse responses of known hardware from. If None,
+      always queries the device.
 
   Returns:
     list: classes where the device responses match the detect criteria.
   """
+  fingerprint = None
+  if cache is not None:
+    fingerprint = detect_cache.get_fingerprint(address, communication_type)
+    if fingerprint:
+      cached_classes = _get_cached_device_classes(
+          address, communication_type, detect_logger, device_classes, cache,
+          fingerprint)
+      if cached_classes is not None:
+        return cached_classes
+
   matching_classes = []
   responses = _get_detect_query_response(address, communication_type,
                                          detect_logger, create_switchboard_func)
@@ -358,6 +376,68 @@ def find_matching_device_class(
       detect_logger.info("{}: Match.".format(device_class.DEVICE_TYPE))
     else:
       detect_logger.info("{}: No Match.".format(device_class.DEVICE_TYPE))
+
+  # Only successful identifications are cached: unmatched responses are often
+  # caused by transient failures and should be retried on the next detection.
+  if fingerprint and matching_classes:
+    cache.set(fingerprint, address, communication_type,
+              {str(query): response for query, response in responses.items()},
+              [device_class.DEVICE_TYPE for device_class in matching_classes])
+  return matching_classes
+
+
+def _get_cached_device_classes(
+    address: str,
+    communication_type: str,
+    detect_logger: logging.Logger,
+    device_classes: Collection[_DeviceClassType],
+    cache: detect_cache.DetectCache,
+    fingerprint: str) -> Optional[List[_DeviceClassType]]:
+  """Returns matching classes from the detection cache or None if not cached.
+
+  Args:
+    address: communication_address.
+    communication_type: category of communication.
+    detect_logger: logs device interactions.
+    device_classes: device classes whose match criteria must be compared to.
+    cache: detection cache.
+    fingerprint: hardware fingerprint of the address.
+
+  Returns:
+    Classes matching the cached responses, or None if there is no usable cache
+    entry for the fingerprint.
+  """
+  entry = cache.get(fingerprint)
+  if not entry or entry["communication_type"] != communication_type:
+    return None
+  detect_queries = extensions.detect_criteria[communication_type]
+  cached_responses = entry["responses"]
+  if any(str(query) not in cached_responses for query in detect_queries):
+    # Detection queries changed since the entry was cached.
+    return None
+  responses = {query: cached_responses[str(query)] for query in detect_queries}
+  detect_logger.info(
+      f"Using cached detect query responses for {address} "
+      f"(fingerprint {fingerprint}): {responses}")
+
+  classes_by_type = {device_class.DEVICE_TYPE: device_class
+                     for device_class in device_classes}
+  if all(device_type in classes_by_type
+         for device_type in entry["device_types"]):
+    matching_classes = [classes_by_type[device_type]
+                        for device_type in entry["device_types"]]
+  else:  # Registered device classes changed since the entry was cached.
+    matching_classes = [
+        device_class for device_class in device_classes
+        if _matches_criteria(responses, device_class.DETECT_MATCH_CRITERIA)]
+  if not matching_classes:
+    return None
+  for device_class in matching_classes:
+    detect_logger.info("{}: Match (cached).".format(device_class.DEVICE_TYPE))
+
+  if entry["address"] != address:  # Same hardware on a different address.
+    cache.set(fingerprint, address, communication_type, cached_responses,
+              [device_class.DEVICE_TYPE for device_class in matching_classes])
   return matching_classes
 
 
@@ -26,6 +26,7 @@ from gazoo_device import extensions
 from gazoo_device import gdm_logger
 from gazoo_device.base_classes import auxiliary_device_base
 from gazoo_device.switchboard import communication_types
+from gazoo_device.utility import detect_cache
 from gazoo_device.utility import pty_process_utils
 
 WIKI_URL = (
@@ -48,7 +49,8 @@ class DeviceDetector(object):
       persistent_configs: custom_types.PersistentConfigsDict,
       options_configs: custom_types.OptionalConfigsDict,
       supported_auxiliary_device_classes: List[
-          auxiliary_device_base.AuxiliaryDeviceBase]):
+          auxiliary_device_base.AuxiliaryDeviceBase],
+      cache: Optional[detect_cache.DetectCache] = None):
     """Initializes the device detector.
 
     Args:
@@ -58,9 +60,12 @@ class DeviceDetector(object):
         options_configs: device options known to the manager.
         supported_auxiliary_device_classes: list of auxiliary device
             classes.
+        cache: detection cache of known hardware. If None, all
+            connections are queried.
     """
     self.manager_weakref = weakref.ref(manager)
     self.log_directory = log_directory
+    self.cache = cache
     self.auxiliary_classes = supported_auxiliary_device_classes
     self.persistent_configs = copy.deepcopy(persistent_configs)
     self.options_configs = copy.deepcopy(options_configs)
@@ -330,9 +335,9 @@ class DeviceDetector(object):
             key,
             detect_log,
             # pytype: disable=attribute-error
-            self.manager_weakref().create_switchboard
+            self.manager_weakref().create_switchboard,
             # pytype: enable=attribute-error
-        )
+            cache=self.cache)
         if len(matching_classes) > 1:
           device_types = [
               device_class.DEVICE_TYPE for device_class in matching_classes
@@ -23,28 +23,111 @@ Extension modules consist of:
 - metadata (extension package name and version);
 - keys (such as SSH keys).
 
+The variables below are defined on first access, at which point the device
+controllers built into GDM are imported and registered, followed by packages
+passed to package_registrar.register_deferred(). This keeps
+"import gazoo_device" cheap for processes which never use extensions.
+Registration errors of the built-in controllers are raised, while those of
+deferred packages are logged.
+
 These values are intended for internal GDM usage only.
 """
-auxiliary_devices = []  # List of device classes
-# "capabilities" are derived from "capability_interfaces"
-capabilities = {}  # Capability name -> capability interface name
-capability_interfaces = {}  # Capability interface name -> interface class
-capability_flavors = {}  # Capability flavor name -> capability flavor class
-communication_types = {}  # Communication type name -> communication type class
-# "detect_criteria" is a mapping of
-# Communication type name -> {Query Key: Query function}
-detect_criteria = {}
-primary_devices = []  # List of device classes
-virtual_devices = []  # List of device classes
-# "package_info" is a mapping of Package name ->
-# immutabledict({"version": Version, "key_download_function": function})
-package_info = {}
-keys = []  # List of data_types.KeyInfo instances
+import importlib
+import threading
+from typing import List
+
+_EXTENSION_NAMES = ("auxiliary_devices", "capabilities",
+                    "capability_interfaces", "capability_flavors",
+                    "communication_types", "detect_criteria",
+                    "primary_devices", "virtual_devices", "package_info",
+                    "keys")
+
+_BUILT_IN_PACKAGE = "gazoo_device.gazoo_device_controllers"
+
+# Names of extension packages to import and register on first access.
+deferred_packages: List[str] = []
+_load_lock = threading.RLock()
+
+
+def __getattr__(name):
+  """Defines the extension variables on first access."""
+  if name not in _EXTENSION_NAMES:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  load()
+  if name not in globals():  # Deleted, e.g. by mock.patch.object().
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  return globals()[name]
+
+
+def load(strict: bool = False) -> None:
+  """Defines the extension variables and registers deferred packages.
+
+  Extension variables are visible to other threads while deferred packages are
+  being registered. Call this before starting threads which use extensions.
+
+  Args:
+    strict: If True, always run conformance checks of registered packages.
+
+  Raises:
+    ImportError: the built-in device controllers failed to import.
+    PackageRegistrationError: the built-in device controllers failed to
+      register. Extensions are loaded again on next access.
+  """
+  with _load_lock:
+    if is_initialized():
+      return
+    _initialize()
+    # pylint: disable=g-import-not-at-top
+    from gazoo_device import package_registrar
+    # pylint: enable=g-import-not-at-top
+    try:
+      package_registrar.register(
+          importlib.import_module(_BUILT_IN_PACKAGE), strict=strict)
+    except Exception:
+      _uninitialize()
+      raise
+    package_registrar.register_deferred_packages(strict=strict)
+
+
+def _initialize() -> None:
+  """Defines the extension variables with no extensions registered."""
+  # pylint: disable=global-variable-undefined
+  global auxiliary_devices, capabilities, capability_interfaces
+  global capability_flavors, communication_types, detect_criteria
+  global primary_devices, virtual_devices, package_info, keys
+  # pylint: enable=global-variable-undefined
+  auxiliary_devices = []  # List of device classes
+  # "capabilities" are derived from "capability_interfaces"
+  capabilities = {}  # Capability name -> capability interface name
+  capability_interfaces = {}  # Capability interface name -> interface class
+  capability_flavors = {}  # Capability flavor name -> capability flavor class
+  communication_types = {}  # Communication type name -> comm type class
+  # "detect_criteria" is a mapping of
+  # Communication type name -> {Query Key: Query function}
+  detect_criteria = {}
+  primary_devices = []  # List of device classes
+  virtual_devices = []  # List of device classes
+  # "package_info" is a mapping of Package name ->
+  # immutabledict({"version": Version, "key_download_function": function})
+  package_info = {}
+  keys = []  # List of data_types.KeyInfo instances
+
+
+def _uninitialize() -> None:
+  """Removes the extension variables so that they are defined again."""
+  for name in _EXTENSION_NAMES:
+    globals().pop(name, None)
+
+
+def is_initialized() -> bool:
+  """Returns whether the extension variables have been defined."""
+  return "package_info" in globals()
 
 
 def get_registered_package_info() -> str:
   """Returns names and versions of all registered extension packages."""
+  registered_packages = __getattr__("package_info")
   extension_versions = []
-  for package_name, package_data in package_info.items():
+  for package_name, package_data in registered_packages.items():
     extension_versions.append(f"{package_name} {package_data['version']}")
   return ", ".join(extension_versions)
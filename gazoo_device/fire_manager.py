@@ -17,17 +17,14 @@
 Used for CLI-specific commands and flags.
 Built to work with Python Fire: https://github.com/google/python-fire.
 """
-import codecs
 import enum
 import inspect
 import json
 import logging
-import os.path
 import pydoc
 import re
 import sys
 import textwrap
-import time
 from typing import Any, Collection, Optional, Type
 
 from gazoo_device import config
@@ -37,6 +34,7 @@ from gazoo_device import gdm_logger
 from gazoo_device import manager
 from gazoo_device import package_registrar
 from gazoo_device import testbed
+from gazoo_device.switchboard import log_follower
 from gazoo_device.utility import parallel_utils
 from gazoo_device.utility import usb_utils
 
@@ -310,51 +308,58 @@ class FireManager(manager.Manager):
   def log(self, device_name, log_file_name=None, duration=2000):
     """Streams device logs to stdout.
 
+    Logs of several devices (e.g. "gdm log device-1234,device-5678") are
+    merged in host timestamp order and each line is prefixed with the name of
+    the device.
+
     Args:
-      device_name (str): device identifier.
-      log_file_name (str): log_file_name. Used for testing purposes.
+      device_name (str or tuple): device identifier(s).
+      log_file_name (str): log_file_name. Used for testing purposes. Only
+        supported when streaming logs of a single device.
       duration (float): how long to stream logs for.
 
     Raises:
-      DeviceError: if unable to initiate log file to stream in 10 seconds.
+      DeviceError: if unable to initiate log file to stream in 10 seconds or
+        if log_file_name is given for more than one device.
     """
+    if isinstance(device_name, str):
+      device_names = device_name.split(",")
+    else:
+      device_names = list(device_name)
+    if log_file_name and len(device_names) > 1:
+      raise errors.DeviceError(
+          "log_file_name is only supported when streaming logs of a single "
+          "device, found devices {}.".format(", ".join(device_names)))
     logger.info("Streaming logs for max {}s".format(duration))
-    device = self.create_device(device_name, log_file_name=log_file_name)
-    # Disable log rotation feature
-    if hasattr(type(device), "switchboard"):
-      device.switchboard.set_max_log_size(0)
-
+    devices = []
     try:
-      # Wait up to 10 seconds for log file to be created
-      end_time = time.time() + MAX_TIME_TO_WAIT_FOR_INITATION
-      while time.time() < end_time:
-        if os.path.exists(device.log_file_name):
-          break
-        time.sleep(0.001)
-      else:
-        raise errors.DeviceError(
-            "Streaming logs for {} failed. "
-            "Log file not created within {} seconds".format(
-                device_name, MAX_TIME_TO_WAIT_FOR_INITATION))
-
-      start_time = time.time()
-      end_time = start_time + duration
-      # Open log file and process log file
-      with codecs.open(
-          device.log_file_name, "r", encoding="utf-8",
-          errors="replace") as log_file:
-
-        while time.time() < end_time:
-          line = log_file.readline()
-          if line:
-            sys.stdout.write(line)
-            sys.stdout.flush()
-          else:
-            time.sleep(0.001)
+      for name in device_names:
+        devices.append(self.create_device(name, log_file_name=log_file_name))
+      # Disable log rotation feature
+      for device in devices:
+        if hasattr(type(device), "switchboard"):
+          device.switchboard.set_max_log_size(0)
+
+      log_paths = {device.name: device.log_file_name for device in devices}
+      with log_follower.LogFollower(log_paths) as follower:
+        # Wait up to 10 seconds for log file to be created
+        if not follower.wait_for_logs(MAX_TIME_TO_WAIT_FOR_INITATION):
+          raise errors.DeviceError(
+              "Streaming logs for {} failed. "
+              "Log file not created within {} seconds".format(
+                  ", ".join(device_names), MAX_TIME_TO_WAIT_FOR_INITATION))
+
+        prefix_lines = len(devices) > 1
+        for name, line in follower.follow(duration):
+          if prefix_lines:
+            line = "{} | {}".format(name, line)
+          sys.stdout.write(line)
+          sys.stdout.flush()
 
     finally:
       sys.stdout.flush()
-      device.close()
+      for device in devices:
+        device.close()
 
   def make_devices_ready(self, devices, testing_props=None, aggressive=False):
     """Makes one or more devices ready and returns a json response.
@@ -404,18 +409,18 @@ class FireManager(manager.Manager):
 
     # execute manager method with each device instance in parallel
     if device_instances:
-      results = parallel_utils.parallel_process(
-          action_name="make_device_ready",
-          fcn=self._make_devices_ready_single_device,
-          devices=device_instances,
-          parameter_dicts=parameter_dicts)
-
-      # combine results of parallel calls
-      for result in results:
-        if isinstance(result, dict):
-          combined_results.update(result)
-        else:
-          logger.info(result)
+      with parallel_utils.ParallelExecutor() as executor:
+        executor.submit_devices(self._make_devices_ready_single_device,
+                                device_instances, parameter_dicts)
+        # combine results of parallel calls
+        for call_result in executor.as_completed():
+          if call_result.error:
+            combined_results[call_result.device_name] = (
+                self._construct_health_dict_from_call_error(call_result.error))
+          elif isinstance(call_result.result, dict):
+            combined_results.update(call_result.result)
+          else:
+            logger.info(call_result.result)
 
     # execute testbed health checks if testing props contain property keys that
     # exist in Testbed.PROP_TO_HEALTH_CHECK
@@ -537,7 +542,8 @@ class FireManager(manager.Manager):
     registered_cli_packages = self.config.get("cli_extension_packages", [])
     if package_name not in registered_cli_packages:
       if package_registrar.import_and_register(package_name,
-                                               include_cli_instructions=True):
+                                               include_cli_instructions=True,
+                                               strict=True):
         self._set_config_prop("cli_extension_packages",
                               registered_cli_packages + [package_name])
         logger.info(f"Registered package {package_name!r} with GDM CLI.")
@@ -632,6 +638,26 @@ class FireManager(manager.Manager):
     device_health["properties"] = getattr(exc, "properties", {})
     return device_health
 
+  def _construct_health_dict_from_call_error(self, call_error):
+    """Constructs a device health dict from an error of a parallel call.
+
+    Args:
+      call_error (CallError): error raised by the parallel call.
+
+    Returns:
+      dict: device health in the same format as
+        _construct_health_dict_from_exception.
+    """
+    if call_error.exception is not None:
+      return self._construct_health_dict_from_exception(call_error.exception)
+    return {
+        "is_healthy": False,
+        "unhealthy_reason": call_error.message,
+        "err_type": call_error.exception_type,
+        "checks_passed": [],
+        "properties": {}
+    }
+
   @classmethod
   def _indent_doc_lines(cls, doc_lines, indent=_DOC_INDENT_SIZE):
     """Indents docstring lines."""
@@ -16,26 +16,43 @@
 
 The CLI is generated dynamically by Python Fire:
 https://github.com/google/python-fire.
+
+If a GDM daemon is running ("gdm start-daemon"), commands are forwarded to it
+over a Unix socket and its output is streamed back. The daemon keeps a Manager
+and the devices it opened alive between commands, which avoids paying the
+Manager and device creation cost on every invocation. Modules which are only
+needed to execute commands in this process (Python Fire, the Manager and
+extension packages) are imported lazily, so forwarded commands don't pay for
+importing them.
 """
+import subprocess
 import sys
-from typing import Dict, Optional, Sequence
-
-import fire
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import gazoo_device
+from gazoo_device import config
 from gazoo_device import errors
 from gazoo_device import extensions
-from gazoo_device import fire_manager
-from gazoo_device import fire_patch
+from gazoo_device import gdm_client
 from gazoo_device import gdm_logger
-from gazoo_device import package_registrar
 
 logger = gdm_logger.get_logger()
 
 VERSION_FLAG = "-v"
 FLAG_MARKER = "--"
 OMIT_FLAGS = ["help"]
+NO_DAEMON_FLAG = "--no-daemon"
+# Runs conformance checks of extension packages even if they passed before.
+STRICT_FLAG = "--strict"
+START_DAEMON_COMMAND = "start-daemon"
+STOP_DAEMON_COMMAND = "stop-daemon"
 _CLI_NAME = "gdm"
+# Commands which change the CLI itself are never forwarded to the daemon.
+_DAEMON_LOCAL_COMMANDS = ("register", "unregister", "update-gdm")
+_DAEMON_MODULE = "gazoo_device.gdm_daemon"
+_DAEMON_START_TIMEOUT = 30
+_DAEMON_POLL_INTERVAL = 0.1
 
 
 def execute_command(command: Optional[str] = None,
@@ -55,28 +72,116 @@ def execute_command(command: Optional[str] = None,
     args = command.split()
   else:
     args = sys.argv[1:]
-  flags = _get_flags(args)
-  commands = [arg for arg in args if arg[len(FLAG_MARKER):] not in flags.keys()]
+  flags, commands = parse_args(args)
 
+  # pylint: disable=g-import-not-at-top
+  from gazoo_device import fire_manager
+  # pylint: enable=g-import-not-at-top
   # Instantiate FireManager instance with provided flags
   manager_inst = fire_manager.FireManager(**flags)
 
   # Execute CLI command
+  try:
+    return run_fire_command(manager_inst, commands, cli_name=cli_name)
+  finally:
+    manager_inst.close()
+
+
+def run_fire_command(manager_inst: Any,
+                     commands: Sequence[str],
+                     cli_name: str = _CLI_NAME) -> int:
+  """Executes the CLI command through Python Fire using the given manager.
+
+  Args:
+    manager_inst: fire_manager.FireManager instance to execute the command
+      with.
+    commands: CLI arguments with flags removed.
+    cli_name: Name of the CLI executable ("gdm").
+
+  Returns:
+    Error code: 0 if command was successful, non-zero otherwise.
+  """
+  # pylint: disable=g-import-not-at-top
+  import fire
+  from gazoo_device import fire_patch
+  # pylint: enable=g-import-not-at-top
   exit_code = 0
   try:
     fire_patch.apply_patch()
-    fire.Fire(manager_inst, commands, name=cli_name)
+    fire.Fire(manager_inst, list(commands), name=cli_name)
   except (ValueError, errors.DeviceError) as err:
     logger.error((repr(err)))
     exit_code = 1
   except KeyboardInterrupt:
     exit_code = 2
-  finally:
-    manager_inst.close()
-
   return exit_code
 
 
+def start_daemon(socket_path: str = config.DEFAULT_DAEMON_SOCKET) -> int:
+  """Starts the GDM daemon in the background.
+
+  Args:
+    socket_path: path to the Unix socket the daemon listens on.
+
+  Returns:
+    Error code: 0 if the daemon is running, non-zero otherwise.
+  """
+  if gdm_client.is_daemon_running(socket_path):
+    logger.info(f"GDM daemon is already running ({socket_path}).")
+    return 0
+  subprocess.Popen(
+      [sys.executable, "-m", _DAEMON_MODULE, socket_path],
+      stdin=subprocess.DEVNULL,
+      stdout=subprocess.DEVNULL,
+      stderr=subprocess.DEVNULL,
+      start_new_session=True)
+  deadline = time.time() + _DAEMON_START_TIMEOUT
+  while time.time() < deadline:
+    if gdm_client.is_daemon_running(socket_path):
+      logger.info(f"GDM daemon started ({socket_path}).")
+      return 0
+    time.sleep(_DAEMON_POLL_INTERVAL)
+  logger.error(f"GDM daemon failed to start within {_DAEMON_START_TIMEOUT}s. "
+               f"See {config.DEFAULT_LOG_FILE} for details.")
+  return 1
+
+
+def stop_daemon(socket_path: str = config.DEFAULT_DAEMON_SOCKET) -> int:
+  """Stops the GDM daemon, closing all devices it keeps open.
+
+  Args:
+    socket_path: path to the Unix socket of the daemon.
+
+  Returns:
+    Error code: 0 if the daemon is not running anymore, non-zero otherwise.
+  """
+  daemon_socket = gdm_client.connect_to_daemon(socket_path)
+  if daemon_socket is None:
+    logger.info("GDM daemon is not running.")
+    return 0
+  with daemon_socket:
+    gdm_client.send_daemon_message(daemon_socket, {"stop": True})
+    for message in gdm_client.receive_daemon_messages(daemon_socket):
+      if "exit_code" in message:
+        break
+  logger.info("GDM daemon stopped.")
+  return 0
+
+
+def parse_args(args: Sequence[str]) -> Tuple[Dict[str, bool], List[str]]:
+  """Splits CLI args into flags and commands.
+
+  Args:
+    args: CLI arguments provided by the user.
+
+  Returns:
+    Parsed flags and the CLI arguments with the flags removed.
+  """
+  flags = _get_flags(args)
+  commands = [arg for arg in args if arg[len(FLAG_MARKER):] not in flags.keys()]
+  return flags, commands
+
+
 def _get_flags(args: Sequence[str]) -> Dict[str, bool]:
   """Parses flags out of array of CLI args.
 
@@ -108,7 +213,37 @@ def main(command: Optional[str] = None) -> int:
   Returns:
     Error code: 0 if command was successful, non-zero otherwise.
   """
-  package_registrar.import_and_register_cli_extension_packages()
+  args = command.split() if command else sys.argv[1:]
+  flags, commands = parse_args(args)
+  cli_command = commands[0] if commands else None
+  if cli_command == START_DAEMON_COMMAND:
+    return start_daemon()
+  if cli_command == STOP_DAEMON_COMMAND:
+    return stop_daemon()
+  # These flags are handled here rather than by FireManager.
+  local_flags = [flag for flag in (NO_DAEMON_FLAG, STRICT_FLAG)
+                 if flag[len(FLAG_MARKER):] in flags]
+  strict = STRICT_FLAG in local_flags
+  if local_flags:
+    for flag in local_flags:
+      args.remove(flag)
+    if command:
+      command = " ".join(args)
+    else:
+      sys.argv = sys.argv[:1] + args
+  elif (VERSION_FLAG not in args and
+        cli_command not in _DAEMON_LOCAL_COMMANDS and
+        not gdm_client.is_long_running_command(commands)):
+    exit_code = gdm_client.execute_command_in_daemon(
+        args, config.DEFAULT_DAEMON_SOCKET)
+    if exit_code is not None:
+      return exit_code
+
+  # pylint: disable=g-import-not-at-top
+  from gazoo_device import package_registrar
+  # pylint: enable=g-import-not-at-top
+  extensions.load(strict=strict)
+  package_registrar.import_and_register_cli_extension_packages(strict=strict)
 
   if VERSION_FLAG in sys.argv or (command and VERSION_FLAG in command):
     logger.info(f"Gazoo Device Manager {gazoo_device.version}")
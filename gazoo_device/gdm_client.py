@@ -0,0 +1,121 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client of the GDM daemon, which forwards CLI commands to it.
+
+This module is on the path of every forwarded command, so it only imports the
+standard library. Commands forwarded to a running daemon therefore don't pay
+for importing the Manager, Python Fire or the device controllers.
+"""
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+# Long-running commands aren't forwarded, as the daemon executes one command
+# at a time.
+LONG_RUNNING_COMMANDS = ("log",)
+# Device methods which take minutes. Same as
+# property_cache.INVALIDATING_METHODS, which isn't imported to keep this
+# module fast to import.
+LONG_RUNNING_DEVICE_METHODS = ("factory_reset", "flash_device", "reboot",
+                               "recover", "upgrade", "upgrade_over_the_wire")
+_MESSAGE_ENCODING = "utf-8"
+
+
+def execute_command_in_daemon(args: Sequence[str],
+                              socket_path: str) -> Optional[int]:
+  """Forwards the CLI command to the GDM daemon and streams its output.
+
+  Args:
+    args: CLI arguments (including flags).
+    socket_path: path to the Unix socket of the daemon.
+
+  Returns:
+    Error code of the command, or None if the daemon isn't running or is
+    busy executing another command.
+  """
+  daemon_socket = connect_to_daemon(socket_path)
+  if daemon_socket is None:
+    return None
+  with daemon_socket:
+    send_daemon_message(daemon_socket, {"args": list(args),
+                                        "cwd": os.getcwd()})
+    try:
+      for message in receive_daemon_messages(daemon_socket):
+        if message.get("busy"):
+          return None
+        if "stdout" in message:
+          sys.stdout.write(message["stdout"])
+          sys.stdout.flush()
+        if "stderr" in message:
+          sys.stderr.write(message["stderr"])
+          sys.stderr.flush()
+        if "exit_code" in message:
+          return message["exit_code"]
+    except KeyboardInterrupt:
+      return 2
+  sys.stderr.write("GDM daemon closed the connection before the command "
+                   "completed.\n")
+  return 1
+
+
+def is_long_running_command(commands: Sequence[str]) -> bool:
+  """Returns whether the CLI command may keep the daemon busy for long.
+
+  Args:
+    commands: CLI arguments without flags.
+  """
+  if commands and commands[0] in LONG_RUNNING_COMMANDS:
+    return True
+  return any(command.replace("-", "_") in LONG_RUNNING_DEVICE_METHODS
+             for command in commands)
+
+
+def receive_daemon_messages(
+    daemon_socket: socket.socket) -> Iterator[Dict[str, Any]]:
+  """Yields messages received over a daemon socket until it is closed."""
+  with daemon_socket.makefile("r", encoding=_MESSAGE_ENCODING) as socket_file:
+    for line in socket_file:
+      yield json.loads(line)
+
+
+def send_daemon_message(daemon_socket: socket.socket,
+                        message: Dict[str, Any]) -> None:
+  """Sends a message over a daemon socket as a line of JSON."""
+  daemon_socket.sendall(
+      (json.dumps(message) + "\n").encode(_MESSAGE_ENCODING))
+
+
+def connect_to_daemon(socket_path: str) -> Optional[socket.socket]:
+  """Returns a socket connected to the daemon or None if it isn't running."""
+  if not os.path.exists(socket_path):
+    return None
+  daemon_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    daemon_socket.connect(socket_path)
+  except OSError:
+    daemon_socket.close()
+    return None
+  return daemon_socket
+
+
+def is_daemon_running(socket_path: str) -> bool:
+  """Returns whether the GDM daemon accepts connections on the socket."""
+  daemon_socket = connect_to_daemon(socket_path)
+  if daemon_socket is None:
+    return False
+  daemon_socket.close()
+  return True
@@ -0,0 +1,363 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""GDM daemon which executes CLI commands on behalf of "gdm" clients.
+
+Start the daemon with "gdm start-daemon" and stop it with "gdm stop-daemon".
+While the daemon is running, "gdm" forwards commands to it over a Unix socket
+instead of creating its own Manager, and the daemon streams the command output
+back. The daemon keeps a single Manager and the devices opened by "gdm issue"
+and "gdm exec" alive between commands, so repeated commands such as
+"gdm issue <device> - shell ..." only pay for device creation and health checks
+once. Devices are closed when a command fails, when the configuration files
+change, and after DEFAULT_DEVICE_IDLE_TIMEOUT seconds without commands.
+
+The daemon executes one command at a time. A client which connects while a
+command is executing is told that the daemon is busy and executes its command
+itself, as do long-running commands such as "gdm log" or device reboots, which
+are never forwarded (see gdm_client.is_long_running_command()).
+Pass "--no-daemon" to "gdm" to execute a command without the daemon.
+"""
+import contextlib
+import io
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from gazoo_device import config
+from gazoo_device import fire_manager
+from gazoo_device import gdm_cli
+from gazoo_device import gdm_client
+from gazoo_device import gdm_logger
+from gazoo_device import package_registrar
+
+logger = gdm_logger.get_logger()
+
+DEFAULT_DEVICE_IDLE_TIMEOUT = 300  # Seconds.
+_LISTEN_BACKLOG = 16
+_POLL_INTERVAL = 1  # Seconds between checks for idle devices.
+_SUPPORTED_FLAGS = ("debug", "dev_debug", "quiet")
+
+
+class _ClientConnection:
+  """Thread-safe sender of messages to a daemon client."""
+
+  def __init__(self, client_socket: socket.socket):
+    self._client_socket = client_socket
+    self._lock = threading.Lock()
+    self.disconnected = False
+
+  def send(self, message: Dict[str, Any]) -> None:
+    """Sends the message. Messages to disconnected clients are dropped."""
+    with self._lock:
+      if self.disconnected:
+        return
+      try:
+        gdm_client.send_daemon_message(self._client_socket, message)
+      except OSError:
+        self.disconnected = True
+
+
+class _ClientStream(io.TextIOBase):
+  """Text stream which forwards writes to a daemon client."""
+
+  def __init__(self, connection: _ClientConnection, stream_name: str):
+    super().__init__()
+    self._connection = connection
+    self._stream_name = stream_name
+
+  def writable(self) -> bool:
+    return True
+
+  def write(self, text: str) -> int:
+    if text:
+      self._connection.send({self._stream_name: text})
+    return len(text)
+
+
+class _DaemonFireManager(fire_manager.FireManager):
+  """FireManager which keeps devices open between CLI commands."""
+
+  def create_device(self,
+                    identifier,
+                    new_alias=None,
+                    log_file_name=None,
+                    log_directory=None,
+                    log_to_stdout=None,
+                    skip_recover_device=False,
+                    make_device_ready="on",
+                    filters=None,
+                    log_name_prefix=""):
+    """Returns the device if it is already open, otherwise creates it.
+
+    Health checks only run when the device is created.
+
+    Args:
+      identifier (str): The identifier string to identify a single device.
+      new_alias (str): A string to replace device's alias kept in file.
+      log_file_name (str): A string log file name to use for log results.
+      log_directory (str): A directory path to use for storing log file.
+      log_to_stdout (bool): Enable streaming of log results to stdout
+        (DEPRECATED).
+      skip_recover_device (bool): Don't recover device if it fails ready
+        check.
+      make_device_ready (str): "on", "check_only", "off". Toggles
+        make_device_ready.
+      filters (list): paths to custom Parser filter files or directories to
+        use.
+      log_name_prefix (str): string to prepend to log filename.
+
+    Returns:
+      The device found or created by the identifier specified.
+    """
+    if not identifier.endswith("sim"):
+      device_name = self._get_device_name(identifier, raise_error=True)
+      device = self._open_devices.get(device_name)
+      if device is not None:
+        if (new_alias is None and log_file_name is None and
+            log_directory is None and filters is None and
+            not log_name_prefix):
+          return device
+        device.close()
+    return super().create_device(
+        identifier,
+        new_alias=new_alias,
+        log_file_name=log_file_name,
+        log_directory=log_directory,
+        log_to_stdout=log_to_stdout,
+        skip_recover_device=skip_recover_device,
+        make_device_ready=make_device_ready,
+        filters=filters,
+        log_name_prefix=log_name_prefix)
+
+
+class GdmDaemon:
+  """Executes CLI commands received over a Unix socket with a warm Manager."""
+
+  def __init__(self,
+               manager_inst: fire_manager.FireManager,
+               socket_path: str = config.DEFAULT_DAEMON_SOCKET,
+               device_idle_timeout: float = DEFAULT_DEVICE_IDLE_TIMEOUT):
+    """Initializes the daemon.
+
+    Args:
+      manager_inst: FireManager instance to execute commands with. The caller
+        is responsible for closing it.
+      socket_path: path of the Unix socket to listen on.
+      device_idle_timeout: open devices are closed after this many seconds
+        without commands.
+    """
+    self.socket_path = socket_path
+    self._manager = manager_inst
+    self._device_idle_timeout = device_idle_timeout
+    self._last_command_time = time.time()
+    self._config_mtimes = self._get_config_mtimes()
+    self._stop_requested = False
+    self._command_thread = None
+
+  def serve_forever(self) -> None:
+    """Serves commands until a client requests the daemon to stop."""
+    server_socket = self._listen()
+    logger.info(f"GDM daemon (pid {os.getpid()}) listening on "
+                f"{self.socket_path}")
+    try:
+      while not self._stop_requested:
+        try:
+          client_socket, _ = server_socket.accept()
+        except socket.timeout:
+          if not self._is_busy():
+            self._close_idle_devices()
+          continue
+        client_socket.settimeout(None)
+        self._handle_client(client_socket)
+    finally:
+      server_socket.close()
+      if self._command_thread is not None:
+        self._command_thread.join()
+      if os.path.exists(self.socket_path):
+        os.remove(self.socket_path)
+      logger.info("GDM daemon stopped")
+
+  def _close_idle_devices(self) -> None:
+    """Closes open devices if no commands were received for a while."""
+    if (self._manager.get_open_devices() and
+        time.time() - self._last_command_time > self._device_idle_timeout):
+      logger.info("Closing devices idle for over {}s: {}".format(
+          self._device_idle_timeout, self._manager.get_open_device_names()))
+      self._manager.close_open_devices()
+
+  def _execute(self, args: Sequence[str], cwd: Optional[str],
+               connection: _ClientConnection) -> int:
+    """Executes the CLI command and streams its output to the client.
+
+    Args:
+      args: CLI arguments (including flags).
+      cwd: working directory of the client.
+      connection: connection to the client.
+
+    Returns:
+      Error code: 0 if command was successful, non-zero otherwise.
+    """
+    flags, commands = gdm_cli.parse_args(args)
+    stdout = _ClientStream(connection, "stdout")
+    stderr = _ClientStream(connection, "stderr")
+    unsupported_flags = [flag for flag in flags
+                         if flag not in _SUPPORTED_FLAGS]
+    if unsupported_flags:
+      stderr.write(f"Unsupported flags: {unsupported_flags}\n")
+      return 1
+    self._reload_configuration_if_changed()
+
+    handler = logging.StreamHandler(stdout)
+    if flags.get("debug") or flags.get("dev_debug"):
+      handler.setLevel(logging.DEBUG)
+      handler.setFormatter(
+          logging.Formatter(gdm_logger.FMT, datefmt=gdm_logger.DATEFMT))
+    else:
+      handler.setLevel(logging.INFO)
+      handler.setFormatter(logging.Formatter("%(message)s"))
+    gdm_logger.add_handler(handler)
+    previous_level = logger.level
+    logger.level = logging.WARNING if flags.get("quiet") else logging.DEBUG
+    previous_cwd = os.getcwd()
+    try:
+      if cwd:
+        os.chdir(cwd)
+      with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+          stderr):
+        exit_code = gdm_cli.run_fire_command(self._manager, commands)
+    except SystemExit as err:  # Raised by Fire for usage errors and help.
+      exit_code = err.code if isinstance(err.code, int) else int(
+          err.code is not None)
+    except Exception as err:  # pylint: disable=broad-except
+      logger.error(f"Command {list(args)} failed: {err!r}")
+      exit_code = 1
+    finally:
+      gdm_logger.flush_queue_messages()
+      gdm_logger.remove_handler(handler)
+      logger.level = previous_level
+      os.chdir(previous_cwd)
+    if exit_code != 0:
+      # Devices may be left in a bad state. Recreate them on the next command.
+      self._manager.close_open_devices()
+    return exit_code
+
+  def _get_config_mtimes(self) -> List[Optional[float]]:
+    """Returns modification times of the Manager configuration files."""
+    mtimes = []
+    for file_name in (self._manager.device_file_name,
+                      self._manager.device_options_file_name,
+                      self._manager.testbeds_file_name,
+                      self._manager.gdm_config_file_name):
+      try:
+        mtimes.append(os.path.getmtime(file_name))
+      except (OSError, TypeError):
+        mtimes.append(None)
+    return mtimes
+
+  def _handle_client(self, client_socket: socket.socket) -> None:
+    """Receives a request from the client and starts executing it.
+
+    Args:
+      client_socket: socket connected to the client. Closed once the request
+        is handled.
+    """
+    messages = gdm_client.receive_daemon_messages(client_socket)
+    try:
+      message = next(messages, None)
+    except (OSError, ValueError) as err:
+      logger.warning(f"Ignoring invalid GDM daemon request: {err!r}")
+      message = None
+    finally:
+      messages.close()
+    connection = _ClientConnection(client_socket)
+    if message and message.get("stop"):
+      self._stop_requested = True
+      connection.send({"exit_code": 0})
+    elif message and self._is_busy():
+      connection.send({"busy": True})
+    elif message:
+      self._command_thread = threading.Thread(
+          target=self._handle_command, args=(client_socket, message),
+          name="gdm_daemon_command", daemon=True)
+      self._command_thread.start()
+      return
+    client_socket.close()
+
+  def _handle_command(self, client_socket: socket.socket,
+                      message: Dict[str, Any]) -> None:
+    """Executes the command of a client and sends it the exit code."""
+    with client_socket:
+      connection = _ClientConnection(client_socket)
+      exit_code = self._execute(message.get("args", []), message.get("cwd"),
+                                connection)
+      connection.send({"exit_code": exit_code})
+    self._last_command_time = time.time()
+    # The command itself may have updated the configuration files.
+    self._config_mtimes = self._get_config_mtimes()
+
+  def _is_busy(self) -> bool:
+    """Returns whether a command is being executed."""
+    return self._command_thread is not None and self._command_thread.is_alive()
+
+  def _listen(self) -> socket.socket:
+    """Returns a server socket bound to the daemon socket path."""
+    socket_directory = os.path.dirname(self.socket_path)
+    if socket_directory and not os.path.isdir(socket_directory):
+      os.makedirs(socket_directory)
+    if os.path.exists(self.socket_path):  # Left behind by a killed daemon.
+      os.remove(self.socket_path)
+    server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server_socket.bind(self.socket_path)
+    os.chmod(self.socket_path, 0o600)
+    server_socket.listen(_LISTEN_BACKLOG)
+    server_socket.settimeout(_POLL_INTERVAL)
+    return server_socket
+
+  def _reload_configuration_if_changed(self) -> None:
+    """Reloads the configuration if it was changed by another process."""
+    config_mtimes = self._get_config_mtimes()
+    if config_mtimes != self._config_mtimes:
+      logger.debug("Configuration files changed. Reloading configuration.")
+      self._manager.close_open_devices()
+      self._manager.refresh_configuration()
+      self._config_mtimes = config_mtimes
+
+
+def main(socket_path: str = config.DEFAULT_DAEMON_SOCKET) -> int:
+  """Runs the GDM daemon until it is stopped.
+
+  Args:
+    socket_path: path of the Unix socket to listen on.
+
+  Returns:
+    Error code: 0 if the daemon exited normally.
+  """
+  package_registrar.import_and_register_cli_extension_packages()
+  manager_inst = _DaemonFireManager()
+  # Command output is streamed to clients instead.
+  gdm_logger.silence_progress_messages()
+  try:
+    GdmDaemon(manager_inst, socket_path=socket_path).serve_forever()
+  finally:
+    manager_inst.close()
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main(*sys.argv[1:]))
@@ -14,6 +14,7 @@
 
 """Module for GDM logger."""
 import atexit
+import json
 import logging
 import logging.handlers
 import multiprocessing as mp
@@ -54,6 +55,28 @@ def add_handler(handler):
   logger.logging_thread.add_handler(handler)  # pytype: disable=attribute-error
 
 
+def add_structured_log_file(file_path, log_level=logging.DEBUG):
+  """Adds a handler which writes messages to a file as JSON lines.
+
+  Each line is a JSON object with keys "time" (seconds since epoch), "level",
+  "process", "logger", "file", "line" and "message" (and "exception" if an
+  exception was logged).
+
+  Args:
+      file_path (str): path of the file to append to.
+      log_level (int): Integer log level, e.g. logging.DEBUG (value is 10)
+
+  Returns:
+      logging.Handler: handler added. Pass it to remove_handler() to stop
+      writing to the file.
+  """
+  handler = logging.FileHandler(file_path, mode='a')
+  handler.setLevel(log_level)
+  handler.setFormatter(JsonLinesFormatter())
+  add_handler(handler)
+  return handler
+
+
 def create_queue_handler(log_level):
   """Adds a QueueHandler to the top-level 'gazoo_device_manager' logger.
 
@@ -66,7 +89,8 @@ def create_queue_handler(log_level):
   """
   logger = get_logger()
   handler = multiprocess_logging.QueueHandler(
-      logger.logging_queue)  # pytype: disable=attribute-error
+      logger.logging_queue,  # pytype: disable=attribute-error
+      min_level=logger.logging_thread.min_level)  # pytype: disable=attribute-error
   handler.setLevel(log_level)
   logger.handlers = [handler]
 
@@ -190,6 +214,7 @@ def stream_debug():
     fmt = logging.Formatter(FMT, datefmt=DATEFMT)
     _stdout_handler.setFormatter(fmt)
     _stdout_handler.setLevel(logging.DEBUG)
+    get_logger().logging_thread.update_min_level()  # pytype: disable=attribute-error
 
 
 def _brace_format_log(self,
@@ -200,16 +225,82 @@ def _brace_format_log(self,
                       extra=None,
                       **kwargs):
   """Enables brace logging for GDM Loggers (by overriding Logger._log)."""
-  # Combines msg with args and kwargs using .format(),
-  # saving special kwargs exc_info and extra for original _log method
+  # Skip creating records which no handler would receive.
+  if _is_dropped(self, level):
+    return
+  # Combines msg with args and kwargs using .format() once a handler needs the
+  # message, saving special kwargs exc_info and extra for original _log method
   if args or kwargs:
-    formatted_msg = str(msg).format(*args, **kwargs)
+    msg = _BraceMessage(msg, args, kwargs)
   else:
-    formatted_msg = str(msg)
+    msg = str(msg)
 
   new_kwargs = dict(exc_info=exc_info, extra=extra)
 
-  self._original_log(level, formatted_msg, (), **new_kwargs)
+  self._original_log(level, msg, (), **new_kwargs)
+
+
+def _is_dropped(logger, level):
+  """Returns whether all handlers of the logger drop messages of the level.
+
+  Only QueueHandlers are considered: a logger with any other handler (or
+  without handlers) never drops messages.
+
+  Args:
+      logger (logging.Logger): logger the message is logged with.
+      level (int): Integer log level, e.g. logging.DEBUG (value is 10)
+
+  Returns:
+      bool: True if the message can be skipped.
+  """
+  has_queue_handler = False
+  while logger:
+    for handler in logger.handlers:
+      if not (isinstance(handler, multiprocess_logging.QueueHandler) and
+              handler.is_dropped(level)):
+        return False
+      has_queue_handler = True
+    if not logger.propagate:
+      break
+    logger = logger.parent
+  return has_queue_handler
+
+
+class _BraceMessage(object):
+  """Log message which is combined with its args using .format() on demand."""
+
+  __slots__ = ('_msg', '_args', '_kwargs', '_formatted_msg')
+
+  def __init__(self, msg, args, kwargs):
+    self._msg = msg
+    self._args = args
+    self._kwargs = kwargs
+    self._formatted_msg = None
+
+  def __str__(self):
+    if self._formatted_msg is None:
+      self._formatted_msg = str(self._msg).format(*self._args, **self._kwargs)
+    return self._formatted_msg
+
+
+class JsonLinesFormatter(logging.Formatter):
+  """Formats messages as single-line JSON objects."""
+
+  def format(self, record):
+    entry = {
+        'time': record.created,
+        'level': record.levelname,
+        'process': record.process,
+        'logger': record.name,
+        'file': record.filename,
+        'line': record.lineno,
+        'message': record.getMessage(),
+    }
+    if record.exc_info and not record.exc_text:
+      record.exc_text = self.formatException(record.exc_info)
+    if record.exc_text:
+      entry['exception'] = record.exc_text
+    return json.dumps(entry)
 
 
 class LogData(object):
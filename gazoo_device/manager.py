@@ -19,6 +19,7 @@
   - get props and sets optional props
 """
 import atexit
+import contextlib
 import copy
 import datetime
 import difflib
@@ -47,16 +48,24 @@ from gazoo_device import gdm_logger
 from gazoo_device.capabilities import event_parser_default
 from gazoo_device.log_parser import LogParser
 from gazoo_device.switchboard import communication_types
+from gazoo_device.switchboard import mp_manager_pool
 from gazoo_device.switchboard import switchboard
+from gazoo_device.switchboard import switchboard_process
 
 from gazoo_device.usb_port_map import UsbPortMap
 from gazoo_device.utility import common_utils
+from gazoo_device.utility import config_store
+from gazoo_device.utility import detect_cache
 from gazoo_device.utility import host_utils
 from gazoo_device.utility import parallel_utils
 from gazoo_device.utility import usb_utils
 
 logger = gdm_logger.get_logger()
 
+# gdm.json keys which locate the other config files and the log directory.
+_CONFIG_FILE_KEYS = ("device_file_name", "device_options_file_name",
+                     "testbeds_file_name", "log_directory")
+
 
 class Manager():
   """Manages the setup and communication of smart devices."""
@@ -75,8 +84,12 @@ class Manager():
                stdout_logging=True,
                max_log_size=100000000):
 
+    # Register deferred extension packages before any threads use them.
+    extensions.load()
     self._open_devices = {}
     self.max_log_size = max_log_size
+    # Switchboards reuse multiprocessing.Manager servers of closed switchboards.
+    self._mp_manager_pool = mp_manager_pool.ManagerPool()
     # b/141476623: exception queue must not share multiprocessing.Manager()
     common_utils.run_before_fork()
     self._exception_queue_manager = multiprocessing.Manager()
@@ -111,6 +124,9 @@ class Manager():
     self.device_options_file_name = None
     self.testbeds_file_name = None
     self.log_directory = None
+    self._config_stores = []
+    self._config_listener = common_utils.MethodWeakRef(
+        self._on_config_file_changed)
     self._load_configuration(device_file_name, device_options_file_name,
                              testbeds_file_name, gdm_config_file_name,
                              log_directory, adb_path)
@@ -155,6 +171,7 @@ class Manager():
   def close(self):
     """Stops logger and closes all devices."""
     self.close_open_devices()
+    self._detach_config_stores()
     gdm_logger.flush_queue_messages()
     gdm_logger.silence_progress_messages()
 
@@ -168,11 +185,74 @@ class Manager():
     if hasattr(self, "_exception_queue_manager"):
       self._exception_queue_manager.shutdown()
       del self._exception_queue_manager
+    if hasattr(self, "_mp_manager_pool"):
+      self._mp_manager_pool.close()
+
+  def close_open_devices(self, timeout=switchboard_process.STOP_TIMEOUT):
+    """Closes all open devices.
+
+    All capabilities other than the switchboard are closed first, while the
+    switchboards are still running, so that their close hooks can still
+    communicate with the devices and write log notes. Switchboard processes
+    of all open devices are then signalled to stop at once and share a single
+    deadline. Processes which are still running at the deadline are
+    terminated. Finally each device is closed; close() overrides of device
+    classes therefore run after the switchboard processes have stopped.
+
+    Args:
+      timeout (float): seconds all switchboard processes have to stop.
 
-  def close_open_devices(self):
-    """Closes all open devices."""
-    for device in list(self._open_devices.values()):
+    Returns:
+      dict: names of terminated (straggler) processes by device name.
+    """
+    devices = list(self._open_devices.values())
+    for device in devices:
+      for capability_name in device.get_supported_capabilities():
+        if capability_name == "switchboard":
+          continue
+        try:
+          device.reset_capability(capability_name)
+        except Exception as err:  # pylint: disable=broad-except
+          logger.debug("{} failed to close capability {}: {!r}".format(
+              device.name, capability_name, err))
+
+    switchboards = {}
+    for device in devices:
+      get_switchboard = getattr(device, "_get_switchboard_if_initialized", None)
+      device_switchboard = get_switchboard() if get_switchboard else None
+      if device_switchboard is None:
+        continue
+      try:
+        device_switchboard.request_stop_processes()
+      except Exception as err:  # pylint: disable=broad-except
+        logger.debug("{} failed to signal switchboard processes to stop: {!r}"
+                     .format(device.name, err))
+      else:
+        switchboards[device.name] = device_switchboard
+
+    deadline = time.time() + timeout
+    device_names = {}
+    for device_name, device_switchboard in switchboards.items():
+      for process in device_switchboard.get_processes():
+        device_names[process] = device_name
+    stragglers = {}
+    try:
+      terminated_processes = switchboard_process.stop_processes(
+          list(device_names), deadline)
+    except Exception as err:  # pylint: disable=broad-except
+      logger.debug("Failed to stop switchboard processes: {!r}".format(err))
+      terminated_processes = []
+    for process in terminated_processes:
+      stragglers.setdefault(device_names[process], []).append(
+          process.process_name)
+    if stragglers:
+      logger.warning(
+          "Switchboard processes did not stop within {}s and were terminated: "
+          "{}".format(timeout, stragglers))
+
+    for device in devices:
       device.close()
+    return stragglers
 
   def close_device(self, identifier):
     """Closes open device via identifier.
@@ -472,6 +552,7 @@ class Manager():
           "parser": event_parser,
           "exception_queue": self._exception_queue,
           "max_log_size": self.max_log_size,
+          "mp_manager_pool": self._mp_manager_pool,
       }
       switchboard_kwargs.update(additional_kwargs)
 
@@ -495,6 +576,7 @@ class Manager():
         tuple[dict, dict]: if save_changes is False, returns the new device
         configs: (devices, device_options).
     """
+    old_configs = self._get_device_configs()
     devices = copy.deepcopy(self.persistent_dict)
     device_options = copy.deepcopy(self.options_dict)
     other_devices = copy.deepcopy(self.other_persistent_dict)
@@ -513,11 +595,9 @@ class Manager():
 
     device_config, device_options_config = self._make_device_configs(
         devices, other_devices, device_options, other_device_options)
-    if save_changes:  # save and reload the config.
-      self._save_config_to_file(device_config, self.device_file_name)
-      self._save_config_to_file(device_options_config,
-                                self.device_options_file_name)
-      self.reload_configuration()
+    if save_changes:  # Config is reloaded when the files change.
+      self._save_device_config_changes(device_config, device_options_config,
+                                       old_configs)
       logger.info("Deleted {}".format(device_name_arg))
     else:
       return (device_config, device_options_config)
@@ -527,18 +607,23 @@ class Manager():
              static_ips=None,
              log_directory=None,
              save_changes=True,
-             device_configs=None):
+             device_configs=None,
+             use_detect_cache=True):
     """Detect new devices not present in config files.
 
     Args:
        force_overwrite (bool): Erase the current configs completely and
          re-detect everything.
-       static_ips (list): list of static ips to detect.
+       static_ips (list): list of static ips or CIDR ranges (such as
+         "192.168.1.0/24") to detect.
        log_directory (str): alternative location to store log from default.
        save_changes (bool): if True, updates the config files.
        device_configs (None or tuple[dict, dict]): device configs
          (persistent, options) to pass to the device detector. If None, uses
          the current Manager configs.
+       use_detect_cache (bool): if True, reuse detection query responses of
+         hardware identified by a previous detection instead of querying it
+         again. Use clear_detect_cache() to invalidate cached responses.
 
     Returns:
         None: if save_changes is True.
@@ -549,9 +634,7 @@ class Manager():
        Overwrite saves the files to a backup directory.
     """
     if device_configs is None:
-      device_config, options_config = self._make_device_configs(
-          self.persistent_dict, self.other_persistent_dict, self.options_dict,
-          self.other_options_dict)
+      device_config, options_config = self._get_device_configs()
     else:
       device_config, options_config = device_configs
 
@@ -574,6 +657,7 @@ class Manager():
       if save_changes:
         self.overwrite_configs()
       device_config, options_config = self._make_device_configs({}, {}, {}, {})
+    old_configs = self._get_device_configs()
 
     detector = device_detector.DeviceDetector(
         manager=self,
@@ -581,19 +665,29 @@ class Manager():
         persistent_configs=device_config,
         options_configs=options_config,
         supported_auxiliary_device_classes=self
-        .get_supported_auxiliary_device_classes())
+        .get_supported_auxiliary_device_classes(),
+        cache=detect_cache.DetectCache() if use_detect_cache else None)
 
     new_device_config, new_options_config = detector.detect_all_new_devices(
         static_ips)
     if save_changes:
-      self._save_config_to_file(new_device_config, self.device_file_name)
-      self._save_config_to_file(new_options_config,
-                                self.device_options_file_name)
-      self.reload_configuration()
+      self._save_device_config_changes(new_device_config, new_options_config,
+                                       old_configs)
       self.devices()
     else:
       return (new_device_config, new_options_config)
 
+  def clear_detect_cache(self, address=None):
+    """Invalidates cached detection query responses.
+
+    Args:
+        address (str): communication address (such as a serial path or an IP
+          address) to invalidate cached responses for. If None, clears the
+          whole detection cache.
+    """
+    num_removed = detect_cache.DetectCache().invalidate(address)
+    logger.info("Removed {} detection cache entries.".format(num_removed))
+
   def devices(self):
     """Prints a summary of device info.
     """
@@ -697,6 +791,50 @@ class Manager():
     device_name = self._get_device_name(identifier, category, raise_error=True)
     return self._get_device_configuration(device_name, category)
 
+  def get_device_log_lines(self, start_time, end_time=None, device_names=None,
+                           max_workers=1):
+    """Returns log lines of open devices logged in the time range.
+
+    Args:
+      start_time (datetime or float): host time of the first line to return.
+      end_time (datetime or float): host time of the last line to return. If
+        None, lines are returned until the end of the logs.
+      device_names (list): names of open devices to return log lines of. If
+        None, log lines of all open devices are returned.
+      max_workers (int): number of processes to scan rotated log files of a
+        device with.
+
+    Returns:
+      dict: log lines by device name.
+    """
+    return {
+        device.name: device.get_log_lines(
+            start_time, end_time, max_workers=max_workers)
+        for device in self._get_open_devices_by_name(device_names)
+    }
+
+  def search_device_logs(self, pattern, since=None, device_names=None,
+                         max_workers=1):
+    """Returns log lines of open devices which match the regex.
+
+    Args:
+      pattern (str): regular expression to search for.
+      since (datetime or float): host time to search from. If None, the whole
+        logs are searched.
+      device_names (list): names of open devices to search the logs of. If
+        None, logs of all open devices are searched.
+      max_workers (int): number of processes to scan rotated log files of a
+        device with.
+
+    Returns:
+      dict: matching log lines by device name.
+    """
+    return {
+        device.name: device.search_log(
+            pattern, since=since, max_workers=max_workers)
+        for device in self._get_open_devices_by_name(device_names)
+    }
+
   def get_open_device_names(self):
     """Returns a list of open device names.
 
@@ -893,14 +1031,14 @@ class Manager():
     """
     self.backup_configs()
 
-    with open(self.device_file_name, "w") as open_file:
-      json.dump({"devices": {}, "other_devices": {}}, open_file)
-    with open(self.device_options_file_name, "w") as open_file:
-      json.dump({"device_options": {}, "other_device_options": {}}, open_file)
-    with open(self.testbeds_file_name, "w") as open_file:
-      json.dump({"testbeds": {}}, open_file)
-    with open(self.gdm_config_file_name, "w") as open_file:
-      json.dump({}, open_file)
+    with self.config_transaction():
+      self._save_config_to_file({"devices": {}, "other_devices": {}},
+                                self.device_file_name)
+      self._save_config_to_file(
+          {"device_options": {}, "other_device_options": {}},
+          self.device_options_file_name)
+      self._save_config_to_file({"testbeds": {}}, self.testbeds_file_name)
+      self._save_config_to_file({}, self.gdm_config_file_name)
 
     self.reload_configuration()
 
@@ -1028,6 +1166,8 @@ class Manager():
           device_name)["persistent"]["console_port_name"]
       if host_utils.is_static_ip(comms_port):
         static_ips = [comms_port]
+      # Redetection must query the device again.
+      detect_cache.DetectCache().invalidate(comms_port)
     except errors.DeviceError as err:
       logger.info(err)
     usb_hub = None
@@ -1038,6 +1178,7 @@ class Manager():
       if original_power_mode != "sync":
         usb_hub.switch_power.set_mode("sync", hub_port)
 
+    old_configs = self._get_device_configs()
     device_configs_after_delete = self.delete(device_name, save_changes=False)
     new_device_config, new_options_config = self.detect(
         static_ips=static_ips,
@@ -1066,11 +1207,43 @@ class Manager():
       new_options_config["other_device_options"][device_name] = (
           self.other_options_dict[device_name])
 
-    self._save_config_to_file(new_device_config, self.device_file_name)
-    self._save_config_to_file(new_options_config, self.device_options_file_name)
-    self.reload_configuration()
+    self._save_device_config_changes(new_device_config, new_options_config,
+                                     old_configs)
     logger.info("Re-detected {}".format(device_name))
 
+  @contextlib.contextmanager
+  def config_transaction(self):
+    """Groups configuration updates into a single write of each config file.
+
+    Locks all config files (also against other processes) for the duration of
+    the transaction. Property updates made inside the transaction, such as
+    set_prop() calls, are written when the transaction exits.
+
+    Yields:
+      None.
+
+    Example:
+      with manager.config_transaction():
+        manager.set_prop("device-1234", "alias", "dut")
+        manager.set_prop("device-1234", "usb_port", "1")
+    """
+    with contextlib.ExitStack() as stack:
+      for store in sorted(self._config_stores, key=lambda s: s.file_path):
+        stack.enter_context(store.transaction())
+      yield
+
+  def refresh_configuration(self):
+    """Reloads the parts of the configuration changed by other processes.
+
+    Unlike reload_configuration(), only reloads the sections of config files
+    which have changed since they were last read.
+    """
+    for store in self._config_stores:
+      try:
+        store.refresh()
+      except errors.DeviceError as err:
+        logger.debug(f"Keeping configuration of {store.file_path}: {err!r}")
+
   def reload_configuration(self,
                            device_file_name=None,
                            options_file_name=None,
@@ -1370,6 +1543,8 @@ class Manager():
       raise errors.DeviceError("Device identifier '{}' should be a string. "
                                "but instead it is a {}".format(
                                    str(identifier), str(type(identifier))))
+    # Pick up devices added or renamed by other processes.
+    self.refresh_configuration()
     aliases = self._get_aliases(category)
     identifier = identifier.lower()
     if identifier not in aliases:
@@ -1632,6 +1807,59 @@ class Manager():
     self._load_devices()
     self._load_other_devices()
     self._load_testbeds()
+    self._attach_config_stores()
+
+  def _attach_config_stores(self):
+    """Subscribes to changes of the current config files."""
+    self._detach_config_stores()
+    for file_name in (self.gdm_config_file_name, self.device_file_name,
+                      self.device_options_file_name, self.testbeds_file_name):
+      store = config_store.get_store(file_name)
+      if store not in self._config_stores:
+        store.add_listener(self._config_listener)
+        self._config_stores.append(store)
+
+  def _detach_config_stores(self):
+    """Unsubscribes from changes of the config files."""
+    for store in self._config_stores:
+      store.remove_listener(self._config_listener)
+    self._config_stores = []
+
+  def _on_config_file_changed(self, file_path, old_contents, new_contents):
+    """Reloads the sections of a config file which have changed.
+
+    Args:
+      file_path (str): path of the changed config file.
+      old_contents (dict): previous contents of the file.
+      new_contents (dict): new contents of the file.
+    """
+    changed_keys = config_store.get_changed_keys(old_contents, new_contents)
+    logger.debug("Reloading {} sections of {}", changed_keys, file_path)
+    if file_path == os.path.abspath(self.gdm_config_file_name):
+      for key in changed_keys:
+        # Config file locations only change on reload_configuration().
+        if key in _CONFIG_FILE_KEYS:
+          continue
+        if key in new_contents:
+          self.config[key] = new_contents[key]
+        else:
+          self.config.pop(key, None)
+        if key == config.ADB_BIN_PATH_CONFIG:
+          setattr(self, key, self.config.get(key, ""))
+    if file_path in (os.path.abspath(self.device_file_name),
+                     os.path.abspath(self.device_options_file_name)):
+      try:
+        if {config.DEVICES_KEYS[0], config.OPTIONS_KEYS[0]} & set(changed_keys):
+          self._load_devices()
+        if {config.DEVICES_KEYS[1], config.OPTIONS_KEYS[1]} & set(changed_keys):
+          self._load_other_devices()
+      except KeyError as err:
+        # The other device config file hasn't been written yet. Reload when
+        # it changes.
+        logger.debug(f"Device config files are out of sync: missing {err}")
+    if (file_path == os.path.abspath(self.testbeds_file_name) and
+        config.TESTBED_KEYS[0] in changed_keys):
+      self._load_testbeds()
 
   def _load_devices(self):
     devices = self._load_config(self.device_file_name, config.DEVICES_KEYS[0])
@@ -1717,26 +1945,7 @@ class Manager():
     Raises:
       DeviceError: Device load configuration failed.
     """
-    if not os.path.exists(file_name):
-      raise errors.DeviceError(
-          "Device load configuration failed. "
-          "File {} is not found. \n Current directory: {}".format(
-              file_name, os.getcwd()))
-
-    with open(file_name, "r") as open_file:
-      for i in range(2):
-        try:
-          conf = json.load(open_file)
-          break
-        except Exception as err:
-          msg = "Unable to parse GDM config file as a json file. {!r}".format(
-              err)
-
-          if i == 1:
-            raise errors.DeviceError(msg)
-          else:
-            logger.debug(msg)
-
+    conf = config_store.get_store(file_name).read()
     if key is None:
       return conf
     if key not in conf:
@@ -1744,6 +1953,14 @@ class Manager():
     else:
       return conf[key]
 
+  def _get_device_configs(self):
+    """Returns copies of the loaded device configs: (devices, device_options)."""
+    return self._make_device_configs(
+        copy.deepcopy(self.persistent_dict),
+        copy.deepcopy(self.other_persistent_dict),
+        copy.deepcopy(self.options_dict),
+        copy.deepcopy(self.other_options_dict))
+
   def _make_device_configs(self, devices, other_devices, device_options,
                            other_device_options):
     """Creates device configs with the provided dictionaries."""
@@ -1893,11 +2110,11 @@ class Manager():
     else:
       a_dict = self.other_devices
     a_dict[device_name]["options"][prop] = value
-    self._save_config_to_file(
-        {
-            "device_options": self.options_dict,
-            "other_device_options": self.other_options_dict
-        }, self.device_options_file_name)
+    section = self._get_options_section(device_name)
+    store = config_store.get_store(self.device_options_file_name)
+    with store.transaction() as options_config:
+      options_config.setdefault(section, {}).setdefault(device_name,
+                                                        {})[prop] = value
     return True
 
   def _remove_device_prop(self, identifier, prop):
@@ -1914,11 +2131,11 @@ class Manager():
     device_config = self.get_device_configuration(identifier)
     if prop in device_config["options"]:
       del device_config["options"][prop]
-      self._save_config_to_file(
-          {
-              "device_options": self.options_dict,
-              "other_device_options": self.other_options_dict
-          }, self.device_options_file_name)
+      device_name = device_config["persistent"]["name"]
+      section = self._get_options_section(device_name)
+      store = config_store.get_store(self.device_options_file_name)
+      with store.transaction() as options_config:
+        options_config.get(section, {}).get(device_name, {}).pop(prop, None)
     else:
       raise errors.DeviceError(
           "Property {} is not an optional property for {}.".format(
@@ -1950,17 +2167,66 @@ class Manager():
     self._type_check("prop", prop)
     self.config[prop] = value
     # save property to json file
-    self._save_config_to_file(self.config, self.gdm_config_file_name)
+    with config_store.get_store(
+        self.gdm_config_file_name).transaction() as gdm_config:
+      gdm_config[prop] = value
+
+  def _get_open_devices_by_name(self, device_names):
+    """Returns the open devices with the given names (all if None).
+
+    Raises:
+      DeviceError: if any of the devices is not open.
+    """
+    if device_names is None:
+      return self.get_open_devices()
+    return [self.get_open_device(name) for name in device_names]
+
+  def _get_options_section(self, device_name):
+    """Returns the device_options.json section of the device."""
+    if device_name in self._devices:
+      return config.OPTIONS_KEYS[0]
+    return config.OPTIONS_KEYS[1]
 
   def _save_config_to_file(self, a_dict, file_path):
     """Saves the dictionary to the given file."""
-    logger.debug("Overwriting {}", file_path)
-    config_directory = os.path.dirname(file_path)
-    temp_file_path = os.path.join(config_directory,
-                                  "temp_config_{}.json".format(os.getpid()))
-    with open(temp_file_path, "w") as open_file:
-      json.dump(a_dict, open_file, sort_keys=True, indent=4)
-    shutil.move(temp_file_path, file_path)
+    with config_store.get_store(file_path).transaction() as contents:
+      contents.clear()
+      contents.update(copy.deepcopy(a_dict))
+
+  def _save_device_config_changes(self, device_config, options_config,
+                                  old_configs):
+    """Saves device entries which differ from the old device configs.
+
+    Entries are added, replaced or removed in the latest file contents read
+    under the config lock. Entries which haven't changed are left as they are
+    on disk, so changes made by other processes since the configs were loaded
+    (such as a set-prop or an alias change) aren't overwritten.
+
+    Args:
+      device_config (dict): new devices config.
+      options_config (dict): new device options config.
+      old_configs (tuple): (devices, device_options) configs the new configs
+        were derived from.
+    """
+    old_device_config, old_options_config = old_configs
+    with self.config_transaction():
+      self._save_config_changes(old_device_config, device_config,
+                                self.device_file_name)
+      self._save_config_changes(old_options_config, options_config,
+                                self.device_options_file_name)
+
+  def _save_config_changes(self, old_config, new_config, file_path):
+    """Applies entries changed between the two configs to the given file."""
+    with config_store.get_store(file_path).transaction() as contents:
+      for section in old_config.keys() | new_config.keys():
+        old_entries = old_config.get(section, {})
+        new_entries = new_config.get(section, {})
+        section_contents = contents.setdefault(section, {})
+        for name in old_entries.keys() - new_entries.keys():
+          section_contents.pop(name, None)
+        for name, entry in new_entries.items():
+          if old_entries.get(name) != entry:
+            section_contents[name] = copy.deepcopy(entry)
 
   def _type_check(self, name, value, allowed_types=(str,)):
     """Sanity checking of (string or None) input values.
@@ -25,7 +25,8 @@ import json
 import logging
 import os.path
 import types
-from typing import Any, Callable, Collection, List, Mapping, Tuple, Type, Union
+from typing import (Any, Callable, Collection, List, Mapping, Optional, Tuple,
+                    Type, Union)
 
 from gazoo_device import config
 from gazoo_device import data_types
@@ -39,6 +40,7 @@ from gazoo_device.capabilities.interfaces import capability_base
 from gazoo_device.capabilities.interfaces import switchboard_base
 from gazoo_device.switchboard import communication_types
 from gazoo_device.utility import common_utils
+from gazoo_device.utility import conformance_cache
 from gazoo_device.utility import conformance_utils
 import immutabledict
 
@@ -80,7 +82,7 @@ _DeviceClassType = Union[_AuxiliaryDeviceBase, _PrimaryDeviceBase,
 logger = gdm_logger.get_logger()
 
 
-def register(package: types.ModuleType) -> None:
+def register(package: types.ModuleType, strict: bool = False) -> None:
   """Registers the given extension package with GDM architecture.
 
   The provided module must define:
@@ -134,8 +136,13 @@ def register(package: types.ModuleType) -> None:
       ]
   }
 
+  Conformance checks of device classes and capability flavors are skipped if
+  the same version and source code of the package already passed them (see
+  utility/conformance_cache.py).
+
   Args:
     package: Extension package to register (typically its __init__ module).
+    strict: If True, always run conformance checks.
 
   Raises:
     PackageRegistrationError: The extensions provided by
@@ -152,7 +159,8 @@ def register(package: types.ModuleType) -> None:
   try:
     _register(new_extensions, package_name,
               package.__version__,  # pytype: disable=attribute-error
-              package.download_key)
+              package.download_key,
+              strict=strict)
   except errors.PackageRegistrationError:
     # Registration failed: revert all changes to the extensions to avoid
     # leaving them in an inconsistent state.
@@ -160,8 +168,38 @@ def register(package: types.ModuleType) -> None:
     raise
 
 
+def register_deferred(package_name: str) -> None:
+  """Registers the extension package when extensions are first accessed.
+
+  Importing an extension package typically imports all of its device
+  controllers, capabilities and their dependencies, and registration runs
+  conformance checks on all of them. Deferring registration avoids this cost in
+  processes which never use extensions. Errors are logged instead of raised
+  (see import_and_register()).
+
+  Args:
+    package_name: Name of the package to import and register. For example,
+      "foo_extension_package" or "my_package.bar_devices".
+  """
+  if extensions.is_initialized():
+    import_and_register(package_name)
+  else:
+    extensions.deferred_packages.append(package_name)
+
+
+def register_deferred_packages(strict: bool = False) -> None:
+  """Imports and registers all packages passed to register_deferred().
+
+  Args:
+    strict: If True, always run conformance checks.
+  """
+  while extensions.deferred_packages:
+    import_and_register(extensions.deferred_packages.pop(0), strict=strict)
+
+
 def import_and_register(package_name: str,
-                        include_cli_instructions: bool = False) -> bool:
+                        include_cli_instructions: bool = False,
+                        strict: bool = False) -> bool:
   """Attempts to import and register the extension package.
 
   Args:
@@ -169,6 +207,7 @@ def import_and_register(package_name: str,
       "foo_extension_package" or "my_package.bar_devices".
     include_cli_instructions: Whether to include CLI-specific instructions to
       resolve the error.
+    strict: If True, always run conformance checks.
 
   Returns:
     True if operation succeeded, False otherwise.
@@ -187,7 +226,7 @@ def import_and_register(package_name: str,
           f"package from GDM CLI via `gdm unregister {package_name}`\n")
     return False
   try:
-    register(package)
+    register(package, strict=strict)
   except errors.PackageRegistrationError:
     logger.warning(
         f"Registration of GDM extension package {package_name!r} failed. "
@@ -212,11 +251,16 @@ def get_cli_extension_packages() -> List[str]:
   return []
 
 
-def import_and_register_cli_extension_packages() -> None:
-  """Attempts to import and register all packages registered with the CLI."""
+def import_and_register_cli_extension_packages(strict: bool = False) -> None:
+  """Attempts to import and register all packages registered with the CLI.
+
+  Args:
+    strict: If True, always run conformance checks.
+  """
   cli_extension_packages = get_cli_extension_packages()
   for package_name in cli_extension_packages:
-    import_and_register(package_name, include_cli_instructions=True)
+    import_and_register(package_name, include_cli_instructions=True,
+                        strict=strict)
 
 
 def _validate_extension_package(package: types.ModuleType,
@@ -256,7 +300,8 @@ def _register(
     new_extensions: Mapping[str, Any],
     package_name: str,
     package_version: str,
-    download_key: Callable[[data_types.KeyInfo, str], None]) -> None:
+    download_key: Callable[[data_types.KeyInfo, str], None],
+    strict: bool = False) -> None:
   """Registers the given extensions with GDM architecture.
 
   Args:
@@ -265,10 +310,16 @@ def _register(
     package_name: Name of the package being registered.
     package_version: Version of the package being registered.
     download_key: download_key function of the package.
+    strict: If True, run conformance checks even if the package passed them
+      before.
 
   Raises:
     PackageRegistrationError: The provided extensions are invalid.
   """
+  cache = conformance_cache.ConformanceCache()
+  cache_key = _get_conformance_cache_key(new_extensions, package_name,
+                                         package_version)
+  check_conformance = strict or not cache.contains(package_name, cache_key)
   _validate_capability_interfaces(
       ext_capability_interfaces=new_extensions["capability_interfaces"],
       package_name=package_name)
@@ -286,7 +337,8 @@ def _register(
 
   _validate_capability_flavors(
       ext_capability_flavors=new_extensions["capability_flavors"],
-      package_name=package_name)
+      package_name=package_name,
+      check_conformance=check_conformance)
   new_capability_flavors = {
       common_utils.generate_name(flavor): flavor
       for flavor in new_extensions["capability_flavors"]
@@ -298,7 +350,8 @@ def _register(
       ext_auxiliary_devices=new_extensions["auxiliary_devices"],
       ext_primary_devices=new_extensions["primary_devices"],
       ext_virtual_devices=new_extensions["virtual_devices"],
-      package_name=package_name)
+      package_name=package_name,
+      check_conformance=check_conformance)
   _validate_comm_type_classes(
       ext_communication_types=new_extensions["communication_types"],
       package_name=package_name)
@@ -332,12 +385,47 @@ def _register(
       "version": package_version,
       "key_download_function": download_key,
   })
+  if check_conformance:
+    cache.set(package_name, cache_key)
+
+
+def _get_conformance_cache_key(new_extensions: Mapping[str, Any],
+                               package_name: str,
+                               package_version: str) -> Optional[str]:
+  """Returns the conformance cache key of the package extensions.
+
+  Conformance of device classes also depends on which capabilities are
+  registered by other packages, so their names are part of the key.
+
+  Args:
+    new_extensions: Extensions to register with GDM architecture.
+    package_name: Name of the package being registered.
+    package_version: Version of the package being registered.
+
+  Returns:
+    Cache key or None if conformance check results can't be cached.
+  """
+  checked_classes = list(itertools.chain(
+      new_extensions["capability_flavors"],
+      new_extensions["auxiliary_devices"],
+      new_extensions["primary_devices"],
+      new_extensions["virtual_devices"]))
+  if not all(inspect.isclass(a_class) for a_class in checked_classes):
+    return None  # Registration will fail.
+  registered_capabilities = sorted(itertools.chain(
+      extensions.capability_interfaces, extensions.capability_flavors,
+      extensions.capabilities))
+  return conformance_cache.get_cache_key(
+      package_name, package_version, checked_classes,
+      extra_source_files=(__file__,),
+      extra_data=registered_capabilities)
 
 
 def _validate_device_classes(ext_auxiliary_devices: Collection[Type[Any]],
                              ext_primary_devices: Collection[Type[Any]],
                              ext_virtual_devices: Collection[Type[Any]],
-                             package_name: str) -> None:
+                             package_name: str,
+                             check_conformance: bool = True) -> None:
   """Validates the extension device classes.
 
   Args:
@@ -345,6 +433,8 @@ def _validate_device_classes(ext_auxiliary_devices: Collection[Type[Any]],
     ext_primary_devices: Primary device classes to validate.
     ext_virtual_devices: Virtual device classes to validate.
     package_name: Name of the package providing the extension classes.
+    check_conformance: Whether to check conformance of the device classes
+      with GDM architecture.
 
   Raises:
     PackageRegistrationError: Device classes are invalid.
@@ -375,6 +465,8 @@ def _validate_device_classes(ext_auxiliary_devices: Collection[Type[Any]],
         f"Device types {redefined_device_types} are already defined in GDM.",
         package_name=package_name)
 
+  if not check_conformance:
+    return
   conformance_issues = _get_device_class_conformance_issues(new_device_classes)
   if conformance_issues:
     issue_messages = []
@@ -590,12 +682,15 @@ def _validate_capability_interfaces(
 
 
 def _validate_capability_flavors(ext_capability_flavors: Collection[Type[Any]],
-                                 package_name: str) -> None:
+                                 package_name: str,
+                                 check_conformance: bool = True) -> None:
   """Validates the extension capability flavors.
 
   Args:
     ext_capability_flavors: Capability flavor classes to validate.
     package_name: Name of the package providing the extension classes.
+    check_conformance: Whether to check conformance of the capability flavors
+      with GDM architecture.
 
   Raises:
     PackageRegistrationError: Capability flavor classes are invalid.
@@ -624,6 +719,8 @@ def _validate_capability_flavors(ext_capability_flavors: Collection[Type[Any]],
                                      "interfaces or capabilities)",
                  package_name=package_name)
 
+  if not check_conformance:
+    return
   conformance_issues = _get_capability_flavor_conformance_issues(
       ext_capability_flavors)
   if conformance_issues:
@@ -27,6 +27,7 @@ from gazoo_device import errors
 from gazoo_device import extensions
 from gazoo_device import gdm_logger
 from gazoo_device.switchboard import data_framer
+from gazoo_device.switchboard import detokenizer
 from gazoo_device.switchboard import line_identifier
 from gazoo_device.switchboard.transports import adb_transport
 from gazoo_device.switchboard.transports import jlink_transport
@@ -133,6 +134,17 @@ class CommunicationType(abc.ABC):
     """
     return [data_framer.NewlineFramer()] * num_transports
 
+  def get_detokenizers(self, num_transports):
+    """Set up detokenizers of the tokenized messages output by the device.
+
+    Args:
+       num_transports (int): number of declared transports.
+
+    Returns:
+       list: list of detokenizers (or None) mapped to each transport.
+    """
+    return [None] * num_transports
+
   def get_identifier(self):
     """Setup identifiers used to distinguish loglines from responses.
 
@@ -173,6 +185,8 @@ class CommunicationType(abc.ABC):
             self.get_button_list(),
         "partial_line_timeout_list":
             self.get_partial_line_timeout_list(num_transports),
+        "detokenizer_list":
+            self.get_detokenizers(num_transports),
     }
 
   @abc.abstractmethod
@@ -428,11 +442,15 @@ class PigweedSerialComms(CommunicationType):
     self.protobufs = protobufs
     self.baudrate = baudrate
 
+  def get_detokenizers(self, num_transports):
+    return detokenizer.get_detokenizers(num_transports)
+
   def get_transport_list(self):
     return [pigweed_rpc_transport.PigweedRPCTransport(
         comms_address=self.comms_address,
         protobufs=self.protobufs,
-        baudrate=self.baudrate)]
+        baudrate=self.baudrate,
+        detokenizer=detokenizer.get_detokenizers(1)[0])]
 
 
 def detect_connections(static_ips):
@@ -0,0 +1,270 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Detokenizer of Pigweed tokenized log messages (pw_tokenizer).
+
+Tokenized devices log a 32-bit token (the hash of the format string) followed
+by the encoded arguments instead of the formatted message. In text output the
+binary message is Base64-encoded and prefixed with "$", which is the form the
+Detokenizer replaces in device lines.
+
+Format strings are looked up in the token databases of a directory
+(config.DETOK_DIRECTORY by default), in the formats written by
+pw_tokenizer's database.py:
+  * binary databases (".bin"), which are memory-mapped and indexed by token;
+  * CSV databases (".csv"): token,removal date,"format string".
+"""
+import base64
+import binascii
+import csv
+import functools
+import mmap
+import os
+import re
+import struct
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from gazoo_device import config
+from gazoo_device import gdm_logger
+
+logger = gdm_logger.get_logger()
+
+_BINARY_DATABASE_HEADER = struct.Struct("<8sI4x")
+_BINARY_DATABASE_MAGIC = b"TOKENS\0\0"
+_BINARY_DATABASE_ENTRY = struct.Struct("<IBBH")  # Token and removal date.
+_BASE64_MESSAGE = re.compile(
+    r"\$(?:[A-Za-z0-9+/\-_]{4})*"
+    r"(?:[A-Za-z0-9+/\-_]{3}=|[A-Za-z0-9+/\-_]{2}==)?")
+_FORMAT_SPEC = re.compile(
+    r"%([-+ #0]*(?:\d+)?(?:\.\d*)?)(hh|h|ll|l|j|z|t|L)?([csdioxXufFeEgGp%])")
+_FLOAT = struct.Struct("<f")
+_TOKEN = struct.Struct("<I")
+_FORMAT_CACHE_SIZE = 4096
+_INTEGER_SPECIFIERS = frozenset("cdioxXup")
+_FLOAT_SPECIFIERS = frozenset("fFeEgG")
+_SIGNED_SPECIFIERS = frozenset("di")
+_TRUNCATED_STRING = "[...]"
+
+_FormatPiece = Union[str, Tuple[str, str, str]]
+
+
+class Detokenizer:
+  """Replaces Base64-encoded tokenized messages in lines with their text."""
+
+  def __init__(self, database_directory: str = config.DETOK_DIRECTORY):
+    """Initializes the detokenizer.
+
+    Args:
+      database_directory: directory of the token databases. Databases are
+        loaded on first use, which happens in the transport process.
+    """
+    self._database_directory = database_directory
+    self._index = None
+
+  def detokenize_line(self, line: str) -> str:
+    """Returns the line with its tokenized messages detokenized.
+
+    Messages which can't be detokenized (unknown token, corrupt arguments)
+    are left as they are.
+
+    Args:
+      line: line of device output.
+    """
+    if "$" not in line:
+      return line
+    return _BASE64_MESSAGE.sub(self._detokenize_match, line)
+
+  def detokenize(self, message: bytes) -> Optional[str]:
+    """Returns the text of a binary tokenized message, or None if unknown."""
+    if len(message) < _TOKEN.size:
+      return None
+    format_string = self._lookup(_TOKEN.unpack_from(message)[0])
+    if format_string is None:
+      return None
+    return _format(_parse_format_string(format_string),
+                   memoryview(message)[_TOKEN.size:])
+
+  def is_tokenized(self, message: bytes) -> bool:
+    """Returns whether the message starts with a token of the databases."""
+    if len(message) < _TOKEN.size:
+      return False
+    if self._index is None:
+      self._index = _load_databases(self._database_directory)
+    return _TOKEN.unpack_from(message)[0] in self._index
+
+  def _detokenize_match(self, match: "re.Match[str]") -> str:
+    try:
+      message = base64.b64decode(match.group(0)[1:], altchars=b"-_")
+    except binascii.Error:
+      return match.group(0)
+    text = self.detokenize(message)
+    return match.group(0) if text is None else text
+
+  def _lookup(self, token: int) -> Optional[str]:
+    """Returns the format string of the token."""
+    if self._index is None:
+      self._index = _load_databases(self._database_directory)
+    entry = self._index.get(token)
+    if entry is None or isinstance(entry, str):
+      return entry
+    database, offset = entry
+    end = database.find(b"\0", offset)
+    format_string = database[offset:end].decode("utf-8", "replace")
+    self._index[token] = format_string  # Decode each string only once.
+    return format_string
+
+
+def _load_databases(
+    directory: str) -> Dict[int, Union[str, Tuple[mmap.mmap, int]]]:
+  """Returns format strings (or their location) indexed by token."""
+  index = {}
+  if not os.path.isdir(directory):
+    return index
+  for file_name in sorted(os.listdir(directory)):
+    path = os.path.join(directory, file_name)
+    try:
+      if file_name.endswith(".bin"):
+        _index_binary_database(path, index)
+      elif file_name.endswith(".csv"):
+        _index_csv_database(path, index)
+    except (OSError, ValueError, struct.error) as err:
+      logger.warning(f"Unable to load token database {path}: {err!r}")
+  logger.debug(f"Loaded {len(index)} tokens from {directory}")
+  return index
+
+
+def _index_binary_database(
+    path: str, index: Dict[int, Union[str, Tuple[mmap.mmap, int]]]) -> None:
+  """Indexes the strings of a binary token database without reading them."""
+  with open(path, "rb") as database_file:
+    database = mmap.mmap(database_file.fileno(), 0, access=mmap.ACCESS_READ)
+  magic, entry_count = _BINARY_DATABASE_HEADER.unpack_from(database)
+  if magic != _BINARY_DATABASE_MAGIC:
+    raise ValueError("Not a binary token database")
+  entries_start = _BINARY_DATABASE_HEADER.size
+  offset = entries_start + entry_count * _BINARY_DATABASE_ENTRY.size
+  for entry in range(entry_count):
+    token = _BINARY_DATABASE_ENTRY.unpack_from(
+        database, entries_start + entry * _BINARY_DATABASE_ENTRY.size)[0]
+    index.setdefault(token, (database, offset))
+    offset = database.find(b"\0", offset) + 1
+    if not offset:
+      raise ValueError("Truncated binary token database")
+
+
+def _index_csv_database(
+    path: str, index: Dict[int, Union[str, Tuple[mmap.mmap, int]]]) -> None:
+  with open(path, newline="", encoding="utf-8") as database_file:
+    for row in csv.reader(database_file):
+      if len(row) == 3:
+        index.setdefault(int(row[0], 16), row[2])
+
+
+@functools.lru_cache(maxsize=_FORMAT_CACHE_SIZE)
+def _parse_format_string(format_string: str) -> Tuple[_FormatPiece, ...]:
+  """Splits a printf-style format string into text and conversions.
+
+  Args:
+    format_string: format string from a token database.
+
+  Returns:
+    Text pieces and (Python conversion, length modifier, specifier) tuples.
+  """
+  pieces = []
+  position = 0
+  for match in _FORMAT_SPEC.finditer(format_string):
+    pieces.append(format_string[position:match.start()])
+    flags, length, specifier = match.groups()
+    if specifier == "%":
+      pieces.append("%")
+    else:
+      pieces.append(("%" + flags, length or "", specifier))
+    position = match.end()
+  pieces.append(format_string[position:])
+  return tuple(piece for piece in pieces if piece)
+
+
+def _format(pieces: Tuple[_FormatPiece, ...],
+            arguments: memoryview) -> Optional[str]:
+  """Returns the formatted message, or None if the arguments are corrupt."""
+  text = []
+  position = 0
+  try:
+    for piece in pieces:
+      if isinstance(piece, str):
+        text.append(piece)
+        continue
+      conversion, length, specifier = piece
+      value, position = _decode_argument(arguments, position, length,
+                                         specifier)
+      text.append(_convert(conversion, specifier, value))
+  except (IndexError, struct.error, ValueError):
+    return None
+  return "".join(text)
+
+
+def _decode_argument(arguments: memoryview, position: int, length: str,
+                     specifier: str) -> Tuple[Any, int]:
+  """Returns the argument at position and the position of the next one."""
+  if specifier in _INTEGER_SPECIFIERS:
+    value, position = _decode_zigzag_varint(arguments, position)
+    if specifier not in _SIGNED_SPECIFIERS and value < 0:
+      value &= 0xFFFFFFFFFFFFFFFF if length in ("ll", "j") else 0xFFFFFFFF
+    return value, position
+  if specifier in _FLOAT_SPECIFIERS:
+    return (_FLOAT.unpack_from(arguments, position)[0],
+            position + _FLOAT.size)
+  # String: a length byte (the top bit flags truncation), then the bytes.
+  string_length = arguments[position] & 0x7F
+  truncated = arguments[position] & 0x80
+  end = position + 1 + string_length
+  if end > len(arguments):
+    raise IndexError("String argument past the end of the message")
+  value = bytes(arguments[position + 1:end]).decode("utf-8", "replace")
+  return value + (_TRUNCATED_STRING if truncated else ""), end
+
+
+def _decode_zigzag_varint(arguments: memoryview,
+                          position: int) -> Tuple[int, int]:
+  value = 0
+  shift = 0
+  while True:
+    byte = arguments[position]
+    position += 1
+    value |= (byte & 0x7F) << shift
+    if not byte & 0x80:
+      return (value >> 1) ^ -(value & 1), position
+    shift += 7
+    if shift > 63:
+      raise ValueError("Varint argument is too long")
+
+
+def _convert(conversion: str, specifier: str, value: Any) -> str:
+  if specifier == "c":
+    return (conversion + "s") % chr(value)
+  if specifier == "p":
+    return "0x%08X" % value
+  if specifier == "u":
+    specifier = "d"
+  return (conversion + specifier) % value
+
+
+def get_detokenizers(num_transports: int) -> List[Optional[Detokenizer]]:
+  """Returns a Detokenizer per transport if there are token databases."""
+  directory = config.DETOK_DIRECTORY
+  if os.path.isdir(directory) and any(
+      file_name.endswith((".bin", ".csv"))
+      for file_name in os.listdir(directory)):
+    return [Detokenizer(directory) for _ in range(num_transports)]
+  return [None] * num_transports
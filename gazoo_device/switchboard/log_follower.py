@@ -0,0 +1,253 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Follows device logs written by LogWriterProcess as they grow.
+
+LogFollower tails the logs of one or more devices, follows them across log
+rotation, and merges lines of several devices in host timestamp order.
+
+On Linux the follower sleeps until inotify reports a change in one of the log
+directories. Elsewhere (or if inotify is unavailable) it polls the log files
+every _POLL_INTERVAL seconds.
+
+Lines of different devices reach their log files with a small delay. To merge
+them in order, lines are held back for merge_delay seconds (of host time)
+before they are yielded.
+"""
+import ctypes
+import ctypes.util
+import datetime
+import heapq
+import itertools
+import os
+import select
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gazoo_device import gdm_logger
+from gazoo_device.switchboard import log_process
+
+logger = gdm_logger.get_logger()
+
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_MAX_EVENT_BYTES = 64 * 1024
+_POLL_INTERVAL = 0.1
+DEFAULT_MERGE_DELAY = 0.25
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+  """Returns libc if it provides inotify, else None."""
+  if not sys.platform.startswith("linux"):
+    return None
+  try:
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                       use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [
+        ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+  except (OSError, AttributeError):
+    return None
+  return libc
+
+
+class _ChangeNotifier:
+  """Waits for changes to files in a set of directories."""
+
+  def __init__(self, directories: List[str]):
+    self._pending_directories = set(directories)
+    self._fd = None
+    self._libc = _load_libc()
+    if self._libc is not None:
+      fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+      if fd >= 0:
+        self._fd = fd
+      else:
+        logger.debug("inotify is unavailable (errno {}). Polling log files.",
+                     ctypes.get_errno())
+    self._add_watches()
+
+  def close(self) -> None:
+    if self._fd is not None:
+      os.close(self._fd)
+      self._fd = None
+
+  def wait(self, timeout: float) -> None:
+    """Waits until a file changes or until timeout seconds pass.
+
+    Args:
+      timeout: maximum time to wait for.
+    """
+    timeout = max(timeout, 0)
+    self._add_watches()
+    if self._fd is None or self._pending_directories:
+      time.sleep(min(timeout, _POLL_INTERVAL))
+      return
+    readable, _, _ = select.select([self._fd], [], [], timeout)
+    if readable:
+      try:
+        while os.read(self._fd, _MAX_EVENT_BYTES):
+          pass
+      except BlockingIOError:
+        pass
+
+  def _add_watches(self) -> None:
+    """Watches directories which didn't exist the last time."""
+    if self._fd is None:
+      return
+    for directory in list(self._pending_directories):
+      if os.path.isdir(directory):
+        if self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), _WATCH_MASK) >= 0:
+          self._pending_directories.discard(directory)
+
+
+class _LogStream:
+  """Reads lines appended to a device log, following log rotation."""
+
+  def __init__(self, name: str, log_path: str):
+    self.name = name
+    self.log_path = log_path
+    self._file = None
+    self._partial_line = b""
+    self._last_timestamp = b""
+
+  def close(self) -> None:
+    if self._file:
+      self._file.close()
+      self._file = None
+
+  def exists(self) -> bool:
+    return self._file is not None or os.path.exists(self.log_path)
+
+  def read_lines(self) -> List[Tuple[bytes, str]]:
+    """Returns (host timestamp, line) of complete lines appended since last call.
+
+    Lines without a host timestamp get the timestamp of the previous line.
+    """
+    lines = []
+    while True:
+      if self._file is None:
+        try:
+          self._file = open(self.log_path, "rb")
+        except FileNotFoundError:
+          break
+      # The next log file is only created after the writer is done with the
+      # current one, so check for it before reading the rest of this one.
+      next_log_path = log_process.get_next_log_filename(self.log_path)
+      rotated = os.path.exists(next_log_path)
+      data = self._partial_line + self._file.read()
+      complete_data, _, self._partial_line = data.rpartition(b"\n")
+      if complete_data:
+        for line in (complete_data + b"\n").splitlines(keepends=True):
+          if line.startswith(b"<"):
+            self._last_timestamp = line[:log_process.HOST_TIMESTAMP_LENGTH]
+          lines.append(
+              (self._last_timestamp, line.decode("utf-8", errors="replace")))
+      if not rotated:
+        break
+      self.close()
+      self.log_path = next_log_path
+    return lines
+
+
+class LogFollower:
+  """Follows device logs and yields their lines in host timestamp order."""
+
+  def __init__(self,
+               log_paths: Dict[str, str],
+               merge_delay: float = DEFAULT_MERGE_DELAY):
+    """Initializes the follower.
+
+    Args:
+      log_paths: log file to follow by device name.
+      merge_delay: seconds to hold lines back for, so that lines logged at the
+        same time by other devices can be merged in order. Not used when
+        following a single log.
+    """
+    self._streams = [_LogStream(name, path) for name, path in log_paths.items()]
+    self._merge_delay = merge_delay if len(self._streams) > 1 else 0
+    directories = {os.path.dirname(os.path.abspath(path))
+                   for path in log_paths.values()}
+    self._notifier = _ChangeNotifier(sorted(directories))
+    self._heap = []
+    self._sequence = itertools.count()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def close(self) -> None:
+    for stream in self._streams:
+      stream.close()
+    self._notifier.close()
+
+  def wait_for_logs(self, timeout: float) -> bool:
+    """Waits until all followed log files exist.
+
+    Args:
+      timeout: maximum time to wait for.
+
+    Returns:
+      True if all log files exist, False if timed out.
+    """
+    end_time = time.time() + timeout
+    while not all(stream.exists() for stream in self._streams):
+      remaining_time = end_time - time.time()
+      if remaining_time <= 0:
+        return False
+      self._notifier.wait(remaining_time)
+    return True
+
+  def follow(self, duration: float) -> Iterator[Tuple[str, str]]:
+    """Yields (device name, line) of log lines as they are written.
+
+    Args:
+      duration: how long to follow the logs for, in seconds.
+
+    Yields:
+      Device name and log line (with the trailing newline). Lines of all
+      devices are yielded in host timestamp order.
+    """
+    end_time = time.time() + duration
+    while True:
+      for stream in self._streams:
+        for timestamp, line in stream.read_lines():
+          heapq.heappush(self._heap,
+                         (timestamp, next(self._sequence), stream.name, line))
+      now = time.time()
+      if now >= end_time:
+        break
+      yield from self._pop_lines(now - self._merge_delay)
+      self._notifier.wait(end_time - now)
+    yield from self._pop_lines(None)
+
+  def _pop_lines(
+      self, before_time: Optional[float]) -> Iterator[Tuple[str, str]]:
+    """Yields held back lines logged up to before_time (all if None)."""
+    bound = None
+    if before_time is not None and self._merge_delay:
+      bound = datetime.datetime.fromtimestamp(before_time).strftime(
+          log_process.HOST_TIMESTAMP_FORMAT).encode()
+    while self._heap and (bound is None or self._heap[0][0] <= bound):
+      _, _, name, line = heapq.heappop(self._heap)
+      yield name, line
@@ -0,0 +1,238 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time range and regex queries over device logs written by LogWriterProcess.
+
+A device log consists of the log file the device was started with and the
+files it was rotated to (see log_process.get_next_log_filename). Each of these
+segments has a sparse index (see log_process.get_index_filename), which maps
+host timestamps to byte offsets. Queries use the indexes to skip segments and
+the parts of segments logged before the requested start time, then scan the
+rest of the segment through mmap.
+
+Host timestamps ("<YYYY-MM-DD hh:mm:ss.ssssss>") sort lexicographically, so
+log lines are compared to the requested time range without parsing them.
+"""
+import bisect
+import concurrent.futures
+import datetime
+import mmap
+import os
+import re
+from typing import List, Optional, Pattern, Tuple, Union
+
+from gazoo_device.switchboard import log_process
+
+_TimeType = Union[datetime.datetime, float]
+
+
+def get_log_segments(log_path: str) -> List[str]:
+  """Returns paths of the existing segments of the log, oldest first.
+
+  Args:
+    log_path: path of the first log file of the log.
+  """
+  segments = []
+  while os.path.exists(log_path):
+    segments.append(log_path)
+    log_path = log_process.get_next_log_filename(log_path)
+  return segments
+
+
+def get_lines(log_path: str,
+              start_time: Optional[_TimeType] = None,
+              end_time: Optional[_TimeType] = None,
+              max_workers: int = 1) -> List[str]:
+  """Returns log lines logged between start_time and end_time (inclusive).
+
+  Only the parts of the log (and of its rotated files) which can contain lines
+  in the time range are read. Backs the get_log_lines() device method.
+
+  Args:
+    log_path: path of the first log file of the log.
+    start_time: host time (datetime or seconds since epoch) of the first line
+      to return. If None, lines are returned from the start of the log.
+    end_time: host time of the last line to return. If None, lines are
+      returned until the end of the log.
+    max_workers: number of processes to scan log segments with. Only worth
+      raising for logs which span several large segments.
+
+  Returns:
+    Log lines (with the host timestamp, GDM log header and trailing newline)
+    in the order they were logged.
+  """
+  return _query(log_path, _get_bound(start_time), _get_bound(end_time), None,
+                max_workers)
+
+
+def search(log_path: str,
+           pattern: Union[str, Pattern[str]],
+           since: Optional[_TimeType] = None,
+           max_workers: int = 1) -> List[str]:
+  """Returns log lines which match the regular expression.
+
+  Backs the search_log() device method.
+
+  Args:
+    log_path: path of the first log file of the log.
+    pattern: regular expression to search for. "^" and "$" match at line
+      boundaries. Matches don't span several lines unless the pattern matches
+      newlines.
+    since: host time (datetime or seconds since epoch) to search from. If
+      None, the whole log is searched.
+    max_workers: number of processes to scan log segments with.
+
+  Returns:
+    Matching log lines (with the trailing newline) in the order they were
+    logged.
+  """
+  if not isinstance(pattern, str):
+    pattern = pattern.pattern
+  return _query(log_path, _get_bound(since), None, pattern, max_workers)
+
+
+def _get_bound(host_time: Optional[_TimeType]) -> Optional[bytes]:
+  """Returns the host time as a host timestamp to compare log lines with."""
+  if host_time is None:
+    return None
+  if not isinstance(host_time, datetime.datetime):
+    host_time = datetime.datetime.fromtimestamp(host_time)
+  return host_time.strftime(log_process.HOST_TIMESTAMP_FORMAT).encode()
+
+
+def _read_index(log_path: str) -> List[Tuple[bytes, int]]:
+  """Returns (host timestamp, byte offset) entries of the segment index."""
+  entries = []
+  try:
+    with open(log_process.get_index_filename(log_path), "rb") as index_file:
+      for entry in index_file:
+        timestamp, _, offset = entry.rstrip().rpartition(b" ")
+        if timestamp and offset.isdigit():
+          entries.append((timestamp, int(offset)))
+  except OSError:  # Index is missing for logs written by older GDM versions.
+    pass
+  return entries
+
+
+def _query(log_path: str, start_bound: Optional[bytes],
+           end_bound: Optional[bytes], pattern: Optional[str],
+           max_workers: int) -> List[str]:
+  """Scans the log segments which may contain lines in the time range."""
+  segments = get_log_segments(log_path)
+  indexes = [_read_index(segment) for segment in segments]
+  scans = []
+  for num, (segment, index) in enumerate(zip(segments, indexes)):
+    next_index = indexes[num + 1] if num + 1 < len(indexes) else None
+    if (start_bound is not None and next_index and
+        next_index[0][0] < start_bound):
+      continue  # The whole segment was logged before start_time.
+    if end_bound is not None and index and index[0][0] > end_bound:
+      break  # This and later segments were logged after end_time.
+    start_offset = 0
+    if start_bound is not None and index:
+      position = bisect.bisect_left(index, (start_bound, -1))
+      if position:
+        start_offset = index[position - 1][1]
+    scans.append((segment, start_offset, start_bound, end_bound, pattern))
+
+  lines = []
+  if max_workers > 1 and len(scans) > 1:
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(max_workers, len(scans))) as executor:
+      for segment_lines in executor.map(_scan_segment, *zip(*scans)):
+        lines.extend(segment_lines)
+  else:
+    for scan in scans:
+      lines.extend(_scan_segment(*scan))
+  return lines
+
+
+def _scan_segment(log_path: str, start_offset: int,
+                  start_bound: Optional[bytes], end_bound: Optional[bytes],
+                  pattern: Optional[str]) -> List[str]:
+  """Returns lines of the segment in the time range which match the pattern.
+
+  Args:
+    log_path: path of the log segment.
+    start_offset: byte offset of a line logged before start_bound.
+    start_bound: host timestamp of the first line to return.
+    end_bound: host timestamp of the last line to return.
+    pattern: regular expression lines have to match. If None, all lines in
+      the time range are returned.
+
+  Returns:
+    Matching log lines.
+  """
+  with open(log_path, "rb") as log_file:
+    if not os.fstat(log_file.fileno()).st_size:
+      return []
+    with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+      position = _skip_lines_before(log_map, start_offset, start_bound)
+      end = len(log_map)
+      if end_bound is not None:
+        end = _skip_lines_before(log_map, position, end_bound, inclusive=True)
+      if pattern is None:
+        data = log_map[position:end]
+        return [line.decode("utf-8", errors="replace")
+                for line in data.splitlines(keepends=True)]
+      return _find_matching_lines(log_map, position, end, pattern)
+
+
+def _skip_lines_before(log_map: mmap.mmap, position: int,
+                       bound: Optional[bytes], inclusive: bool = False) -> int:
+  """Returns the offset of the first line logged after the bound.
+
+  Args:
+    log_map: log segment contents.
+    position: offset of the line to start from.
+    bound: host timestamp. If None, position is returned.
+    inclusive: also skip lines logged at the bound.
+
+  Returns:
+    Offset of the first line with a later (or, if not inclusive, equal)
+    timestamp, or the segment size if there is no such line.
+  """
+  if bound is None:
+    return position
+  timestamp_length = log_process.HOST_TIMESTAMP_LENGTH
+  size = len(log_map)
+  while position < size:
+    timestamp = log_map[position:position + timestamp_length]
+    if timestamp > bound or (not inclusive and timestamp == bound):
+      return position
+    line_end = log_map.find(b"\n", position)
+    if line_end == -1:
+      return size
+    position = line_end + 1
+  return size
+
+
+def _find_matching_lines(log_map: mmap.mmap, start: int, end: int,
+                         pattern: str) -> List[str]:
+  """Returns lines between the offsets which contain a match of the pattern."""
+  regex = re.compile(pattern.encode("utf-8"), re.MULTILINE)
+  lines = []
+  position = start
+  while position < end:
+    match = regex.search(log_map, position, end)
+    if not match:
+      break
+    line_start = log_map.rfind(b"\n", start, match.start()) + 1
+    line_start = max(line_start, start)
+    line_end = log_map.find(b"\n", match.end(), end)
+    line_end = end if line_end == -1 else line_end + 1
+    lines.append(log_map[line_start:line_end].decode("utf-8",
+                                                      errors="replace"))
+    position = max(line_end, match.end() + 1)
+  return lines
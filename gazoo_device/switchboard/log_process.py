@@ -36,6 +36,10 @@ according to the following assumptions:
 
     * Log lines are queued in the correct order to be written to the log file
 
+The LogWriterProcess also writes a sparse index next to each log file (see
+get_index_filename). Every INDEX_INTERVAL bytes it records the host timestamp
+and byte offset of the line being written, which lets log_index find lines
+logged after a given time without reading the whole log file.
 """
 import codecs
 import datetime
@@ -56,6 +60,7 @@ LOG_LINE_HEADER_LENGTH = 8  # len(" GDM-#: ")
 LOG_LINE_HEADER_FORMAT = r"\sGDM-(.):\s(.*)$"
 HOST_TIMESTAMP_LENGTH = 28  # len("<YYYY-MM-DD hh:mm:ss.ssssss>")
 HOST_TIMESTAMP_FORMAT = "<%Y-%m-%d %H:%M:%S.%f>"
+INDEX_INTERVAL = 64 * 1024  # Bytes of log lines between index entries
 _MAX_READ_BYTES = 4096
 _VALID_COMMON_COMMANDS = [CMD_NEW_LOG_FILE]
 _VALID_FILTER_COMMANDS = [CMD_ADD_NEW_FILTER] + _VALID_COMMON_COMMANDS
@@ -74,6 +79,22 @@ def get_event_filename(log_path):
   return os.path.splitext(log_path)[0] + "-events.txt"
 
 
+def get_index_filename(log_path):
+  """Returns index filename for a given log_path.
+
+  Args:
+      log_path (str): path to log filename to get index filename for.
+
+  Returns:
+      str: Path to index filename for the given log_path provided.
+
+  Note:
+      Each line of the index file contains the host timestamp of a log line
+      and its byte offset in the log file, separated by a space.
+  """
+  return os.path.splitext(log_path)[0] + ".idx"
+
+
 def get_next_log_filename(current_log_path):
   """Returns the next log filename using the current log path as a reference.
 
@@ -389,12 +410,17 @@ class LogWriterProcess(switchboard_process.SwitchboardProcess):
     self._log_filename = os.path.basename(log_path)
     self._log_directory = os.path.dirname(log_path)
     self._log_file = None
+    self._index_file = None
+    self._next_index_offset = 0
     self._max_log_size = max_log_size
 
   def _close_file(self):
     if hasattr(self, "_log_file") and self._log_file:
       self._log_file.flush()
       self._log_file.close()
+    if getattr(self, "_index_file", None):
+      self._index_file.close()
+      self._index_file = None
 
   def _do_log_rotation(self):
     """Perform log rotation if necessary."""
@@ -436,6 +462,8 @@ class LogWriterProcess(switchboard_process.SwitchboardProcess):
       os.makedirs(self._log_directory)
     log_path = os.path.join(self._log_directory, self._log_filename)
     self._log_file = codecs.open(log_path, "a", encoding="utf-8")
+    self._index_file = open(get_index_filename(log_path), "a")
+    self._next_index_offset = 0
 
   def _open_new_log_file(self, new_log_path):
     self._close_file()
@@ -444,6 +472,13 @@ class LogWriterProcess(switchboard_process.SwitchboardProcess):
     self._open_file()
 
   def _post_run_hook(self):
+    # Write out log lines queued before the process was asked to stop.
+    if getattr(self, "_log_file", None) and not self._log_file.closed:
+      log_line = switchboard_process.get_message(self._log_queue, timeout=0)
+      while log_line:
+        self._write_log_line(log_line)
+        self._do_log_rotation()
+        log_line = switchboard_process.get_message(self._log_queue, timeout=0)
     self._close_file()
 
   def _pre_run_hook(self):
@@ -474,8 +509,19 @@ class LogWriterProcess(switchboard_process.SwitchboardProcess):
       raise RuntimeError("Device {} received an unknown command {}.".format(
           self.device_name, command))
 
+  def _write_index_entry(self, log_line):
+    """Adds the log line to the index if INDEX_INTERVAL bytes were written."""
+    offset = self._log_file.tell()
+    if offset >= self._next_index_offset and log_line.startswith("<"):
+      self._index_file.write("{} {}\n".format(
+          log_line[:HOST_TIMESTAMP_LENGTH], offset))
+      self._index_file.flush()
+      self._next_index_offset = offset + INDEX_INTERVAL
+
   def _write_log_line(self, log_line):
     if hasattr(self, "_log_file") and self._log_file:
+      if getattr(self, "_index_file", None):
+        self._write_index_entry(log_line)
       if log_line[-1] != "\n":
         # Write log line with newline added
         self._log_file.write(log_line + "[NO EOL]\n")
@@ -0,0 +1,114 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pool of warm multiprocessing.Manager servers for Switchboard instances.
+
+Every Switchboard needs a multiprocessing.Manager server process to host the
+queues and events shared with its subprocesses. Forking and starting a Manager
+server is one of the most expensive steps of switchboard creation. Switchboards
+created with a pool claim an already running server and return it to the pool
+when they are closed, so creating and closing devices repeatedly only pays the
+Manager startup cost once.
+"""
+import multiprocessing
+import threading
+
+from gazoo_device import gdm_logger
+from gazoo_device.utility import common_utils
+
+logger = gdm_logger.get_logger()
+
+DEFAULT_MAX_IDLE_MANAGERS = 8
+
+
+def _start_manager():
+  """Starts a new multiprocessing.Manager server."""
+  common_utils.run_before_fork()
+  mp_manager = multiprocessing.Manager()
+  common_utils.run_after_fork_in_parent()
+  return mp_manager
+
+
+def _is_alive(mp_manager):
+  """Returns whether the Manager server process is still running."""
+  process = getattr(mp_manager, "_process", None)
+  return process is not None and process.is_alive()
+
+
+class ManagerPool(object):
+  """Pool of idle multiprocessing.Manager servers."""
+
+  def __init__(self, max_idle_managers=DEFAULT_MAX_IDLE_MANAGERS):
+    """Initializes an empty pool.
+
+    Args:
+        max_idle_managers (int): maximum number of idle Manager servers kept
+          running. Managers released to a full pool are shut down.
+    """
+    self._max_idle_managers = max_idle_managers
+    self._idle_managers = []
+    self._lock = threading.Lock()
+
+  def acquire(self):
+    """Returns an idle Manager server, starting a new one if none are idle.
+
+    Returns:
+        multiprocessing.managers.SyncManager: running Manager server.
+    """
+    with self._lock:
+      while self._idle_managers:
+        mp_manager = self._idle_managers.pop()
+        if _is_alive(mp_manager):
+          return mp_manager
+    return _start_manager()
+
+  def release(self, mp_manager):
+    """Returns a Manager server to the pool.
+
+    Args:
+        mp_manager (SyncManager): Manager server obtained from acquire(). All
+          proxies to objects hosted by the server must have been deleted.
+    """
+    if not _is_alive(mp_manager):
+      return
+    with self._lock:
+      if len(self._idle_managers) < self._max_idle_managers:
+        self._idle_managers.append(mp_manager)
+        return
+    mp_manager.shutdown()
+
+  def warm_up(self, count):
+    """Starts Manager servers in advance so that they're ready to be claimed.
+
+    Args:
+        count (int): number of idle Manager servers the pool should have.
+    """
+    count = min(count, self._max_idle_managers)
+    while True:
+      with self._lock:
+        if len(self._idle_managers) >= count:
+          return
+      mp_manager = _start_manager()
+      with self._lock:
+        self._idle_managers.append(mp_manager)
+
+  def close(self):
+    """Shuts down all idle Manager servers."""
+    with self._lock:
+      idle_managers, self._idle_managers = self._idle_managers, []
+    for mp_manager in idle_managers:
+      try:
+        mp_manager.shutdown()
+      except (IOError, OSError) as err:
+        logger.debug("Failed to shut down Manager server: {!r}".format(err))
@@ -202,6 +202,8 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
       partial_line_timeout_list=None,
       force_slow=False,
       max_log_size=0,
+      mp_manager_pool=None,
+      detokenizer_list=None,
   ):
     """Initialize the Switchboard with the parameters provided.
 
@@ -229,21 +231,32 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
         slow=True.
       max_log_size (int): maximum size in bytes before performing log
         rotation. max_log_size of 0 means no log rotation should ever occur.
+      mp_manager_pool (ManagerPool): pool to claim a running
+        multiprocessing.Manager server from. The server is returned to the
+        pool on close. If None, a new server is started and shut down on
+        close.
+      detokenizer_list (list): of Detokenizers (or None) to use to detokenize
+        the lines of each transport.
     """
     super().__init__(device_name=device_name)
     if framer_list is None:
       framer_list = []
     if partial_line_timeout_list is None:
       partial_line_timeout_list = []
+    if detokenizer_list is None:
+      detokenizer_list = []
 
     self.log_path = log_path
     self._button_list = button_list
     self._force_slow = force_slow
     self._identifier = identifier or line_identifier.AllUnknownIdentifier()
-    time.sleep(.1)
-    common_utils.run_before_fork()
-    self._mp_manager = multiprocessing.Manager()
-    common_utils.run_after_fork_in_parent()
+    self._mp_manager_pool = mp_manager_pool
+    if mp_manager_pool is not None:
+      self._mp_manager = mp_manager_pool.acquire()
+    else:
+      common_utils.run_before_fork()
+      self._mp_manager = multiprocessing.Manager()
+      common_utils.run_after_fork_in_parent()
     self._transport_processes = []
     self._log_queue = self._mp_manager.Queue()
     self._call_result_queue = self._mp_manager.Queue()
@@ -253,7 +266,7 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
     self._exception_queue = exception_queue
 
     self._add_transport_processes(transport_list, framer_list,
-                                  partial_line_timeout_list)
+                                  partial_line_timeout_list, detokenizer_list)
     self._add_log_writer_process(log_path, max_log_size)
     self._add_log_filter_process(parser, log_path)
     self._start_processes()
@@ -520,7 +533,10 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
     if hasattr(self, "_exception_queue") and self._exception_queue:
       delattr(self, "_exception_queue")
     if hasattr(self, "_mp_manager") and self._mp_manager:
-      self._mp_manager.shutdown()
+      if getattr(self, "_mp_manager_pool", None) is not None:
+        self._mp_manager_pool.release(self._mp_manager)
+      else:
+        self._mp_manager.shutdown()
       delattr(self, "_mp_manager")
     self.ensure_serial_paths_unlocked(comms_addresses)
 
@@ -1398,6 +1414,8 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
     transport_process_kwargs can be:
         framer(DataFramer): DataFramer derived classes to use to frame
           incoming raw data into raw lines. Defaults to None.
+        detokenizer(Detokenizer): to use to detokenize tokenized messages in
+          lines. Defaults to None.
         partial_line_timeout(float): time in seconds to wait before adding
           partial lines to raw_data_queue and log_queue. Defaults to
           transport_process.PARTIAL_LINE_TIMEOUT.
@@ -1429,7 +1447,7 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
         self._transport_processes) - 1  # The added process is always last
 
   def _add_transport_processes(self, transport_list, framer_list,
-                               partial_line_timeout_list):
+                               partial_line_timeout_list, detokenizer_list):
     """Create transport processes which handle the given transports.
 
     Args:
@@ -1437,6 +1455,8 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
       framer_list(list): list of data framers, one per transport.
       partial_line_timeout_list(list): list of float to delay before adding
         a partial line.
+      detokenizer_list(list): list of detokenizers (or None), one per
+        transport.
     """
     for idx, transport in enumerate(transport_list):
       kwargs = {}
@@ -1444,6 +1464,8 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
         kwargs["framer"] = framer_list[idx]
       if idx < len(partial_line_timeout_list):
         kwargs["partial_line_timeout"] = partial_line_timeout_list[idx]
+      if idx < len(detokenizer_list) and detokenizer_list[idx] is not None:
+        kwargs["detokenizer"] = detokenizer_list[idx]
       self.add_transport_process(transport, **kwargs)
 
   def _add_log_writer_process(self, log_path, max_log_size):
@@ -1831,15 +1853,50 @@ class SwitchboardDefault(switchboard_base.SwitchboardBase):
     if process.is_started():
       process.stop()
 
+  @decorators.CapabilityLogDecorator(logger, level=decorators.DEBUG)
+  def request_stop_processes(self):
+    """Signals all Switchboard processes to stop without waiting for them.
+
+    Used to stop processes of several switchboards concurrently. Call
+    wait_for_processes_to_stop() afterwards.
+    """
+    for process in self.get_processes():
+      process.request_stop()
+
+  def wait_for_processes_to_stop(self, deadline: float) -> List[str]:
+    """Waits for signalled Switchboard processes to stop until the deadline.
+
+    Processes still running after the deadline are terminated.
+
+    Args:
+        deadline: time.time() value by which all processes must stop.
+
+    Returns:
+        Names of processes which had to be terminated.
+    """
+    return [process.process_name
+            for process in switchboard_process.stop_processes(
+                self.get_processes(), deadline)]
+
+  def get_processes(self) -> List[switchboard_process.SwitchboardProcess]:
+    """Returns all Switchboard processes (started or not)."""
+    processes = list(getattr(self, "_transport_processes", []))
+    for process_attribute in ("_log_writer_process", "_log_filter_process"):
+      process = getattr(self, process_attribute, None)
+      if process:
+        processes.append(process)
+    return processes
+
   def _start_processes(self):
-    for process_num in range(len(self._transport_processes)):
-      self.start_transport_process(process_num)
-    if hasattr(self, "_log_writer_process"):
-      if not self._log_writer_process.is_started():
-        self._log_writer_process.start()
-    if hasattr(self, "_log_filter_process"):
-      if not self._log_filter_process.is_started():
-        self._log_filter_process.start()
+    """Starts all Switchboard processes concurrently."""
+    started_processes = []
+    for process in self.get_processes():
+      if not process.is_started():
+        process.start(wait_for_start=False)
+        started_processes.append(process)
+    deadline = time.time() + switchboard_process.START_TIMEOUT
+    for process in started_processes:
+      process.wait_for_start(deadline)
 
   def _stop_processes(self):
     """Stop all Switchboard processes."""
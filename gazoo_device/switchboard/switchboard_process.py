@@ -18,6 +18,7 @@ import multiprocessing
 import os
 import signal
 import socket
+import time
 import traceback
 
 import psutil
@@ -28,6 +29,49 @@ from gazoo_device.utility import common_utils
 
 logger = gdm_logger.get_logger()
 
+START_TIMEOUT = 5  # Seconds to wait for a process to start.
+STOP_TIMEOUT = 5  # Seconds to wait for a process to stop before terminating it.
+_JOIN_TIMEOUT = 1
+
+
+def stop_processes(processes, deadline):
+  """Waits for signalled processes to stop, then forcibly stops stragglers.
+
+  All processes share the deadline. Processes still running at the deadline
+  are terminated together and given _JOIN_TIMEOUT seconds to exit, then the
+  remaining ones are killed.
+
+  Args:
+      processes (list): SwitchboardProcess instances (started or not).
+      deadline (float): time.time() value by which the processes must stop.
+
+  Returns:
+      list: processes which had to be terminated.
+  """
+  processes = [process for process in processes if process.is_started()]
+  for process in processes:
+    process._join(deadline)  # pylint: disable=protected-access
+  stragglers = [
+      process for process in processes
+      if process._process.is_alive()  # pylint: disable=protected-access
+  ]
+  for signal_method in ("terminate", "kill"):
+    alive = [
+        process._process  # pylint: disable=protected-access
+        for process in stragglers
+        if process._process.is_alive()  # pylint: disable=protected-access
+    ]
+    if not alive:
+      break
+    for child_process in alive:
+      getattr(child_process, signal_method)()
+    join_deadline = time.time() + _JOIN_TIMEOUT
+    for child_process in alive:
+      child_process.join(timeout=max(0, join_deadline - time.time()))
+  for process in processes:
+    delattr(process, "_process")
+  return stragglers
+
 
 def get_message(queue, timeout=None):
   """Returns next message from queue.
@@ -185,9 +229,14 @@ class SwitchboardProcess(object):
     if self.is_started():
       self.stop()
 
-  def start(self):
+  def start(self, wait_for_start=True):
     """Starts process if process is not already running.
 
+    Args:
+        wait_for_start (bool): whether to wait for the process to signal that
+          it started. If False, wait_for_start() must be called afterwards.
+          Not waiting allows several processes to start concurrently.
+
     Raises:
         RuntimeError: if called when process is already running
 
@@ -206,17 +255,34 @@ class SwitchboardProcess(object):
       common_utils.run_before_fork()
       process.start()
       common_utils.run_after_fork_in_parent()
-      start_event_value = self._start_event.wait(timeout=5)
-      if not start_event_value:
-        raise RuntimeError("Device {} failed to start child process {}. "
-                           "Start event was not set.".format(
-                               self.device_name, self.process_name))
       self._process = process
+      if wait_for_start:
+        self.wait_for_start(time.time() + START_TIMEOUT)
     else:
       raise RuntimeError("Device {} failed to start child process {}. "
                          "Child process is already running.".format(
                              self.device_name, self.process_name))
 
+  def wait_for_start(self, deadline):
+    """Waits for a started process to signal that it's running.
+
+    Args:
+        deadline (float): time.time() value by which the process must start.
+
+    Raises:
+        RuntimeError: if the process did not signal it started by the
+          deadline. The process is terminated.
+    """
+    start_event_value = self._start_event.wait(
+        timeout=max(0, deadline - time.time()))
+    if not start_event_value:
+      if self.is_started():
+        self._process.terminate()
+        delattr(self, "_process")
+      raise RuntimeError("Device {} failed to start child process {}. "
+                         "Start event was not set.".format(
+                             self.device_name, self.process_name))
+
   def is_started(self):
     """Returns True if process was started, False otherwise.
 
@@ -268,31 +334,54 @@ class SwitchboardProcess(object):
         process was previously started to prevent raising an error.
     """
     if self.is_started():
-      if self._process.is_alive():
-        try:
-          self._terminate_event.set()
-        except IOError:  # manager shutdown
-          pass
-      try:
-        stop_event_value = self._stop_event.wait(timeout=5)
-        if not stop_event_value:
-          msg = ("Device {} failed to stop child process {}. "
-                 "Stop event was not set.").format(self.device_name,
-                                                   self.process_name)
-          logger.error(msg)
-          raise IOError(msg)
-      except (IOError, ValueError):  # manager shutdown failed
-        pass
-      self._process.join(timeout=1)
-      if self._process.is_alive():
-        self._process.terminate()
-      delattr(self, "_process")
+      self.request_stop()
+      self.wait_for_stop(time.time() + STOP_TIMEOUT)
     else:
       msg = ("Device {} failed to stop child process {}. Child process is not "
              "currently running.").format(self.device_name, self.process_name)
       logger.error(msg)
       raise RuntimeError(msg)
 
+  def request_stop(self):
+    """Signals the process to stop without waiting for it to stop.
+
+    Note:
+        Call wait_for_stop() afterwards to reap the process. Signalling
+        several processes before waiting allows them to stop concurrently.
+    """
+    if self.is_started() and self._process.is_alive():
+      try:
+        self._terminate_event.set()
+      except IOError:  # manager shutdown
+        pass
+
+  def wait_for_stop(self, deadline):
+    """Waits for a signalled process to stop, then forcibly stops it if needed.
+
+    Args:
+        deadline (float): time.time() value by which the process must stop.
+          Processes still running after the deadline are terminated (and
+          killed if they don't respond to SIGTERM).
+
+    Returns:
+        bool: True if the process stopped on its own (or wasn't started),
+        False if it had to be terminated.
+    """
+    return not stop_processes([self], deadline)
+
+  def _join(self, deadline):
+    """Waits until the deadline for the process to exit."""
+    try:
+      stop_event_value = self._stop_event.wait(
+          timeout=max(0, deadline - time.time()))
+      if not stop_event_value:
+        logger.error("Device {} failed to stop child process {}. "
+                     "Stop event was not set.".format(self.device_name,
+                                                      self.process_name))
+    except (IOError, ValueError):  # manager shutdown failed
+      pass
+    self._process.join(timeout=max(0, deadline - time.time()))
+
   def is_command_done(self):
     """Returns True if command queue is empty, false otherwise.
 
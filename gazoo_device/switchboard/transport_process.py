@@ -20,7 +20,8 @@ the transport class provided and according to the following assumptions:
     * Transport commands from the main process are received using the
       send_command() method.
 
-    * Raw transport data is (optionally) detokenized.
+    * Raw transport data is (optionally) detokenized, a line at a time, before
+      it's queued.
 
     * Raw/detokenized data is queued in the expect queue provided.
 
@@ -103,6 +104,7 @@ class TransportProcess(switchboard_process.SwitchboardProcess):
                raw_data_queue=None,
                raw_data_id=0,
                framer=None,
+               detokenizer=None,
                partial_line_timeout=PARTIAL_LINE_TIMEOUT,
                read_timeout=_READ_TIMEOUT,
                max_read_bytes=_MAX_READ_BYTES,
@@ -125,6 +127,8 @@ class TransportProcess(switchboard_process.SwitchboardProcess):
         transport process to the raw_data_queue.
       framer (DataFramer): to use to frame raw data into partial and
         complete lines.
+      detokenizer (Detokenizer): to use to detokenize tokenized messages in
+        lines. None disables detokenization.
       partial_line_timeout (float): time in seconds to wait before adding
         partial lines to raw_data_queue and log_queue.
       read_timeout (float): time to wait in seconds for transport reads.
@@ -143,6 +147,7 @@ class TransportProcess(switchboard_process.SwitchboardProcess):
         valid_commands=_ALL_VALID_COMMANDS)
     self._buffered_unicode = u""
     self._framer = framer or data_framer.NewlineFramer()
+    self._detokenizer = detokenizer
     self._log_queue = log_queue
     self._max_read_bytes = max_read_bytes
     self._max_write_bytes = max_write_bytes
@@ -306,6 +311,8 @@ class TransportProcess(switchboard_process.SwitchboardProcess):
           self.device_name, command))
 
   def _publish_line(self, line):
+    if self._detokenizer is not None:
+      line = self._detokenizer.detokenize_line(line)
     if self._raw_data_enabled.is_set():
       switchboard_process.put_message(
           self._raw_data_queue, (self._raw_data_id, line), timeout=0)
@@ -32,6 +32,8 @@ DSRDTR = "dsrdtr"
 EXCLUSIVE = "exclusive"
 READ_REOPEN = "read_reopen"
 USE_HIGH_BAUDRATE_FLOW_CONTROL = "use_high_baudrate_flow_control"
+USE_READER_THREAD = "use_reader_thread"
+READ_BUFFER_SIZE = "read_buffer_size"
 
 # TcpTransport properties
 HOST = "host"
@@ -13,7 +13,6 @@
 # limitations under the License.
 
 """ADB transport which communicates to the device over a process running 'adb shell'."""
-import time
 
 from gazoo_device.switchboard.transports import process_transport
 from gazoo_device.utility import adb_utils
@@ -59,10 +58,9 @@ class AdbTransport(process_transport.ProcessTransport):
     self._fastboot_path = fastboot_path
 
   def _is_ready_to_open(self):
-    result = adb_utils.is_device_online(
+    return adb_utils.wait_for_state(
         self.comms_address,
+        (adb_utils.ADB_ONLINE_STATE, adb_utils.FASTBOOT_STATE),
+        timeout=READY_RETRY_DELAY,
         adb_path=self._adb_path,
         fastboot_path=self._fastboot_path)
-    if not result:
-      time.sleep(READY_RETRY_DELAY)
-    return result
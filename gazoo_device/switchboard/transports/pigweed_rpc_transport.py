@@ -13,14 +13,22 @@
 # limitations under the License.
 
 """Pigweed RPC transport class."""
+import base64
+import collections
 import fcntl
+import itertools
 import queue
+import re
+import select
 import threading
 import time
 import types
-from typing import Any, Callable, Collection, Dict, Optional, Tuple
+import zlib
+from typing import (Any, Callable, Collection, Dict, List, Optional, Sequence,
+                    Tuple)
 from gazoo_device import errors
 from gazoo_device import gdm_logger
+from gazoo_device.switchboard import detokenizer as detokenizer_lib
 from gazoo_device.switchboard.transports import transport_base
 import serial
 
@@ -33,6 +41,7 @@ try:
   from pw_hdlc import rpc
   from pw_hdlc import decode
   from pw_protobuf_compiler import python_protos
+  from google.protobuf import text_format
   # pytype: enable=import-error
   PIGWEED_IMPORT = True
 except ImportError:
@@ -41,9 +50,116 @@ except ImportError:
 _STDOUT_ADDRESS = 1
 _DEFAULT_ADDRESS = ord("R")
 _JOIN_TIMEOUT_SEC = 1  # seconds
+_DATA_WAIT_TIMEOUT_SEC = 0.1  # How often the frame pump checks for stop.
+_READ_SIZE = 64 * 1024
+_HDLC_FLAG = 0x7E
+_HDLC_ESCAPE = 0x7D
+_HDLC_ESCAPE_MASK = 0x20
+_HDLC_MIN_FRAME_SIZE = 6  # Address, control and frame check sequence.
+_HDLC_MAX_BUFFER_SIZE = 1024 * 1024  # Dropped if no frame ends in it.
+# Control characters which don't occur in text logs. ESC starts ANSI escape
+# sequences (e.g. colors), so it's left out.
+_CONTROL_CHARACTERS = re.compile(rb"[\x00-\x08\x0b\x0c\x0e-\x1a\x1c-\x1f\x7f]")
+_RPC_BATCH_TIMEOUT_SEC = 10
+_STREAM_BUFFER_SIZE = 1000  # Responses kept per server-streaming RPC.
+_STREAM_LOG_FORMAT = "RPC stream {id} {service}.{event}: {response}\n"
 logger = gdm_logger.get_logger()
 
 
+class _HdlcFrameDecoder:
+  """Decodes HDLC frames a whole chunk of data at a time.
+
+  Unlike decode.FrameDecoder, which goes through the data byte by byte, frame
+  boundaries are found with bytearray.find() and only frames with escaped
+  bytes are unescaped. Incomplete frames stay in a buffer which is reused
+  across chunks.
+  """
+
+  def __init__(self):
+    self._buffer = bytearray()
+
+  def process_valid_frames(self, data: bytes) -> List[Any]:
+    """Returns the valid frames completed by the data."""
+    buffer = self._buffer
+    buffer += data
+    frames = []
+    start = 0
+    end = buffer.find(_HDLC_FLAG)
+    while end != -1:
+      if end > start:
+        frame = self._decode_frame(bytes(buffer[start:end]))
+        if frame is not None:
+          frames.append(frame)
+      start = end + 1
+      end = buffer.find(_HDLC_FLAG, start)
+    del buffer[:start]
+    if len(buffer) > _HDLC_MAX_BUFFER_SIZE:
+      logger.warning("Dropping {} bytes of data without HDLC frame boundaries."
+                     .format(len(buffer)))
+      buffer.clear()
+    return frames
+
+  def _decode_frame(self, raw_frame: bytes) -> Optional[Any]:
+    """Returns the frame if it's valid, None otherwise."""
+    decoded_frame = raw_frame
+    if _HDLC_ESCAPE in raw_frame:
+      first_part, *escaped_parts = raw_frame.split(bytes((_HDLC_ESCAPE,)))
+      if not all(escaped_parts):  # Escape at the end or before an escape.
+        return None
+      decoded_frame = first_part + b"".join(
+          bytes((part[0] ^ _HDLC_ESCAPE_MASK,)) + part[1:]
+          for part in escaped_parts)
+    if (len(decoded_frame) < _HDLC_MIN_FRAME_SIZE or
+        zlib.crc32(decoded_frame[:-4]).to_bytes(4, "little") !=
+        decoded_frame[-4:]):
+      return None
+    return decode.Frame(raw_frame, decoded_frame)
+
+
+class _PendingCall:
+  """Collects the responses and the final status of an asynchronous RPC."""
+
+  def __init__(self, on_response: Optional[Callable[[Any], None]] = None,
+               buffer_size: Optional[int] = None):
+    """Initializes the pending call.
+
+    Args:
+      on_response: Called with each response as it arrives.
+      buffer_size: Maximum number of responses kept (the oldest are dropped).
+    """
+    self.call = None
+    self.status = None
+    self.done = threading.Event()
+    self._on_response = on_response
+    self._responses = collections.deque(maxlen=buffer_size)
+    self._lock = threading.Lock()
+
+  def on_next(self, unused_call: Any, response: Any) -> None:
+    with self._lock:
+      self._responses.append(response)
+    if self._on_response is not None:
+      self._on_response(response)
+
+  def on_completed(self, unused_call: Any, status: Any) -> None:
+    self.status = status
+    self.done.set()
+
+  def on_error(self, unused_call: Any, error: Any) -> None:
+    self.status = error
+    self.done.set()
+
+  def is_ok(self) -> bool:
+    """Returns True if the RPC completed successfully."""
+    return self.status is not None and self.status.ok()
+
+  def pop_responses(self) -> List[Any]:
+    """Returns and forgets the responses received so far."""
+    with self._lock:
+      responses = list(self._responses)
+      self._responses.clear()
+    return responses
+
+
 class PwHdlcRpcClient:
   """Pigweed HDLC RPC Client.
 
@@ -53,13 +169,21 @@ class PwHdlcRpcClient:
   def __init__(self,
                read: Callable[[], bytes],
                write: Callable[[bytes], int],
-               protobufs: Collection[types.ModuleType]):
+               protobufs: Collection[types.ModuleType],
+               wait_for_data: Optional[Callable[[float], bool]] = None,
+               detokenizer: Optional[detokenizer_lib.Detokenizer] = None):
     """Creates an RPC client configured to communicate using HDLC.
 
     Args:
       read: Function that reads bytes; e.g serial_device.read.
       write: Function that writes bytes; e.g serial_device.write.
       protobufs: Proto modules.
+      wait_for_data: Function that waits up to the given number of seconds
+        for data to read and returns whether there is any. If None, read() is
+        polled every 10 ms instead.
+      detokenizer: Detokenizer whose token databases recognize tokenized log
+        frames made of printable bytes. If None, only frames with control
+        characters or invalid UTF-8 are recognized as tokenized.
     """
     if not PIGWEED_IMPORT:
       raise errors.DependencyUnavailableError(
@@ -76,9 +200,12 @@ class PwHdlcRpcClient:
         _DEFAULT_ADDRESS: self._handle_rpc_packet,
         _STDOUT_ADDRESS: self._push_to_log_queue}
     self.read = read
+    self._wait_for_data = wait_for_data
     self._stop_event = threading.Event()
     self._worker = None
     self.log_queue = queue.Queue()
+    self._log_batch = []
+    self._detokenizer = detokenizer
 
   def is_alive(self) -> bool:
     """Return true if the worker thread has started."""
@@ -111,6 +238,26 @@ class PwHdlcRpcClient:
       return next(iter(self.client.channels())).rpcs
     return self.client.channel(channel_id).rpcs
 
+  def invoke(self, method: Any, pending_call: _PendingCall,
+             **kwargs: Any) -> _PendingCall:
+    """Starts an RPC without waiting for its responses.
+
+    Args:
+      method: Method client, such as rpcs().pw.rpc.EchoService.Echo.
+      pending_call: Collects the responses and the status of the RPC.
+      **kwargs: Fields of the request message.
+
+    Returns:
+      The pending call, with its call attribute set to the ongoing call.
+    """
+    request = method.method.request_type(**kwargs)
+    pending_call.call = method.invoke(
+        request,
+        on_next=pending_call.on_next,
+        on_completed=pending_call.on_completed,
+        on_error=pending_call.on_error)
+    return pending_call
+
   def _handle_rpc_packet(self, frame: Any):
     """Handler for processing HDLC frame."""
     if not self.client.process_packet(frame.data):
@@ -119,10 +266,16 @@ class PwHdlcRpcClient:
   def read_and_process_data(self,
                             read: Callable[[], bytes],
                             frame_handlers: Any):
-    """Continuously reads and handles HDLC frames."""
-    decoder = decode.FrameDecoder()
+    """Continuously reads and handles HDLC frames.
+
+    Log frames decoded from the same data are put in the log queue together.
+    """
+    decoder = _HdlcFrameDecoder()
     while not self._stop_event.is_set():
       try:
+        if (self._wait_for_data is not None and
+            not self._wait_for_data(_DATA_WAIT_TIMEOUT_SEC)):
+          continue
         data = read()
       except Exception:  # pylint: disable=broad-except
         logger.exception("Exception occurred when reading in "
@@ -131,17 +284,34 @@ class PwHdlcRpcClient:
       if data:
         for frame in decoder.process_valid_frames(data):
           self._handle_frame(frame, frame_handlers)
+        if self._log_batch:
+          self.log_queue.put(b"".join(self._log_batch))
+          self._log_batch = []
       else:
-        # TODO(b/184718613): Refactor to non-blocking IO.
         time.sleep(0.01)
 
   def _push_to_log_queue(self, frame: Any):
-    """Push the HDLC log in frame into the log queue.
+    """Adds the HDLC log in frame to the batch for the log queue.
+
+    If a detokenizer is configured, binary (tokenized) logs, recognized by
+    control characters, invalid UTF-8 or a leading token of the detokenizer's
+    databases, are Base64-encoded with a "$" prefix, the text form of
+    tokenized messages, so that they can be detokenized as text. Without a
+    detokenizer, logs are added as is.
 
     Args:
       frame: HDLC frame packet.
     """
-    self.log_queue.put(frame.data + b"\n")
+    data = frame.data
+    if self._detokenizer is not None:
+      try:
+        data.decode("utf-8")
+        is_binary = _CONTROL_CHARACTERS.search(data) is not None
+      except UnicodeDecodeError:
+        is_binary = True
+      if is_binary or self._detokenizer.is_tokenized(data):
+        data = b"$" + base64.b64encode(data)
+    self._log_batch.append(data + b"\n")
 
   def _handle_frame(self,
                     frame: Any,
@@ -174,7 +344,8 @@ class PigweedRPCTransport(transport_base.TransportBase):
                protobufs: Collection[types.ModuleType],
                baudrate: int,
                auto_reopen: bool = True,
-               open_on_start: bool = True):
+               open_on_start: bool = True,
+               detokenizer: Optional[detokenizer_lib.Detokenizer] = None):
     super().__init__(
         auto_reopen=auto_reopen,
         open_on_start=open_on_start)
@@ -183,11 +354,15 @@ class PigweedRPCTransport(transport_base.TransportBase):
     self._serial = serial.Serial()
     self._serial.port = comms_address
     self._serial.baudrate = baudrate
-    self._serial.timeout = 0.01
+    self._serial.timeout = 0  # Reads return the data available right away.
     self._hdlc_client = PwHdlcRpcClient(
-        lambda: self._serial.read(4096),
+        lambda: self._serial.read(_READ_SIZE),
         self._serial.write,
-        protobufs)
+        protobufs,
+        wait_for_data=self._wait_for_data,
+        detokenizer=detokenizer)
+    self._subscriptions = {}
+    self._subscription_ids = itertools.count(1)
 
   def is_open(self) -> bool:
     """Returns True if the PwRPC transport is connected to the target.
@@ -199,6 +374,8 @@ class PigweedRPCTransport(transport_base.TransportBase):
 
   def _close(self) -> None:
     """Closes the PwRPC transport."""
+    for subscription_id in list(self._subscriptions):
+      self.unsubscribe(subscription_id)
     self._hdlc_client.close()
     fcntl.flock(self._serial.fileno(), fcntl.LOCK_UN)
     self._serial.close()
@@ -223,10 +400,21 @@ class PigweedRPCTransport(transport_base.TransportBase):
     """
     # Retrieving logs from queue doesn't support size configuration.
     del size
+    log_queue = self._hdlc_client.log_queue
     try:
-      return self._hdlc_client.log_queue.get(timeout=timeout)
+      log_batches = [log_queue.get(timeout=timeout)]
     except queue.Empty:
       return b""
+    while True:
+      try:
+        log_batches.append(log_queue.get_nowait())
+      except queue.Empty:
+        return b"".join(log_batches)
+
+  def _wait_for_data(self, timeout: float) -> bool:
+    """Waits up to timeout seconds for serial data. Returns if there is any."""
+    readable, _, _ = select.select([self._serial.fileno()], [], [], timeout)
+    return bool(readable)
 
   def _write(self, data: str, timeout: Optional[float] = None) -> int:
     """Dummy method for Pigweed RPC.
@@ -256,12 +444,113 @@ class PigweedRPCTransport(transport_base.TransportBase):
     Returns:
       (RPC ack value, RPC encoded payload in bytes)
     """
-    client_channel = self._hdlc_client.rpcs().chip.rpc
-    service = getattr(client_channel, service_name)
-    event = getattr(service, event_name)
+    event = self._get_rpc_method(service_name, event_name)
     ack, payload = event(**kwargs)
     return ack.ok(), payload.SerializeToString()
 
+  def rpc_batch(
+      self,
+      calls: Sequence[Tuple[str, str, Dict[str, Any]]],
+      timeout: float = _RPC_BATCH_TIMEOUT_SEC) -> List[Tuple[bool, bytes]]:
+    """Sends several RPCs back to back, then collects all their responses.
+
+    Saves a round trip per RPC compared to calling rpc() for each of them.
+
+    Args:
+      calls: (service name, event name, event method arguments) of each RPC.
+      timeout: Maximum seconds to wait for all the responses.
+
+    Returns:
+      (RPC ack value, RPC encoded payload in bytes) of each RPC, in order.
+      RPCs which didn't complete in time are cancelled and return
+      (False, b"").
+    """
+    pending_calls = [
+        self._hdlc_client.invoke(
+            self._get_rpc_method(service_name, event_name), _PendingCall(),
+            **kwargs)
+        for service_name, event_name, kwargs in calls
+    ]
+    end_time = time.time() + timeout
+    results = []
+    for pending_call in pending_calls:
+      if not pending_call.done.wait(max(end_time - time.time(), 0)):
+        pending_call.call.cancel()
+        results.append((False, b""))
+        continue
+      responses = pending_call.pop_responses()
+      payload = responses[-1].SerializeToString() if responses else b""
+      results.append((pending_call.is_ok(), payload))
+    return results
+
+  def subscribe(self, service_name: str, event_name: str,
+                **kwargs: Dict[str, Any]) -> int:
+    """Starts a server-streaming RPC.
+
+    Each response is written to the device log as a line
+    "RPC stream <subscription ID> <service>.<event>: <response>" and kept for
+    get_stream_responses().
+
+    Args:
+      service_name: PwRPC service name.
+      event_name: Server-streaming event name in the given service instance.
+      **kwargs: Arguments for the event method.
+
+    Returns:
+      Subscription ID to pass to get_stream_responses() and unsubscribe().
+    """
+    subscription_id = next(self._subscription_ids)
+
+    def log_response(response: Any) -> None:
+      self._hdlc_client.log_queue.put(_STREAM_LOG_FORMAT.format(
+          id=subscription_id, service=service_name, event=event_name,
+          response=text_format.MessageToString(
+              response, as_one_line=True)).encode("utf-8", "replace"))
+
+    self._subscriptions[subscription_id] = self._hdlc_client.invoke(
+        self._get_rpc_method(service_name, event_name),
+        _PendingCall(on_response=log_response,
+                     buffer_size=_STREAM_BUFFER_SIZE),
+        **kwargs)
+    return subscription_id
+
+  def get_stream_responses(
+      self, subscription_id: int) -> Tuple[bool, List[bytes]]:
+    """Returns the responses received since the last call.
+
+    Args:
+      subscription_id: ID returned by subscribe().
+
+    Returns:
+      (Whether the stream is still open, encoded responses in bytes). Only
+      the last responses are kept if they aren't retrieved in time.
+
+    Raises:
+      ValueError: Unknown subscription ID.
+    """
+    if subscription_id not in self._subscriptions:
+      raise ValueError(f"Unknown RPC subscription {subscription_id}.")
+    pending_call = self._subscriptions[subscription_id]
+    return (not pending_call.done.is_set(),
+            [response.SerializeToString()
+             for response in pending_call.pop_responses()])
+
+  def unsubscribe(self, subscription_id: int) -> None:
+    """Cancels a server-streaming RPC started by subscribe().
+
+    Args:
+      subscription_id: ID returned by subscribe().
+    """
+    pending_call = self._subscriptions.pop(subscription_id, None)
+    if pending_call is not None and not pending_call.done.is_set():
+      pending_call.call.cancel()
+
+  def _get_rpc_method(self, service_name: str, event_name: str) -> Any:
+    """Returns the method client of a Matter endpoint event."""
+    client_channel = self._hdlc_client.rpcs().chip.rpc
+    service = getattr(client_channel, service_name)
+    return getattr(service, event_name)
+
   def echo_rpc(self, msg: str) -> Tuple[bool, str]:
     """Calls the Echo RPC endpoint.
 
@@ -12,9 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Defines a serial port transport by wrapping the Pyserial interface."""
+"""Defines a serial port transport by wrapping the Pyserial interface.
+
+With the use_reader_thread property set, a thread drains the serial port into
+a large in-process ring buffer as soon as data arrives, and reads are served
+from the ring buffer. This prevents data loss when the transport process
+stalls long enough for the OS serial buffer (4095 bytes) to fill up, which
+takes under 50 ms at 921600 baud. If the ring buffer fills up as well, the
+oldest bytes are overwritten and counted as overruns (see
+get_read_buffer_stats()).
+"""
 import fcntl
 import os
+import threading
 import time
 import typing
 
@@ -26,7 +36,89 @@ import six
 
 logger = gdm_logger.get_logger()
 DEFAULT_BAUDRATE = 115200
+DEFAULT_READ_BUFFER_SIZE = 4 * 1024 * 1024
 REOPEN_TIMEOUT = 20
+_READER_THREAD_READ_TIMEOUT = 0.05
+_READER_THREAD_STOP_TIMEOUT = 1
+
+
+class _RingBuffer:
+  """Thread-safe byte ring buffer which overwrites the oldest bytes when full."""
+
+  def __init__(self, size):
+    self._buffer = bytearray(size)
+    self._size = size
+    self._start = 0
+    self._length = 0
+    self._data_available = threading.Condition()
+    self.overruns = 0
+    self.overrun_bytes = 0
+    self.peak_fill = 0
+
+  def clear(self):
+    with self._data_available:
+      self._start = 0
+      self._length = 0
+
+  def get_stats(self):
+    """Returns buffer size, current and peak fill, and overrun counters."""
+    with self._data_available:
+      return {
+          "size": self._size,
+          "fill": self._length,
+          "peak_fill": self.peak_fill,
+          "overruns": self.overruns,
+          "overrun_bytes": self.overrun_bytes,
+      }
+
+  def read(self, size, timeout=None):
+    """Returns up to size bytes, waiting up to timeout seconds for any data.
+
+    Args:
+        size (int): maximum number of bytes to return.
+        timeout (float): maximum seconds to wait for data or indefinitely if
+          None.
+
+    Returns:
+        bytes: data read. Empty if no data arrived within timeout.
+    """
+    with self._data_available:
+      if not self._length:
+        self._data_available.wait(timeout)
+      size = min(size, self._length)
+      end = self._start + size
+      if end <= self._size:
+        data = bytes(self._buffer[self._start:end])
+      else:
+        data = bytes(self._buffer[self._start:] +
+                     self._buffer[:end - self._size])
+      self._start = end % self._size
+      self._length -= size
+      return data
+
+  def write(self, data):
+    """Appends data, overwriting the oldest bytes if the buffer is full."""
+    with self._data_available:
+      if len(data) > self._size:
+        self._record_overrun(len(data) - self._size)
+        data = data[-self._size:]
+      excess = self._length + len(data) - self._size
+      if excess > 0:
+        self._record_overrun(excess)
+        self._start = (self._start + excess) % self._size
+        self._length -= excess
+      write_start = (self._start + self._length) % self._size
+      first_part_length = min(len(data), self._size - write_start)
+      self._buffer[write_start:write_start + first_part_length] = (
+          data[:first_part_length])
+      self._buffer[:len(data) - first_part_length] = data[first_part_length:]
+      self._length += len(data)
+      self.peak_fill = max(self.peak_fill, self._length)
+      self._data_available.notify()
+
+  def _record_overrun(self, lost_bytes):
+    self.overruns += 1
+    self.overrun_bytes += lost_bytes
 
 
 class SerialTransport(transport_base.TransportBase):
@@ -40,7 +132,9 @@ class SerialTransport(transport_base.TransportBase):
                stopbits=serial.STOPBITS_ONE,
                use_high_baudrate_flow_control=False,
                auto_reopen=False,
-               open_on_start=True):
+               open_on_start=True,
+               use_reader_thread=False,
+               read_buffer_size=DEFAULT_READ_BUFFER_SIZE):
     """Initialize the SerialTransport object with the given serial properties.
 
     Args:
@@ -56,6 +150,9 @@ class SerialTransport(transport_base.TransportBase):
           unexpectedly closed.
         open_on_start (bool): flag indicating transport should be open on
           TransportProcess start.
+        use_reader_thread (bool): whether to drain the serial port into a ring
+          buffer from a dedicated thread. Recommended for high baud rates.
+        read_buffer_size (int): size of the ring buffer in bytes.
     """
     super(SerialTransport, self).__init__(auto_reopen, open_on_start)
     self._max_read_errors = 3
@@ -69,10 +166,16 @@ class SerialTransport(transport_base.TransportBase):
         props.DSRDTR: False,
         props.EXCLUSIVE: True,
         props.READ_REOPEN: True,
-        props.USE_HIGH_BAUDRATE_FLOW_CONTROL: use_high_baudrate_flow_control
+        props.USE_HIGH_BAUDRATE_FLOW_CONTROL: use_high_baudrate_flow_control,
+        props.USE_READER_THREAD: use_reader_thread,
+        props.READ_BUFFER_SIZE: read_buffer_size
     })
     self.comms_address = comms_address
     self._read_errors = 0
+    self._read_buffer = None
+    self._reader_thread = None
+    self._reader_error = None
+    self._reader_stop_event = None
     # Windows is not supported due to use of fcntl.
     # Cast to Posix serial so pytype understands this.
     self._serial = typing.cast(serial.serialposix.Serial, serial.Serial())
@@ -110,13 +213,71 @@ class SerialTransport(transport_base.TransportBase):
     fd = self._serial.fileno()
     flags = fcntl.fcntl(fd, fcntl.F_GETFD)
     fcntl.fcntl(fd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+    if self._properties[props.USE_READER_THREAD]:
+      self._start_reader_thread()
 
   def _close(self):
     """Closes the serial port."""
+    self._stop_reader_thread()
     # Prevent holding on to the exclusive lock [NEP-2473]
     fcntl.flock(self._serial.fileno(), fcntl.LOCK_UN)
     self._serial.close()
 
+  def get_read_buffer_stats(self):
+    """Returns reader thread ring buffer statistics.
+
+    Returns:
+        dict: "size", "fill" (current) and "peak_fill" of the ring buffer in
+        bytes, number of "overruns" and "overrun_bytes" lost because the
+        buffer was full. None if the reader thread was never started.
+    """
+    if self._read_buffer is None:
+      return None
+    return self._read_buffer.get_stats()
+
+  def _start_reader_thread(self):
+    """Starts the thread which drains the serial port into the ring buffer."""
+    buffer_size = self._properties[props.READ_BUFFER_SIZE]
+    if self._read_buffer is None or self._read_buffer.get_stats()[
+        "size"] != buffer_size:
+      self._read_buffer = _RingBuffer(buffer_size)
+    else:
+      self._read_buffer.clear()
+    self._reader_error = None
+    self._reader_stop_event = threading.Event()
+    self._serial.timeout = _READER_THREAD_READ_TIMEOUT
+    self._reader_thread = threading.Thread(
+        target=self._reader_thread_loop,
+        name="{}-SerialReader".format(self.comms_address),
+        daemon=True)
+    self._reader_thread.start()
+
+  def _stop_reader_thread(self):
+    if self._reader_thread is not None:
+      self._reader_stop_event.set()
+      self._reader_thread.join(timeout=_READER_THREAD_STOP_TIMEOUT)
+      self._reader_thread = None
+
+  def _reader_thread_loop(self):
+    """Reads from the serial port into the ring buffer until stopped."""
+    overruns = self._read_buffer.overruns
+    while not self._reader_stop_event.is_set():
+      try:
+        data = self._serial.read(self._serial.in_waiting or 1)
+      except (serial.SerialException, OSError, TypeError) as err:
+        # TypeError is raised by pyserial if the port is closed mid-read.
+        if not self._reader_stop_event.is_set():
+          self._reader_error = err
+        return
+      if data:
+        self._read_buffer.write(data)
+        if self._read_buffer.overruns != overruns:
+          overruns = self._read_buffer.overruns
+          logger.warning(
+              "{} serial read buffer overrun: {} bytes lost in {} overruns "
+              "so far.".format(self.comms_address,
+                               self._read_buffer.overrun_bytes, overruns))
+
   def _read(self, size=1, timeout=None):
     """Returns bytes read up to max_bytes within timeout in seconds specified.
 
@@ -132,14 +293,20 @@ class SerialTransport(transport_base.TransportBase):
     Returns:
         str: bytes read from transport or None if no bytes were read
     """
-    self._serial.timeout = timeout
     try:
-      in_waiting = self._serial.in_waiting
-      if in_waiting > 3072:
-        logger.warning("Serial port input buffer size exceeds 3072 bytes. "
-                       "Data will be lost if buffer size exceeds 4095 bytes. \n"
-                       "Input buffer size: {}".format(in_waiting))
-      result = self._serial.read(size=size)
+      if self._reader_thread is not None:
+        result = self._read_buffer.read(size, timeout=timeout)
+        if not result and self._reader_error is not None:
+          raise self._reader_error
+      else:
+        if self._serial.timeout != timeout:
+          self._serial.timeout = timeout
+        in_waiting = self._serial.in_waiting
+        if in_waiting > 3072:
+          logger.warning("Serial port input buffer size exceeds 3072 bytes. "
+                         "Data will be lost if buffer size exceeds 4095 bytes. "
+                         "\nInput buffer size: {}".format(in_waiting))
+        result = self._serial.read(size=size)
       if self._read_errors:
         self._read_errors -= 1
     except serial.SerialException as err:
@@ -246,6 +413,8 @@ class SerialTransport(transport_base.TransportBase):
     self._serial.flush()
     self._serial.reset_input_buffer()
     self._serial.reset_output_buffer()
+    if self._read_buffer is not None:
+      self._read_buffer.clear()
 
   def send_xon(self):
     """Sends flow control XON byte.
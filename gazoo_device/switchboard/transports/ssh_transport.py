@@ -45,6 +45,9 @@ class SSHTransport(process_transport.ProcessTransport):
       username: Username to log in as.
     """
     self.comms_address = comms_address
+    self._username = username
+    self._ssh_options = args
+    self._key_info = key_info
     args = host_utils.generate_ssh_args(
         comms_address,
         log_cmd,
@@ -58,4 +61,9 @@ class SSHTransport(process_transport.ProcessTransport):
         open_on_start=open_on_start)
 
   def _is_ready_to_open(self):
-    return host_utils.is_pingable(self.comms_address)
+    if not host_utils.is_pingable(self.comms_address):
+      return False
+    # Share the connection with the other transports and host_utils commands.
+    host_utils.open_ssh_connection(
+        self.comms_address, self._username, self._ssh_options, self._key_info)
+    return True
@@ -0,0 +1,96 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.capabilities.shell_ssh.py."""
+import re
+import unittest
+from unittest import mock
+
+from gazoo_device import errors
+from gazoo_device.capabilities import shell_ssh
+from gazoo_device.capabilities.interfaces import shell_base
+
+
+def _fake_send_and_expect(outputs):
+  """Returns a send_and_expect which responds like a shell would."""
+
+  def send_and_expect(command, patterns, **kwargs):
+    del kwargs  # Unused by send_and_expect
+    markers = re.findall(r"echo (GDM_BATCH_\w+?_\d+):\$\?", command)
+    before = "".join(
+        "{}\n{}:{}\n".format(output, marker, code)
+        for (output, code), marker in zip(outputs, markers))
+    response = mock.MagicMock(timedout=False)
+    response.match = re.search(patterns[0],
+                               before + "Return Code: 0\n", re.DOTALL)
+    return response
+
+  return send_and_expect
+
+
+class ShellSSHTests(unittest.TestCase):
+  """Unit tests for gazoo_device.capabilities.shell_ssh.py."""
+
+  def _make_shell(self, outputs):
+    mock_send_and_expect = mock.MagicMock(
+        side_effect=_fake_send_and_expect(outputs))
+    return shell_ssh.ShellSSH(mock_send_and_expect, "raspberrypi-1234")
+
+  def test_shell_batch_single_round_trip(self):
+    """Test that all commands are sent at once and responses are split."""
+    shell = self._make_shell([("5.10.17-v7+", 0), ("", 1),
+                              ("line 1\nline 2", 0)])
+    results = shell.shell_batch(["uname -r", "false;", "cat foo"])
+    self.assertEqual(results, [("5.10.17-v7+", 0), ("", 1),
+                               ("line 1\nline 2", 0)])
+    shell._send_and_expect.assert_called_once()
+    command = shell._send_and_expect.call_args[0][0]
+    self.assertTrue(command.startswith("{\nuname -r\necho GDM_BATCH_"))
+
+  def test_shell_batch_keeps_commands_on_separate_lines(self):
+    """Test that background commands and comments don't break the batch."""
+    shell = self._make_shell([("", 0), ("a", 0)])
+    shell.shell_batch(["sleep 1 &", "echo a  # comment"])
+    lines = shell._send_and_expect.call_args[0][0].splitlines()
+    self.assertEqual(lines[0], "{")
+    self.assertEqual(lines[1], "sleep 1 &")
+    self.assertRegex(lines[2], r"^echo GDM_BATCH_\w+_0:\$\?$")
+    self.assertEqual(lines[3], "echo a  # comment")
+    self.assertRegex(lines[4], r"^echo GDM_BATCH_\w+_1:\$\?$")
+    self.assertTrue(lines[5].startswith("}"))
+
+  def test_shell_batch_missing_output_raises_error(self):
+    """Test that an incomplete response raises DeviceError."""
+    shell = self._make_shell([("5.10.17-v7+", 0)])
+    with self.assertRaisesRegex(errors.DeviceError, "Expected output of 2"):
+      shell.shell_batch(["uname -r", "cat /etc/os-release"])
+
+  def test_shell_batch_without_commands(self):
+    """Test that no commands are sent for an empty batch."""
+    shell = self._make_shell([])
+    self.assertEqual(shell.shell_batch([]), [])
+    shell._send_and_expect.assert_not_called()
+
+  def test_default_shell_batch_sends_commands_one_by_one(self):
+    """Test the ShellBase fallback implementation."""
+    shell = self._make_shell([])
+    with mock.patch.object(
+        shell, "shell", side_effect=[("a", 0), ("b", 1)]) as mock_shell:
+      results = shell_base.ShellBase.shell_batch(shell, ["echo a", "echo b"])
+    self.assertEqual(results, [("a", 0), ("b", 1)])
+    self.assertEqual(mock_shell.call_count, 2)
+
+
+if __name__ == "__main__":
+  unittest.main()
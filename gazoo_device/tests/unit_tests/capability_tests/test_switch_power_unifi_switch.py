@@ -0,0 +1,93 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.capabilities.switch_power_unifi_switch.py."""
+import re
+import unittest
+from unittest import mock
+
+from gazoo_device import errors
+from gazoo_device.auxiliary_devices import unifi_poe_switch
+from gazoo_device.capabilities import switch_power_unifi_switch
+
+_TOTAL_PORTS = 4
+
+
+class _FakeTelnetSession:
+  """Tracks the PoE mode of the ports as configured over telnet."""
+
+  def __init__(self):
+    self.commands = []
+    self.port_modes = ["Auto"] * _TOTAL_PORTS
+    self.broken_ports = []
+    self._interface = None
+
+  def send(self, command):
+    self.commands.append(command)
+    port = self._interface
+    if port not in self.broken_ports:
+      self.port_modes[port - 1] = (
+          "Auto" if command.endswith("auto") else "Shutdown")
+
+  def send_and_expect(self, command, pattern_list, **kwargs):
+    del kwargs  # Unused by the fake.
+    self.commands.append(command)
+    if command.startswith("interface"):
+      self._interface = int(command.split("/")[-1])
+    if command != unifi_poe_switch.COMMANDS["GET_ALL_PORTS_MODE"]:
+      return mock.Mock()  # Prompts aren't checked.
+    output = "\n".join(f"0/{port}    {mode}" for port, mode in enumerate(
+        self.port_modes, start=1)) + "(Config)#"
+    return mock.Mock(match=re.search(pattern_list[0], output, re.DOTALL))
+
+
+class SwitchPowerUnifiSwitchTests(unittest.TestCase):
+  """Unit tests for gazoo_device.capabilities.switch_power_unifi_switch.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.session = _FakeTelnetSession()
+    self.switch_power = switch_power_unifi_switch.SwitchPowerUnifiSwitch(
+        device_name="unifi_switch-1234",
+        command_dict=unifi_poe_switch.COMMANDS,
+        regex_dict=unifi_poe_switch.REGEXES,
+        total_ports=_TOTAL_PORTS,
+        send_and_expect_fn=self.session.send_and_expect,
+        send_fn=self.session.send)
+
+  def test_set_ports_mode_in_one_session(self):
+    """Test that ports are set and verified without leaving config mode."""
+    self.switch_power.set_ports_mode("off", [1, 3])
+    self.assertEqual(self.session.port_modes,
+                     ["Shutdown", "Auto", "Shutdown", "Auto"])
+    self.assertEqual(self.session.commands.count("telnet localhost"), 1)
+    self.assertEqual(self.session.commands.count("show poe port all"), 1)
+    self.assertEqual(self.switch_power.get_cached_mode(3), "off")
+    self.assertEqual(self.session.commands.count("show poe port all"), 1)
+
+  def test_set_all_ports_mode(self):
+    """Test that all ports are set in a single session."""
+    self.switch_power.set_all_ports_mode("off")
+    self.assertEqual(self.session.port_modes, ["Shutdown"] * _TOTAL_PORTS)
+    self.assertEqual(self.session.commands.count("telnet localhost"), 1)
+
+  def test_set_ports_mode_verification_failure(self):
+    """Test that ports which didn't change mode are reported."""
+    self.session.broken_ports = [2]
+    with self.assertRaisesRegex(errors.DeviceError, r"ports \[2\] is not off"):
+      self.switch_power.set_ports_mode("off", [1, 2])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,108 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.capabilities.switch_power_usb_with_charge.py."""
+import unittest
+from unittest import mock
+
+from gazoo_device import errors
+from gazoo_device.auxiliary_devices import cambrionix
+from gazoo_device.capabilities import switch_power_usb_with_charge
+from gazoo_device.capabilities.interfaces import switch_power_base
+from gazoo_device.utility import property_cache
+
+_TOTAL_PORTS = 3
+_STATES = {
+    1: "1, 0000, R D S, 0, 0, x, 0.00",
+    2: "2, 0000, O, 0, 0, x, 0.00",
+    3: "3, 0000, R D C, 0, 0, x, 0.00",
+}
+
+
+class SwitchPowerUsbWithChargeTests(unittest.TestCase):
+  """Unit tests for gazoo_device.capabilities.switch_power_usb_with_charge.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.mock_shell = mock.MagicMock()
+    self.mock_shell_batch = mock.MagicMock(
+        side_effect=lambda commands: [
+            _STATES[int(command.split()[-1])] if command.startswith("state")
+            else "" for command in commands])
+    self.switch_power = switch_power_usb_with_charge.SwitchPowerUsbWithCharge(
+        shell_fn=self.mock_shell,
+        regex_shell_fn=mock.MagicMock(),
+        command_dict=cambrionix.COMMANDS,
+        regex_dict=cambrionix.REGEXES,
+        device_name="cambrionix-1234",
+        serial_number="1234",
+        total_ports=_TOTAL_PORTS,
+        shell_batch_fn=self.mock_shell_batch)
+
+  def test_get_all_ports_mode_in_one_round_trip(self):
+    """Test that the states of all ports are queried together."""
+    self.assertEqual(self.switch_power.get_all_ports_mode(),
+                     ["sync", "off", "charge"])
+    self.mock_shell_batch.assert_called_once_with(
+        ["state 1", "state 2", "state 3"])
+
+  def test_set_all_ports_mode_in_one_round_trip(self):
+    """Test that the modes of all ports are set together."""
+    self.switch_power.set_all_ports_mode("off")
+    self.mock_shell_batch.assert_called_once_with(
+        ["mode off 1", "mode off 2", "mode off 3"])
+    self.mock_shell.assert_not_called()
+
+  def test_get_all_ports_mode_unexpected_response(self):
+    """Test that a response without a port state raises an error."""
+    self.mock_shell_batch.side_effect = lambda commands: [""] * len(commands)
+    with self.assertRaisesRegex(errors.DeviceError, "state of port 1"):
+      self.switch_power.get_all_ports_mode()
+
+  def test_get_cached_mode_refreshes_all_ports(self):
+    """Test that cache misses refresh the modes of all ports at once."""
+    self.assertEqual(self.switch_power.get_cached_mode(3), "charge")
+    self.assertEqual(self.switch_power.get_cached_mode("1"), "sync")
+    self.mock_shell_batch.assert_called_once_with(
+        ["state 1", "state 2", "state 3"])
+
+  def test_get_cached_mode_after_set_mode(self):
+    """Test that modes set through GDM are cached until invalidated."""
+    self.switch_power.set_mode("off", 1)
+    self.assertEqual(self.switch_power.get_cached_mode(1), "off")
+    self.mock_shell_batch.assert_not_called()
+
+    property_cache.set_value(self.switch_power, "other_property", "value",
+                             ttl=60)
+    with mock.patch.object(property_cache, "invalidate") as mock_invalidate:
+      self.switch_power.invalidate_port_modes()
+    mock_invalidate.assert_not_called()
+    self.assertEqual(self.switch_power.get_cached_mode(1), "sync")
+    self.mock_shell_batch.assert_called_once()
+    self.assertEqual(
+        property_cache.get_value(self.switch_power, "other_property"),
+        (True, "value"))
+
+  def test_cached_modes_expire(self):
+    """Test that cached modes are queried again after PORT_MODE_TTL."""
+    self.switch_power.set_all_ports_mode("off")
+    with mock.patch.object(switch_power_base, "PORT_MODE_TTL", 0):
+      self.switch_power.set_mode("off", 2)
+    self.assertEqual(self.switch_power.get_cached_mode(1), "off")
+    self.assertEqual(self.switch_power.get_cached_mode(2), "off")
+    self.assertEqual(self.mock_shell_batch.call_count, 2)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,99 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.switchboard.detokenizer.py."""
+import base64
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from gazoo_device.switchboard import detokenizer
+
+_CSV_TOKEN = 0x141C35D5
+_BINARY_TOKEN = 0x2E668CD6
+
+
+def _encode_varint(value):
+  value = (value << 1) ^ (value >> 63)  # Zigzag encoding.
+  encoded = b""
+  while value > 0x7F:
+    encoded += bytes(((value & 0x7F) | 0x80,))
+    value >>= 7
+  return encoded + bytes((value,))
+
+
+def _encode_message(token, *arguments):
+  return "$" + base64.b64encode(
+      struct.pack("<I", token) + b"".join(arguments)).decode()
+
+
+class DetokenizerTests(unittest.TestCase):
+  """Unit tests for gazoo_device.switchboard.detokenizer.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.database_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.database_directory)
+    with open(os.path.join(self.database_directory, "app.csv"), "w") as f:
+      f.write('{:08x},          ,"Light %s: level %d%%, %u, 0x%x, %.1f"\n'
+              .format(_CSV_TOKEN))
+    strings = [b"Booted in %d ms\0", b"Unused\0"]
+    with open(os.path.join(self.database_directory, "lib.bin"), "wb") as f:
+      f.write(b"TOKENS\0\0" + struct.pack("<I4x", len(strings)))
+      f.write(struct.pack("<IBBH", 1, 0xFF, 0xFF, 0xFFFF))
+      f.write(struct.pack("<IBBH", _BINARY_TOKEN, 0xFF, 0xFF, 0xFFFF))
+      f.write(b"".join(reversed(strings)))
+    self.detokenizer = detokenizer.Detokenizer(self.database_directory)
+
+  def test_detokenize_line(self):
+    """Test that messages are replaced with their text in lines."""
+    message = _encode_message(_CSV_TOKEN, b"\x03off", _encode_varint(-5),
+                              _encode_varint(-1), _encode_varint(255),
+                              struct.pack("<f", 2.25))
+    self.assertEqual(
+        self.detokenizer.detokenize_line("I " + message + " done\n"),
+        "I Light off: level -5%, 4294967295, 0xff, 2.2 done\n")
+    self.assertEqual(
+        self.detokenizer.detokenize_line(
+            _encode_message(_BINARY_TOKEN, _encode_varint(1234)) + "\n"),
+        "Booted in 1234 ms\n")
+
+  def test_is_tokenized(self):
+    """Test that messages are recognized by their leading token."""
+    self.assertTrue(self.detokenizer.is_tokenized(
+        struct.pack("<I", _CSV_TOKEN) + b"args"))
+    self.assertTrue(self.detokenizer.is_tokenized(
+        struct.pack("<I", _BINARY_TOKEN)))
+    self.assertFalse(self.detokenizer.is_tokenized(b"Hello"))
+    self.assertFalse(self.detokenizer.is_tokenized(b"Hi"))
+
+  def test_truncated_string_argument(self):
+    """Test that truncated string arguments are marked."""
+    message = struct.pack("<I", _CSV_TOKEN) + b"\x82ab" + b"\x00" * 4 + (
+        struct.pack("<f", 0))
+    self.assertEqual(self.detokenizer.detokenize(message),
+                     "Light ab[...]: level 0%, 0, 0x0, 0.0")
+
+  def test_undecodable_messages_are_left_as_is(self):
+    """Test that unknown tokens and corrupt arguments are left alone."""
+    for line in (_encode_message(0x12345678) + "\n",
+                 _encode_message(_BINARY_TOKEN) + "\n",
+                 "Cost: $5\n"):
+      self.assertEqual(self.detokenizer.detokenize_line(line), line)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,94 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.switchboard.log_follower.py."""
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from gazoo_device.switchboard import log_follower
+from gazoo_device.switchboard import log_process
+
+_START_TIME = datetime.datetime(2021, 6, 1, 12, 0, 0)
+
+
+def _get_log_line(seconds, text):
+  host_timestamp = (_START_TIME + datetime.timedelta(seconds=seconds)).strftime(
+      log_process.HOST_TIMESTAMP_FORMAT)
+  return "{} GDM-0: {}\n".format(host_timestamp, text)
+
+
+class LogFollowerTests(unittest.TestCase):
+  """Unit tests for gazoo_device.switchboard.log_follower.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.log_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.log_directory)
+
+  def _write(self, log_path, *lines):
+    with open(log_path, "a") as log_file:
+      log_file.writelines(lines)
+
+  def test_lines_of_several_devices_are_merged(self):
+    """Test that lines are yielded in host timestamp order."""
+    log_paths = {
+        name: os.path.join(self.log_directory, name + ".txt")
+        for name in ("device-1234", "device-5678")
+    }
+    self._write(log_paths["device-1234"], _get_log_line(1, "a"),
+                _get_log_line(3, "c"))
+    self._write(log_paths["device-5678"], _get_log_line(2, "b"),
+                _get_log_line(4, "d"))
+    with log_follower.LogFollower(log_paths) as follower:
+      lines = list(follower.follow(duration=0.1))
+    self.assertEqual([name for name, _ in lines],
+                     ["device-1234", "device-5678"] * 2)
+    self.assertEqual([line[-2] for _, line in lines], ["a", "b", "c", "d"])
+
+  def test_rotation_and_partial_lines(self):
+    """Test that rotated log files are followed and partial lines held."""
+    log_path = os.path.join(self.log_directory, "device-1234.txt")
+    self._write(log_path, _get_log_line(1, "first"), "<2021-06-01 12")
+    next_log_path = log_process.get_next_log_filename(log_path)
+
+    def rotate():
+      time.sleep(0.2)
+      self._write(log_path, ":00:02.000000> GDM-0: second\n")
+      self._write(next_log_path, _get_log_line(3, "third"))
+
+    writer = threading.Thread(target=rotate)
+    writer.start()
+    with log_follower.LogFollower({"device-1234": log_path}) as follower:
+      lines = [line for _, line in follower.follow(duration=1)]
+    writer.join()
+    self.assertEqual(lines, [_get_log_line(1, "first"),
+                             _get_log_line(2, "second"),
+                             _get_log_line(3, "third")])
+
+  def test_wait_for_logs(self):
+    """Test waiting for log files to be created."""
+    log_path = os.path.join(self.log_directory, "device-1234.txt")
+    with log_follower.LogFollower({"device-1234": log_path}) as follower:
+      self.assertFalse(follower.wait_for_logs(timeout=0.1))
+      threading.Timer(0.1, self._write, (log_path,)).start()
+      self.assertTrue(follower.wait_for_logs(timeout=5))
+
+
+if __name__ == "__main__":
+  unittest.main()
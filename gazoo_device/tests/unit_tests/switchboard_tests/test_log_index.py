@@ -0,0 +1,99 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.switchboard.log_index.py."""
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gazoo_device.switchboard import log_index
+from gazoo_device.switchboard import log_process
+
+_LINE_COUNT = 300
+_START_TIME = datetime.datetime(2021, 6, 1, 12, 0, 0)
+
+
+def _get_log_line(num):
+  host_timestamp = (_START_TIME + datetime.timedelta(seconds=num)).strftime(
+      log_process.HOST_TIMESTAMP_FORMAT)
+  return "{} GDM-0: line {}\n".format(host_timestamp, num)
+
+
+class LogIndexTests(unittest.TestCase):
+  """Unit tests for gazoo_device.switchboard.log_index.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.log_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.log_directory)
+    self.log_path = os.path.join(self.log_directory, "device-1234.txt")
+    with mock.patch.object(log_process, "INDEX_INTERVAL", 512):
+      writer = log_process.LogWriterProcess(
+          "device-1234", mock.MagicMock(), mock.MagicMock(), mock.MagicMock(),
+          mock.MagicMock(), self.log_path, max_log_size=4096)
+      writer._pre_run_hook()
+      for num in range(_LINE_COUNT):
+        writer._write_log_line(_get_log_line(num))
+        writer._do_log_rotation()
+      writer._close_file()
+
+  def test_writer_creates_index_for_each_segment(self):
+    """Test that every rotated log file gets a sparse index."""
+    segments = log_index.get_log_segments(self.log_path)
+    self.assertGreater(len(segments), 2)
+    for segment in segments:
+      entries = log_index._read_index(segment)
+      self.assertGreater(len(entries), 1)
+      with open(segment, "rb") as log_file:
+        for timestamp, offset in entries:
+          log_file.seek(offset)
+          self.assertTrue(log_file.readline().startswith(timestamp))
+
+  def test_get_lines_in_time_range(self):
+    """Test that only lines in the time range are returned."""
+    lines = log_index.get_lines(
+        self.log_path, _START_TIME + datetime.timedelta(seconds=100),
+        _START_TIME + datetime.timedelta(seconds=250))
+    device_lines = [line for line in lines if " GDM-0: " in line]
+    self.assertEqual(device_lines,
+                     [_get_log_line(num) for num in range(100, 251)])
+
+  def test_get_lines_with_parallel_scan(self):
+    """Test that parallel scanning returns lines in the logged order."""
+    start_time = (_START_TIME + datetime.timedelta(seconds=20)).timestamp()
+    lines = log_index.get_lines(self.log_path, start_time)
+    self.assertEqual(
+        log_index.get_lines(self.log_path, start_time, max_workers=2), lines)
+    self.assertEqual(lines[0], _get_log_line(20))
+    self.assertEqual(lines[-1], _get_log_line(_LINE_COUNT - 1))
+
+  def test_search_since(self):
+    """Test that regex matches are returned from the given time only."""
+    lines = log_index.search(self.log_path, r"line \d*7$",
+                             since=_START_TIME + datetime.timedelta(seconds=270))
+    self.assertEqual(lines, [_get_log_line(num) for num in (277, 287, 297)])
+
+  def test_search_without_index(self):
+    """Test that logs without an index are searched from the start."""
+    for segment in log_index.get_log_segments(self.log_path):
+      os.remove(log_process.get_index_filename(segment))
+    self.assertEqual(log_index.search(self.log_path, "line 5$"),
+                     [_get_log_line(5)])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,168 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.switchboard.transports.pigweed_rpc_transport.py."""
+import queue
+import unittest
+import zlib
+from unittest import mock
+
+from gazoo_device.switchboard.transports import pigweed_rpc_transport
+
+
+def _encode_hdlc_frame(address, data):
+  frame = bytes((address, 0x03)) + data
+  frame += zlib.crc32(frame).to_bytes(4, "little")
+  escaped = frame.replace(b"\x7d", b"\x7d\x5d").replace(b"\x7e", b"\x7d\x5e")
+  return b"\x7e" + escaped + b"\x7e"
+
+
+class _FakeStatus:
+
+  def __init__(self, ok):
+    self._ok = ok
+
+  def ok(self):
+    return self._ok
+
+
+class _FakeResponse:
+
+  def __init__(self, payload):
+    self.payload = payload
+
+  def SerializeToString(self):  # pylint: disable=invalid-name
+    return self.payload
+
+
+class _FakeHdlcRpcClient:
+  """Completes RPCs named "Ok" right away and leaves the others pending."""
+
+  def __init__(self):
+    self.log_queue = queue.Queue()
+    self.invoked = []
+
+  def is_alive(self):
+    return False
+
+  def invoke(self, method, pending_call, **kwargs):
+    self.invoked.append((method, kwargs))
+    pending_call.call = mock.Mock()
+    if method == "Ok":
+      pending_call.on_next(None, _FakeResponse(repr(kwargs).encode()))
+      pending_call.on_completed(None, _FakeStatus(True))
+    return pending_call
+
+
+class PigweedRPCTransportTests(unittest.TestCase):
+  """Unit tests for gazoo_device.switchboard.transports.pigweed_rpc_transport.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.hdlc_client = _FakeHdlcRpcClient()
+    with mock.patch.object(pigweed_rpc_transport, "PwHdlcRpcClient",
+                           return_value=self.hdlc_client), \
+        mock.patch.object(pigweed_rpc_transport.serial, "Serial"):
+      self.transport = pigweed_rpc_transport.PigweedRPCTransport(
+          "/dev/ttyACM0", protobufs=(), baudrate=115200)
+    get_rpc_method_patch = mock.patch.object(
+        self.transport, "_get_rpc_method",
+        side_effect=lambda service_name, event_name: event_name)
+    get_rpc_method_patch.start()
+    self.addCleanup(get_rpc_method_patch.stop)
+
+  def test_hdlc_frame_decoder(self):
+    """Test decoding escaped frames split across chunks of data."""
+    data = (b"noise" + _encode_hdlc_frame(1, b"log \x7e\x7d line") +
+            _encode_hdlc_frame(82, b"rpc")[:-1] + b"\x00\x7e" +
+            _encode_hdlc_frame(1, b"second log line"))
+    decoder = pigweed_rpc_transport._HdlcFrameDecoder()
+    with mock.patch.object(pigweed_rpc_transport, "decode",
+                           create=True) as mock_decode:
+      mock_decode.Frame.side_effect = lambda raw_frame, decoded_frame: (
+          decoded_frame[2:-4])
+      frames = decoder.process_valid_frames(data[:20])
+      frames += decoder.process_valid_frames(data[20:])
+    self.assertEqual(frames, [b"log \x7e\x7d line", b"second log line"])
+
+  def test_printable_tokenized_logs_are_encoded(self):
+    """Test that frames starting with a known token are Base64-encoded."""
+    client = pigweed_rpc_transport.PwHdlcRpcClient.__new__(
+        pigweed_rpc_transport.PwHdlcRpcClient)
+    client._log_batch = []
+    client._detokenizer = mock.Mock(
+        is_tokenized=lambda data: data.startswith(b"Tok!"))
+    for data in (b"Tok!", b"plain text", b"\x01\x02"):
+      client._push_to_log_queue(mock.Mock(data=data))
+    self.assertEqual(client._log_batch,
+                     [b"$VG9rIQ==\n", b"plain text\n", b"$AQI=\n"])
+
+  def test_text_logs_are_not_encoded(self):
+    """Test that logs stay as is without a detokenizer or with ANSI colors."""
+    client = pigweed_rpc_transport.PwHdlcRpcClient.__new__(
+        pigweed_rpc_transport.PwHdlcRpcClient)
+    client._log_batch = []
+    client._detokenizer = None
+    for data in (b"\x1b[32mgreen\x1b[0m", b"\x01\x02", b"\xff"):
+      client._push_to_log_queue(mock.Mock(data=data))
+    client._detokenizer = mock.Mock(is_tokenized=lambda data: False)
+    client._push_to_log_queue(mock.Mock(data=b"\x1b[32mgreen\x1b[0m"))
+    self.assertEqual(client._log_batch,
+                     [b"\x1b[32mgreen\x1b[0m\n", b"\x01\x02\n", b"\xff\n",
+                      b"\x1b[32mgreen\x1b[0m\n"])
+
+  def test_read_returns_all_queued_logs(self):
+    """Test that log batches queued since the last read are read at once."""
+    self.hdlc_client.log_queue.put(b"line 1\nline 2\n")
+    self.hdlc_client.log_queue.put(b"line 3\n")
+    self.assertEqual(self.transport._read(size=1, timeout=0.1),
+                     b"line 1\nline 2\nline 3\n")
+    self.assertEqual(self.transport._read(size=1, timeout=0), b"")
+
+  def test_rpc_batch(self):
+    """Test that all RPCs are sent before any response is awaited."""
+    results = self.transport.rpc_batch(
+        [("Lighting", "Ok", {"on": True}), ("Lighting", "Pending", {}),
+         ("Lighting", "Ok", {})],
+        timeout=0.1)
+    self.assertEqual(len(self.hdlc_client.invoked), 3)
+    self.assertEqual(results, [(True, b"{'on': True}"), (False, b""),
+                               (True, b"{}")])
+
+  def test_subscription(self):
+    """Test that streamed responses are logged and kept until retrieved."""
+    with mock.patch.object(pigweed_rpc_transport, "text_format",
+                           create=True) as mock_text_format:
+      mock_text_format.MessageToString.side_effect = (
+          lambda response, as_one_line: response.payload.decode())
+      subscription_id = self.transport.subscribe("Lighting", "Pending")
+      pending_call = self.transport._subscriptions[subscription_id]
+      pending_call.on_next(None, _FakeResponse(b"on: true"))
+      pending_call.on_next(None, _FakeResponse(b"on: false"))
+
+    self.assertEqual(self.transport._read(size=1, timeout=0),
+                     b"RPC stream 1 Lighting.Pending: on: true\n"
+                     b"RPC stream 1 Lighting.Pending: on: false\n")
+    self.assertEqual(self.transport.get_stream_responses(subscription_id),
+                     (True, [b"on: true", b"on: false"]))
+    self.assertEqual(self.transport.get_stream_responses(subscription_id),
+                     (True, []))
+    self.transport.unsubscribe(subscription_id)
+    pending_call.call.cancel.assert_called_once()
+    with self.assertRaises(ValueError):
+      self.transport.get_stream_responses(subscription_id)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,74 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.switchboard.transports.serial_transport.py."""
+import os
+import time
+import unittest
+
+from gazoo_device.switchboard.transports import serial_transport
+
+
+class SerialTransportTests(unittest.TestCase):
+  """Unit tests for gazoo_device.switchboard.transports.serial_transport.py."""
+
+  def test_ring_buffer_wraps_around(self):
+    """Test that data is read back in order across the end of the buffer."""
+    ring_buffer = serial_transport._RingBuffer(8)
+    ring_buffer.write(b"abcdef")
+    self.assertEqual(ring_buffer.read(4), b"abcd")
+    ring_buffer.write(b"ghijk")
+    self.assertEqual(ring_buffer.read(100), b"efghijk")
+    self.assertEqual(ring_buffer.read(1, timeout=0), b"")
+    self.assertEqual(ring_buffer.get_stats()["overruns"], 0)
+
+  def test_ring_buffer_overrun(self):
+    """Test that the oldest bytes are overwritten and counted when full."""
+    ring_buffer = serial_transport._RingBuffer(8)
+    ring_buffer.write(b"abcdef")
+    ring_buffer.write(b"ghij")
+    ring_buffer.write(b"0123456789")
+    self.assertEqual(ring_buffer.read(100), b"23456789")
+    stats = ring_buffer.get_stats()
+    self.assertEqual(stats["overruns"], 3)
+    self.assertEqual(stats["overrun_bytes"], 12)
+    self.assertEqual(stats["peak_fill"], 8)
+    self.assertEqual(stats["fill"], 0)
+
+  def test_reads_are_served_from_reader_thread(self):
+    """Test reading from a pseudo-terminal through the reader thread."""
+    master_fd, slave_fd = os.openpty()
+    self.addCleanup(os.close, master_fd)
+    self.addCleanup(os.close, slave_fd)
+    transport = serial_transport.SerialTransport(
+        os.ttyname(slave_fd), use_reader_thread=True, read_buffer_size=1024)
+    transport.open()
+    self.addCleanup(transport.close)
+
+    os.write(master_fd, b"boot log line\n")
+    data = b""
+    end_time = time.time() + 5
+    while not data.endswith(b"\n") and time.time() < end_time:
+      data += transport.read(size=100, timeout=0.1)
+    self.assertEqual(data, b"boot log line\n")
+    stats = transport.get_read_buffer_stats()
+    self.assertEqual(stats["peak_fill"] > 0, True)
+    self.assertEqual(stats["overruns"], 0)
+
+    transport.close()
+    self.assertIsNone(transport._reader_thread)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,62 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.switchboard.switchboard_process.py."""
+import multiprocessing
+import signal
+import time
+import unittest
+
+from gazoo_device.switchboard import switchboard_process
+
+
+def _ignore_sigterm_and_hang():
+  signal.signal(signal.SIGTERM, signal.SIG_IGN)
+  time.sleep(60)
+
+
+class _FakeProcess:
+  """Stands in for a SwitchboardProcess which has been signalled to stop."""
+
+  def __init__(self, target):
+    self.process_name = target.__name__
+    self._process = multiprocessing.Process(target=target, daemon=True)
+    self._process.start()
+
+  def is_started(self):
+    return hasattr(self, "_process")
+
+  def _join(self, deadline):
+    self._process.join(timeout=max(0, deadline - time.time()))
+
+
+class SwitchboardProcessTests(unittest.TestCase):
+  """Unit tests for gazoo_device.switchboard.switchboard_process.py."""
+
+  def test_stop_processes_shares_the_deadline(self):
+    """Test that stragglers are terminated and killed together."""
+    stuck_processes = [_FakeProcess(_ignore_sigterm_and_hang) for _ in range(4)]
+    processes = stuck_processes + [_FakeProcess(time.time)]
+    start_time = time.time()
+    stragglers = switchboard_process.stop_processes(
+        processes, deadline=start_time + 0.5)
+    # The terminate and kill grace periods are shared by all stragglers.
+    self.assertLess(time.time() - start_time,
+                    0.5 + 2 * switchboard_process._JOIN_TIMEOUT + 1)
+    self.assertEqual(stragglers, stuck_processes)
+    self.assertFalse(any(process.is_started() for process in processes))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,150 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.auxiliary_devices.cambrionix.py."""
+import fcntl
+import os
+import shutil
+import struct
+import tempfile
+import termios
+import threading
+import time
+import unittest
+from unittest import mock
+
+from gazoo_device import errors
+from gazoo_device.auxiliary_devices import cambrionix
+
+_PORT = "/dev/serial/by-id/usb-cambrionix-1234"
+_RESPONSES = {
+    "state 1": "1, 0000, R D S, 0, 0, x, 0.00",
+    "state 2": "2, 0000, O, 0, 0, x, 0.00",
+    "mode off 9": "*E004: Invalid port",
+}
+# The hub answers the line ending after CTRL-C with a second, late prompt.
+_LATE_PROMPT_DELAY = 0.03
+
+
+class _FakeSerialPort:
+  """Answers hub commands through a pipe, so that select() works on it."""
+
+  def __init__(self):
+    self._read_fd, self._write_fd = os.pipe()
+    self.fd = self._read_fd
+    self.is_open = True
+    self.written = []
+    self._timers = []
+
+  def fileno(self):
+    return self._read_fd
+
+  def inWaiting(self):  # pylint: disable=invalid-name
+    available = fcntl.ioctl(self._read_fd, termios.FIONREAD,
+                            struct.pack("I", 0))
+    return struct.unpack("I", available)[0]
+
+  def read(self, size):
+    return os.read(self._read_fd, size) if size else b""
+
+  def reset_input_buffer(self):
+    while self.inWaiting():
+      self.read(self.inWaiting())
+
+  def write(self, data):
+    self.written.append(data)
+    data = data.decode("utf-8")
+    if data.startswith("\x03"):
+      self._output("\r\n>> ")
+      # Arrives after the first prompt has been read.
+      timer = threading.Timer(_LATE_PROMPT_DELAY, self._output, ["\r\n>> "])
+      timer.start()
+      self._timers.append(timer)
+      return
+    for command in data.split("\r\n")[:-1]:
+      self._output("{}\r\n{}\r\n>> ".format(command, _RESPONSES[command]))
+
+  def close(self):
+    self.is_open = False
+
+  def _output(self, text):
+    os.write(self._write_fd, text.encode("utf-8"))
+
+  def release(self):
+    for timer in self._timers:
+      timer.join()
+    os.close(self._read_fd)
+    os.close(self._write_fd)
+
+
+class CambrionixTests(unittest.TestCase):
+  """Unit tests for gazoo_device.auxiliary_devices.cambrionix.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.log_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.log_directory)
+    self.serial_port = _FakeSerialPort()
+    self.addCleanup(self.serial_port.release)
+    instances_patch = mock.patch.dict(cambrionix.Cambrionix._instances,
+                                      clear=True)
+    instances_patch.start()
+    self.addCleanup(instances_patch.stop)
+    serial_patch = mock.patch.object(
+        cambrionix.serial, "Serial", return_value=self.serial_port)
+    serial_patch.start()
+    self.addCleanup(serial_patch.stop)
+    self.manager = mock.MagicMock()
+    self.device = cambrionix.Cambrionix(
+        self.manager,
+        {"persistent": {"console_port_name": _PORT,
+                        "name": "cambrionix-1234",
+                        "serial_number": "1234"},
+         "options": {},
+         "log_name_prefix": ""},
+        log_file_name=None,
+        log_directory=self.log_directory)
+    self.addCleanup(self.device._close_session)
+
+  def test_command_batch(self):
+    """Test that commands are written at once and responses are split."""
+    self.assertEqual(self.device._command_batch(["state 1", "state 2"]),
+                     [[_RESPONSES["state 1"]], [_RESPONSES["state 2"]]])
+    self.assertEqual(self.serial_port.written[-1],
+                     b"state 1\r\nstate 2\r\n")
+
+  def test_late_prompt_after_ctrl_c_is_discarded(self):
+    """Test that the second prompt after CTRL-C doesn't shift responses."""
+    self.device._command_batch(["state 1"])
+    time.sleep(_LATE_PROMPT_DELAY * 2)
+    self.assertEqual(self.serial_port.inWaiting(), 0)
+    self.assertEqual(self.device._command_batch(["state 2", "state 1"]),
+                     [[_RESPONSES["state 2"]], [_RESPONSES["state 1"]]])
+
+  def test_session_is_reused(self):
+    """Test that consecutive commands don't reopen the session."""
+    self.device._command_batch(["state 1"])
+    self.device._command_batch(["state 2"])
+    ctrl_c_writes = [data for data in self.serial_port.written
+                     if data.startswith(b"\x03")]
+    self.assertEqual(len(ctrl_c_writes), 1)
+
+  def test_command_batch_error_response(self):
+    """Test that an error response raises DeviceError."""
+    with self.assertRaisesRegex(errors.DeviceError, "Invalid port"):
+      self.device._command_batch(["state 1", "mode off 9"])
+
+
+if __name__ == "__main__":
+  unittest.main()
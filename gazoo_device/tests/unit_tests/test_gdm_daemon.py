@@ -0,0 +1,165 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.gdm_daemon.py."""
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from gazoo_device import fire_manager
+from gazoo_device import gdm_cli
+from gazoo_device import gdm_client
+from gazoo_device import gdm_daemon
+from gazoo_device.utility import property_cache
+
+
+_command_release = threading.Event()
+
+
+def _fake_run_fire_command(manager_inst, commands, cli_name="gdm"):
+  del manager_inst, cli_name  # Unused by _fake_run_fire_command
+  if commands[0] == "slow":
+    _command_release.wait(5)
+  print(" ".join(commands))
+  return 0 if commands[0] in ("devices", "slow") else 1
+
+
+class GdmDaemonTests(unittest.TestCase):
+  """Unit tests for gazoo_device.gdm_daemon.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.artifacts_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.artifacts_directory)
+    self.socket_path = os.path.join(self.artifacts_directory, "gdm.sock")
+    self.mock_manager = mock.MagicMock(spec=fire_manager.FireManager)
+    self.mock_manager.device_file_name = None
+    self.mock_manager.device_options_file_name = None
+    self.mock_manager.testbeds_file_name = None
+    self.mock_manager.gdm_config_file_name = None
+    run_patcher = mock.patch.object(
+        gdm_cli, "run_fire_command", side_effect=_fake_run_fire_command)
+    run_patcher.start()
+    self.addCleanup(run_patcher.stop)
+    # The daemon redirects the process-wide sys.stdout and sys.stderr while it
+    # executes a command, so the client (a separate process in real use) gets
+    # its own streams.
+    self.client_stdout = io.StringIO()
+    self.client_stderr = io.StringIO()
+    sys_patcher = mock.patch.object(
+        gdm_client, "sys", stdout=self.client_stdout, stderr=self.client_stderr)
+    sys_patcher.start()
+    self.addCleanup(sys_patcher.stop)
+
+  def _start_daemon(self):
+    """Starts the daemon in a thread and waits until it accepts commands."""
+    daemon = gdm_daemon.GdmDaemon(self.mock_manager,
+                                  socket_path=self.socket_path)
+    daemon_thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    daemon_thread.start()
+    self.addCleanup(daemon_thread.join, 5)
+    self.addCleanup(gdm_cli.stop_daemon, self.socket_path)
+    for _ in range(50):
+      if gdm_client.is_daemon_running(self.socket_path):
+        return
+      daemon_thread.join(0.1)
+    self.fail("GDM daemon did not start")
+
+  def test_command_output_is_streamed_to_client(self):
+    """Test that command output and exit code are returned to the client."""
+    self._start_daemon()
+    exit_code = gdm_client.execute_command_in_daemon(
+        ["--debug", "devices"], socket_path=self.socket_path)
+    self.assertEqual(exit_code, 0)
+    self.assertIn("devices\n", self.client_stdout.getvalue())
+    self.mock_manager.close_open_devices.assert_not_called()
+
+  def test_failed_command_closes_open_devices(self):
+    """Test that devices are closed after a failed command."""
+    self._start_daemon()
+    exit_code = gdm_client.execute_command_in_daemon(
+        ["issue", "device-1234", "-", "reboot"], socket_path=self.socket_path)
+    self.assertEqual(exit_code, 1)
+    self.mock_manager.close_open_devices.assert_called_once()
+
+  def test_unsupported_flags_are_rejected(self):
+    """Test that unsupported flags fail the command without executing it."""
+    self._start_daemon()
+    exit_code = gdm_client.execute_command_in_daemon(
+        ["--foo", "devices"], socket_path=self.socket_path)
+    self.assertEqual(exit_code, 1)
+    self.assertIn("Unsupported flags", self.client_stderr.getvalue())
+    gdm_cli.run_fire_command.assert_not_called()
+
+  def test_busy_daemon_turns_commands_away(self):
+    """Test that clients aren't queued behind a command in progress."""
+    _command_release.clear()
+    self.addCleanup(_command_release.set)
+    self._start_daemon()
+    exit_codes = []
+    slow_client = threading.Thread(
+        target=lambda: exit_codes.append(gdm_client.execute_command_in_daemon(
+            ["slow"], socket_path=self.socket_path)))
+    slow_client.start()
+    for _ in range(50):
+      if gdm_cli.run_fire_command.called:
+        break
+      slow_client.join(0.1)
+    self.assertIsNone(gdm_client.execute_command_in_daemon(
+        ["devices"], socket_path=self.socket_path))
+    _command_release.set()
+    slow_client.join(5)
+    self.assertEqual(exit_codes, [0])
+
+  def test_long_running_commands(self):
+    """Test that long-running commands are recognized."""
+    self.assertTrue(gdm_client.is_long_running_command(["log", "device-1234"]))
+    self.assertTrue(gdm_client.is_long_running_command(
+        ["issue", "device-1234", "-", "reboot"]))
+    self.assertTrue(gdm_client.is_long_running_command(
+        ["issue", "device-1234", "-", "factory-reset"]))
+    self.assertFalse(gdm_client.is_long_running_command(
+        ["issue", "device-1234", "-", "shell", "ls"]))
+
+  def test_long_running_device_methods_match_invalidating_methods(self):
+    """Test that the client's copy of invalidating methods is up to date."""
+    self.assertCountEqual(gdm_client.LONG_RUNNING_DEVICE_METHODS,
+                          property_cache.INVALIDATING_METHODS)
+
+  def test_client_import_does_not_load_manager(self):
+    """Test that forwarding commands doesn't import the Manager."""
+    for module in ("gazoo_device.gdm_client", "gazoo_device.gdm_cli"):
+      loaded_modules = subprocess.check_output(
+          [sys.executable, "-c",
+           f"import sys, {module}; print(' '.join(sys.modules))"],
+          text=True).split()
+      self.assertIn(module, loaded_modules)
+      self.assertNotIn("gazoo_device.manager", loaded_modules)
+      self.assertNotIn("gazoo_device.fire_manager", loaded_modules)
+
+  def test_no_daemon_running(self):
+    """Test that commands aren't forwarded if the daemon isn't running."""
+    self.assertIsNone(gdm_client.execute_command_in_daemon(
+        ["devices"], socket_path=self.socket_path))
+    self.assertEqual(gdm_cli.stop_daemon(self.socket_path), 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
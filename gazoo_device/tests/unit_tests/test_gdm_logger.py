@@ -0,0 +1,124 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.gdm_logger.py."""
+import json
+import logging
+import pickle
+import queue
+import timeit
+import unittest
+from unittest import mock
+
+from gazoo_device import gdm_logger
+from gazoo_device import multiprocess_logging
+
+
+class _FormatRecorder:
+  """Log message argument which counts how many times it was formatted."""
+
+  def __init__(self):
+    self.format_count = 0
+
+  def __format__(self, format_spec):
+    self.format_count += 1
+    return "formatted"
+
+
+class GdmLoggerTests(unittest.TestCase):
+  """Unit tests for gazoo_device.gdm_logger.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.queue = queue.Queue()
+    self.logging_thread = multiprocess_logging.LoggingThread(self.queue)
+    self.queue_handler = multiprocess_logging.QueueHandler(
+        self.queue, min_level=self.logging_thread.min_level)
+    self.logger = gdm_logger.get_logger("test_gdm_logger")
+    self.logger.propagate = False
+    self.logger.setLevel(logging.DEBUG)
+    self.logger.addHandler(self.queue_handler)
+    self.addCleanup(self.logger.removeHandler, self.queue_handler)
+    self.info_handler = logging.NullHandler(logging.INFO)
+    self.logging_thread.add_handler(self.info_handler)
+
+  def test_messages_below_handler_levels_are_not_formatted(self):
+    """Test that dropped messages are neither formatted nor enqueued."""
+    arg = _FormatRecorder()
+    with mock.patch.object(self.logger, "handlers", [self.queue_handler]):
+      self.logger.debug("Debug message {}", arg)
+    self.assertEqual(arg.format_count, 0)
+    self.assertTrue(self.queue.empty())
+
+    self.logging_thread.remove_handler(self.info_handler)
+    self.logging_thread.add_handler(logging.NullHandler(logging.DEBUG))
+    self.logger.debug("Debug message {}", "sent")
+    self.assertEqual(self.queue.qsize(), 1)
+
+  def test_min_level_is_updated_when_handler_level_changes(self):
+    """Test that lowering a handler level takes effect after an update."""
+    self.info_handler.setLevel(logging.DEBUG)
+    self.logging_thread.update_min_level()
+    self.logger.debug("Debug message {}", "sent")
+    self.assertEqual(self.queue.qsize(), 1)
+
+  def test_records_are_sent_as_tuples(self):
+    """Test that records are sent as tuples and rebuilt by the receiver."""
+    self.logger.info("Message from {name}", name="device-1234")
+    record_fields = self.queue.get_nowait()
+    self.assertIsInstance(record_fields, tuple)
+
+    record = multiprocess_logging.make_record(record_fields)
+    self.assertEqual(record.getMessage(), "Message from device-1234")
+    self.assertEqual(record.levelno, logging.INFO)
+    formatter = logging.Formatter(gdm_logger.FMT, datefmt=gdm_logger.DATEFMT)
+    self.assertIn("Message from device-1234", formatter.format(record))
+
+  def test_records_sent_with_default_handlers_are_cheaper_to_send(self):
+    """Test that tuples pickle smaller and faster than LogRecords."""
+    # Default GDM handlers: log file at DEBUG and stdout at INFO.
+    self.logging_thread.add_handler(logging.NullHandler(logging.DEBUG))
+    self.logger.debug("Response from {}: {!r}", "device-1234", "ok")
+    record_fields = self.queue.get_nowait()
+
+    # QueueHandler used to send the formatted LogRecord.
+    log_record = multiprocess_logging.make_record(record_fields)
+    logging.Formatter().format(log_record)
+
+    self.assertLess(len(pickle.dumps(record_fields)),
+                    len(pickle.dumps(log_record)))
+    pickle_time = min(timeit.repeat(
+        lambda: pickle.dumps(record_fields), number=1000, repeat=5))
+    old_pickle_time = min(timeit.repeat(
+        lambda: pickle.dumps(log_record), number=1000, repeat=5))
+    self.assertLess(pickle_time, old_pickle_time)
+
+  def test_json_lines_formatter(self):
+    """Test that JsonLinesFormatter outputs a single-line JSON object."""
+    try:
+      raise ValueError("Something failed")
+    except ValueError:
+      self.logger.exception("Failed on {}", "device-1234")
+    record = multiprocess_logging.make_record(self.queue.get_nowait())
+
+    line = gdm_logger.JsonLinesFormatter().format(record)
+    self.assertNotIn("\n", line)
+    entry = json.loads(line)
+    self.assertEqual(entry["message"], "Failed on device-1234")
+    self.assertEqual(entry["level"], "ERROR")
+    self.assertIn("ValueError: Something failed", entry["exception"])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -13,9 +13,41 @@
 # limitations under the License.
 
 """Tests that gazoo_device can be imported."""
+import json
 import logging
+import statistics
+import subprocess
+import sys
 import unittest
 
+# Generous upper bound to catch regressions such as eager imports of device
+# controllers without being flaky on slow hosts.
+_MAX_IMPORT_TIME = 1.0  # Seconds.
+_IMPORT_RUNS = 5
+_IMPORT_SCRIPT = """
+import json, sys, time
+start_time = time.perf_counter()
+import gazoo_device
+import_time = time.perf_counter() - start_time
+print(json.dumps({"import_time": import_time, "modules": sorted(sys.modules)}))
+"""
+_FAILED_REGISTRATION_SCRIPT = """
+from unittest import mock
+import gazoo_device
+from gazoo_device import errors, extensions, package_registrar
+with mock.patch.object(package_registrar, "register",
+                       side_effect=errors.PackageRegistrationError("Bad", "x")):
+  try:
+    extensions.primary_devices
+  except errors.PackageRegistrationError:
+    print("raised" if not extensions.is_initialized() else "initialized")
+print("gazoo_device_controllers" in extensions.package_info)
+"""
+# Modules which must only be imported when extensions are first used.
+_DEFERRED_MODULES = ("gazoo_device.gazoo_device_controllers",
+                     "gazoo_device.manager",
+                     "gazoo_device.package_registrar")
+
 
 class ImportTestSuite(unittest.TestCase):
   """Tests that gazoo_device can be imported."""
@@ -28,6 +60,32 @@ class ImportTestSuite(unittest.TestCase):
       self.fail(f"Unable to import gazoo_device. Error: {err!r}.")
     logging.info("gazoo_device version: %s", gazoo_device.version)
 
+  def test_import_time(self):
+    """Benchmarks importing gazoo_device in a fresh interpreter."""
+    import_times = []
+    for _ in range(_IMPORT_RUNS):
+      output = subprocess.check_output([sys.executable, "-c", _IMPORT_SCRIPT])
+      result = json.loads(output.decode("utf-8").splitlines()[-1])
+      import_times.append(result["import_time"])
+      for module in _DEFERRED_MODULES:
+        self.assertNotIn(module, result["modules"])
+    median_import_time = statistics.median(import_times)
+    logging.info("Median gazoo_device import time: %.3fs", median_import_time)
+    self.assertLess(median_import_time, _MAX_IMPORT_TIME)
+
+  def test_deferred_registration(self):
+    """Tests that built-in extensions are registered on first access."""
+    import gazoo_device  # pylint: disable=g-import-not-at-top
+    self.assertIn("gazoo_device_controllers",
+                  gazoo_device.extensions.get_registered_package_info())
+
+  def test_built_in_registration_errors_are_raised(self):
+    """Tests that failures to register built-in extensions aren't ignored."""
+    output = subprocess.check_output(
+        [sys.executable, "-c", _FAILED_REGISTRATION_SCRIPT])
+    self.assertEqual(output.decode("utf-8").splitlines()[-2:],
+                     ["raised", "True"])
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,78 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.manager.py."""
+import unittest
+from unittest import mock
+
+from gazoo_device import manager
+
+
+class _FakeSwitchboard:
+
+  def __init__(self, events):
+    self._events = events
+
+  def request_stop_processes(self):
+    self._events.append("stop switchboard processes")
+
+  def get_processes(self):
+    return []
+
+
+class _FakeDevice:
+  """Records the order in which the device is closed."""
+
+  def __init__(self, name, events):
+    self.name = name
+    self._events = events
+    self._switchboard = _FakeSwitchboard(events)
+
+  def get_supported_capabilities(self):
+    return ["file_transfer", "switchboard", "usb_hub"]
+
+  def reset_capability(self, capability_name):
+    self._events.append(f"close {self.name} {capability_name}")
+
+  def _get_switchboard_if_initialized(self):
+    return self._switchboard
+
+  def close(self):
+    self._events.append(f"close {self.name}")
+
+
+class ManagerTests(unittest.TestCase):
+  """Unit tests for gazoo_device.manager.py."""
+
+  def test_close_open_devices_closes_capabilities_first(self):
+    """Test that capabilities are closed while switchboards still run."""
+    events = []
+    mock_manager = mock.MagicMock(_open_devices={
+        name: _FakeDevice(name, events)
+        for name in ("device-1234", "device-5678")})
+    manager.Manager.close_open_devices(mock_manager)
+    self.assertEqual(events, [
+        "close device-1234 file_transfer",
+        "close device-1234 usb_hub",
+        "close device-5678 file_transfer",
+        "close device-5678 usb_hub",
+        "stop switchboard processes",
+        "stop switchboard processes",
+        "close device-1234",
+        "close device-5678",
+    ])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,182 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.adb_client.py."""
+import os
+import shutil
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from gazoo_device.utility import adb_client
+from gazoo_device.utility import adb_utils
+
+_SERIAL = "0123456789ABCDEF"
+
+
+class _FakeAdbServerHandler(socketserver.BaseRequestHandler):
+  """Serves ADB server protocol requests from the files of the fake device."""
+
+  def _read(self, size):
+    data = b""
+    while len(data) < size:
+      chunk = self.request.recv(size - len(data))
+      if not chunk:
+        raise EOFError()
+      data += chunk
+    return data
+
+  def _fail(self, message):
+    self.request.sendall(b"FAIL%04x" % len(message) + message)
+
+  def handle(self):
+    try:
+      while True:
+        request = self._read(int(self._read(4), 16)).decode()
+        if request == "host:devices":
+          devices = "{}\tdevice\n".format(_SERIAL).encode()
+          self.request.sendall(b"OKAY%04x" % len(devices) + devices)
+          return
+        elif request.startswith("host:transport:"):
+          if request != "host:transport:" + _SERIAL:
+            self._fail(b"device not found")
+            return
+          self.request.sendall(b"OKAY")
+        elif request.startswith("shell:"):
+          self.request.sendall(b"OKAY" + b"output of " + request[6:].encode())
+          return
+        elif request == "sync:":
+          self.request.sendall(b"OKAY")
+          self._handle_sync()
+          return
+    except EOFError:
+      pass
+
+  def _handle_sync(self):
+    files = self.server.device_files
+    while True:
+      request_id, length = struct.unpack("<4sI", self._read(8))
+      if request_id == b"QUIT":
+        return
+      data = self._read(length)
+      if request_id == b"STAT":
+        path = data.decode()
+        if path in files:
+          mode = stat.S_IFREG | 0o644
+        elif path == "/sdcard":
+          mode = stat.S_IFDIR | 0o755
+        else:
+          mode = 0
+        self.request.sendall(struct.pack("<4sIII", b"STAT", mode, 0, 0))
+      elif request_id == b"SEND":
+        path = data.decode().rsplit(",", 1)[0]
+        contents = b""
+        while True:
+          chunk_id, chunk_length = struct.unpack("<4sI", self._read(8))
+          if chunk_id == b"DONE":
+            break
+          contents += self._read(chunk_length)
+        files[path] = contents
+        self.request.sendall(struct.pack("<4sI", b"OKAY", 0))
+      elif request_id == b"RECV":
+        contents = files[data.decode()]
+        for start in range(0, len(contents), 1000):
+          chunk = contents[start:start + 1000]
+          self.request.sendall(
+              struct.pack("<4sI", b"DATA", len(chunk)) + chunk)
+        self.request.sendall(struct.pack("<4sI", b"DONE", 0))
+
+
+class AdbClientTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.adb_client.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0),
+                                                  _FakeAdbServerHandler)
+    self.server.daemon_threads = True
+    self.server.device_files = {}
+    threading.Thread(
+        target=self.server.serve_forever, kwargs={"poll_interval": 0.01},
+        daemon=True).start()
+    self.addCleanup(self.server.server_close)
+    self.addCleanup(self.server.shutdown)
+    self.port = self.server.server_address[1]
+    self.client = adb_client.AdbClient(port=self.port)
+    self.artifacts_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.artifacts_directory)
+
+  def test_devices_and_shell(self):
+    """Test host and device shell requests."""
+    self.assertEqual(self.client.devices(), _SERIAL + "\tdevice\n")
+    self.assertEqual(self.client.shell(_SERIAL, "getprop"),
+                     "output of getprop")
+    with self.assertRaisesRegex(adb_client.AdbClientError, "device not found"):
+      self.client.shell("unknown-serial", "getprop")
+
+  def test_push_and_pull(self):
+    """Test that files larger than a sync chunk are pushed and pulled."""
+    source = os.path.join(self.artifacts_directory, "source.bin")
+    contents = os.urandom(adb_client.SYNC_DATA_MAX * 2 + 10)
+    with open(source, "wb") as source_file:
+      source_file.write(contents)
+
+    self.assertEqual(self.client.push(_SERIAL, [source], "/sdcard"),
+                     (1, len(contents)))
+    self.assertEqual(self.server.device_files["/sdcard/source.bin"], contents)
+
+    destination = os.path.join(self.artifacts_directory, "pulled.bin")
+    self.assertEqual(
+        self.client.pull(_SERIAL, ["/sdcard/source.bin"], destination),
+        (1, len(contents)))
+    with open(destination, "rb") as destination_file:
+      self.assertEqual(destination_file.read(), contents)
+
+  def test_pull_directory_is_unsupported(self):
+    """Test that directory pulls are left to the adb command."""
+    with self.assertRaises(adb_client.UnsupportedRequestError):
+      self.client.pull(_SERIAL, ["/sdcard"], self.artifacts_directory)
+
+  def test_adb_utils_uses_server_client(self):
+    """Test that adb_utils doesn't start adb processes if a server runs."""
+    with mock.patch.dict(os.environ,
+                         {"ANDROID_ADB_SERVER_PORT": str(self.port)}), \
+        mock.patch.object(adb_utils.subprocess, "Popen") as mock_popen:
+      self.assertEqual(adb_utils.get_adb_devices(), [_SERIAL])
+      self.assertEqual(adb_utils.shell(_SERIAL, "echo"), "output of echo")
+      output = adb_utils.shell("unknown-serial", "echo")
+    self.assertEqual(output, "error: device not found\n")
+    mock_popen.assert_not_called()
+
+  def test_adb_utils_falls_back_to_adb_command(self):
+    """Test that the adb command is used if no server is running."""
+    self.server.shutdown()
+    self.server.server_close()
+    mock_process = mock.MagicMock(returncode=0)
+    mock_process.communicate.return_value = (b"output", None)
+    with mock.patch.dict(os.environ,
+                         {"ANDROID_ADB_SERVER_PORT": str(self.port)}), \
+        mock.patch.object(adb_utils, "get_adb_path", return_value="adb"), \
+        mock.patch.object(adb_utils.subprocess, "Popen",
+                          return_value=mock_process) as mock_popen:
+      self.assertEqual(adb_utils.shell(_SERIAL, "echo"), "output")
+    mock_popen.assert_called_once()
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,130 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.adb_device_tracker.py."""
+import queue
+import socketserver
+import threading
+import unittest
+from unittest import mock
+
+from gazoo_device.utility import adb_client
+from gazoo_device.utility import adb_device_tracker
+from gazoo_device.utility import adb_utils
+
+_SERIAL = "0123456789ABCDEF"
+
+
+class _FakeTrackDevicesHandler(socketserver.BaseRequestHandler):
+  """Streams the device lists put in the server queue to track-devices."""
+
+  def handle(self):
+    length = int(self.request.recv(4), 16)
+    if self.request.recv(length) != b"host:track-devices":
+      return
+    self.request.sendall(b"OKAY")
+    while True:
+      device_list = self.server.device_lists.get()
+      if device_list is None:
+        return
+      self.request.sendall(b"%04x" % len(device_list) + device_list)
+
+
+class AdbDeviceTrackerTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.adb_device_tracker.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0),
+                                                  _FakeTrackDevicesHandler)
+    self.server.daemon_threads = True
+    self.server.device_lists = queue.Queue()
+    self.server.device_lists.put(b"")
+    threading.Thread(
+        target=self.server.serve_forever, kwargs={"poll_interval": 0.01},
+        daemon=True).start()
+    self.addCleanup(self.server.server_close)
+    self.addCleanup(self.server.shutdown)
+    self.fastboot_serials = []
+    self.tracker = adb_device_tracker.AdbDeviceTracker(
+        lambda: self.fastboot_serials,
+        client=adb_client.AdbClient(port=self.server.server_address[1]))
+    self.tracker.start()
+    self.addCleanup(self.tracker.stop)
+    self.assertTrue(self.tracker.wait_for_adb_snapshot(timeout=5))
+
+  def test_adb_states_are_pushed(self):
+    """Test that waits are answered from the states pushed by the server."""
+    self.assertIsNone(self.tracker.get_state(_SERIAL))
+    self.assertFalse(
+        self.tracker.wait_for_state(_SERIAL, ("device",), timeout=0))
+
+    threading.Timer(0.1, self.server.device_lists.put,
+                    (_SERIAL.encode() + b"\tdevice\n",)).start()
+    self.assertTrue(
+        self.tracker.wait_for_state(_SERIAL, ("device",), timeout=5))
+    self.assertEqual(self.tracker.get_adb_state(_SERIAL), "device")
+
+    self.server.device_lists.put(b"192.168.1.2:5555\toffline\n")
+    self.assertTrue(self.tracker.wait_for_state(_SERIAL, (None,), timeout=5))
+    self.assertEqual(self.tracker.get_adb_state("192.168.1.2"), "offline")
+
+  def test_fastboot_devices_are_polled(self):
+    """Test that fastboot devices are listed once fastboot mode is queried."""
+    self.assertFalse(self.tracker.is_fastboot_mode(_SERIAL))
+    self.fastboot_serials = [_SERIAL]
+    self.assertTrue(self.tracker.wait_for_state(
+        _SERIAL, (adb_device_tracker.FASTBOOT_STATE,), timeout=5))
+    self.assertTrue(self.tracker.is_fastboot_mode(_SERIAL))
+
+  def test_server_disconnection(self):
+    """Test that states are no longer live once the server goes away."""
+    self.server.device_lists.put(None)
+    self.server.shutdown()
+    self.server.server_close()
+    for _ in range(50):
+      if not self.tracker.is_adb_live():
+        break
+      self.tracker.wait_for_state(_SERIAL, ("device",), timeout=0.1)
+    self.assertFalse(self.tracker.is_adb_live())
+
+  def test_adb_utils_uses_tracker(self):
+    """Test that adb_utils answers state queries without listing devices."""
+    self.server.device_lists.put(_SERIAL.encode() + b"\tdevice\n")
+    self.tracker.wait_for_state(_SERIAL, ("device",), timeout=5)
+    with mock.patch.object(adb_device_tracker, "get_tracker",
+                           return_value=self.tracker), \
+        mock.patch.object(adb_utils, "get_adb_devices") as mock_get_devices:
+      self.assertTrue(adb_utils.is_adb_mode(_SERIAL))
+      self.assertTrue(adb_utils.is_device_online(_SERIAL))
+      self.assertTrue(adb_utils.wait_for_state(
+          _SERIAL, (adb_utils.ADB_ONLINE_STATE,), timeout=0))
+    mock_get_devices.assert_not_called()
+
+  def test_adb_utils_explicit_path_skips_tracker(self):
+    """Test that an explicit adb binary is used instead of the tracker."""
+    self.server.device_lists.put(_SERIAL.encode() + b"\tdevice\n")
+    self.tracker.wait_for_state(_SERIAL, ("device",), timeout=5)
+    with mock.patch.object(adb_device_tracker, "get_tracker",
+                           return_value=self.tracker), \
+        mock.patch.object(adb_utils, "get_adb_devices",
+                          return_value=[]) as mock_get_devices:
+      self.assertFalse(adb_utils.wait_for_state(
+          _SERIAL, (adb_utils.ADB_ONLINE_STATE,), timeout=0,
+          adb_path="/some/adb"))
+    mock_get_devices.assert_called_with(adb_path="/some/adb")
+
+
+if __name__ == "__main__":
+  unittest.main()
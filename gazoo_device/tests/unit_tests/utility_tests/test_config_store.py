@@ -0,0 +1,159 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.config_store.py."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gazoo_device import errors
+from gazoo_device.utility import config_store
+
+_CONFIG = {"device_options": {"device-1234": {"alias": None}},
+           "other_device_options": {}}
+
+
+class ConfigStoreTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.config_store.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.artifacts_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.artifacts_directory)
+    self.config_file = os.path.join(self.artifacts_directory, "options.json")
+    self._write_config(_CONFIG)
+    self.store = config_store.ConfigStore(self.config_file)
+    self.mock_listener = mock.MagicMock()
+    self.store.add_listener(self.mock_listener)
+
+  def _read_config(self):
+    with open(self.config_file) as open_file:
+      return json.load(open_file)
+
+  def _write_config(self, contents):
+    """Replaces the config file like another process would."""
+    temp_file = self.config_file + ".other"
+    with open(temp_file, "w") as open_file:
+      json.dump(contents, open_file)
+    os.replace(temp_file, self.config_file)
+
+  def test_get_store_returns_shared_store(self):
+    """Test that each file has a single store per process."""
+    store = config_store.get_store(self.config_file)
+    self.assertIs(store, config_store.get_store(
+        os.path.join(self.artifacts_directory, ".", "options.json")))
+    self.assertIsNot(store, config_store.get_store(self.config_file + "2"))
+
+  def test_get_changed_keys(self):
+    """Test that added, removed and changed keys are returned."""
+    self.assertEqual(
+        config_store.get_changed_keys({"a": 1, "b": 2, "c": None},
+                                      {"b": 3, "c": None, "d": None}),
+        ["a", "b", "d"])
+
+  def test_read_returns_copy(self):
+    """Test that modifying read() results doesn't modify the store."""
+    contents = self.store.read()
+    self.assertEqual(contents, _CONFIG)
+    contents["device_options"].clear()
+    self.assertEqual(self.store.read(), _CONFIG)
+
+  def test_nested_transactions_write_once(self):
+    """Test that updates made in nested transactions are written together."""
+    self.store.read()
+    with mock.patch.object(
+        self.store, "_write_file",
+        wraps=self.store._write_file) as mock_write_file:
+      with self.store.transaction() as outer_contents:
+        outer_contents["device_options"]["device-1234"]["alias"] = "dut"
+        with self.store.transaction() as inner_contents:
+          inner_contents["device_options"]["device-1234"]["usb_port"] = "1"
+        self.assertEqual(self._read_config(), _CONFIG)
+    mock_write_file.assert_called_once()
+    self.assertEqual(
+        self._read_config()["device_options"]["device-1234"],
+        {"alias": "dut", "usb_port": "1"})
+    self.mock_listener.assert_called_once_with(
+        self.config_file, _CONFIG, self._read_config())
+
+  def test_transaction_without_changes_skips_write(self):
+    """Test that unchanged contents are not written."""
+    with mock.patch.object(self.store, "_write_file") as mock_write_file:
+      with self.store.transaction():
+        pass
+    mock_write_file.assert_not_called()
+    self.mock_listener.assert_not_called()
+
+  def test_failed_transaction_is_discarded(self):
+    """Test that contents aren't written if the transaction raises."""
+    with self.assertRaises(RuntimeError):
+      with self.store.transaction() as contents:
+        contents["device_options"].clear()
+        raise RuntimeError("Something failed")
+    self.assertEqual(self._read_config(), _CONFIG)
+    self.assertEqual(self.store.read(), _CONFIG)
+
+  def test_transaction_keeps_external_changes(self):
+    """Test that transactions start from the latest file contents."""
+    self.store.read()
+    self._write_config({"device_options": {}, "other_device_options": {}})
+    with self.store.transaction() as contents:
+      contents["other_device_options"]["device-5678"] = {}
+    self.assertEqual(self._read_config(),
+                     {"device_options": {},
+                      "other_device_options": {"device-5678": {}}})
+
+  def test_refresh_detects_external_changes(self):
+    """Test that listeners are notified of changes by other processes."""
+    self.assertTrue(self.store.refresh())
+    self.assertFalse(self.store.refresh())
+    self.mock_listener.assert_not_called()
+    new_config = {"device_options": {}, "other_device_options": {}}
+    self._write_config(new_config)
+    self.assertTrue(self.store.refresh())
+    self.mock_listener.assert_called_once_with(
+        self.config_file, _CONFIG, new_config)
+    self.store.remove_listener(self.mock_listener)
+    self._write_config(_CONFIG)
+    self.assertTrue(self.store.refresh())
+    self.mock_listener.assert_called_once()
+
+  def test_read_invalid_file_raises_error(self):
+    """Test that missing or invalid files raise DeviceError."""
+    with open(self.config_file, "w") as open_file:
+      open_file.write("{")
+    with self.assertRaisesRegex(errors.DeviceError, "Unable to parse"):
+      self.store.read()
+    os.remove(self.config_file)
+    with self.assertRaisesRegex(errors.DeviceError, "is not found"):
+      self.store.read()
+
+  def test_versioned_entries(self):
+    """Test that entries are only read back with a matching version."""
+    cache_file = os.path.join(self.artifacts_directory, "cache", "cache.json")
+    self.assertEqual(config_store.read_versioned_entries(cache_file, 1), {})
+    config_store.write_versioned_entries(cache_file, 1, {"a": 1})
+    self.assertEqual(config_store.read_versioned_entries(cache_file, 1),
+                     {"a": 1})
+    self.assertEqual(config_store.read_versioned_entries(cache_file, 2), {})
+    with open(cache_file, "w") as open_file:
+      open_file.write("{")
+    self.assertEqual(config_store.read_versioned_entries(cache_file, 1), {})
+
+
+if __name__ == "__main__":
+  unittest.main()
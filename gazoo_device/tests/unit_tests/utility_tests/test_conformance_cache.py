@@ -0,0 +1,76 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.conformance_cache.py."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from gazoo_device.capabilities import usb_hub_default
+from gazoo_device.utility import conformance_cache
+
+_PACKAGE_NAME = "foo_extension_package"
+_PACKAGE_VERSION = "0.0.1"
+_CLASSES = (usb_hub_default.UsbHubDefault,)
+
+
+class ConformanceCacheTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.conformance_cache.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.artifacts_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.artifacts_directory)
+    self.cache_file = os.path.join(self.artifacts_directory, "cache.json")
+    self.extra_file = os.path.join(self.artifacts_directory, "extra.py")
+    with open(self.extra_file, "w") as open_file:
+      open_file.write("EXCEPTIONS = ()\n")
+
+  def _get_cache_key(self, package_version=_PACKAGE_VERSION):
+    return conformance_cache.get_cache_key(
+        _PACKAGE_NAME, package_version, _CLASSES,
+        extra_source_files=(self.extra_file,))
+
+  def test_cache_key_depends_on_version_and_sources(self):
+    """Test that the key changes with the package version and source files."""
+    cache_key = self._get_cache_key()
+    self.assertEqual(cache_key, self._get_cache_key())
+    self.assertNotEqual(cache_key, self._get_cache_key(package_version="0.0.2"))
+    with open(self.extra_file, "a") as open_file:
+      open_file.write("EXCEPTIONS = ('foo',)\n")
+    self.assertNotEqual(cache_key, self._get_cache_key())
+
+  def test_set_persists_entries(self):
+    """Test that passing packages are reloaded from disk."""
+    cache_key = self._get_cache_key()
+    conformance_cache.ConformanceCache(self.cache_file).set(
+        _PACKAGE_NAME, cache_key)
+    cache = conformance_cache.ConformanceCache(self.cache_file)
+    self.assertTrue(cache.contains(_PACKAGE_NAME, cache_key))
+    self.assertFalse(cache.contains(_PACKAGE_NAME, "other_key"))
+    self.assertFalse(cache.contains(_PACKAGE_NAME, None))
+    cache.invalidate(_PACKAGE_NAME)
+    self.assertFalse(conformance_cache.ConformanceCache(
+        self.cache_file).contains(_PACKAGE_NAME, cache_key))
+
+  def test_missing_source_file_disables_caching(self):
+    """Test that no key is generated if a source file can't be read."""
+    self.assertIsNone(conformance_cache.get_cache_key(
+        _PACKAGE_NAME, _PACKAGE_VERSION, _CLASSES,
+        extra_source_files=(os.path.join(self.artifacts_directory, "a.py"),)))
+
+
+if __name__ == "__main__":
+  unittest.main()
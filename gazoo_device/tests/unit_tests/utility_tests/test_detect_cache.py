@@ -0,0 +1,89 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.detect_cache.py."""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gazoo_device.utility import detect_cache
+from gazoo_device.utility import usb_config
+from gazoo_device.utility import usb_utils
+
+_ADDRESS = "/dev/ttyUSB0"
+_COMMUNICATION_TYPE = "SerialComms"
+_RESPONSES = {"SerialQuery.product_name": "ft232r usb uart"}
+_DEVICE_TYPES = ["nrf52840"]
+
+
+class DetectCacheTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.detect_cache.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.artifacts_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.artifacts_directory)
+    self.cache_file = os.path.join(self.artifacts_directory, "cache.json")
+
+  def test_set_persists_entries(self):
+    """Test that cache entries are reloaded from disk."""
+    detect_cache.DetectCache(self.cache_file).set(
+        "abc", _ADDRESS, _COMMUNICATION_TYPE, _RESPONSES, _DEVICE_TYPES)
+    entry = detect_cache.DetectCache(self.cache_file).get("abc")
+    self.assertEqual(entry["responses"], _RESPONSES)
+    self.assertEqual(entry["device_types"], _DEVICE_TYPES)
+
+  def test_invalidate_by_address(self):
+    """Test that invalidate() only removes entries of the given address."""
+    cache = detect_cache.DetectCache(self.cache_file)
+    cache.set("abc", _ADDRESS, _COMMUNICATION_TYPE, _RESPONSES, _DEVICE_TYPES)
+    cache.set("def", "/dev/ttyUSB1", _COMMUNICATION_TYPE, _RESPONSES,
+              _DEVICE_TYPES)
+    self.assertEqual(cache.invalidate(_ADDRESS), 1)
+    self.assertIsNone(cache.get("abc"))
+    self.assertIsNotNone(detect_cache.DetectCache(self.cache_file).get("def"))
+    self.assertEqual(cache.invalidate(), 1)
+    self.assertIsNone(cache.get("def"))
+
+  def test_corrupted_cache_file_is_ignored(self):
+    """Test that an unreadable cache file results in an empty cache."""
+    with open(self.cache_file, "w") as open_file:
+      open_file.write("{not json")
+    self.assertIsNone(detect_cache.DetectCache(self.cache_file).get("abc"))
+
+  @mock.patch.object(usb_utils, "get_device_info")
+  def test_usb_fingerprint(self, mock_get_device_info):
+    """Test that USB fingerprints depend on serial number, VID and PID."""
+    mock_get_device_info.return_value = usb_config.UsbInfo(
+        serial_number="123456", vendor_id="0403", product_id="6001")
+    fingerprint = detect_cache.get_fingerprint(_ADDRESS, _COMMUNICATION_TYPE)
+    mock_get_device_info.return_value = usb_config.UsbInfo(
+        serial_number="123456", vendor_id="0403", product_id="6015")
+    self.assertNotEqual(
+        fingerprint,
+        detect_cache.get_fingerprint(_ADDRESS, _COMMUNICATION_TYPE))
+
+  @mock.patch.object(usb_utils, "get_device_info",
+                     return_value=usb_config.UsbInfo())
+  def test_no_fingerprint_without_serial_number(self, unused_mock_info):
+    """Test that devices without a USB serial number aren't fingerprinted."""
+    self.assertIsNone(
+        detect_cache.get_fingerprint(_ADDRESS, _COMMUNICATION_TYPE))
+    self.assertIsNone(detect_cache.get_fingerprint("abc", "YepkitComms"))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -14,6 +14,11 @@
 
 """Unit tests for gazoo_device.utility.host_utils.py."""
 import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
 import unittest
 from unittest import mock
 
@@ -41,6 +46,7 @@ _TEST_KEY_SSH_PUBLIC = data_types.KeyInfo(
     package=_TEST_PACKAGE)
 _TEST_KEY_OTHER = data_types.KeyInfo(
     _TEST_KEY_OTHER_NAME, type=data_types.KeyType.OTHER, package=_TEST_PACKAGE)
+_TEST_IP_ADDRESS = "192.168.1.2"
 
 
 class HostUtilsTests(unittest.TestCase):
@@ -171,6 +177,133 @@ class HostUtilsTests(unittest.TestCase):
     mock_chmod.assert_called_once_with(_EXPECTED_KEY_SSH_PRIVATE_PATH,
                                        int("400", 8))
 
+  def _patch_ssh_control_directory(self):
+    control_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, control_directory)
+    control_directory_patch = mock.patch.object(
+        host_utils, "_SSH_CONTROL_DIRECTORY", new=control_directory)
+    control_directory_patch.start()
+    self.addCleanup(control_directory_patch.stop)
+    failure_times_patch = mock.patch.dict(
+        host_utils._ssh_master_failure_times, clear=True)
+    failure_times_patch.start()
+    self.addCleanup(failure_times_patch.stop)
+    return control_directory
+
+  def _listen_on(self, control_path):
+    control_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self.addCleanup(control_socket.close)
+    control_socket.bind(control_path)
+    control_socket.listen()
+
+  def test_generate_ssh_args_uses_shared_connection(self):
+    """Test that SSH commands go through the shared connection if open."""
+    self._patch_ssh_control_directory()
+    ssh_args = host_utils.generate_ssh_args(_TEST_IP_ADDRESS, "ls", "root")
+    self.assertIn(
+        "-oControlMaster=no -oControlPath=" +
+        host_utils.get_ssh_control_path(_TEST_IP_ADDRESS), ssh_args)
+    with mock.patch.object(host_utils, "USE_SSH_MULTIPLEXING", new=False):
+      ssh_args = host_utils.generate_ssh_args(_TEST_IP_ADDRESS, "ls", "root")
+    self.assertNotIn("ControlPath", ssh_args)
+
+  def test_open_ssh_connection_is_reused(self):
+    """Test that the shared SSH connection is only opened once."""
+    self._patch_ssh_control_directory()
+    control_path = host_utils.get_ssh_control_path(_TEST_IP_ADDRESS)
+    with mock.patch.object(
+        subprocess, "run",
+        side_effect=lambda *args, **kwargs: self._listen_on(control_path)
+    ) as mock_run:
+      self.assertTrue(host_utils.open_ssh_connection(_TEST_IP_ADDRESS))
+      self.assertTrue(host_utils.open_ssh_connection(_TEST_IP_ADDRESS))
+    mock_run.assert_called_once()
+    self.assertIn("-oControlMaster=yes", mock_run.call_args[0][0])
+
+    with mock.patch.object(subprocess, "check_output") as mock_check_output:
+      self.assertTrue(host_utils.is_sshable(_TEST_IP_ADDRESS))
+    mock_check_output.assert_not_called()
+
+  def test_open_ssh_connection_replaces_stale_socket(self):
+    """Test that a socket left behind by a dead connection is removed."""
+    self._patch_ssh_control_directory()
+    control_path = host_utils.get_ssh_control_path(_TEST_IP_ADDRESS)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale_socket:
+      stale_socket.bind(control_path)
+    error = subprocess.CalledProcessError(
+        host_utils._SSH_ERROR_RETURN_CODE, "ssh")
+    with mock.patch.object(subprocess, "run", side_effect=error):
+      self.assertFalse(host_utils.open_ssh_connection(_TEST_IP_ADDRESS))
+    self.assertFalse(os.path.exists(control_path))
+
+  def test_insecure_ssh_control_directory_is_not_used(self):
+    """Test that shared connections need a private control directory."""
+    control_directory = self._patch_ssh_control_directory()
+    os.chmod(control_directory, 0o755)
+    with mock.patch.object(subprocess, "run") as mock_run:
+      self.assertFalse(host_utils.open_ssh_connection(_TEST_IP_ADDRESS))
+    mock_run.assert_not_called()
+    ssh_args = host_utils.generate_ssh_args(_TEST_IP_ADDRESS, "ls", "root")
+    self.assertNotIn("ControlPath", ssh_args)
+
+    os.chmod(control_directory, 0o700)
+    symlink = control_directory + "-link"
+    os.symlink(control_directory, symlink)
+    self.addCleanup(os.remove, symlink)
+    with mock.patch.object(host_utils, "_SSH_CONTROL_DIRECTORY", new=symlink):
+      ssh_args = host_utils.generate_ssh_args(_TEST_IP_ADDRESS, "ls", "root")
+    self.assertNotIn("ControlPath", ssh_args)
+
+  def test_open_ssh_connection_backs_off_after_failure(self):
+    """Test that a failure to open the shared connection isn't retried soon."""
+    self._patch_ssh_control_directory()
+    error = subprocess.CalledProcessError(
+        host_utils._SSH_ERROR_RETURN_CODE, "ssh")
+    with mock.patch.object(subprocess, "run", side_effect=error) as mock_run:
+      self.assertFalse(
+          host_utils.open_ssh_connection(_TEST_IP_ADDRESS, timeout=1))
+      self.assertFalse(host_utils.open_ssh_connection(_TEST_IP_ADDRESS))
+      mock_run.assert_called_once()
+      self.assertEqual(mock_run.call_args[1]["timeout"], 1)
+
+      backoff_end = time.time() + host_utils._SSH_MASTER_BACKOFF
+      with mock.patch.object(time, "time", return_value=backoff_end):
+        self.assertFalse(host_utils.open_ssh_connection(_TEST_IP_ADDRESS))
+      self.assertEqual(mock_run.call_count, 2)
+      self.assertEqual(mock_run.call_args[1]["timeout"],
+                       host_utils._SSH_MASTER_TIMEOUT)
+
+  @mock.patch.object(host_utils, "open_ssh_connection")
+  def test_ssh_command_opens_shared_connection_after_success(
+      self, mock_open_ssh_connection):
+    """Test that the shared connection is only opened once a command works."""
+    self._patch_ssh_control_directory()
+    error = subprocess.CalledProcessError(
+        host_utils._SSH_ERROR_RETURN_CODE, "ssh", output=b"No route to host")
+    with mock.patch.object(subprocess, "check_output", side_effect=error):
+      with self.assertRaises(RuntimeError):
+        host_utils.ssh_command(_TEST_IP_ADDRESS, "ls", timeout=2)
+    mock_open_ssh_connection.assert_not_called()
+
+    with mock.patch.object(subprocess, "check_output", return_value=b"ok"):
+      self.assertEqual(
+          host_utils.ssh_command(_TEST_IP_ADDRESS, "ls", timeout=2), "ok")
+    mock_open_ssh_connection.assert_called_once_with(
+        _TEST_IP_ADDRESS, "root", host_utils.DEFAULT_SSH_OPTIONS, None,
+        timeout=2)
+
+  @mock.patch.object(host_utils, "close_ssh_connection")
+  @mock.patch.object(host_utils, "open_ssh_connection", return_value=True)
+  def test_ssh_command_closes_broken_shared_connection(
+      self, unused_mock_open_ssh_connection, mock_close_ssh_connection):
+    """Test that SSH connection errors close the shared connection."""
+    self._patch_ssh_control_directory()
+    error = subprocess.CalledProcessError(
+        host_utils._SSH_ERROR_RETURN_CODE, "ssh", output=b"Broken pipe")
+    with mock.patch.object(subprocess, "check_output", side_effect=error):
+      with self.assertRaises(RuntimeError):
+        host_utils.ssh_command(_TEST_IP_ADDRESS, "ls")
+    mock_close_ssh_connection.assert_called_once_with(_TEST_IP_ADDRESS, "root")
 
 if __name__ == "__main__":
   unittest.main()
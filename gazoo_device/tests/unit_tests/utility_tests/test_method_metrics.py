@@ -0,0 +1,137 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.method_metrics.py."""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gazoo_device import decorators
+from gazoo_device import errors
+from gazoo_device.capabilities.interfaces import capability_base
+from gazoo_device.utility import method_metrics
+
+_mock_logger = mock.MagicMock(spec=logging.Logger)
+
+
+class _FakeCapability(capability_base.CapabilityBase):
+  """Capability with a log-decorated method."""
+
+  @classmethod
+  def get_capability_name(cls):
+    return "fake_capability"
+
+  @decorators.CapabilityLogDecorator(_mock_logger)
+  def cycle(self):
+    pass
+
+
+class _FakeDevice:
+  """Device with log-decorated methods."""
+
+  def __init__(self):
+    self.name = "device-1234"
+    self.fake_capability = _FakeCapability(device_name=self.name)
+
+  @decorators.LogDecorator(_mock_logger)
+  def reboot(self):
+    pass
+
+  @decorators.LogDecorator(_mock_logger)
+  def factory_reset(self):
+    raise RuntimeError("Something failed")
+
+
+class MethodMetricsTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.method_metrics.py."""
+
+  def setUp(self):
+    super().setUp()
+    _mock_logger.reset_mock()
+    _mock_logger.getEffectiveLevel.return_value = logging.DEBUG
+    method_metrics.reset()
+    method_metrics.enable()
+    self.addCleanup(method_metrics.reset)
+    self.addCleanup(method_metrics.disable)
+    self.device = _FakeDevice()
+
+  def test_log_decorated_calls_are_recorded(self):
+    """Test that device and capability method calls are recorded."""
+    self.device.reboot()
+    self.device.reboot()
+    self.device.fake_capability.cycle()
+    with self.assertRaises(errors.DeviceError):
+      self.device.factory_reset()
+
+    reboot_metrics, = method_metrics.get_metrics(method_name="reboot")
+    self.assertEqual(reboot_metrics.device_name, "device-1234")
+    self.assertIsNone(reboot_metrics.capability_name)
+    self.assertEqual(reboot_metrics.call_count, 2)
+    self.assertEqual(reboot_metrics.error_count, 0)
+    self.assertEqual(sum(reboot_metrics.histogram), 2)
+    cycle_metrics, = method_metrics.get_metrics(
+        capability_name="fake_capability")
+    self.assertEqual(cycle_metrics.method_name, "cycle")
+    reset_metrics, = method_metrics.get_metrics(method_name="factory_reset")
+    self.assertEqual(reset_metrics.error_count, 1)
+
+  def test_disabled_metrics_are_not_recorded(self):
+    """Test that nothing is recorded unless metrics are enabled."""
+    method_metrics.disable()
+    self.device.reboot()
+    self.assertEqual(method_metrics.get_metrics(), [])
+
+  def test_record_histogram(self):
+    """Test latency statistics and histogram buckets."""
+    for elapsed_time in (0.0005, 0.05, 1000):
+      method_metrics.record("device-1234", None, "shell", elapsed_time)
+    metrics, = method_metrics.get_metrics()
+    self.assertEqual(metrics.min_time, 0.0005)
+    self.assertEqual(metrics.max_time, 1000)
+    self.assertEqual(metrics.histogram[0], 1)
+    self.assertEqual(metrics.histogram[2], 1)
+    self.assertEqual(metrics.histogram[-1], 1)
+
+  def test_dump(self):
+    """Test that metrics are dumped to a JSON file."""
+    artifacts_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, artifacts_directory)
+    file_path = os.path.join(artifacts_directory, "metrics.json")
+    self.device.reboot()
+    method_metrics.dump(file_path)
+    with open(file_path) as open_file:
+      metrics_dicts = json.load(open_file)
+    self.assertEqual(len(metrics_dicts), 1)
+    self.assertEqual(metrics_dicts[0]["method_name"], "reboot")
+    self.assertEqual(metrics_dicts[0]["call_count"], 1)
+    self.assertIn("mean_time", metrics_dicts[0])
+
+  def test_disabled_log_level_skips_messages(self):
+    """Test that no log messages are formatted below the logger level."""
+    _mock_logger.getEffectiveLevel.return_value = logging.WARNING
+    self.device.reboot()
+    _mock_logger.log.assert_not_called()
+    _mock_logger.getEffectiveLevel.return_value = logging.INFO
+    self.device.reboot()
+    self.assertEqual(_mock_logger.log.call_count, 2)
+    self.assertIn("_FakeDevice.reboot successful",
+                  _mock_logger.log.call_args[0][1])
+
+
+if __name__ == "__main__":
+  unittest.main()
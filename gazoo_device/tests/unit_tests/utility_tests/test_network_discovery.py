@@ -0,0 +1,95 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.network_discovery.py."""
+import socket
+import threading
+import unittest
+
+from gazoo_device.utility import network_discovery
+
+_LOCALHOST = "127.0.0.1"
+
+
+def _get_unused_port() -> int:
+  with socket.socket() as sock:
+    sock.bind((_LOCALHOST, 0))
+    return sock.getsockname()[1]
+
+
+class NetworkDiscoveryTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.network_discovery.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.banner = b"SSH-2.0-OpenSSH_8.4\r\n"
+    self.server = socket.socket()
+    self.server.bind((_LOCALHOST, 0))
+    self.server.listen(8)
+    self.port = self.server.getsockname()[1]
+    self.addCleanup(self.server.close)
+    server_thread = threading.Thread(target=self._serve, daemon=True)
+    server_thread.start()
+
+  def _serve(self):
+    while True:
+      try:
+        connection, _ = self.server.accept()
+      except OSError:  # Server socket closed.
+        return
+      with connection:
+        connection.sendall(self.banner)
+
+  def test_expand_addresses(self):
+    """Test expansion of CIDR ranges and deduplication of addresses."""
+    self.assertEqual(
+        network_discovery.expand_addresses(
+            ["10.0.0.1", "10.0.0.0/30", "somehost", ""]),
+        ["10.0.0.1", "10.0.0.2", "somehost"])
+
+  def test_expand_addresses_raises_on_invalid_range(self):
+    """Test that an invalid CIDR range raises ValueError."""
+    with self.assertRaises(ValueError):
+      network_discovery.expand_addresses(["10.0.0.0/33"])
+
+  def test_discover_hosts_with_banner(self):
+    """Test that only hosts with an open port and SSH banner are returned."""
+    results = []
+    open_hosts = network_discovery.discover_hosts(
+        [_LOCALHOST], port=self.port, read_banner=True, results=results)
+    self.assertEqual(open_hosts, [_LOCALHOST])
+    self.assertEqual(results[0].banner, "SSH-2.0-OpenSSH_8.4")
+
+  def test_discover_hosts_rejects_non_ssh_banner(self):
+    """Test that hosts with a non-SSH banner are not considered open."""
+    self.banner = b"220 FTP server ready\r\n"
+    results = []
+    self.assertEqual(
+        network_discovery.discover_hosts(
+            [_LOCALHOST], port=self.port, read_banner=True, results=results),
+        [])
+    self.assertEqual(results[0].error, "not an SSH server")
+
+  def test_discover_hosts_closed_port(self):
+    """Test that hosts with a closed port are not returned."""
+    results = []
+    self.assertEqual(
+        network_discovery.discover_hosts(
+            [_LOCALHOST], port=_get_unused_port(), timeout=1, results=results),
+        [])
+    self.assertFalse(results[0].is_open)
+
+
+if __name__ == "__main__":
+  unittest.main()
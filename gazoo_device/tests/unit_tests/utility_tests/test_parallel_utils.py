@@ -0,0 +1,153 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.parallel_utils.py."""
+import threading
+import time
+import unittest
+
+from gazoo_device.utility import parallel_utils
+
+
+class _FakeDevice:
+  DEVICE_TYPE = "fakedevice"
+
+  def __init__(self, name):
+    self.name = name
+
+
+def _fake_call(device, parameter_dict=None):
+  """Returns the device name or fails depending on the device name."""
+  if device.name == "failing":
+    raise ValueError("Something went wrong")
+  if device.name == "hanging":
+    time.sleep(10)
+  if parameter_dict:
+    return parameter_dict["value"]
+  return device.name
+
+
+def _return_at(device, end_time):
+  """Returns the device name at end_time, together with the other calls."""
+  time.sleep(max(0, end_time - time.time()))
+  return device.name
+
+
+class ParallelUtilsTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.parallel_utils.py."""
+
+  def test_executor_results_are_keyed_by_device_name(self):
+    """Test that results and structured errors are keyed by device name."""
+    for backend in (parallel_utils.BACKEND_PROCESS,
+                    parallel_utils.BACKEND_THREAD):
+      with self.subTest(backend=backend):
+        executor = parallel_utils.ParallelExecutor(backend=backend)
+        executor.submit_devices(
+            _fake_call, [_FakeDevice("device-1234"), _FakeDevice("failing")])
+        results = executor.run()
+        self.assertEqual(results["device-1234"].result, "device-1234")
+        self.assertIsNone(results["device-1234"].error)
+        error = results["failing"].error
+        self.assertEqual(error.exception_type, "ValueError")
+        self.assertEqual(error.message, "Something went wrong")
+        self.assertIn("_fake_call", error.traceback)
+        self.assertIsInstance(error.exception, ValueError)
+
+  def test_executor_per_device_timeout(self):
+    """Test that calls exceeding the timeout are reported as timed out."""
+    for backend in (parallel_utils.BACKEND_PROCESS,
+                    parallel_utils.BACKEND_THREAD):
+      with self.subTest(backend=backend):
+        executor = parallel_utils.ParallelExecutor(
+            backend=backend, timeout=0.5)
+        executor.submit_devices(
+            _fake_call, [_FakeDevice("hanging"), _FakeDevice("device-1234")])
+        start_time = time.time()
+        results = executor.run()
+        self.assertLess(time.time() - start_time, 5)
+        self.assertEqual(results["hanging"].error.exception_type,
+                         "TimeoutError")
+        self.assertEqual(results["device-1234"].result, "device-1234")
+
+  def test_executor_bounds_concurrency(self):
+    """Test that no more than max_workers calls run at the same time."""
+    lock = threading.Lock()
+    counters = {"running": 0, "peak": 0}
+
+    def _count_concurrent_calls(device):
+      del device  # Unused.
+      with lock:
+        counters["running"] += 1
+        counters["peak"] = max(counters["peak"], counters["running"])
+      time.sleep(0.05)
+      with lock:
+        counters["running"] -= 1
+
+    executor = parallel_utils.ParallelExecutor(
+        backend=parallel_utils.BACKEND_THREAD, max_workers=3)
+    executor.submit_devices(_count_concurrent_calls,
+                            [_FakeDevice(f"device-{i}") for i in range(10)])
+    self.assertEqual(len(executor.run()), 10)
+    self.assertEqual(counters["peak"], 3)
+
+  def test_executor_many_short_processes(self):
+    """Test that processes exiting together aren't reported as crashed."""
+    devices = [_FakeDevice(f"device-{i}") for i in range(30)]
+    end_time = time.time() + 1
+    executor = parallel_utils.ParallelExecutor(max_workers=32)
+    for device in devices:
+      executor.submit(device.name, _return_at, device=device,
+                      end_time=end_time)
+    results = executor.run()
+    self.assertEqual(
+        {name: result.error for name, result in results.items()},
+        {device.name: None for device in devices})
+    self.assertEqual(
+        {name: result.result for name, result in results.items()},
+        {device.name: device.name for device in devices})
+
+  def test_executor_cancel(self):
+    """Test that cancelled calls are reported with a CancelledError."""
+    executor = parallel_utils.ParallelExecutor(
+        backend=parallel_utils.BACKEND_THREAD, max_workers=1)
+    executor.submit_devices(
+        _fake_call, [_FakeDevice("hanging"), _FakeDevice("device-1234")])
+    executor.cancel()
+    results = executor.run()
+    self.assertEqual(results["device-1234"].error.exception_type,
+                     "CancelledError")
+
+  def test_executor_rejects_duplicate_devices(self):
+    """Test that submitting two calls for the same device raises an error."""
+    executor = parallel_utils.ParallelExecutor()
+    executor.submit("device-1234", _fake_call)
+    with self.assertRaisesRegex(ValueError, "already submitted"):
+      executor.submit("device-1234", _fake_call)
+
+  def test_parallel_process_raises_on_failure(self):
+    """Test that parallel_process raises RuntimeError if a call fails."""
+    self.assertCountEqual(
+        parallel_utils.parallel_process(
+            "fake_call", _fake_call,
+            [_FakeDevice("device-1234"), _FakeDevice("device-5678")],
+            parameter_dicts={"fakedevice": {"value": 1}}),
+        [1, 1])
+    with self.assertRaisesRegex(RuntimeError, "failing: ValueError"):
+      parallel_utils.parallel_process(
+          "fake_call", _fake_call,
+          [_FakeDevice("device-1234"), _FakeDevice("failing")])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,145 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for gazoo_device.utility.property_cache.py."""
+import unittest
+from unittest import mock
+
+from gazoo_device import decorators
+from gazoo_device import gdm_logger
+from gazoo_device.utility import property_cache
+
+logger = gdm_logger.get_logger()
+
+
+class _FakeDevice:
+  """Device with cached dynamic properties."""
+
+  def __init__(self, name):
+    self.name = name
+    self.commands = {"KERNEL_VERSION": "uname -r",
+                     "FIRMWARE_VERSION": "cat /etc/os-release"}
+    self.regexes = {"KERNEL_VERSION_REGEX": r"(.*)",
+                    "FIRMWARE_VERSION_REGEX": r"VERSION=\"(\d+ \(\w+\))\""}
+    self.shell_capability = mock.MagicMock()
+    self.query_count = 0
+    self._timeout = 10
+
+  @decorators.DynamicProperty.cached(
+      ttl=60, shell_query=("KERNEL_VERSION", "KERNEL_VERSION_REGEX"))
+  def kernel_version(self):
+    self.query_count += 1
+    return "5.10.17-v7+"
+
+  @decorators.DynamicProperty.cached(
+      ttl=60, shell_query=("FIRMWARE_VERSION", "FIRMWARE_VERSION_REGEX"))
+  def firmware_version(self):
+    return "10 (buster)"
+
+  @decorators.DynamicProperty.cached(ttl=60)
+  def timeout(self):
+    self.query_count += 1
+    return self._timeout
+
+  @timeout.setter
+  def timeout(self, value):
+    self._timeout = value
+
+  @decorators.LogDecorator(logger)
+  def reboot(self):
+    pass
+
+
+class PropertyCacheTests(unittest.TestCase):
+  """Unit tests for gazoo_device.utility.property_cache.py."""
+
+  def setUp(self):
+    super().setUp()
+    self.device = _FakeDevice("raspberrypi-1234")
+
+  def test_value_is_cached_until_ttl_expires(self):
+    """Test that cached values are reused until they expire."""
+    with mock.patch.object(property_cache.time, "monotonic", return_value=0):
+      self.assertEqual(self.device.kernel_version, "5.10.17-v7+")
+      self.assertEqual(self.device.kernel_version, "5.10.17-v7+")
+    self.assertEqual(self.device.query_count, 1)
+    with mock.patch.object(property_cache.time, "monotonic", return_value=61):
+      self.assertEqual(self.device.kernel_version, "5.10.17-v7+")
+    self.assertEqual(self.device.query_count, 2)
+
+  def test_reboot_invalidates_cached_values(self):
+    """Test that log-decorated reboot() invalidates the device cache."""
+    other_device = _FakeDevice("raspberrypi-5678")
+    for device in (self.device, other_device):
+      _ = device.kernel_version
+    self.device.reboot()
+    for device in (self.device, other_device):
+      _ = device.kernel_version
+    self.assertEqual(self.device.query_count, 2)
+    self.assertEqual(other_device.query_count, 1)
+
+  def test_setter_keeps_cache_settings_and_discards_value(self):
+    """Test that setting a cached property discards its cached value."""
+    self.assertEqual(self.device.timeout, 10)
+    self.device.timeout = 20
+    self.assertEqual(self.device.timeout, 20)
+    self.assertEqual(self.device.query_count, 2)
+    self.assertEqual(type(self.device).timeout.ttl, 60)
+
+  def test_discard_values_with_prefix(self):
+    """Test that only values of properties with the prefix are discarded."""
+    for property_name in ("port_mode_1", "port_mode_2", "firmware_version"):
+      property_cache.set_value(self.device, property_name, "value", ttl=60)
+    property_cache.discard_values(self.device, "port_mode_")
+    self.assertEqual(property_cache.get_value(self.device, "port_mode_1"),
+                     (False, None))
+    self.assertEqual(property_cache.get_value(self.device, "port_mode_2"),
+                     (False, None))
+    self.assertEqual(property_cache.get_value(self.device, "firmware_version"),
+                     (True, "value"))
+
+  def test_evaluate_shell_properties_in_single_batch(self):
+    """Test that shell-backed properties are retrieved in one shell batch."""
+    shell_batch = self.device.shell_capability.shell_batch
+    shell_batch.return_value = [
+        ("5.10.17-v7+", 0),
+        ("PRETTY_NAME=\"Raspbian GNU/Linux 10 (buster)\"\n"
+         "VERSION=\"10 (buster)\"", 0)]
+    values = property_cache.evaluate_shell_properties(
+        self.device, ["kernel_version", "firmware_version", "timeout"])
+    self.assertEqual(values, {"kernel_version": "5.10.17-v7+",
+                              "firmware_version": "10 (buster)"})
+    shell_batch.assert_called_once_with(
+        ["uname -r", "cat /etc/os-release"], command_name="get_properties")
+    self.assertEqual(self.device.kernel_version, "5.10.17-v7+")
+    self.assertEqual(self.device.query_count, 0)
+
+  def test_evaluate_shell_properties_skips_unmatched_properties(self):
+    """Test that properties not found in the responses are skipped."""
+    self.device.shell_capability.shell_batch.return_value = [
+        ("5.10.17-v7+", 0), ("", 1)]
+    values = property_cache.evaluate_shell_properties(
+        self.device, ["kernel_version", "firmware_version"])
+    self.assertEqual(values, {"kernel_version": "5.10.17-v7+"})
+
+  def test_evaluate_shell_properties_needs_several_queries(self):
+    """Test that a single uncached shell-backed property isn't batched."""
+    _ = self.device.kernel_version
+    self.assertEqual(property_cache.evaluate_shell_properties(
+        self.device, ["kernel_version", "firmware_version"]), {})
+    self.device.shell_capability.shell_batch.assert_not_called()
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,386 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client for the ADB server protocol (the adb client <-> server protocol).
+
+Talks to a running ADB server (TCP port 5037 by default) directly instead of
+starting an "adb" client process for every command. Each request opens a
+connection to the server:
+
+  * Requests are sent as a 4 hex digit length followed by the request.
+  * The server replies "OKAY" or "FAIL" followed by a 4 hex digit length and
+    an error message.
+  * "host:" requests are answered by the server itself. Other requests are
+    forwarded to the device selected by a preceding "host:transport:<serial>"
+    request, after which the connection is dedicated to that service.
+  * The "sync:" service transfers files with 8 byte headers of a 4 character
+    id and a little-endian 32 bit length (STAT, SEND, RECV, DATA, DONE, ...).
+
+A service consumes its connection, so connections can't be reused between
+requests; connecting to the local server is cheap compared to starting an adb
+process though.
+
+ANDROID_ADB_SERVER_ADDRESS and ANDROID_ADB_SERVER_PORT environment variables
+select the server like they do for the adb command.
+"""
+import os
+import select
+import socket
+import stat
+import struct
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 5037
+CONNECT_TIMEOUT = 2.0
+SYNC_DATA_MAX = 64 * 1024
+_DEFAULT_FILE_MODE = 0o644
+_SYNC_HEADER = struct.Struct("<4sI")
+_SYNC_STAT = struct.Struct("<4sIII")
+_TRACK_DEVICES_STOP_CHECK_INTERVAL = 0.5
+
+
+class AdbClientError(RuntimeError):
+  """The ADB server rejected a request or violated the protocol."""
+
+
+class UnsupportedRequestError(AdbClientError):
+  """The request can't be handled by this client (use the adb command)."""
+
+
+def get_server_address() -> Tuple[str, int]:
+  """Returns the (host, port) of the ADB server to use."""
+  host = os.environ.get("ANDROID_ADB_SERVER_ADDRESS", DEFAULT_SERVER_HOST)
+  try:
+    port = int(os.environ.get("ANDROID_ADB_SERVER_PORT", DEFAULT_SERVER_PORT))
+  except ValueError:
+    port = DEFAULT_SERVER_PORT
+  return host, port
+
+
+class AdbClient:
+  """Sends requests to an ADB server."""
+
+  def __init__(self,
+               host: Optional[str] = None,
+               port: Optional[int] = None,
+               timeout: Optional[float] = None):
+    """Initializes the client.
+
+    Args:
+      host: ADB server host. Defaults to get_server_address().
+      port: ADB server port. Defaults to get_server_address().
+      timeout: default socket timeout of requests in seconds. None waits
+        indefinitely.
+    """
+    default_host, default_port = get_server_address()
+    self.host = host or default_host
+    self.port = port or default_port
+    self.timeout = timeout
+
+  def is_server_running(self) -> bool:
+    """Returns whether the ADB server accepts connections."""
+    try:
+      self._connect().close()
+    except OSError:
+      return False
+    return True
+
+  def devices(self) -> str:
+    """Returns the device list in "adb devices" format (without the header)."""
+    with self._connect() as connection:
+      _send_request(connection, "host:devices")
+      return _read_length_prefixed(connection).decode("utf-8", "replace")
+
+  def track_devices(
+      self, stop_event: Optional[threading.Event] = None) -> Iterator[str]:
+    """Yields the device list whenever it changes.
+
+    Device lists are in "adb devices" format (without the header).
+
+    Args:
+      stop_event: stops tracking when set.
+
+    Yields:
+      Device lists until the server closes the connection or stop_event is
+      set.
+
+    Raises:
+      AdbClientError: if the server rejects the request or closes the
+        connection.
+    """
+    with self._connect() as connection:
+      _send_request(connection, "host:track-devices")
+      connection.settimeout(None)
+      while not (stop_event and stop_event.is_set()):
+        readable, _, _ = select.select(
+            [connection], [], [], _TRACK_DEVICES_STOP_CHECK_INTERVAL)
+        if readable:
+          yield _read_length_prefixed(connection).decode("utf-8", "replace")
+
+  def shell(self,
+            adb_serial: Optional[str],
+            command: str,
+            timeout: Optional[float] = None) -> str:
+    """Runs the command in the device shell and returns its output.
+
+    Args:
+      adb_serial: device serial number. Any device if None.
+      command: shell command to run.
+      timeout: maximum time to wait for the command to finish in seconds.
+        Output received so far is returned on timeout.
+
+    Returns:
+      Output of the command (stdout and stderr).
+
+    Raises:
+      AdbClientError: if the server rejects the request.
+    """
+    with self._connect_to_device(adb_serial) as connection:
+      _send_request(connection, "shell:" + command)
+      return _read_until_closed(connection, timeout).decode("utf-8", "replace")
+
+  def stat(self, adb_serial: Optional[str], path: str) -> Tuple[int, int, int]:
+    """Returns (mode, size, mtime) of the path on the device.
+
+    Mode is 0 if the path doesn't exist.
+    """
+    with self._connect_to_device(adb_serial) as connection:
+      _send_request(connection, "sync:")
+      result = _sync_stat(connection, path)
+      _send_sync_request(connection, b"QUIT")
+      return result
+
+  def push(self, adb_serial: Optional[str], sources: List[str],
+           destination_path: str) -> Tuple[int, int]:
+    """Pushes host files to the device through the sync service.
+
+    Args:
+      adb_serial: device serial number. Any device if None.
+      sources: paths of host files to push.
+      destination_path: device path to push to. Sources are pushed into it if
+        it's a directory (which it has to be for several sources).
+
+    Returns:
+      Number of files and bytes pushed.
+
+    Raises:
+      AdbClientError: if a transfer fails.
+    """
+    total_bytes = 0
+    with self._connect_to_device(adb_serial) as connection:
+      _send_request(connection, "sync:")
+      mode, _, _ = _sync_stat(connection, destination_path)
+      is_directory = stat.S_ISDIR(mode)
+      if len(sources) > 1 and not is_directory:
+        raise AdbClientError(
+            "Target {} is not a directory".format(destination_path))
+      for source in sources:
+        destination = destination_path
+        if is_directory:
+          destination = "/".join([destination_path.rstrip("/"),
+                                  os.path.basename(source)])
+        total_bytes += _sync_send(connection, source, destination)
+      _send_sync_request(connection, b"QUIT")
+    return len(sources), total_bytes
+
+  def pull(self, adb_serial: Optional[str], sources: List[str],
+           destination_path: str) -> Tuple[int, int]:
+    """Pulls device files to the host through the sync service.
+
+    Args:
+      adb_serial: device serial number. Any device if None.
+      sources: paths of device files to pull.
+      destination_path: host path to pull to. Sources are pulled into it if
+        it's a directory (which it has to be for several sources).
+
+    Returns:
+      Number of files and bytes pulled.
+
+    Raises:
+      UnsupportedRequestError: if a source is a directory.
+      AdbClientError: if a source doesn't exist or a transfer fails.
+    """
+    is_directory = os.path.isdir(destination_path)
+    if len(sources) > 1 and not is_directory:
+      raise AdbClientError(
+          "Target {} is not a directory".format(destination_path))
+    total_bytes = 0
+    with self._connect_to_device(adb_serial) as connection:
+      _send_request(connection, "sync:")
+      for source in sources:
+        mode, _, _ = _sync_stat(connection, source)
+        if not mode:
+          raise AdbClientError(
+              "Remote object {} does not exist".format(source))
+        if stat.S_ISDIR(mode):
+          raise UnsupportedRequestError(
+              "Pulling directory {} is not supported".format(source))
+      for source in sources:
+        destination = destination_path
+        if is_directory:
+          destination = os.path.join(destination_path,
+                                     os.path.basename(source.rstrip("/")))
+        total_bytes += _sync_receive(connection, source, destination)
+      _send_sync_request(connection, b"QUIT")
+    return len(sources), total_bytes
+
+  def _connect(self) -> socket.socket:
+    connection = socket.create_connection((self.host, self.port),
+                                          timeout=CONNECT_TIMEOUT)
+    connection.settimeout(self.timeout)
+    return connection
+
+  def _connect_to_device(self, adb_serial: Optional[str]) -> socket.socket:
+    """Returns a connection switched to the transport of the device."""
+    connection = self._connect()
+    try:
+      if adb_serial is None:
+        _send_request(connection, "host:transport-any")
+      else:
+        _send_request(connection, "host:transport:" + adb_serial)
+    except Exception:
+      connection.close()
+      raise
+    return connection
+
+
+def _send_request(connection: socket.socket, request: str) -> None:
+  """Sends a request and raises AdbClientError unless the server agrees."""
+  data = request.encode("utf-8")
+  connection.sendall(b"%04x" % len(data) + data)
+  status = _read_exactly(connection, 4)
+  if status == b"OKAY":
+    return
+  if status == b"FAIL":
+    message = _read_length_prefixed(connection).decode("utf-8", "replace")
+    raise AdbClientError(message)
+  raise AdbClientError("Unexpected ADB server response {!r} to {!r}".format(
+      status, request))
+
+
+def _read_exactly(connection: socket.socket, size: int) -> bytes:
+  """Reads size bytes from the connection."""
+  data = bytearray()
+  while len(data) < size:
+    chunk = connection.recv(size - len(data))
+    if not chunk:
+      raise AdbClientError(
+          "ADB server closed the connection after {} of {} bytes".format(
+              len(data), size))
+    data += chunk
+  return bytes(data)
+
+
+def _read_length_prefixed(connection: socket.socket) -> bytes:
+  """Reads data prefixed with a 4 hex digit length."""
+  length = int(_read_exactly(connection, 4), 16)
+  return _read_exactly(connection, length)
+
+
+def _read_until_closed(connection: socket.socket,
+                       timeout: Optional[float]) -> bytes:
+  """Reads until the service closes the connection or timeout expires."""
+  chunks = []
+  end_time = None if timeout is None else time.time() + timeout
+  while True:
+    if end_time is not None:
+      remaining_time = end_time - time.time()
+      if remaining_time <= 0:
+        break
+      connection.settimeout(remaining_time)
+    try:
+      chunk = connection.recv(SYNC_DATA_MAX)
+    except socket.timeout:
+      break
+    if not chunk:
+      break
+    chunks.append(chunk)
+  return b"".join(chunks)
+
+
+def _send_sync_request(connection: socket.socket, request_id: bytes,
+                       data: bytes = b"") -> None:
+  connection.sendall(_SYNC_HEADER.pack(request_id, len(data)) + data)
+
+
+def _read_sync_failure(connection: socket.socket, length: int) -> str:
+  return _read_exactly(connection, length).decode("utf-8", "replace")
+
+
+def _sync_stat(connection: socket.socket, path: str) -> Tuple[int, int, int]:
+  """Returns (mode, size, mtime) of the device path. Mode is 0 if missing."""
+  _send_sync_request(connection, b"STAT", path.encode("utf-8"))
+  response_id, mode, size, mtime = _SYNC_STAT.unpack(
+      _read_exactly(connection, _SYNC_STAT.size))
+  if response_id != b"STAT":
+    raise AdbClientError(
+        "Unexpected sync response {!r} to STAT".format(response_id))
+  return mode, size, mtime
+
+
+def _sync_send(connection: socket.socket, source: str,
+               destination: str) -> int:
+  """Streams the host file to the device path. Returns the bytes sent."""
+  mode = os.stat(source).st_mode & 0o777 or _DEFAULT_FILE_MODE
+  _send_sync_request(connection, b"SEND",
+                     "{},{}".format(destination, mode).encode("utf-8"))
+  total_bytes = 0
+  with open(source, "rb") as source_file:
+    while True:
+      chunk = source_file.read(SYNC_DATA_MAX)
+      if not chunk:
+        break
+      _send_sync_request(connection, b"DATA", chunk)
+      total_bytes += len(chunk)
+  connection.sendall(_SYNC_HEADER.pack(b"DONE", int(time.time())))
+  response_id, length = _SYNC_HEADER.unpack(
+      _read_exactly(connection, _SYNC_HEADER.size))
+  if response_id == b"FAIL":
+    raise AdbClientError("Failed to push {} to {}: {}".format(
+        source, destination, _read_sync_failure(connection, length)))
+  if response_id != b"OKAY":
+    raise AdbClientError(
+        "Unexpected sync response {!r} to SEND".format(response_id))
+  return total_bytes
+
+
+def _sync_receive(connection: socket.socket, source: str,
+                  destination: str) -> int:
+  """Streams the device file to the host path. Returns the bytes received."""
+  _send_sync_request(connection, b"RECV", source.encode("utf-8"))
+  total_bytes = 0
+  temporary_destination = destination + ".gdm_pull"
+  try:
+    with open(temporary_destination, "wb") as destination_file:
+      while True:
+        response_id, length = _SYNC_HEADER.unpack(
+            _read_exactly(connection, _SYNC_HEADER.size))
+        if response_id == b"DONE":
+          break
+        if response_id == b"FAIL":
+          raise AdbClientError("Failed to pull {}: {}".format(
+              source, _read_sync_failure(connection, length)))
+        if response_id != b"DATA":
+          raise AdbClientError(
+              "Unexpected sync response {!r} to RECV".format(response_id))
+        destination_file.write(_read_exactly(connection, length))
+        total_bytes += length
+    os.replace(temporary_destination, destination)
+  finally:
+    if os.path.exists(temporary_destination):
+      os.remove(temporary_destination)
+  return total_bytes
@@ -0,0 +1,223 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Background tracker of the states of Android devices attached to the host.
+
+ADB device states are pushed by the ADB server ("host:track-devices"), so
+they are always current while the tracker is connected to the server (see
+is_adb_live()). Fastboot has no equivalent, so devices in fastboot mode are
+listed periodically, but only while somebody has asked about fastboot mode
+in the last FASTBOOT_QUERY_LINGER seconds.
+
+The tracker of the current process is returned by get_tracker(). Trackers
+don't survive a fork: child processes get a tracker of their own.
+"""
+import os
+import threading
+import time
+from typing import Callable, Collection, Dict, List, Optional
+
+from gazoo_device import gdm_logger
+from gazoo_device.utility import adb_client
+
+logger = gdm_logger.get_logger()
+
+FASTBOOT_STATE = "fastboot"
+FASTBOOT_POLL_INTERVAL = 0.5
+FASTBOOT_QUERY_LINGER = 30
+INITIAL_SNAPSHOT_TIMEOUT = 0.5
+RECONNECT_INTERVAL = 1
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker(
+    fastboot_lister: Callable[[], List[str]]) -> "AdbDeviceTracker":
+  """Returns the tracker of the current process, starting it if necessary.
+
+  Args:
+    fastboot_lister: function which returns serials of devices in fastboot
+      mode. Only used when the tracker is started.
+  """
+  global _tracker
+  with _tracker_lock:
+    if _tracker is None or _tracker.pid != os.getpid():
+      _tracker = AdbDeviceTracker(fastboot_lister)
+      _tracker.start()
+      _tracker.wait_for_adb_snapshot(INITIAL_SNAPSHOT_TIMEOUT)
+    return _tracker
+
+
+def _parse_device_list(device_list: str) -> Dict[str, str]:
+  """Returns states by serial (without the port of network devices)."""
+  states = {}
+  for line in device_list.splitlines():
+    fields = line.split()
+    if len(fields) >= 2:
+      states[fields[0].split(":", 1)[0]] = fields[1]
+  return states
+
+
+class AdbDeviceTracker:
+  """Keeps a live map of device serial to ADB or fastboot state."""
+
+  def __init__(self, fastboot_lister: Callable[[], List[str]],
+               client: Optional[adb_client.AdbClient] = None):
+    """Initializes the tracker.
+
+    Args:
+      fastboot_lister: function which returns serials of devices in fastboot
+        mode.
+      client: ADB server client to track devices with.
+    """
+    self.pid = os.getpid()
+    self._client = client or adb_client.AdbClient()
+    self._fastboot_lister = fastboot_lister
+    self._state_changed = threading.Condition()
+    self._adb_states = {}
+    self._adb_live = False
+    self._adb_attempted = False
+    self._fastboot_serials = frozenset()
+    self._fastboot_update_time = 0.0
+    self._fastboot_query_time = 0.0
+    self._fastboot_wanted = threading.Event()
+    self._stop_event = threading.Event()
+    self._threads = []
+
+  def start(self) -> None:
+    """Starts tracking in background threads."""
+    for target in (self._track_adb_devices, self._poll_fastboot_devices):
+      thread = threading.Thread(target=target, name=target.__name__,
+                                daemon=True)
+      thread.start()
+      self._threads.append(thread)
+
+  def stop(self) -> None:
+    """Stops tracking."""
+    self._stop_event.set()
+    self._fastboot_wanted.set()
+    for thread in self._threads:
+      thread.join(timeout=RECONNECT_INTERVAL * 2)
+    self._threads = []
+
+  def is_adb_live(self) -> bool:
+    """Returns whether ADB states are being pushed by the ADB server."""
+    return self._adb_live and self.pid == os.getpid()
+
+  def wait_for_adb_snapshot(self, timeout: float) -> bool:
+    """Waits for the first connection to the server. Returns is_adb_live()."""
+    with self._state_changed:
+      self._state_changed.wait_for(lambda: self._adb_attempted, timeout)
+    return self.is_adb_live()
+
+  def get_adb_state(self, serial: str) -> Optional[str]:
+    """Returns the ADB state ("device", "offline", ...) or None if absent."""
+    with self._state_changed:
+      return self._adb_states.get(serial)
+
+  def is_fastboot_mode(self, serial: str) -> bool:
+    """Returns whether the device is in fastboot mode.
+
+    Lists fastboot devices right away if the last listing is out of date.
+    """
+    self._note_fastboot_query()
+    with self._state_changed:
+      return serial in self._fastboot_serials
+
+  def get_state(self, serial: str) -> Optional[str]:
+    """Returns the ADB state, "fastboot" or None if the device is absent."""
+    with self._state_changed:
+      state = self._adb_states.get(serial)
+      if state is None and serial in self._fastboot_serials:
+        state = FASTBOOT_STATE
+      return state
+
+  def wait_for_state(self, serial: str, states: Collection[str],
+                     timeout: float) -> bool:
+    """Waits until the device is in one of the states.
+
+    Args:
+      serial: device serial.
+      states: ADB states ("device", "recovery", ...) and/or "fastboot".
+        None stands for absent.
+      timeout: maximum time to wait in seconds.
+
+    Returns:
+      True if the device reached one of the states, False if timed out.
+    """
+    end_time = time.time() + timeout
+    wants_fastboot = FASTBOOT_STATE in states or None in states
+    if wants_fastboot:
+      self._note_fastboot_query()
+    while True:
+      if wants_fastboot:
+        self._fastboot_query_time = time.time()
+      with self._state_changed:
+        if self.get_state(serial) in states:
+          return True
+        remaining_time = end_time - time.time()
+        if remaining_time <= 0:
+          return False
+        if wants_fastboot:  # Wake up to keep fastboot polling going.
+          remaining_time = min(remaining_time, FASTBOOT_QUERY_LINGER / 2)
+        self._state_changed.wait(remaining_time)
+
+  def _note_fastboot_query(self) -> None:
+    """Keeps fastboot polling going and catches up if it was paused."""
+    self._fastboot_query_time = time.time()
+    self._fastboot_wanted.set()
+    if time.time() - self._fastboot_update_time > FASTBOOT_POLL_INTERVAL * 2:
+      self._update_fastboot_devices()
+
+  def _set_adb_states(self, states: Dict[str, str], live: bool) -> None:
+    with self._state_changed:
+      self._adb_states = states
+      self._adb_live = live
+      self._adb_attempted = True
+      self._state_changed.notify_all()
+
+  def _track_adb_devices(self) -> None:
+    """Consumes the ADB server device list stream until stopped."""
+    while not self._stop_event.is_set():
+      try:
+        for device_list in self._client.track_devices(self._stop_event):
+          self._set_adb_states(_parse_device_list(device_list), live=True)
+      except (OSError, adb_client.AdbClientError) as err:
+        if self._adb_live:
+          logger.debug(f"ADB device tracking interrupted: {err!r}")
+      self._set_adb_states({}, live=False)
+      self._stop_event.wait(RECONNECT_INTERVAL)
+
+  def _update_fastboot_devices(self) -> None:
+    try:
+      serials = frozenset(self._fastboot_lister())
+    except Exception as err:  # pylint: disable=broad-except
+      logger.debug(f"Listing fastboot devices failed: {err!r}")
+      return
+    with self._state_changed:
+      self._fastboot_update_time = time.time()
+      if serials != self._fastboot_serials:
+        self._fastboot_serials = serials
+        self._state_changed.notify_all()
+
+  def _poll_fastboot_devices(self) -> None:
+    """Lists fastboot devices while there is interest in fastboot mode."""
+    while not self._stop_event.is_set():
+      if time.time() - self._fastboot_query_time > FASTBOOT_QUERY_LINGER:
+        self._fastboot_wanted.clear()
+        self._fastboot_wanted.wait()
+        continue
+      self._update_fastboot_devices()
+      self._stop_event.wait(FASTBOOT_POLL_INTERVAL)
@@ -21,6 +21,8 @@ import time
 from gazoo_device import config
 from gazoo_device import errors
 from gazoo_device import gdm_logger
+from gazoo_device.utility import adb_client
+from gazoo_device.utility import adb_device_tracker
 from gazoo_device.utility import host_utils
 
 import six
@@ -29,6 +31,14 @@ ADB_RETRY_SLEEP = 10
 FASTBOOT_TIMEOUT = 10.0
 PROPERTY_PATTERN = r"\[(.*)\]: \[(.*)\]\n"
 SYSENV_PATTERN = r"(.*)=(.*)\n"
+# Whether to send "devices", "shell", "push" and "pull" commands to a running
+# ADB server directly (see adb_client) instead of starting adb processes.
+USE_ADB_SERVER_CLIENT = True
+# Whether to answer device state queries from the states pushed by a running
+# ADB server (see adb_device_tracker) instead of listing devices every time.
+USE_ADB_DEVICE_TRACKER = True
+ADB_ONLINE_STATE = "device"
+FASTBOOT_STATE = adb_device_tracker.FASTBOOT_STATE
 logger = gdm_logger.get_logger()
 
 
@@ -407,6 +417,9 @@ def is_adb_mode(adb_serial, adb_path=None):
       If adb_path is not provided then path returned by get_adb_path will be
       used instead.
   """
+  tracker = _get_device_tracker() if adb_path is None else None
+  if tracker:
+    return tracker.get_adb_state(adb_serial) == ADB_ONLINE_STATE
   return adb_serial in get_adb_devices(adb_path=adb_path)
 
 
@@ -448,9 +461,69 @@ def is_fastboot_mode(adb_serial, fastboot_path=None):
       If fastboot_path is not provided then path returned by get_fastboot_path
       will be used instead.
   """
+  tracker = _get_device_tracker() if fastboot_path is None else None
+  if tracker:
+    return tracker.is_fastboot_mode(adb_serial)
   return adb_serial in get_fastboot_devices(fastboot_path=fastboot_path)
 
 
+def wait_for_state(adb_serial,
+                   states,
+                   timeout,
+                   adb_path=None,
+                   fastboot_path=None):
+  """Waits until the device is in one of the given states.
+
+  Args:
+      adb_serial (str): Device serial number.
+      states (collection): ADB states (such as ADB_ONLINE_STATE) and/or
+        FASTBOOT_STATE.
+      timeout (float): maximum time to wait in seconds.
+      adb_path (str): optional alternative path to adb executable
+      fastboot_path (str): optional alternative path to fastboot executable
+
+  Returns:
+      bool: True if the device reached one of the states, False if timed out.
+
+  Note:
+      State changes are pushed by the ADB server if one is running and
+      neither adb_path nor fastboot_path is provided. Otherwise "adb devices"
+      and "fastboot devices" are polled, in which case only ADB_ONLINE_STATE
+      and FASTBOOT_STATE can be detected.
+  """
+  tracker = None
+  if adb_path is None and fastboot_path is None:
+    tracker = _get_device_tracker()
+  if tracker:
+    return tracker.wait_for_state(adb_serial, states, timeout)
+
+  end_time = time.time() + timeout
+  while True:
+    if ((ADB_ONLINE_STATE in states and
+         is_adb_mode(adb_serial, adb_path=adb_path)) or
+        (FASTBOOT_STATE in states and
+         is_fastboot_mode(adb_serial, fastboot_path=fastboot_path))):
+      return True
+    if time.time() >= end_time:
+      return False
+    time.sleep(min(0.5, max(end_time - time.time(), 0)))
+
+
+def _get_device_tracker():
+  """Returns the device state tracker if it's live, None otherwise."""
+  if not USE_ADB_DEVICE_TRACKER:
+    return None
+  tracker = adb_device_tracker.get_tracker(_list_fastboot_devices)
+  return tracker if tracker.is_adb_live() else None
+
+
+def _list_fastboot_devices():
+  """Lists fastboot devices for the tracker without warning on every poll."""
+  if not host_utils.has_command("fastboot"):
+    return []
+  return get_fastboot_devices()
+
+
 def pull_from_device(adb_serial, sources, destination_path="./", adb_path=None):
   """Pulls sources from device to destination_path on host for adb_serial provided.
 
@@ -641,29 +714,37 @@ def _adb_command(command,
       or search the output for known errors if they want to determine if the
       command succeeded or not.
   """
-  adb_path = get_adb_path(adb_path)
-
-  if adb_serial is None:
-    args = [adb_path]
-  else:
-    args = [adb_path, "-s", adb_serial]
-  if isinstance(command, (str, six.text_type)):
-    args.append(command)
-  elif isinstance(command, (list, tuple)):
-    args.extend(command)
+  args = None
   for i in range(0, retries):
-    proc = subprocess.Popen(
-        args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    try:
-      output, _ = proc.communicate(timeout=timeout)
-    except subprocess.TimeoutExpired:
-      proc.terminate()
-      output, _ = proc.communicate()
-    output = output.decode("utf-8", "replace")
+    result = None
+    if adb_path is None and USE_ADB_SERVER_CLIENT:
+      result = _adb_server_command(command, adb_serial, timeout)
+    if result is not None:
+      output, returncode = result
+    else:
+      if args is None:
+        adb_path = get_adb_path(adb_path)
+        if adb_serial is None:
+          args = [adb_path]
+        else:
+          args = [adb_path, "-s", adb_serial]
+        if isinstance(command, (str, six.text_type)):
+          args.append(command)
+        elif isinstance(command, (list, tuple)):
+          args.extend(command)
+      proc = subprocess.Popen(
+          args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+      try:
+        output, _ = proc.communicate(timeout=timeout)
+      except subprocess.TimeoutExpired:
+        proc.terminate()
+        output, _ = proc.communicate()
+      output = output.decode("utf-8", "replace")
+      returncode = proc.returncode
     logger.debug("adb command {!r} to {} returned {!r}".format(
         command, adb_serial, output))
     if include_return_code:
-      return output, proc.returncode
+      return output, returncode
     if not any(msg in output for msg in ["error: closed", "offline"]):
       return output
     if i < retries - 1:
@@ -673,6 +754,48 @@ def _adb_command(command,
       f"ADB command failed: {command} with output: {output}")
 
 
+def _adb_server_command(command, adb_serial, timeout):
+  """Runs the command through the ADB server protocol client if possible.
+
+  Args:
+      command (str or tuple): ADB command and optionally arguments to execute.
+      adb_serial (str): Device serial number
+      timeout (int): time in seconds to wait for a shell command to complete.
+
+  Returns:
+      tuple: output in the format of the adb command and return code. None if
+      the command isn't supported by the client or no ADB server is running.
+  """
+  if isinstance(command, (str, six.text_type)):
+    command = [command]
+  command = list(command)
+  client = adb_client.AdbClient()
+  start_time = time.time()
+  try:
+    if command == ["devices"]:
+      return "List of devices attached\n" + client.devices(), 0
+    if len(command) == 2 and command[0] == "shell":
+      return client.shell(adb_serial, command[1], timeout=timeout), 0
+    if len(command) >= 3 and command[0] == "push":
+      if not all(os.path.isfile(source) for source in command[1:-1]):
+        return None  # Directories are pushed by the adb command.
+      file_count, byte_count = client.push(adb_serial, command[1:-1],
+                                           command[-1])
+      action = "pushed"
+    elif len(command) >= 3 and command[0] == "pull":
+      file_count, byte_count = client.pull(adb_serial, command[1:-1],
+                                           command[-1])
+      action = "pulled"
+    else:
+      return None
+  except (ConnectionRefusedError, adb_client.UnsupportedRequestError):
+    return None  # The adb command starts the server if it isn't running.
+  except (adb_client.AdbClientError, OSError) as err:
+    return "error: {}\n".format(err), 1
+  return "{} file(s) {}. {} bytes in {:.3f}s\n".format(
+      file_count, action, byte_count, time.time() - start_time), 0
+
+
 def _fastboot_command(command,
                       fastboot_serial=None,
                       fastboot_path=None,
@@ -0,0 +1,267 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Transactional store for JSON config files shared between processes.
+
+Updates are made in transactions: the file is locked (via an flock() on a
+sidecar ".lock" file), the latest contents are read from disk, the caller
+modifies them, and the result is written atomically when the transaction ends.
+Concurrent writers (in this or in other processes) therefore can't lose each
+other's updates. Nested transactions on the same store join the outermost one,
+so any number of updates made inside a transaction result in a single write.
+
+Each config file has a single store per process (see get_store()). Listeners
+are notified when the contents change, whether through a transaction of this
+process or through a write by another process detected by refresh().
+
+Caches which don't need locking (such as the detect and conformance caches)
+use read_versioned_entries() and write_versioned_entries() instead.
+"""
+import contextlib
+import copy
+import fcntl
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from gazoo_device import errors
+from gazoo_device import gdm_logger
+
+logger = gdm_logger.get_logger()
+
+LOCK_FILE_SUFFIX = ".lock"
+_MISSING = object()
+
+# Called with (file path, old contents, new contents).
+ChangeListener = Callable[[str, Dict[str, Any], Dict[str, Any]], None]
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(file_path: str) -> "ConfigStore":
+  """Returns the store of the config file shared by all users in this process.
+
+  Args:
+    file_path: path to the JSON config file.
+
+  Returns:
+    Config store of the file.
+  """
+  file_path = os.path.abspath(file_path)
+  with _stores_lock:
+    if file_path not in _stores:
+      _stores[file_path] = ConfigStore(file_path)
+    return _stores[file_path]
+
+
+def get_changed_keys(old_contents: Dict[str, Any],
+                     new_contents: Dict[str, Any]) -> List[str]:
+  """Returns top-level keys which were added, removed or changed."""
+  return sorted(
+      key for key in old_contents.keys() | new_contents.keys()
+      if old_contents.get(key, _MISSING) != new_contents.get(key, _MISSING))
+
+
+def write_json_file(file_path: str, contents: Dict[str, Any]) -> None:
+  """Atomically replaces the file with the contents serialized as JSON."""
+  directory = os.path.dirname(file_path)
+  if directory and not os.path.isdir(directory):
+    os.makedirs(directory)
+  temp_file_path = "{}.{}.tmp".format(file_path, os.getpid())
+  with open(temp_file_path, "w") as open_file:
+    json.dump(contents, open_file, sort_keys=True, indent=4)
+  os.replace(temp_file_path, file_path)
+
+
+def read_versioned_entries(file_path: str, version: int) -> Dict[str, Any]:
+  """Returns entries of a file written by write_versioned_entries().
+
+  Missing and unreadable files and files of another version are ignored.
+
+  Args:
+    file_path: path to the JSON file.
+    version: expected format version of the file.
+
+  Returns:
+    Entries stored in the file or an empty dictionary.
+  """
+  if not os.path.exists(file_path):
+    return {}
+  try:
+    with open(file_path) as open_file:
+      contents = json.load(open_file)
+  except (OSError, ValueError) as err:
+    logger.debug(f"Ignoring unreadable file {file_path}: {err!r}")
+    return {}
+  if not isinstance(contents, dict) or contents.get("version") != version:
+    return {}
+  return contents.get("entries", {})
+
+
+def write_versioned_entries(file_path: str, version: int,
+                            entries: Dict[str, Any]) -> None:
+  """Atomically writes entries along with their format version to the file.
+
+  Args:
+    file_path: path to the JSON file.
+    version: format version of the entries.
+    entries: entries to write.
+  """
+  write_json_file(file_path, {"version": version, "entries": entries})
+
+
+class ConfigStore:
+  """Transactional, change-notifying store for a single JSON config file."""
+
+  def __init__(self, file_path: str):
+    """Initializes the store. The file is read on first access.
+
+    Args:
+      file_path: path to the JSON config file.
+    """
+    self.file_path = file_path
+    self._lock = threading.RLock()
+    self._contents = None
+    self._signature = None
+    self._listeners = []
+    self._transaction_contents = None
+
+  def add_listener(self, listener: ChangeListener) -> None:
+    """Registers a function to call when the file contents change."""
+    with self._lock:
+      self._listeners.append(listener)
+
+  def remove_listener(self, listener: ChangeListener) -> None:
+    """Unregisters a function registered with add_listener()."""
+    with self._lock:
+      if listener in self._listeners:
+        self._listeners.remove(listener)
+
+  def read(self) -> Dict[str, Any]:
+    """Returns a copy of the latest file contents.
+
+    Raises:
+      DeviceError: the file does not exist or isn't valid JSON.
+    """
+    with self._lock:
+      if self._transaction_contents is not None:
+        return copy.deepcopy(self._transaction_contents)
+      self.refresh()
+      return copy.deepcopy(self._contents)
+
+  def refresh(self) -> bool:
+    """Reloads the file if it was changed by another process.
+
+    Listeners are notified if the contents changed.
+
+    Returns:
+      True if the file was reloaded, False if it hasn't changed.
+
+    Raises:
+      DeviceError: the file does not exist or isn't valid JSON.
+    """
+    with self._lock:
+      if self._transaction_contents is not None:
+        return False  # Other writers are locked out.
+      signature = self._get_signature()
+      if self._contents is not None and signature == self._signature:
+        return False
+      old_contents = self._contents
+      self._contents = self._read_file()
+      self._signature = signature
+      new_contents = self._contents
+    if old_contents is not None and old_contents != new_contents:
+      self._notify(old_contents, new_contents)
+    return True
+
+  @contextlib.contextmanager
+  def transaction(self) -> Iterator[Dict[str, Any]]:
+    """Locks the file and yields its latest contents for modification.
+
+    The modified contents are written when the outermost transaction exits
+    without an exception. Listeners are notified after the file is unlocked.
+
+    Yields:
+      Latest file contents. Modify the dictionary in place.
+
+    Raises:
+      DeviceError: the file isn't valid JSON.
+    """
+    with self._lock:
+      if self._transaction_contents is not None:  # Join the outer transaction.
+        yield self._transaction_contents
+        return
+      old_contents = self._contents
+      with self._file_lock():
+        contents = self._read_file() if os.path.exists(self.file_path) else {}
+        disk_contents = copy.deepcopy(contents)
+        self._transaction_contents = contents
+        try:
+          yield contents
+        finally:
+          self._transaction_contents = None
+        if contents != disk_contents:
+          self._write_file(contents)
+        self._contents = contents
+        self._signature = self._get_signature()
+    if old_contents is not None and old_contents != contents:
+      self._notify(old_contents, contents)
+
+  @contextlib.contextmanager
+  def _file_lock(self) -> Iterator[None]:
+    """Holds an exclusive lock of the config file across processes."""
+    with open(self.file_path + LOCK_FILE_SUFFIX, "a") as lock_file:
+      fcntl.flock(lock_file, fcntl.LOCK_EX)
+      try:
+        yield
+      finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+  def _get_signature(self) -> Optional[Tuple[int, int, int]]:
+    """Returns a value which changes whenever the file is replaced."""
+    try:
+      stat = os.stat(self.file_path)
+    except OSError:
+      return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+  def _notify(self, old_contents: Dict[str, Any],
+              new_contents: Dict[str, Any]) -> None:
+    """Calls all listeners with the old and the new file contents."""
+    with self._lock:
+      listeners = list(self._listeners)
+    for listener in listeners:
+      listener(self.file_path, old_contents, new_contents)
+
+  def _read_file(self) -> Dict[str, Any]:
+    """Returns the file contents read from disk."""
+    if not os.path.exists(self.file_path):
+      raise errors.DeviceError(
+          "Device load configuration failed. "
+          "File {} is not found. \n Current directory: {}".format(
+              self.file_path, os.getcwd()))
+    with open(self.file_path, "r") as open_file:
+      try:
+        return json.load(open_file)
+      except ValueError as err:
+        raise errors.DeviceError(
+            "Unable to parse GDM config file as a json file. {!r}".format(
+                err))
+
+  def _write_file(self, contents: Dict[str, Any]) -> None:
+    """Atomically replaces the file with the contents."""
+    logger.debug("Overwriting {}", self.file_path)
+    write_json_file(self.file_path, contents)
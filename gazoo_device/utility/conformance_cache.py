@@ -0,0 +1,146 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent cache of extension package conformance check results.
+
+Conformance checks of device classes and capability flavors inspect every
+method and signature of every class, yet their result only depends on the
+source code of the classes and of the checks. Packages which passed the checks
+are recorded with a key derived from the package name, the package version and
+a hash of the source files of all classes (including base classes) and of any
+extra files (such as the conformance checks themselves).
+"""
+import hashlib
+import inspect
+import sys
+import threading
+from typing import Any, Collection, List, Optional, Type
+
+from gazoo_device import config
+from gazoo_device import gdm_logger
+from gazoo_device.utility import config_store
+from gazoo_device.utility import conformance_utils
+
+logger = gdm_logger.get_logger()
+
+_CACHE_VERSION = 1
+
+
+def _get_source_files(classes: Collection[Type[Any]]) -> Optional[List[str]]:
+  """Returns sorted source files of the classes and of their base classes."""
+  source_files = set()
+  for a_class in classes:
+    for mro_class in inspect.getmro(a_class):
+      module = sys.modules.get(mro_class.__module__)
+      if module is None or mro_class.__module__ == "builtins":
+        continue
+      source_file = getattr(module, "__file__", None)
+      if not source_file:
+        return None
+      source_files.add(source_file)
+  return sorted(source_files)
+
+
+def get_cache_key(package_name: str,
+                  package_version: str,
+                  classes: Collection[Type[Any]],
+                  extra_source_files: Collection[str] = (),
+                  extra_data: Collection[str] = ()) -> Optional[str]:
+  """Returns the cache key for conformance checks of the package.
+
+  Args:
+    package_name: Name of the extension package.
+    package_version: Version of the extension package.
+    classes: Classes checked for conformance.
+    extra_source_files: Other files which affect the outcome of the checks.
+    extra_data: Other strings which affect the outcome of the checks.
+
+  Returns:
+    Cache key (a SHA-256 hex digest), or None if the source files of the
+    classes cannot be read.
+  """
+  source_files = _get_source_files(classes)
+  if source_files is None:
+    return None
+  source_files.extend(extra_source_files)
+  source_files.append(conformance_utils.__file__)
+  key_hash = hashlib.sha256()
+  for data in (package_name, package_version, sys.version, *extra_data):
+    key_hash.update(data.encode("utf-8", "replace") + b"\0")
+  for source_file in source_files:
+    try:
+      with open(source_file, "rb") as open_file:
+        key_hash.update(open_file.read())
+    except OSError as err:
+      logger.debug(f"Unable to read {source_file}: {err!r}")
+      return None
+  return key_hash.hexdigest()
+
+
+class ConformanceCache:
+  """Persistent record of packages which passed conformance checks."""
+
+  def __init__(self,
+               cache_file: str = config.DEFAULT_CONFORMANCE_CACHE_FILE):
+    """Initializes the cache and loads existing entries from disk.
+
+    Args:
+      cache_file: path to the JSON file backing the cache.
+    """
+    self.cache_file = cache_file
+    self._lock = threading.Lock()
+    self._entries = config_store.read_versioned_entries(
+        self.cache_file, _CACHE_VERSION)
+
+  def contains(self, package_name: str, cache_key: Optional[str]) -> bool:
+    """Returns whether the package passed conformance checks with the key."""
+    if cache_key is None:
+      return False
+    with self._lock:
+      return self._entries.get(package_name) == cache_key
+
+  def set(self, package_name: str, cache_key: Optional[str]) -> None:
+    """Records that the package passed conformance checks and saves the cache.
+
+    Args:
+      package_name: Name of the extension package.
+      cache_key: Key returned by get_cache_key(). No-op if None.
+    """
+    if cache_key is None:
+      return
+    with self._lock:
+      if self._entries.get(package_name) == cache_key:
+        return
+      self._entries[package_name] = cache_key
+      try:
+        config_store.write_versioned_entries(
+            self.cache_file, _CACHE_VERSION, self._entries)
+      except OSError as err:
+        logger.debug(f"Unable to save conformance cache {self.cache_file}: "
+                     f"{err!r}")
+
+  def invalidate(self, package_name: Optional[str] = None) -> None:
+    """Removes cached results and saves the cache.
+
+    Args:
+      package_name: Package to remove results for. If None, removes results
+        of all packages.
+    """
+    with self._lock:
+      if package_name is None:
+        self._entries.clear()
+      else:
+        self._entries.pop(package_name, None)
+      config_store.write_versioned_entries(
+          self.cache_file, _CACHE_VERSION, self._entries)
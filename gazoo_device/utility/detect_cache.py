@@ -0,0 +1,164 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent cache of detection query responses keyed by hardware fingerprint.
+
+Detection queries can be expensive (opening a switchboard, issuing Pigweed
+RPCs, several SSH handshakes). Hardware which has already been identified is
+recognized by a fingerprint:
+  - USB connections: serial number, vendor ID and product ID.
+  - SSH connections: IP address and the SSH host key(s).
+If the fingerprint of a connection matches a cached entry, the cached query
+responses and resolved device types are reused instead of querying the device.
+"""
+import hashlib
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from gazoo_device import config
+from gazoo_device import gdm_logger
+from gazoo_device.utility import config_store
+from gazoo_device.utility import usb_utils
+
+logger = gdm_logger.get_logger()
+
+_CACHE_VERSION = 1
+_SSH_KEYSCAN_COMMAND = "ssh-keyscan -T {timeout} {ip_address}"
+_SSH_KEYSCAN_TIMEOUT = 2
+_SSH_COMMUNICATION_TYPES = ("SshComms",)
+_USB_COMMUNICATION_TYPES = ("JlinkSerialComms", "PigweedSerialComms",
+                            "SerialComms")
+
+
+def _get_ssh_fingerprint(address: str) -> Optional[str]:
+  """Returns a fingerprint of the SSH host keys of the address or None."""
+  cmd_list = _SSH_KEYSCAN_COMMAND.format(
+      timeout=_SSH_KEYSCAN_TIMEOUT, ip_address=address).split()
+  try:
+    output = subprocess.check_output(
+        cmd_list, stderr=subprocess.DEVNULL,
+        timeout=_SSH_KEYSCAN_TIMEOUT + 1).decode("utf-8", "replace")
+  except (OSError, subprocess.CalledProcessError,
+          subprocess.TimeoutExpired) as err:
+    logger.debug(f"Unable to retrieve SSH host keys of {address}: {err!r}")
+    return None
+  host_keys = sorted(line.strip() for line in output.splitlines()
+                     if line.strip() and not line.startswith("#"))
+  if not host_keys:
+    return None
+  return "ssh:{}:{}".format(address, "\n".join(host_keys))
+
+
+def _get_usb_fingerprint(address: str) -> Optional[str]:
+  """Returns a fingerprint of the USB descriptors of the address or None."""
+  usb_info = usb_utils.get_device_info(address)
+  if not usb_info.serial_number:
+    return None
+  return "usb:{}:{}:{}".format(usb_info.serial_number, usb_info.vendor_id,
+                               usb_info.product_id)
+
+
+def get_fingerprint(address: str, communication_type: str) -> Optional[str]:
+  """Returns the hardware fingerprint of the address.
+
+  Args:
+    address: communication address.
+    communication_type: category of communication.
+
+  Returns:
+    Hardware fingerprint (a SHA-256 hex digest), or None if the hardware
+    behind the address cannot be fingerprinted.
+  """
+  if communication_type in _USB_COMMUNICATION_TYPES:
+    fingerprint = _get_usb_fingerprint(address)
+  elif communication_type in _SSH_COMMUNICATION_TYPES:
+    fingerprint = _get_ssh_fingerprint(address)
+  else:
+    fingerprint = None
+  if fingerprint is None:
+    return None
+  fingerprint = "{}:{}".format(communication_type, fingerprint)
+  return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+class DetectCache:
+  """Persistent cache of detection results keyed by hardware fingerprint.
+
+  Each entry stores the communication address and type, the detection query
+  responses (keyed by str(query enum member)) and the resolved device types.
+  """
+
+  def __init__(self, cache_file: str = config.DEFAULT_DETECT_CACHE_FILE):
+    """Initializes the cache and loads existing entries from disk.
+
+    Args:
+      cache_file: path to the JSON file backing the cache.
+    """
+    self.cache_file = cache_file
+    self._lock = threading.Lock()
+    self._entries = config_store.read_versioned_entries(
+        self.cache_file, _CACHE_VERSION)
+
+  def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Returns the cached entry for the fingerprint or None."""
+    with self._lock:
+      return self._entries.get(fingerprint)
+
+  def set(self, fingerprint: str, address: str, communication_type: str,
+          responses: Dict[str, Any], device_types: List[str]) -> None:
+    """Stores detection results for the fingerprint and saves the cache.
+
+    Args:
+      fingerprint: hardware fingerprint returned by get_fingerprint().
+      address: communication address.
+      communication_type: category of communication.
+      responses: detection query responses keyed by str(query enum member).
+      device_types: device types which matched the responses.
+    """
+    with self._lock:
+      self._entries[fingerprint] = {
+          "address": address,
+          "communication_type": communication_type,
+          "responses": responses,
+          "device_types": device_types,
+          "timestamp": time.time(),
+      }
+      config_store.write_versioned_entries(
+          self.cache_file, _CACHE_VERSION, self._entries)
+
+  def invalidate(self, address: Optional[str] = None) -> int:
+    """Removes cached entries and saves the cache.
+
+    Args:
+      address: communication address to remove entries for. If None, removes
+        all entries.
+
+    Returns:
+      Number of entries removed.
+    """
+    with self._lock:
+      if address is None:
+        removed = list(self._entries)
+      else:
+        removed = [fingerprint
+                   for fingerprint, entry in self._entries.items()
+                   if entry["address"] == address]
+      for fingerprint in removed:
+        del self._entries[fingerprint]
+      if removed:
+        config_store.write_versioned_entries(
+            self.cache_file, _CACHE_VERSION, self._entries)
+    return len(removed)
@@ -13,16 +13,22 @@
 # limitations under the License.
 
 """Utility module for local host commands."""
+import fcntl
 import glob
 import os
 import re
+import socket
+import stat
 import subprocess
-from typing import List, Optional
+import tempfile
+import time
+from typing import Dict, List, Optional
 
 from gazoo_device import config
 from gazoo_device import data_types
 from gazoo_device import extensions
 from gazoo_device import gdm_logger
+from gazoo_device.utility import network_discovery
 
 logger = gdm_logger.get_logger()
 ARP_CONNECTED_IPS = r"([\-\w\.]*)\s*ether"
@@ -43,11 +49,29 @@ SSH_CONFIG = (
     "-oConnectTimeout={timeout}".format(timeout=SSH_TIMEOUT))
 _SSH_DISABLE_PSEUDO_TTY = "-T "
 DEFAULT_SSH_OPTIONS = _SSH_DISABLE_PSEUDO_TTY + SSH_CONFIG
+# Whether ssh and scp commands to a device share one authenticated connection
+# (an OpenSSH ControlMaster) instead of each doing a full handshake.
+USE_SSH_MULTIPLEXING = True
+SSH_CONTROL_PERSIST = 300  # Seconds an unused shared connection stays open.
+_SSH_CONTROL_DIRECTORY = os.path.join(config.INSTALL_DIRECTORY, "ssh")
+_SSH_CONTROL_OPTIONS = "-oControlMaster=no -oControlPath={control_path}"
+# Shared connections which stop responding are torn down after ~10 seconds.
+_SSH_MASTER_OPTIONS = (
+    "-N -f -oControlMaster=yes -oControlPath={control_path} "
+    "-oControlPersist={persist} -oServerAliveInterval=5 "
+    "-oServerAliveCountMax=2 ")
+_SSH_MASTER_TIMEOUT = SSH_TIMEOUT * 3
+# Seconds to connect without a shared connection after failing to open one.
+_SSH_MASTER_BACKOFF = 60
+_SSH_CONTROL_COMMAND = "ssh -oControlPath={control_path} -O {command} {target}"
+_SSH_ERROR_RETURN_CODE = 255
 
 GET_COMMAND_PATH = "which {}"
 GET_CONNECTED_IPS = "/usr/sbin/arp -e"
 
 _gsutil_cli = None  # Set by _set_gsutil_cli().
+# Control path -> time of the last failure to open the shared SSH connection.
+_ssh_master_failure_times: Dict[str, float] = {}
 
 
 def docker_cp_to_device(docker_container, local_file_path, container_file_path):
@@ -138,6 +162,7 @@ def generate_ssh_args(ip_address: str,
   if key_info:
     verify_key(key_info)
     options += " -i " + get_key_path(key_info)
+  options = _add_ssh_control_options(options, ip_address, user)
   return SSH_ARGS.format(
       options=options, ip_address=ip_address, user=user, command=command)
 
@@ -190,21 +215,24 @@ def is_static_ip(comm_port: str) -> bool:
 
 
 def get_all_ssh_ips(static_ips: Optional[List[str]] = None) -> List[str]:
-  """Returns all IPs that respond to ping and accept SSH connections."""
-  static_ips = static_ips or []
-  ssh_ips = set(static_ips)
+  """Returns all IPs that accept SSH connections.
 
-  unpingable_ips = {ip for ip in ssh_ips if not is_pingable(ip)}
-  if unpingable_ips:
-    logger.info(f"ip_address(es) {unpingable_ips} do not respond to ping.")
-  ssh_ips -= unpingable_ips
+  All hosts are probed concurrently with TCP connects to the SSH port.
 
-  unsshable_ips = {ip for ip in ssh_ips if not is_sshable(ip)}
+  Args:
+    static_ips: IP addresses or CIDR ranges (such as "192.168.1.0/24") to
+      probe.
+  """
+  static_ips = static_ips or []
+  probe_results = []
+  ssh_ips = network_discovery.discover_hosts(
+      static_ips, port=network_discovery.SSH_PORT, results=probe_results)
+  unsshable_ips = {result.ip_address for result in probe_results
+                   if not result.is_open}
   if unsshable_ips:
-    logger.info(f"ip_address(es) {unsshable_ips} do not accept incoming SSH "
-                "connections.")
-  ssh_ips -= unsshable_ips
-  return list(ssh_ips)
+    logger.info(f"ip_address(es) {unsshable_ips} are unreachable or do not "
+                "accept incoming SSH connections.")
+  return ssh_ips
 
 
 def get_all_yepkit_serials():
@@ -368,8 +396,14 @@ def is_sshable(ip_address):
       ip_address (str): to ping
 
   Returns:
-      bool: True if nc can see port 22 open.
+      bool: True if nc can see port 22 open or there is an open shared SSH
+      connection to the IP address.
   """
+  control_paths = []
+  if _get_ssh_control_directory():
+    control_paths = glob.glob(get_ssh_control_path(ip_address, user="*"))
+  if any(_is_ssh_control_socket_alive(path) for path in control_paths):
+    return True
   try:
     cmd_list = SSHABLE_COMMAND.format(ip_address).split()
     subprocess.check_output(cmd_list, stderr=subprocess.STDOUT)
@@ -392,7 +426,8 @@ def ssh_command(ip_address: str,
       user: Username to log in as.
       options: Extra command line args for the SSH command.
       key_info: SSH key to use. If None, don't use an SSH key.
-      timeout: Timeout for the SSH command.
+      timeout: Timeout for the SSH command. Also limits the time spent
+        opening the shared SSH connection after the command succeeds.
 
   Returns:
       SSH command output.
@@ -408,11 +443,159 @@ def ssh_command(ip_address: str,
     result = result.decode("utf-8", "replace")
     logger.debug("Ssh command {} to {} returned {!r}".format(
         command, ip_address, result))
-    return result
   except subprocess.CalledProcessError as err:
+    if err.returncode == _SSH_ERROR_RETURN_CODE:
+      # The shared connection may be broken. The next command reopens it.
+      close_ssh_connection(ip_address, user)
     msg = "Command {} failed. Err: {!r}".format(" ".join(ssh_list), err.output)
     logger.debug(msg)
     raise RuntimeError(msg)
+  # The device is reachable, so later commands can share a connection.
+  open_ssh_connection(ip_address, user, options, key_info, timeout=timeout)
+  return result
+
+
+def get_ssh_control_path(ip_address: str, user: str = "root") -> str:
+  """Returns the control socket path of the shared SSH connection."""
+  return os.path.join(_SSH_CONTROL_DIRECTORY, "{}@{}".format(user, ip_address))
+
+
+def is_ssh_connection_open(ip_address: str, user: str = "root") -> bool:
+  """Returns whether the shared SSH connection to the device is open."""
+  return _is_ssh_control_socket_alive(get_ssh_control_path(ip_address, user))
+
+
+def open_ssh_connection(ip_address: str,
+                        user: str = "root",
+                        options: str = SSH_CONFIG,
+                        key_info: Optional[data_types.KeyInfo] = None,
+                        timeout: Optional[float] = None) -> bool:
+  """Opens the shared SSH connection to the device unless it's already open.
+
+  ssh and scp commands to the device (including SSH transports) use the
+  shared connection while it's open and connect on their own otherwise. The
+  connection closes after SSH_CONTROL_PERSIST seconds without use, or when it
+  stops responding. Opening it is best effort: after a failure, no attempt is
+  made for _SSH_MASTER_BACKOFF seconds.
+
+  Args:
+      ip_address: IP address of the device.
+      user: Username to log in as.
+      options: Extra command line args for the SSH command.
+      key_info: SSH key to use. If None, don't use an SSH key.
+      timeout: Maximum time to wait for the connection to open. Capped at
+        _SSH_MASTER_TIMEOUT.
+
+  Returns:
+      True if the shared connection is open.
+  """
+  if not USE_SSH_MULTIPLEXING or not _get_ssh_control_directory():
+    return False
+  control_path = get_ssh_control_path(ip_address, user)
+  if _is_ssh_control_socket_alive(control_path):
+    return True
+  failure_time = _ssh_master_failure_times.get(control_path)
+  if (failure_time is not None and
+      time.time() - failure_time < _SSH_MASTER_BACKOFF):
+    return False
+  if timeout is None or timeout > _SSH_MASTER_TIMEOUT:
+    timeout = _SSH_MASTER_TIMEOUT
+
+  # Serialize with other processes opening the same connection.
+  with open(control_path + ".lock", "w") as lock_file:
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    if _is_ssh_control_socket_alive(control_path):
+      return True
+    if os.path.exists(control_path):
+      os.remove(control_path)  # Left behind by a connection which died.
+
+    master_options = _SSH_MASTER_OPTIONS.format(
+        control_path=control_path, persist=SSH_CONTROL_PERSIST)
+    ssh_args = generate_ssh_args(ip_address, "", user,
+                                 options=master_options + options,
+                                 key_info=key_info)
+    # The connection outlives this call, so its output can't go to a pipe.
+    with tempfile.TemporaryFile() as output_file:
+      try:
+        subprocess.run(["ssh"] + ssh_args.split(),
+                       stdin=subprocess.DEVNULL,
+                       stdout=output_file,
+                       stderr=subprocess.STDOUT,
+                       timeout=timeout,
+                       check=True)
+      except (subprocess.CalledProcessError,
+              subprocess.TimeoutExpired) as err:
+        output_file.seek(0)
+        logger.debug("Unable to open a shared SSH connection to {}@{}: {!r}. "
+                     "Output: {!r}".format(user, ip_address, err,
+                                           output_file.read()))
+        _ssh_master_failure_times[control_path] = time.time()
+        return False
+  _ssh_master_failure_times.pop(control_path, None)
+  return _is_ssh_control_socket_alive(control_path)
+
+
+def close_ssh_connection(ip_address: str, user: str = "root") -> None:
+  """Closes the shared SSH connection to the device if it's open."""
+  control_path = get_ssh_control_path(ip_address, user)
+  if not os.path.exists(control_path):
+    return
+  command = _SSH_CONTROL_COMMAND.format(
+      control_path=control_path, command="exit",
+      target="{}@{}".format(user, ip_address))
+  try:
+    subprocess.run(command.split(), stdin=subprocess.DEVNULL,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   timeout=SSH_TIMEOUT)
+  except subprocess.TimeoutExpired:
+    pass
+  if os.path.exists(control_path) and not _is_ssh_control_socket_alive(
+      control_path):
+    os.remove(control_path)
+
+
+def _get_ssh_control_directory() -> Optional[str]:
+  """Creates the directory of SSH control sockets if it doesn't exist.
+
+  Returns:
+      The directory, or None if it isn't a real directory which only the
+      current user can access (shared SSH connections aren't used then).
+  """
+  try:
+    os.makedirs(_SSH_CONTROL_DIRECTORY, mode=0o700, exist_ok=True)
+    directory_stat = os.lstat(_SSH_CONTROL_DIRECTORY)
+  except OSError as err:
+    logger.debug("Unable to create SSH control directory {}: {!r}".format(
+        _SSH_CONTROL_DIRECTORY, err))
+    return None
+  if (not stat.S_ISDIR(directory_stat.st_mode) or
+      directory_stat.st_uid != os.getuid() or
+      stat.S_IMODE(directory_stat.st_mode) != 0o700):
+    logger.debug(
+        "Not sharing SSH connections: {} must be a directory owned by the "
+        "current user with mode 0700.".format(_SSH_CONTROL_DIRECTORY))
+    return None
+  return _SSH_CONTROL_DIRECTORY
+
+
+def _is_ssh_control_socket_alive(control_path: str) -> bool:
+  """Returns whether an SSH connection listens on the control socket."""
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as control_socket:
+    try:
+      control_socket.connect(control_path)
+      return True
+    except OSError:
+      return False
+
+
+def _add_ssh_control_options(options: str, ip_address: str, user: str) -> str:
+  """Adds options to use the shared SSH connection if there isn't one yet."""
+  if (not USE_SSH_MULTIPLEXING or "ControlPath" in options or
+      not _get_ssh_control_directory()):
+    return options
+  control_options = _SSH_CONTROL_OPTIONS.format(
+      control_path=get_ssh_control_path(ip_address, user))
+  return options + " " + control_options
 
 
 def _scp(source: str, destination: str, options: str = SSH_CONFIG,
@@ -465,13 +648,16 @@ def scp_to_device(ip_address: str,
   Returns:
       "scp" command output.
   """
+  control_options = _add_ssh_control_options(options, ip_address, user)
   remote_file_path = "{user}@{host}:{path}".format(
       user=user, host=ip_address, path=remote_file_path)
-  return _scp(
+  result = _scp(
       source=local_file_path,
       destination=remote_file_path,
-      options=options,
+      options=control_options,
       key_info=key_info)
+  open_ssh_connection(ip_address, user, options, key_info)
+  return result
 
 
 def scp_from_device(ip_address: str,
@@ -493,13 +679,16 @@ def scp_from_device(ip_address: str,
   Returns:
       "scp" command output.
   """
+  control_options = _add_ssh_control_options(options, ip_address, user)
   remote_file_path = "{user}@{host}:{path}".format(
       user=user, host=ip_address, path=remote_file_path)
-  return _scp(
+  result = _scp(
       source=remote_file_path,
       destination=local_file_path,
-      options=options,
+      options=control_options,
       key_info=key_info)
+  open_ssh_connection(ip_address, user, options, key_info)
+  return result
 
 
 def verify_key(key_info: data_types.KeyInfo) -> None:
@@ -0,0 +1,165 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in registry of call counts and latencies of device and capability calls.
+
+Methods decorated with LogDecorator or CapabilityLogDecorator are recorded
+once metrics are enabled:
+
+  from gazoo_device.utility import method_metrics
+  method_metrics.enable()
+  ...  # Run tests.
+  method_metrics.dump("/tmp/method_metrics.json")
+
+Metrics are kept per (device name, capability name, method name). Capability
+name is None for methods of device classes. Metrics are only recorded in the
+process which enabled them.
+"""
+import bisect
+import dataclasses
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds (in seconds) of the latency histogram buckets. The last bucket
+# counts calls which took longer than the last bound.
+HISTOGRAM_BUCKET_BOUNDS = (0.001, 0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+_enabled = False
+_lock = threading.Lock()
+_metrics = {}
+
+
+@dataclasses.dataclass
+class MethodMetrics:
+  """Call count and latency statistics of a single method."""
+  device_name: str
+  capability_name: Optional[str]
+  method_name: str
+  call_count: int = 0
+  error_count: int = 0
+  total_time: float = 0.0
+  min_time: Optional[float] = None
+  max_time: Optional[float] = None
+  histogram: List[int] = dataclasses.field(
+      default_factory=lambda: [0] * (len(HISTOGRAM_BUCKET_BOUNDS) + 1))
+
+  @property
+  def mean_time(self) -> Optional[float]:
+    if not self.call_count:
+      return None
+    return self.total_time / self.call_count
+
+  def to_dict(self) -> Dict[str, Any]:
+    """Returns the metrics as a JSON-serializable dictionary."""
+    metrics_dict = dataclasses.asdict(self)
+    metrics_dict["mean_time"] = self.mean_time
+    metrics_dict["histogram_bucket_bounds"] = list(HISTOGRAM_BUCKET_BOUNDS)
+    return metrics_dict
+
+
+def enable() -> None:
+  """Starts recording method metrics."""
+  global _enabled
+  _enabled = True
+
+
+def disable() -> None:
+  """Stops recording method metrics. Recorded metrics are kept."""
+  global _enabled
+  _enabled = False
+
+
+def is_enabled() -> bool:
+  """Returns whether method metrics are being recorded."""
+  return _enabled
+
+
+def reset() -> None:
+  """Removes all recorded metrics."""
+  with _lock:
+    _metrics.clear()
+
+
+def record(device_name: str,
+           capability_name: Optional[str],
+           method_name: str,
+           elapsed_time: float,
+           failed: bool = False) -> None:
+  """Records a single method call.
+
+  Args:
+    device_name: name of the device the method was called for.
+    capability_name: name of the capability the method belongs to. None for
+      methods of device classes.
+    method_name: name of the method.
+    elapsed_time: duration of the call in seconds.
+    failed: whether the call raised an error.
+  """
+  key = (device_name, capability_name, method_name)
+  bucket = bisect.bisect_left(HISTOGRAM_BUCKET_BOUNDS, elapsed_time)
+  with _lock:
+    metrics = _metrics.get(key)
+    if metrics is None:
+      metrics = MethodMetrics(device_name, capability_name, method_name)
+      _metrics[key] = metrics
+    metrics.call_count += 1
+    metrics.error_count += int(failed)
+    metrics.total_time += elapsed_time
+    if metrics.min_time is None or elapsed_time < metrics.min_time:
+      metrics.min_time = elapsed_time
+    if metrics.max_time is None or elapsed_time > metrics.max_time:
+      metrics.max_time = elapsed_time
+    metrics.histogram[bucket] += 1
+
+
+def get_metrics(device_name: Optional[str] = None,
+                capability_name: Optional[str] = None,
+                method_name: Optional[str] = None) -> List[MethodMetrics]:
+  """Returns copies of recorded metrics matching all of the given filters.
+
+  Args:
+    device_name: only return metrics of this device.
+    capability_name: only return metrics of methods of this capability.
+    method_name: only return metrics of methods with this name.
+
+  Returns:
+    Matching metrics sorted by (device name, capability name, method name).
+  """
+  with _lock:
+    all_metrics = [dataclasses.replace(metrics, histogram=metrics.histogram[:])
+                   for metrics in _metrics.values()]
+  return sorted(
+      (metrics for metrics in all_metrics
+       if (device_name is None or metrics.device_name == device_name) and
+       (capability_name is None or
+        metrics.capability_name == capability_name) and
+       (method_name is None or metrics.method_name == method_name)),
+      key=_sort_key)
+
+
+def dump(file_path: str) -> None:
+  """Writes all recorded metrics to a JSON file.
+
+  Args:
+    file_path: path of the JSON file to write.
+  """
+  with open(file_path, "w") as open_file:
+    json.dump([metrics.to_dict() for metrics in get_metrics()], open_file,
+              indent=2)
+
+
+def _sort_key(metrics: MethodMetrics) -> Tuple[str, str, str]:
+  return (metrics.device_name, metrics.capability_name or "",
+          metrics.method_name)
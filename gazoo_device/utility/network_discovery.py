@@ -0,0 +1,168 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Concurrent discovery of network hosts via TCP connect probes.
+
+Probes many hosts at once with asyncio instead of forking a "ping" and an "nc"
+process per host. Each probe opens a TCP connection to the given port
+(22 by default) and optionally reads the SSH protocol banner. Unreachable hosts
+only cost a single per-host deadline, and all hosts are probed concurrently
+(bounded by a semaphore).
+"""
+import asyncio
+import ipaddress
+from typing import Iterable, List, Optional
+
+import dataclasses
+
+SSH_PORT = 22
+SSH_BANNER_PREFIX = "SSH-"
+DEFAULT_CONCURRENCY = 256
+DEFAULT_TIMEOUT = 2.0  # Seconds. Per-host deadline for connect + banner read.
+_MAX_BANNER_SIZE = 255  # RFC 4253: identification string is <= 255 chars.
+
+
+@dataclasses.dataclass(frozen=True)
+class ProbeResult:
+  ip_address: str  # Probed IP address.
+  is_open: bool  # Whether the port accepted a connection (and sent a banner).
+  banner: str = ""  # Banner sent by the server, if it was read.
+  error: str = ""  # Reason the probe failed, if it did.
+
+
+def expand_addresses(addresses: Iterable[str]) -> List[str]:
+  """Expands CIDR ranges into host IP addresses.
+
+  Args:
+    addresses: IP addresses ("192.168.1.5"), CIDR ranges ("192.168.1.0/24")
+      or host names.
+
+  Returns:
+    Unique addresses in input order. Network and broadcast addresses of CIDR
+    ranges are excluded. Host names are returned unchanged.
+
+  Raises:
+    ValueError: an address is an invalid CIDR range.
+  """
+  expanded = {}
+  for address in addresses:
+    address = address.strip()
+    if not address:
+      continue
+    if "/" in address:
+      network = ipaddress.ip_network(address, strict=False)
+      for host in network.hosts():
+        expanded[str(host)] = None
+    else:
+      expanded[address] = None
+  return list(expanded)
+
+
+async def probe_host(ip_address: str,
+                     port: int = SSH_PORT,
+                     timeout: float = DEFAULT_TIMEOUT,
+                     read_banner: bool = False) -> ProbeResult:
+  """Probes a single host with a TCP connect.
+
+  Args:
+    ip_address: IP address to probe.
+    port: TCP port to connect to.
+    timeout: deadline in seconds for the connection (and banner read).
+    read_banner: if True, also read the SSH identification banner and only
+      consider the host open if the banner starts with "SSH-".
+
+  Returns:
+    Probe result.
+  """
+  writer = None
+
+  async def _connect_and_read_banner() -> str:
+    nonlocal writer
+    reader, writer = await asyncio.open_connection(ip_address, port)
+    if read_banner:
+      return (await reader.readline())[:_MAX_BANNER_SIZE].decode(
+          "utf-8", "replace").strip()
+    return ""
+
+  try:
+    banner = await asyncio.wait_for(_connect_and_read_banner(), timeout)
+  except asyncio.TimeoutError:
+    return ProbeResult(ip_address, False, error="timed out")
+  except OSError as err:
+    return ProbeResult(ip_address, False, error=repr(err))
+  finally:
+    if writer is not None:
+      writer.close()
+  if read_banner and not banner.startswith(SSH_BANNER_PREFIX):
+    return ProbeResult(ip_address, False, banner=banner,
+                       error="not an SSH server")
+  return ProbeResult(ip_address, True, banner=banner)
+
+
+async def probe_hosts(addresses: Iterable[str],
+                      port: int = SSH_PORT,
+                      timeout: float = DEFAULT_TIMEOUT,
+                      read_banner: bool = False,
+                      concurrency: int = DEFAULT_CONCURRENCY
+                      ) -> List[ProbeResult]:
+  """Probes hosts concurrently with TCP connects.
+
+  Args:
+    addresses: IP addresses and CIDR ranges to probe.
+    port: TCP port to connect to.
+    timeout: per-host deadline in seconds.
+    read_banner: if True, also verify the SSH identification banner.
+    concurrency: maximum number of simultaneous probes.
+
+  Returns:
+    Probe results in the order of the expanded addresses.
+  """
+  semaphore = asyncio.Semaphore(concurrency)
+
+  async def _bounded_probe(ip_address: str) -> ProbeResult:
+    async with semaphore:
+      return await probe_host(ip_address, port, timeout, read_banner)
+
+  return list(await asyncio.gather(
+      *(_bounded_probe(ip_address)
+        for ip_address in expand_addresses(addresses))))
+
+
+def discover_hosts(addresses: Iterable[str],
+                   port: int = SSH_PORT,
+                   timeout: float = DEFAULT_TIMEOUT,
+                   read_banner: bool = False,
+                   concurrency: int = DEFAULT_CONCURRENCY,
+                   results: Optional[List[ProbeResult]] = None) -> List[str]:
+  """Returns IP addresses which accept TCP connections on the given port.
+
+  Synchronous wrapper around probe_hosts().
+
+  Args:
+    addresses: IP addresses and CIDR ranges to probe.
+    port: TCP port to connect to.
+    timeout: per-host deadline in seconds.
+    read_banner: if True, also verify the SSH identification banner.
+    concurrency: maximum number of simultaneous probes.
+    results: if provided, all probe results are appended to this list.
+
+  Returns:
+    IP addresses with an open port, in the order of the expanded addresses.
+  """
+  probe_results = asyncio.run(
+      probe_hosts(addresses, port=port, timeout=timeout,
+                  read_banner=read_banner, concurrency=concurrency))
+  if results is not None:
+    results.extend(probe_results)
+  return [result.ip_address for result in probe_results if result.is_open]
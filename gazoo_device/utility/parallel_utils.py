@@ -14,11 +14,10 @@
 
 """Reusable utility functions for executing methods in parallel.
 
-This will create multiple processes to execute device operations on multiple
-devices. Device
+This will create multiple processes (or threads) to execute device operations
+on multiple devices. The number of simultaneous workers is bounded. Device
 interactions will be logged to the provided logger. Errors can optionally be
-raised if device
-methods fail.
+raised if device methods fail.
 
 Example usage:
     sample_function_results = parallel_utils.parallel_process(
@@ -28,9 +27,24 @@ Example usage:
 
     for result in sample_function_results:
         do_something(result)
+
+Results can also be streamed as they complete:
+    with parallel_utils.ParallelExecutor(max_workers=8) as executor:
+      executor.submit_devices(self._sample_function, device_instances)
+      for call_result in executor.as_completed():
+        if call_result.error:
+          logger.info(f"{call_result.device_name} failed: "
+                      f"{call_result.error.traceback}")
 """
+import collections
+import dataclasses
 import multiprocessing
+import os
+import pickle
+import threading
 import time
+import traceback
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from six.moves import queue
 
@@ -43,40 +57,319 @@ TIMEOUT_PROCESS = 600.0
 TIMEOUT_TERMINATE_PROCESS = 5
 REQUIRED_PROPS = ["name", "DEVICE_TYPE"]
 
+BACKEND_PROCESS = "process"
+BACKEND_THREAD = "thread"
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_POLL_INTERVAL = 0.05
+
+
+@dataclasses.dataclass(frozen=True)
+class CallError:
+  """Structured description of an exception raised by a parallel call."""
+  exception_type: str  # Name of the exception class.
+  message: str  # str() of the exception.
+  traceback: str  # Formatted traceback.
+  # The exception object itself. None if it could not be transferred from the
+  # worker process.
+  exception: Optional[BaseException] = None
+
+  @classmethod
+  def from_exception(cls, exc: BaseException) -> "CallError":
+    return cls(
+        exception_type=type(exc).__name__,
+        message=str(exc),
+        traceback="".join(
+            traceback.format_exception(type(exc), exc, exc.__traceback__)),
+        exception=exc)
+
+  def __str__(self):
+    return f"{self.exception_type}: {self.message}"
+
+
+@dataclasses.dataclass(frozen=True)
+class CallResult:
+  """Result of a parallel call for a single device."""
+  device_name: str
+  result: Any = None  # Return value of the call if it succeeded.
+  error: Optional[CallError] = None  # Set if the call failed.
+  duration: float = 0.0  # Seconds from worker start to completion.
+
+
+@dataclasses.dataclass
+class _Task:
+  """A pending or running parallel call."""
+  device_name: str
+  fcn: Callable[..., Any]
+  kwargs: Dict[str, Any]
+  worker: Any = None  # multiprocessing.Process or threading.Thread.
+  start_time: float = 0.0
+
+
+class ParallelExecutor:
+  """Executes functions for multiple devices with a bounded number of workers.
+
+  Two backends are supported:
+    BACKEND_PROCESS: each call runs in a forked process. Calls exceeding their
+      timeout or cancelled calls are terminated.
+    BACKEND_THREAD: each call runs in a daemon thread. Calls exceeding their
+      timeout or cancelled calls are abandoned (their results are discarded).
+
+  At most max_workers calls run at the same time. Results are streamed by
+  as_completed() in completion order, keyed by device name.
+  """
+
+  def __init__(self,
+               backend: str = BACKEND_PROCESS,
+               max_workers: int = DEFAULT_MAX_WORKERS,
+               timeout: float = TIMEOUT_PROCESS):
+    """Initializes the executor.
+
+    Args:
+      backend: BACKEND_PROCESS or BACKEND_THREAD.
+      max_workers: maximum number of calls executing simultaneously.
+      timeout: per-device timeout in seconds, counted from the call start.
+
+    Raises:
+      ValueError: invalid backend or max_workers.
+    """
+    if backend not in (BACKEND_PROCESS, BACKEND_THREAD):
+      raise ValueError(f"Backend must be one of {BACKEND_PROCESS!r}, "
+                       f"{BACKEND_THREAD!r}. Got {backend!r}.")
+    if max_workers < 1:
+      raise ValueError(f"max_workers must be >= 1. Got {max_workers}.")
+    self.backend = backend
+    self.max_workers = max_workers
+    self.timeout = timeout
+    self._pending = collections.deque()
+    self._running = {}
+    self._device_names = set()
+    self._cancelled = threading.Event()
+    if backend == BACKEND_PROCESS:
+      self._result_queue = multiprocessing.Queue()
+    else:
+      self._result_queue = queue.Queue()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, exc_traceback):
+    if self._pending or self._running:
+      self.cancel()
+      for _ in self.as_completed():
+        pass
+
+  def submit(self, device_name: str, fcn: Callable[..., Any],
+             **kwargs: Any) -> None:
+    """Schedules fcn(**kwargs) to be executed for the device.
+
+    Args:
+      device_name: name of the device the call is for. Must be unique.
+      fcn: function to execute.
+      **kwargs: keyword arguments to pass to the function.
+
+    Raises:
+      ValueError: a call for the device has already been submitted.
+    """
+    if device_name in self._device_names:
+      raise ValueError(f"A call for {device_name} was already submitted.")
+    self._device_names.add(device_name)
+    self._pending.append(_Task(device_name, fcn, kwargs))
+
+  def submit_devices(self,
+                     fcn: Callable[..., Any],
+                     devices: List[Any],
+                     parameter_dicts: Optional[Dict[str, Any]] = None,
+                     logger: Any = None) -> None:
+    """Schedules fcn(device=device, ...) to be executed for each device.
+
+    Args:
+      fcn: function to execute.
+      devices: device objects. Passed to the function as the "device" argument.
+      parameter_dicts: arguments to pass to the function as the
+        "parameter_dict" argument, by device type.
+      logger: logger to pass to the function as the "logger" argument.
+    """
+    parameter_dicts = parameter_dicts or {}
+    for device in devices:
+      kwargs = {"device": device}
+      if logger:
+        kwargs["logger"] = logger
+      if device.DEVICE_TYPE in parameter_dicts:
+        kwargs["parameter_dict"] = parameter_dicts[device.DEVICE_TYPE]
+      self.submit(device.name, fcn, **kwargs)
+
+  def cancel(self) -> None:
+    """Cancels all pending and running calls.
+
+    Cancelled calls are reported by as_completed() with a CancelledError.
+    Safe to call from other threads.
+    """
+    self._cancelled.set()
+
+  def run(self) -> Dict[str, CallResult]:
+    """Executes all submitted calls and returns their results by device name."""
+    return {result.device_name: result for result in self.as_completed()}
+
+  def as_completed(self) -> Iterator[CallResult]:
+    """Executes submitted calls and yields their results as they complete.
+
+    Yields:
+      Results of calls in completion order.
+    """
+    while self._pending or self._running:
+      if self._cancelled.is_set():
+        yield from self._cancel_all()
+        return
+      while self._pending and len(self._running) < self.max_workers:
+        self._start(self._pending.popleft())
+      try:
+        message = self._result_queue.get(timeout=self._get_poll_timeout())
+      except queue.Empty:
+        pass
+      else:
+        result = self._complete(message)
+        if result:
+          yield result
+      yield from self._reap_expired_and_dead()
+
+  def _cancel_all(self) -> Iterator[CallResult]:
+    """Stops running calls and yields cancelled results for all calls."""
+    cancelled_error = CallError(
+        exception_type="CancelledError", message="Call was cancelled.",
+        traceback="")
+    for task in list(self._running.values()):
+      self._stop(task)
+      yield CallResult(task.device_name, error=cancelled_error,
+                       duration=time.time() - task.start_time)
+    self._running.clear()
+    while self._pending:
+      yield CallResult(self._pending.popleft().device_name,
+                       error=cancelled_error)
+
+  def _complete(self, message: Any) -> Optional[CallResult]:
+    """Returns the result of a call from a worker message.
+
+    Args:
+      message: message put on the result queue by _execute_call.
+
+    Returns:
+      Result of the call, or None if the call has already been reported (for
+      example, an abandoned thread which finished after its timeout).
+    """
+    if self.backend == BACKEND_PROCESS:
+      message = pickle.loads(message)
+    device_name, result, error = message
+    task = self._running.pop(device_name, None)
+    if task is None:
+      return None
+    if self.backend == BACKEND_PROCESS:
+      task.worker.join(timeout=TIMEOUT_TERMINATE_PROCESS)
+    return CallResult(device_name, result=result, error=error,
+                      duration=time.time() - task.start_time)
+
+  def _get_poll_timeout(self) -> float:
+    """Returns how long to wait for a result before checking deadlines."""
+    if not self._running:
+      return 0
+    next_deadline = min(
+        task.start_time + self.timeout for task in self._running.values())
+    return min(_POLL_INTERVAL, max(0, next_deadline - time.time()))
+
+  def _reap_expired_and_dead(self) -> Iterator[CallResult]:
+    """Stops calls past their deadline and reports crashed processes."""
+    now = time.time()
+    dead_tasks = []
+    for task in list(self._running.values()):
+      if now - task.start_time >= self.timeout:
+        self._stop(task)
+        del self._running[task.device_name]
+        yield CallResult(
+            task.device_name,
+            error=CallError(
+                exception_type="TimeoutError",
+                message=f"Call did not complete within {self.timeout}s.",
+                traceback=""),
+            duration=now - task.start_time)
+      elif self.backend == BACKEND_PROCESS and not task.worker.is_alive():
+        dead_tasks.append(task)
+    if not dead_tasks:
+      return
+    # Processes may exit right after putting their result, and the next result
+    # on the shared queue may be for any call. Collect all results before
+    # deciding that a process crashed.
+    while True:
+      try:
+        message = self._result_queue.get(timeout=_POLL_INTERVAL)
+      except queue.Empty:
+        break
+      result = self._complete(message)
+      if result:
+        yield result
+    for task in dead_tasks:
+      if task.device_name in self._running:
+        del self._running[task.device_name]
+        yield CallResult(
+            task.device_name,
+            error=CallError(
+                exception_type="ProcessError",
+                message=("Process exited unexpectedly with exit code "
+                         f"{task.worker.exitcode}."),
+                traceback=""),
+            duration=now - task.start_time)
+
+  def _start(self, task: _Task) -> None:
+    """Starts a worker for the task."""
+    args = (task.device_name, task.fcn, task.kwargs, self._result_queue,
+            self.backend == BACKEND_PROCESS)
+    if self.backend == BACKEND_PROCESS:
+      task.worker = multiprocessing.Process(target=_execute_call, args=args)
+      common_utils.run_before_fork()
+      task.worker.start()
+      common_utils.run_after_fork_in_parent()
+    else:
+      task.worker = threading.Thread(
+          target=_execute_call, args=args, daemon=True,
+          name=f"parallel_{task.device_name}")
+      task.worker.start()
+    task.start_time = time.time()
+    self._running[task.device_name] = task
+
+  def _stop(self, task: _Task) -> None:
+    """Terminates the process of the task. Threads are abandoned."""
+    if self.backend != BACKEND_PROCESS:
+      return
+    task.worker.terminate()
+    task.worker.join(timeout=TIMEOUT_TERMINATE_PROCESS)
+    if task.worker.is_alive():
+      task.worker.kill()
+      task.worker.join(timeout=TIMEOUT_TERMINATE_PROCESS)
+
 
 def parallel_process(action_name,
                      fcn,
                      devices,
                      logger=None,
                      parameter_dicts=None,
-                     timeout=TIMEOUT_PROCESS):
+                     timeout=TIMEOUT_PROCESS,
+                     max_workers=DEFAULT_MAX_WORKERS):
   """Concurrently apply function to each device.
 
-  TODO(b/152442892): Increase the flexibility of this function.
-
   Args:
       action_name (str): terse description of the function
       fcn (function): function to execute in parallel
       devices (list): list of device objects
       logger (logger): logger object that will be passed to fcn
       parameter_dicts (dict): of arguments to send to the fcn by device_type
-      timeout (int): seconds before terminating all the parallel processes
+      timeout (int): seconds before terminating a parallel process
+      max_workers (int): maximum number of processes running at once.
 
   Returns:
-      list: results from parallel functions if return_results flag is
-      specified. this will be
-          a list of either an exception raised while running the function or
-          data added
-          manually to the multiprocessing queue.
+      list: results (other than None) returned by the parallel functions.
 
   Raises:
       RuntimeError: if any of the parallel functions raise error or timeouts
-      and return_results flag is not true
       AttributeError: if provided devices are missing required props.
   """
-  if not parameter_dicts:
-    parameter_dicts = {}
-
   # verify list of devices was recieved
   if not isinstance(devices, list):
     raise RuntimeError(
@@ -93,43 +386,23 @@ def parallel_process(action_name,
   logger_gdm.info("Executing {} concurrently for {}s on devices {}".format(
       action_name, timeout, ",".join(device_names)))
 
-  # create queues to manage parallel processes
-  return_queue = multiprocessing.Queue()
-  error_queue = multiprocessing.Queue()
-  processes = []
-
-  # initiate new process for each device with provided arguments
-  for device in devices:
-    device_type = device.DEVICE_TYPE
-    args = (fcn, return_queue, error_queue)
-    kwargs = {"device": device}
-    if logger:
-      kwargs["logger"] = logger
-    if device_type in parameter_dicts:
-      kwargs["parameter_dict"] = parameter_dicts[device_type]
-    process = multiprocessing.Process(
-        target=_sub_process, args=args, kwargs=kwargs)
-    processes.append(process)
-
-  # run each process in parallel
-  deadline = time.time() + timeout
-  for process in processes:
-    common_utils.run_before_fork()
-    process.start()
-    common_utils.run_after_fork_in_parent()
-
-  for process in processes:
-    remaining_timeout = max(0, deadline - time.time())  # ensure timeout >= 0
-    process.join(timeout=remaining_timeout)
-    if process.is_alive():
-      process.terminate()
-      process.join(timeout=TIMEOUT_TERMINATE_PROCESS)
-
-  # handle results from queue
-  errors = get_messages_from_queue(error_queue)
+  results = []
+  errors = []
+  with ParallelExecutor(max_workers=max_workers, timeout=timeout) as executor:
+    executor.submit_devices(fcn, devices, parameter_dicts, logger)
+    for call_result in executor.as_completed():
+      if call_result.error:
+        logger_gdm.debug("{} failed on {}: {}".format(
+            action_name, call_result.device_name,
+            call_result.error.traceback or call_result.error))
+        errors.append("{}: {}".format(call_result.device_name,
+                                      call_result.error))
+      elif call_result.result is not None:
+        results.append(call_result.result)
+
   if errors:
     raise RuntimeError(", ".join(errors))
-  return get_messages_from_queue(return_queue)
+  return results
 
 
 def issue_devices_parallel(method_name,
@@ -195,18 +468,36 @@ def get_messages_from_queue(mp_queue, timeout=0.01):
   return msgs
 
 
-def _sub_process(fcn, return_queue, error_queue, **kwargs):
-  """Helper function for calling methods in parallel.
+def _execute_call(device_name, fcn, kwargs, result_queue, serialize):
+  """Executes a parallel call and puts its result on the result queue.
 
   Args:
-      fcn (function): function to execute
-      return_queue (queue): a multiprocess Queue instance for results
-      error_queue (queue): a multiprocess Queue instance for exceptions
-      **kwargs (dict): other keyworded arguments to pass to the function
+      device_name (str): name of the device the call is for.
+      fcn (function): function to execute.
+      kwargs (dict): keyword arguments to pass to the function.
+      result_queue (queue): queue to put the (device_name, result, error)
+        message on.
+      serialize (bool): whether to pickle the message before putting it on the
+        queue (required for multiprocessing queues to report pickling errors).
   """
   try:
-    result = fcn(**kwargs)
-    if result is not None:
-      return_queue.put_nowait(result)
-  except Exception as err:
-    error_queue.put_nowait(repr(err))
+    message = (device_name, fcn(**kwargs), None)
+  except Exception as err:  # pylint: disable=broad-except
+    message = (device_name, None, CallError.from_exception(err))
+  if not serialize:
+    result_queue.put(message)
+    return
+  try:
+    serialized_message = pickle.dumps(message)
+    pickle.loads(serialized_message)  # Some exceptions can't be unpickled.
+  except Exception as err:  # pylint: disable=broad-except
+    _, result, error = message
+    if error is not None:
+      error = dataclasses.replace(error, exception=None)
+    else:
+      error = CallError.from_exception(err)
+      error = dataclasses.replace(
+          error, message=f"Unable to return result {result!r}: {error.message}",
+          exception=None)
+    serialized_message = pickle.dumps((device_name, None, error))
+  result_queue.put(serialized_message)
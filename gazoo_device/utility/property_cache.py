@@ -0,0 +1,163 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache of dynamic property values and batched property evaluation.
+
+Dynamic properties declared with a TTL (see DynamicProperty.cached()) keep
+their value in the device (or capability) instance for TTL seconds. All cached
+values of a device are invalidated when any of INVALIDATING_METHODS is called
+on the device or on one of its capabilities, as the device state may have
+changed. The log decorators take care of this.
+
+Dynamic properties which declare a shell query can be evaluated together in a
+single shell_batch() call by evaluate_shell_properties().
+"""
+import re
+import threading
+import time
+from typing import Any, Collection, Dict, Optional, Tuple
+
+from gazoo_device import gdm_logger
+
+logger = gdm_logger.get_logger()
+
+# Methods (of devices and capabilities) after which cached values are stale.
+INVALIDATING_METHODS = frozenset({
+    "factory_reset",
+    "flash_device",
+    "reboot",
+    "recover",
+    "upgrade",
+    "upgrade_over_the_wire",
+})
+
+_CACHE_ATTRIBUTE = "_dynamic_property_cache"
+
+_generations = {}
+_lock = threading.Lock()
+
+
+def get_device_name(instance: Any) -> Optional[str]:
+  """Returns the name of the device the device or capability instance is for."""
+  device_name = getattr(instance, "_device_name", None)
+  if device_name is None:
+    device_name = getattr(instance, "name", None)
+  return device_name if isinstance(device_name, str) else None
+
+
+def get_value(instance: Any, property_name: str) -> Tuple[bool, Any]:
+  """Returns (True, value) if the property value is cached, else (False, None).
+
+  Args:
+    instance: device or capability instance the property belongs to.
+    property_name: name of the property.
+  """
+  entry = getattr(instance, _CACHE_ATTRIBUTE, {}).get(property_name)
+  if entry is None:
+    return False, None
+  value, expiration_time, generation = entry
+  if (time.monotonic() >= expiration_time or
+      generation != _get_generation(get_device_name(instance))):
+    return False, None
+  return True, value
+
+
+def set_value(instance: Any, property_name: str, value: Any,
+              ttl: float) -> None:
+  """Caches the property value for ttl seconds.
+
+  Args:
+    instance: device or capability instance the property belongs to.
+    property_name: name of the property.
+    value: property value.
+    ttl: time to keep the value for, in seconds.
+  """
+  cache = instance.__dict__.setdefault(_CACHE_ATTRIBUTE, {})
+  cache[property_name] = (value, time.monotonic() + ttl,
+                          _get_generation(get_device_name(instance)))
+
+
+def discard_value(instance: Any, property_name: str) -> None:
+  """Removes the cached property value (if any)."""
+  getattr(instance, _CACHE_ATTRIBUTE, {}).pop(property_name, None)
+
+
+def discard_values(instance: Any, prefix: str) -> None:
+  """Removes the cached values of properties whose names start with prefix."""
+  cache = getattr(instance, _CACHE_ATTRIBUTE, {})
+  for property_name in [name for name in cache if name.startswith(prefix)]:
+    del cache[property_name]
+
+
+def invalidate(device_name: Optional[str]) -> None:
+  """Invalidates all cached property values of the device and its capabilities.
+
+  Args:
+    device_name: name of the device. No-op if None.
+  """
+  if device_name is None:
+    return
+  with _lock:
+    _generations[device_name] = _generations.get(device_name, 0) + 1
+  logger.debug("{} cached property values invalidated", device_name)
+
+
+def evaluate_shell_properties(
+    device: Any, property_names: Collection[str]) -> Dict[str, Any]:
+  """Evaluates properties which declare a shell query in a single shell batch.
+
+  Properties which are cached, don't declare a shell query, or whose value
+  can't be found in the response are skipped. The caller is expected to
+  evaluate skipped properties individually.
+
+  Args:
+    device: device instance. Must have a shell_capability if any of the
+      properties declare a shell query.
+    property_names: names of the properties to evaluate.
+
+  Returns:
+    Values of the evaluated properties by property name.
+  """
+  queries = []
+  for name in property_names:
+    device_property = getattr(type(device), name, None)
+    shell_query = getattr(device_property, "shell_query", None)
+    if shell_query and not get_value(device, name)[0]:
+      command_key, regex_key = shell_query
+      queries.append((device_property, device.commands[command_key],
+                      device.regexes[regex_key]))
+  if len(queries) < 2:  # Nothing to gain from batching.
+    return {}
+
+  try:
+    results = device.shell_capability.shell_batch(
+        [command for _, command, _ in queries], command_name="get_properties")
+  except Exception as err:  # pylint: disable=broad-except
+    logger.debug(f"{device.name} batched property query failed: {err!r}")
+    return {}
+
+  values = {}
+  for (device_property, _, regex), (output, _) in zip(queries, results):
+    match = re.search(regex, output, re.MULTILINE | re.DOTALL)
+    if match:
+      value = match.group(1)
+      if device_property.ttl is not None:
+        set_value(device, device_property.name, value, device_property.ttl)
+      values[device_property.name] = value
+  return values
+
+
+def _get_generation(device_name: Optional[str]) -> int:
+  """Returns the number of times the device cache was invalidated."""
+  return _generations.get(device_name, 0)